@@ -18,46 +18,76 @@ pub fn is_tenpai(hand: &mut Hand) -> bool {
     for i in 0..crate::types::TILE_MAX {
         if hand.counts[i] < 4 {
             hand.add(i as u8);
-
-            // Fast checks first
-            if is_kokushi(hand) {
-                hand.remove(i as u8);
-                return true;
-            }
-            if is_chiitoitsu(hand) {
-                hand.remove(i as u8);
+            let done = completes_with(hand, i);
+            hand.remove(i as u8); // backtrack
+            if done {
                 return true;
             }
+        }
+    }
+    false
+}
 
-            // Pruning for standard agari:
-            // Only relevant if the added tile 'i' forms a pair or mentsu.
-            // This usually requires neighbors or existing count >= 2.
-            let c = hand.counts[i];
-            let check_standard = if i >= 27 {
-                c >= 2
-            } else {
-                let has_p = if i % 9 > 0 {
-                    hand.counts[i - 1] > 0
-                } else {
-                    false
-                };
-                let has_n = if i % 9 < 8 {
-                    hand.counts[i + 1] > 0
-                } else {
-                    false
-                };
-                c >= 2 || has_p || has_n
-            };
-
-            if check_standard && is_standard_agari(hand) {
-                hand.remove(i as u8);
-                return true;
-            }
+/// `is_agari` for a hand that was just completed by tile `i`, skipping the
+/// standard decomposition when `i` cannot be part of a pair or mentsu.
+fn completes_with(hand: &mut Hand, i: usize) -> bool {
+    // Fast checks first
+    if is_kokushi(hand) || is_chiitoitsu(hand) {
+        return true;
+    }
 
-            hand.remove(i as u8); // backtrack
+    // Pruning for standard agari:
+    // Only relevant if the added tile 'i' forms a pair or mentsu.
+    // This usually requires neighbors or existing count >= 2.
+    let c = hand.counts[i];
+    let check_standard = if i >= 27 {
+        c >= 2
+    } else {
+        let has_p = if i % 9 > 0 {
+            hand.counts[i - 1] > 0
+        } else {
+            false
+        };
+        let has_n = if i % 9 < 8 {
+            hand.counts[i + 1] > 0
+        } else {
+            false
+        };
+        c >= 2 || has_p || has_n
+    };
+
+    check_standard && is_standard_agari(hand)
+}
+
+/// Wait sets of every discard from a hand one tile over tenpai size.
+///
+/// Entry `d` is a bitmask of the tile types that complete the hand after one
+/// tile of type `d` is discarded; it is zero when that discard is not tenpai
+/// or no tile of type `d` is held. All discards share one traversal: the
+/// discard-and-wait-on-the-same-tile case is the hand itself, checked once.
+pub fn discard_waits(hand: &mut Hand) -> [u64; TILE_MAX] {
+    let mut out = [0u64; TILE_MAX];
+    let complete = is_agari(hand);
+    for d in 0..TILE_MAX {
+        if hand.counts[d] == 0 {
+            continue;
         }
+        hand.counts[d] -= 1;
+        let mut waits = if complete { 1u64 << d } else { 0 };
+        for w in 0..TILE_MAX {
+            if w == d || hand.counts[w] >= 4 {
+                continue;
+            }
+            hand.counts[w] += 1;
+            if completes_with(hand, w) {
+                waits |= 1 << w;
+            }
+            hand.counts[w] -= 1;
+        }
+        hand.counts[d] += 1;
+        out[d] = waits;
     }
-    false
+    out
 }
 
 pub fn is_agari(hand: &mut Hand) -> bool {
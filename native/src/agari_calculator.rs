@@ -1,6 +1,7 @@
 #![allow(clippy::useless_conversion)]
 use crate::agari;
 use crate::score;
+use crate::tile_hist::TileHist;
 use crate::types::{Agari, Conditions, Hand, Meld, MeldType, Wind};
 use crate::yaku;
 use pyo3::prelude::*;
@@ -33,13 +34,101 @@ impl AgariCalculator {
             tiles_34.push(t / 4);
         }
 
-        let mut full_hand = Hand::new(Some(tiles_34));
+        Self::from_counts(Hand::new(Some(tiles_34)), aka_dora_count, &melds)
+    }
+
+    #[pyo3(signature = (win_tile, dora_indicators=vec![], ura_indicators=vec![], conditions=None))]
+    pub fn calc(
+        &self,
+        win_tile: u8, // Renamed from win_tile_136
+        dora_indicators: Vec<u8>,
+        ura_indicators: Vec<u8>,
+        conditions: Option<Conditions>,
+    ) -> Agari {
+        let conditions = conditions.unwrap_or_default();
+        let debug = std::env::var_os("DEBUG").is_some();
+        self.evaluate(
+            win_tile,
+            &dora_indicators,
+            &ura_indicators,
+            &conditions,
+            debug,
+        )
+    }
+
+    /// `calc` for each of `win_tiles`, sharing the indicators and conditions.
+    #[pyo3(signature = (win_tiles, dora_indicators=vec![], ura_indicators=vec![], conditions=None))]
+    pub fn calc_many(
+        &self,
+        win_tiles: Vec<u8>,
+        dora_indicators: Vec<u8>,
+        ura_indicators: Vec<u8>,
+        conditions: Option<Conditions>,
+    ) -> Vec<Agari> {
+        let conditions = conditions.unwrap_or_default();
+        let debug = std::env::var_os("DEBUG").is_some();
+        win_tiles
+            .iter()
+            .map(|&t| self.evaluate(t, &dora_indicators, &ura_indicators, &conditions, debug))
+            .collect()
+    }
+
+    pub fn is_tenpai(&self) -> bool {
+        let current_total: u8 = self.hand.counts.iter().sum::<u8>() + (self.melds.len() as u8 * 3);
+        if current_total != 13 {
+            return false;
+        }
+        let mut hand_14 = self.hand.clone();
+        for i in 0..crate::types::TILE_MAX {
+            if hand_14.counts[i] < 4 {
+                hand_14.add(i as u8);
+                if agari::is_agari(&mut hand_14) {
+                    return true;
+                }
+                hand_14.remove(i as u8);
+            }
+        }
+        false
+    }
+
+    pub fn get_waits_u8(&self) -> Vec<u8> {
+        let mut waits = Vec::new();
+        let current_total: u8 = self.hand.counts.iter().sum::<u8>() + (self.melds.len() as u8 * 3);
+        if current_total != 13 {
+            return waits;
+        }
+        let mut hand_14 = self.hand.clone();
+        for i in 0..crate::types::TILE_MAX {
+            if hand_14.counts[i] < 4 {
+                hand_14.add(i as u8);
+                if crate::agari::is_agari(&mut hand_14) {
+                    waits.push(i as u8);
+                }
+                hand_14.remove(i as u8);
+            }
+        }
+        waits
+    }
+
+    pub fn get_waits(&self) -> Vec<u32> {
+        self.get_waits_u8().iter().map(|&x| x as u32).collect()
+    }
+}
+
+impl AgariCalculator {
+    /// Builds a calculator straight from a maintained hand histogram, without
+    /// materialising the tile list.
+    pub(crate) fn from_hist(hist: &TileHist, melds: &[Meld]) -> Self {
+        Self::from_counts(hist.to_hand(), hist.red_count(), melds)
+    }
+
+    fn from_counts(mut full_hand: Hand, mut aka_dora_count: u8, melds: &[Meld]) -> Self {
         let mut hand = full_hand.clone();
 
         // Clone melds to avoid mutating the Python objects passed in
         let mut internal_melds = Vec::with_capacity(melds.len());
 
-        for meld in &melds {
+        for meld in melds {
             let mut new_meld = meld.clone();
 
             // Reduce Kongs to triplets for agari detection
@@ -78,16 +167,16 @@ impl AgariCalculator {
         }
     }
 
-    #[pyo3(signature = (win_tile, dora_indicators=vec![], ura_indicators=vec![], conditions=None))]
-    pub fn calc(
+    /// `debug` (the `DEBUG` environment variable, read once by the caller)
+    /// traces each call on stderr.
+    fn evaluate(
         &self,
-        win_tile: u8, // Renamed from win_tile_136
-        dora_indicators: Vec<u8>,
-        ura_indicators: Vec<u8>,
-        conditions: Option<Conditions>,
+        win_tile_136: u8,
+        dora_indicators: &[u8],
+        ura_indicators: &[u8],
+        conditions: &Conditions,
+        debug: bool,
     ) -> Agari {
-        let win_tile_136 = win_tile;
-        let conditions = conditions.unwrap_or_default();
         let win_tile_34 = win_tile_136 / 4;
 
         // Clone and add win tile to create 14-tile hands for check
@@ -106,7 +195,7 @@ impl AgariCalculator {
             // But let's assume it should be 14 for calc.
         }
 
-        if std::env::var("DEBUG").is_ok() {
+        if debug {
             eprintln!(
                 "DEBUG RUST: AgariCalculator::calc win_tile_136={} houtei={} haitei={} tsumo={}",
                 win_tile_136, conditions.houtei, conditions.haitei, conditions.tsumo
@@ -120,14 +209,14 @@ impl AgariCalculator {
 
         // Count normal doras in 14-tile hand
         let mut dora_count = 0;
-        for &indicator_136 in &dora_indicators {
+        for &indicator_136 in dora_indicators {
             let next_tile_34 = get_next_tile(indicator_136 / 4);
             dora_count += full_hand_14.counts[next_tile_34 as usize];
         }
 
         // Count ura doras in 14-tile hand
         let mut ura_dora_count = 0;
-        for &indicator_136 in &ura_indicators {
+        for &indicator_136 in ura_indicators {
             let next_tile_34 = get_next_tile(indicator_136 / 4);
             ura_dora_count += full_hand_14.counts[next_tile_34 as usize];
         }
@@ -178,47 +267,6 @@ impl AgariCalculator {
             fu: yaku_res.fu as u32,
         }
     }
-
-    pub fn is_tenpai(&self) -> bool {
-        let current_total: u8 = self.hand.counts.iter().sum::<u8>() + (self.melds.len() as u8 * 3);
-        if current_total != 13 {
-            return false;
-        }
-        let mut hand_14 = self.hand.clone();
-        for i in 0..crate::types::TILE_MAX {
-            if hand_14.counts[i] < 4 {
-                hand_14.add(i as u8);
-                if agari::is_agari(&mut hand_14) {
-                    return true;
-                }
-                hand_14.remove(i as u8);
-            }
-        }
-        false
-    }
-
-    pub fn get_waits_u8(&self) -> Vec<u8> {
-        let mut waits = Vec::new();
-        let current_total: u8 = self.hand.counts.iter().sum::<u8>() + (self.melds.len() as u8 * 3);
-        if current_total != 13 {
-            return waits;
-        }
-        let mut hand_14 = self.hand.clone();
-        for i in 0..crate::types::TILE_MAX {
-            if hand_14.counts[i] < 4 {
-                hand_14.add(i as u8);
-                if crate::agari::is_agari(&mut hand_14) {
-                    waits.push(i as u8);
-                }
-                hand_14.remove(i as u8);
-            }
-        }
-        waits
-    }
-
-    pub fn get_waits(&self) -> Vec<u32> {
-        self.get_waits_u8().iter().map(|&x| x as u32).collect()
-    }
 }
 
 fn get_next_tile(tile: u8) -> u8 {
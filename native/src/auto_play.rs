@@ -0,0 +1,99 @@
+//! Decisions `RiichiEnv` can take on a seat's behalf inside `step`.
+//!
+//! `RiichiEnv(auto_play=...)` takes a collection of policy names. After every
+//! step the env asks `choose` for each seat that has to act; when every such
+//! seat is covered the chosen actions are applied right away, and when only
+//! some are, their actions are held back and merged into the next `step` call
+//! so that only the remaining seats are returned to the caller.
+
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+
+use crate::env::{ActionType, RiichiEnv};
+use crate::legal::RawAction;
+
+/// The only legal action is `Pass`.
+pub(crate) const PASS_ONLY: u8 = 1 << 0;
+/// A riichi seat whose only legal action is discarding the drawn tile.
+pub(crate) const RIICHI_TSUMOGIRI: u8 = 1 << 1;
+/// Ron whenever it is legal.
+pub(crate) const ALWAYS_RON: u8 = 1 << 2;
+/// Tsumo whenever it is legal.
+pub(crate) const ALWAYS_TSUMO: u8 = 1 << 3;
+/// Any seat with exactly one legal action.
+pub(crate) const FORCED: u8 = 1 << 4;
+
+const POLICIES: [(&str, u8); 5] = [
+    ("pass_only", PASS_ONLY),
+    ("riichi_tsumogiri", RIICHI_TSUMOGIRI),
+    ("always_ron", ALWAYS_RON),
+    ("always_tsumo", ALWAYS_TSUMO),
+    ("forced", FORCED),
+];
+
+/// Parses an iterable of policy names into a bit mask.
+pub(crate) fn parse(policies: &Bound<'_, PyAny>) -> PyResult<u8> {
+    if let Ok(name) = policies.extract::<String>() {
+        return flag(&name);
+    }
+    let mut mask = 0;
+    for item in policies.try_iter()? {
+        mask |= flag(&item?.extract::<String>()?)?;
+    }
+    Ok(mask)
+}
+
+fn flag(name: &str) -> PyResult<u8> {
+    POLICIES
+        .iter()
+        .find(|(n, _)| *n == name)
+        .map(|&(_, f)| f)
+        .ok_or_else(|| {
+            let known: Vec<&str> = POLICIES.iter().map(|(n, _)| *n).collect();
+            PyValueError::new_err(format!(
+                "Unknown auto_play policy: {} (expected one of {})",
+                name,
+                known.join(", ")
+            ))
+        })
+}
+
+/// Policy names set in `mask`, in a fixed order.
+pub(crate) fn names(mask: u8) -> Vec<&'static str> {
+    POLICIES
+        .iter()
+        .filter(|&&(_, f)| mask & f != 0)
+        .map(|&(n, _)| n)
+        .collect()
+}
+
+/// The action `mask` takes for `pid`, if any. `buf` is scratch space for the
+/// legal action list.
+pub(crate) fn choose(
+    env: &RiichiEnv,
+    mask: u8,
+    pid: u8,
+    buf: &mut Vec<RawAction>,
+) -> Option<RawAction> {
+    env._legal_actions_into(pid, buf);
+    let find = |t: ActionType| buf.iter().copied().find(|a| a.action_type == t);
+    if mask & ALWAYS_RON != 0 {
+        if let Some(a) = find(ActionType::Ron) {
+            return Some(a);
+        }
+    }
+    if mask & ALWAYS_TSUMO != 0 {
+        if let Some(a) = find(ActionType::Tsumo) {
+            return Some(a);
+        }
+    }
+    let [only] = buf.as_slice() else {
+        return None;
+    };
+    let take = mask & FORCED != 0
+        || (mask & PASS_ONLY != 0 && only.action_type == ActionType::Pass)
+        || (mask & RIICHI_TSUMOGIRI != 0
+            && env.riichi_declared[pid as usize]
+            && only.action_type == ActionType::Discard);
+    take.then_some(*only)
+}
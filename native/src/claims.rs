@@ -0,0 +1,153 @@
+//! Fixed-capacity storage and priority resolution for claims on a discard.
+//!
+//! After every discard `_update_claims` records what each seat may call in a
+//! `ClaimTable`: one inline array per seat, so filling and clearing it never
+//! hashes or allocates. The Python-visible `current_claims` dict is built from
+//! the table only when it is read.
+
+use std::collections::HashMap;
+
+use crate::env::{Action, ActionType};
+use crate::legal::RawAction;
+
+/// Options one seat can have on a single discard: ron, two pon and two
+/// daiminkan variants (red or not) and at most five chi shapes and variants.
+pub(crate) const MAX_CLAIMS_PER_SEAT: usize = 12;
+
+#[derive(Debug, Clone, Copy)]
+pub(crate) struct ClaimTable {
+    claims: [[RawAction; MAX_CLAIMS_PER_SEAT]; 4],
+    lens: [u8; 4],
+}
+
+impl Default for ClaimTable {
+    fn default() -> Self {
+        Self {
+            claims: [[RawAction::simple(ActionType::Pass, None); MAX_CLAIMS_PER_SEAT]; 4],
+            lens: [0; 4],
+        }
+    }
+}
+
+impl ClaimTable {
+    #[inline]
+    pub(crate) fn clear(&mut self) {
+        self.lens = [0; 4];
+    }
+
+    #[inline]
+    pub(crate) fn push(&mut self, pid: u8, claim: RawAction) {
+        let len = &mut self.lens[pid as usize];
+        if (*len as usize) < MAX_CLAIMS_PER_SEAT {
+            self.claims[pid as usize][*len as usize] = claim;
+            *len += 1;
+        }
+    }
+
+    /// Claims available to `pid`, in the order they were found.
+    #[inline]
+    pub(crate) fn get(&self, pid: u8) -> &[RawAction] {
+        &self.claims[pid as usize][..self.lens[pid as usize] as usize]
+    }
+
+    #[inline]
+    pub(crate) fn is_empty(&self) -> bool {
+        self.lens == [0; 4]
+    }
+
+    /// Seats with at least one claim, in seat order.
+    pub(crate) fn seats(&self) -> Vec<u8> {
+        (0..4u8).filter(|&p| self.lens[p as usize] > 0).collect()
+    }
+
+    #[inline]
+    pub(crate) fn can(&self, pid: u8, action_type: ActionType) -> bool {
+        self.get(pid).iter().any(|c| c.action_type == action_type)
+    }
+
+    pub(crate) fn to_map(&self) -> HashMap<u8, Vec<Action>> {
+        (0..4u8)
+            .filter(|&p| self.lens[p as usize] > 0)
+            .map(|p| (p, self.get(p).iter().map(|c| c.to_action()).collect()))
+            .collect()
+    }
+
+    pub(crate) fn from_map(map: &HashMap<u8, Vec<Action>>) -> Result<Self, String> {
+        let mut table = Self::default();
+        for (&pid, claims) in map {
+            if pid >= 4 {
+                return Err(format!("invalid seat in claims: {}", pid));
+            }
+            if claims.len() > MAX_CLAIMS_PER_SEAT {
+                return Err(format!(
+                    "too many claims for seat {}: {} (at most {})",
+                    pid,
+                    claims.len(),
+                    MAX_CLAIMS_PER_SEAT
+                ));
+            }
+            for c in claims {
+                if c.consume_tiles.len() > 4 {
+                    return Err(format!(
+                        "claim for seat {} consumes {} tiles (at most 4)",
+                        pid,
+                        c.consume_tiles.len()
+                    ));
+                }
+                table.push(pid, RawAction::from_action(c));
+            }
+        }
+        Ok(table)
+    }
+}
+
+/// Precedence of a response to a discard; higher wins.
+#[derive(Debug, Clone, Copy, PartialEq, Eq, PartialOrd, Ord)]
+pub(crate) enum ClaimPriority {
+    None,
+    Chi,
+    PonKan,
+    Ron,
+}
+
+const PRIORITY: [ClaimPriority; 11] = {
+    let mut table = [ClaimPriority::None; 11];
+    table[ActionType::Chi as usize] = ClaimPriority::Chi;
+    table[ActionType::Pon as usize] = ClaimPriority::PonKan;
+    table[ActionType::Daiminkan as usize] = ClaimPriority::PonKan;
+    table[ActionType::Ron as usize] = ClaimPriority::Ron;
+    table
+};
+
+#[inline]
+pub(crate) fn priority(action_type: ActionType) -> ClaimPriority {
+    PRIORITY
+        .get(action_type as usize)
+        .copied()
+        .unwrap_or(ClaimPriority::None)
+}
+
+/// The winning responses to a discard by `discarder`.
+///
+/// Returns the highest priority among `responses` and the seats that chose
+/// it, in turn order after the discarder (so multiple rons are in head-bump
+/// order and a single pon/chi claimer is `seats[0]`).
+pub(crate) fn resolve(responses: &HashMap<u8, Action>, discarder: u8) -> (ClaimPriority, Vec<u8>) {
+    let mut best = ClaimPriority::None;
+    let mut seats = Vec::new();
+    for offset in 1..4 {
+        let pid = (discarder + offset) % 4;
+        let Some(act) = responses.get(&pid) else {
+            continue;
+        };
+        let p = priority(act.action_type);
+        if p > best {
+            best = p;
+            seats.clear();
+        }
+        if p == best && p != ClaimPriority::None {
+            seats.push(pid);
+        }
+    }
+    (best, seats)
+}
@@ -1,6 +1,6 @@
 #![allow(clippy::useless_conversion)]
-use pyo3::types::{PyAnyMethods, PyDict, PyDictMethods, PyListMethods};
-use pyo3::{pyclass, pymethods, Bound, IntoPyObject, Py, PyAny, PyErr, PyResult, Python};
+use pyo3::types::{PyAnyMethods, PyBytes, PyDict, PyDictMethods, PyListMethods};
+use pyo3::{pyclass, pymethods, Bound, IntoPyObject, Py, PyAny, PyErr, PyRef, PyResult, Python};
 // IntoPy might be needed for .into_py() calls if I revert?
 // I used .to_object() which needs ToPyObject.
 use numpy::{ndarray::Array1, IntoPyArray, PyArray1};
@@ -10,20 +10,17 @@ use serde::{Deserialize, Serialize};
 use serde_json::Value;
 use std::collections::{HashMap, HashSet};
 
+use crate::claims::{ClaimPriority, ClaimTable};
+use crate::legal::{RawAction, TenpaiTable};
+use crate::mjai_index::{MjaiKey, MjaiQuery};
 use crate::parser::tid_to_mjai;
+use crate::tile_hist::{is_red, TileHist};
 use crate::types::{Agari, Conditions, Meld, MeldType, Wind};
+use crate::wall::{splitmix64, WallRng, WALL_SIZE};
 use crate::yaku;
 use crate::y47_encode;
 use crate::y47_schema;
 use crate::y47_turn::Y47Turn;
-use sha2::Digest;
-
-fn splitmix64(x: u64) -> u64 {
-    let mut z = x.wrapping_add(0x9E3779B97F4A7C15);
-    z = (z ^ (z >> 30)).wrapping_mul(0xBF58476D1CE4E5B9);
-    z = (z ^ (z >> 27)).wrapping_mul(0x94D049BB133111EB);
-    z ^ (z >> 31)
-}
 
 // --- Enums ---
 
@@ -166,6 +163,8 @@ pub struct Observation {
     #[pyo3(get)]
     pub prev_events_size: usize,
     pub legal_actions: Vec<Action>,
+    /// `legal_actions` reduced for `select_action_from_mjai`, built on first use.
+    pub(crate) mjai_keys: std::sync::OnceLock<Vec<MjaiKey>>,
 }
 
 #[pymethods]
@@ -184,9 +183,28 @@ impl Observation {
             events_json,
             prev_events_size,
             legal_actions,
+            mjai_keys: std::sync::OnceLock::new(),
         }
     }
 
+    /// Compact binary form of the observation; see `from_bytes`.
+    pub fn to_bytes<'py>(&self, py: Python<'py>) -> Bound<'py, PyBytes> {
+        PyBytes::new(py, &self.to_snapshot())
+    }
+
+    #[staticmethod]
+    pub fn from_bytes(data: &[u8]) -> PyResult<Self> {
+        Self::from_snapshot(data).map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)
+    }
+
+    fn __reduce__<'py>(
+        slf: &Bound<'py, Self>,
+    ) -> PyResult<(Bound<'py, PyAny>, (Bound<'py, PyBytes>,))> {
+        let from_bytes = slf.get_type().getattr("from_bytes")?;
+        let data = PyBytes::new(slf.py(), &slf.borrow().to_snapshot());
+        Ok((from_bytes, (data,)))
+    }
+
     #[getter]
     pub fn hand(&self) -> Vec<u32> {
         self.hand.iter().map(|&x| x as u32).collect()
@@ -215,67 +233,35 @@ impl Observation {
         _py: Python,
         mjai_resp: Bound<PyDict>,
     ) -> PyResult<Option<Action>> {
-        let r_type: String = mjai_resp
-            .get_item("type")?
-            .ok_or_else(|| PyErr::new::<pyo3::exceptions::PyKeyError, _>("missing type"))?
-            .extract()?;
-        let r_pai: Option<String> = mjai_resp.get_item("pai")?.and_then(|v| v.extract().ok());
-        let r_consumed: Option<Vec<String>> = mjai_resp
-            .get_item("consumed")?
-            .and_then(|v| v.extract().ok());
-
-        for act in &self.legal_actions {
-            let m_type = match act.action_type {
-                ActionType::Discard => "dahai",
-                ActionType::Chi => "chi",
-                ActionType::Pon => "pon",
-                ActionType::Daiminkan => "daiminkan",
-                ActionType::Ankan => "ankan",
-                ActionType::Kakan => "kakan",
-                ActionType::Riichi => "reach",
-                ActionType::Tsumo | ActionType::Ron => "hora",
-                ActionType::Pass => "none",
-                ActionType::KyushuKyuhai => "ryukyoku",
-            };
-
-            if m_type != r_type {
-                continue;
-            }
-
-            // Tile comparison
-            if let Some(ref rp) = r_pai {
-                if let Some(at) = act.tile {
-                    if tid_to_mjai(at) != *rp {
-                        continue;
-                    }
-                } else if act.action_type != ActionType::Riichi
-                    && act.action_type != ActionType::Tsumo
-                    && act.action_type != ActionType::Ron
-                    && act.action_type != ActionType::Ankan
-                    && act.action_type != ActionType::Kakan
-                {
-                    continue;
-                }
-            }
+        let query = MjaiQuery::from_dict(&mjai_resp)?;
+        Ok(self.select_mjai(&query))
+    }
 
-            // Consumed comparison
-            if let Some(ref rc) = r_consumed {
-                let mut ac: Vec<String> =
-                    act.consume_tiles.iter().map(|&t| tid_to_mjai(t)).collect();
-                ac.sort();
-                let mut rc_sorted = rc.clone();
-                rc_sorted.sort();
-                if ac != rc_sorted {
-                    continue;
-                }
-            } else if !act.consume_tiles.is_empty() {
-                continue;
-            }
+    /// `select_action_from_mjai` for a response still in JSON form.
+    pub fn select_action_from_mjai_str(&self, mjai_resp: &str) -> PyResult<Option<Action>> {
+        let query = MjaiQuery::from_json(mjai_resp)
+            .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)?;
+        Ok(self.select_mjai(&query))
+    }
 
-            return Ok(Some(act.clone()));
+    /// `select_action_from_mjai_str` for `observations[i]` and `mjai_resps[i]`.
+    #[staticmethod]
+    pub fn select_actions_from_mjai(
+        observations: Vec<PyRef<Observation>>,
+        mjai_resps: Vec<String>,
+    ) -> PyResult<Vec<Option<Action>>> {
+        if observations.len() != mjai_resps.len() {
+            return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
+                "got {} observations and {} responses",
+                observations.len(),
+                mjai_resps.len()
+            )));
         }
-
-        Ok(None)
+        observations
+            .iter()
+            .zip(&mjai_resps)
+            .map(|(obs, resp)| obs.select_action_from_mjai_str(resp))
+            .collect()
     }
 
     pub fn to_dict<'py>(&self, py: Python<'py>) -> PyResult<Py<PyAny>> {
@@ -300,14 +286,25 @@ impl Observation {
     }
 }
 
+impl Observation {
+    fn select_mjai(&self, query: &MjaiQuery) -> Option<Action> {
+        let keys = self
+            .mjai_keys
+            .get_or_init(|| self.legal_actions.iter().map(MjaiKey::new).collect());
+        query.select(keys).map(|i| self.legal_actions[i].clone())
+    }
+}
+
 #[pyclass(module = "riichienv._riichienv")]
 #[derive(Debug, Clone)]
 pub struct RiichiEnv {
     // Game State
     #[pyo3(get, set)]
     pub wall: Vec<u8>,
-    #[pyo3(get, set)]
+    #[pyo3(get)]
     pub hands: [Vec<u8>; 4],
+    /// Histogram view of `hands`, updated on every draw, discard and call.
+    pub(crate) hists: [TileHist; 4],
     #[pyo3(get, set)]
     pub melds: [Vec<Meld>; 4],
     #[pyo3(get, set)]
@@ -348,12 +345,12 @@ pub struct RiichiEnv {
     #[pyo3(get)]
     pub phase: Phase,
     pub active_players: Vec<u8>,
-    y47_cached_actions: [Vec<Action>; 4],
-    y47_cached_active: Vec<u8>,
-    y47_cache_valid: bool,
+    pub(crate) y47_cached_actions: [Vec<Action>; 4],
+    pub(crate) y47_cached_active: Vec<u8>,
+    pub(crate) y47_cache_valid: bool,
     pub last_discard: Option<(u8, u8)>,
-    #[pyo3(get, set)]
-    pub current_claims: HashMap<u8, Vec<Action>>,
+    /// Claims on the last discard (or kan), exposed as `current_claims`.
+    pub(crate) claims: ClaimTable,
 
     #[pyo3(get, set)]
     pub pending_kan: Option<(u8, Action)>,
@@ -390,8 +387,13 @@ pub struct RiichiEnv {
     #[pyo3(get, set)]
     pub ippatsu_cycle: [bool; 4],
 
-    #[pyo3(get)]
-    pub wall_digest: String,
+    /// Digest of `dealt_wall`, computed on first read of `wall_digest`.
+    wall_digest: std::sync::OnceLock<String>,
+    /// The hand's wall in drawing order as shuffled, before dealing.
+    pub(crate) dealt_wall: Vec<u8>,
+    /// `wall_digest` format: 0 disables it, 1 hashes the comma-joined tile ids
+    /// and 2 the raw tile bytes (see `crate::wall::wall_digest`).
+    pub(crate) digest_version: u8,
     #[pyo3(get)]
     pub salt: String,
     #[pyo3(get)]
@@ -418,7 +420,24 @@ pub struct RiichiEnv {
     pub skip_mjai_logging: bool,
     #[pyo3(get)]
     pub seed: Option<u64>,
-    hand_index: u64,
+    pub(crate) hand_index: u64,
+    /// Action-index stream for `game_record()`, when recording is enabled.
+    pub(crate) recorder: Option<crate::record::Recorder>,
+    /// Per-seat tenpai table for the hand held after the last draw.
+    pub(crate) tenpai_tables: [Option<TenpaiTable>; 4],
+    /// Scratch buffer reused by `_record_indices`.
+    legal_buf: Vec<RawAction>,
+    /// `auto_play` policies as a bit mask (see `crate::auto_play`).
+    pub(crate) auto_play: u8,
+    /// Auto-play actions held back until the remaining seats respond.
+    pub(crate) auto_pending: HashMap<u8, Action>,
+    /// Generator for seeded and entropy walls.
+    pub(crate) wall_rng: WallRng,
+    /// Walls loaded with `load_walls`, shared between clones.
+    pub(crate) wall_bank: std::sync::Arc<[[u8; WALL_SIZE]]>,
+    /// Bank row for the next hand when the episode was reset with `wall_index`,
+    /// not wrapped (the row used is `wall_cursor % wall_bank.len()`).
+    pub(crate) wall_cursor: Option<usize>,
     #[pyo3(get)]
     pub rule: crate::rule::GameRule,
 }
@@ -432,10 +451,10 @@ impl RiichiEnv {
 
         if reason == "exhaustive_draw" {
             for (i, tp) in tenpai.iter_mut().enumerate() {
-                let hand = &self.hands[i];
-                let melds = &self.melds[i];
-                let calc =
-                    crate::agari_calculator::AgariCalculator::new(hand.clone(), melds.clone());
+                let calc = crate::agari_calculator::AgariCalculator::from_hist(
+                    &self.hists[i],
+                    &self.melds[i],
+                );
                 if calc.is_tenpai() {
                     *tp = true;
                 }
@@ -729,6 +748,228 @@ fn _tid_to_mjai_hand(hand: &[u8]) -> Vec<String> {
 }
 
 impl RiichiEnv {
+    /// Builds an env with every field at its pre-deal default, without dealing a round.
+    pub(crate) fn with_config(
+        game_mode: u8,
+        skip_mjai_logging: bool,
+        seed: Option<u64>,
+        round_wind: Option<u8>,
+        rule: crate::rule::GameRule,
+    ) -> Self {
+        RiichiEnv {
+            wall: Vec::new(),
+            hands: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
+            hists: [TileHist::EMPTY; 4],
+            melds: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
+            discards: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
+            discard_flags: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
+            current_player: 0,
+            turn_count: 0,
+            is_done: false,
+            needs_tsumo: false,
+            needs_initialize_next_round: false,
+            pending_oya_won: false,
+            pending_is_draw: false,
+            scores: [25000; 4],
+            score_deltas: [0; 4],
+            riichi_sticks: 0,
+            riichi_declared: [false; 4],
+            riichi_stage: [false; 4],
+            double_riichi_declared: [false; 4],
+            phase: Phase::WaitAct,
+            active_players: vec![0],
+            y47_cached_actions: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
+            y47_cached_active: Vec::new(),
+            y47_cache_valid: false,
+            last_discard: None,
+            claims: ClaimTable::default(),
+            pending_kan: None,
+            oya: 0,
+            honba: 0,
+            kyoku_idx: 0,
+            dora_indicators: Vec::new(),
+            rinshan_draw_count: 0,
+            pending_kan_dora_count: 0,
+            is_rinshan_flag: false,
+            is_first_turn: true,
+            missed_agari_riichi: [false; 4],
+            missed_agari_doujun: [false; 4],
+            riichi_pending_acceptance: None,
+            nagashi_eligible: [true; 4],
+            drawn_tile: None,
+            wall_digest: std::sync::OnceLock::new(),
+            dealt_wall: Vec::new(),
+            digest_version: 1,
+            salt: String::new(),
+            agari_results: HashMap::new(),
+            last_agari_results: HashMap::new(),
+            round_end_scores: None,
+            mjai_log: Vec::new(),
+            mjai_log_per_player: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
+            player_event_counts: [0; 4],
+            round_wind: round_wind.unwrap_or(0),
+            ippatsu_cycle: [false; 4],
+            game_mode,
+            skip_mjai_logging,
+            seed,
+            hand_index: 0,
+            recorder: None,
+            tenpai_tables: [None; 4],
+            legal_buf: Vec::new(),
+            auto_play: 0,
+            auto_pending: HashMap::new(),
+            wall_rng: WallRng::default(),
+            wall_bank: std::sync::Arc::from(Vec::new()),
+            wall_cursor: None,
+            forbidden_discards: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
+            rule,
+        }
+    }
+
+    /// Adds a tile to `pid`'s hand, keeping `hists` in sync.
+    fn _hand_push(&mut self, pid: u8, tile: u8) {
+        self.hands[pid as usize].push(tile);
+        self.hists[pid as usize].insert(tile);
+    }
+
+    /// Removes the tile at `idx` of `pid`'s hand, keeping `hists` in sync.
+    fn _hand_remove_at(&mut self, pid: usize, idx: usize) -> u8 {
+        let tile = self.hands[pid].remove(idx);
+        self.hists[pid].sync_remove(&self.hands[pid], tile);
+        tile
+    }
+
+    /// Rebuilds `hists` after `hands` was replaced wholesale.
+    pub(crate) fn _sync_hists(&mut self) {
+        for (hist, hand) in self.hists.iter_mut().zip(&self.hands) {
+            *hist = TileHist::from_tiles(hand);
+        }
+    }
+
+    /// Legal-action indices of `actions` for the active players, in seat order.
+    fn _record_indices(&mut self, actions: &HashMap<u8, Action>) -> Result<Vec<u8>, String> {
+        let mut active = self.active_players.clone();
+        active.sort();
+        let mut buf = std::mem::take(&mut self.legal_buf);
+        let indices = active
+            .iter()
+            .map(|pid| {
+                let Some(act) = actions.get(pid) else {
+                    return Ok(crate::record::NO_ACTION);
+                };
+                self._legal_actions_into(*pid, &mut buf);
+                buf.iter()
+                    .position(|a| a.matches(act))
+                    .map(|i| i as u8)
+                    .ok_or_else(|| format!("{:?} is not a legal action for seat {}", act, pid))
+            })
+            .collect();
+        self.legal_buf = buf;
+        indices
+    }
+
+    /// `_step_core` plus episode recording.
+    fn _step_recorded(&mut self, actions: HashMap<u8, Action>) -> PyResult<Vec<u8>> {
+        let recorded = if self.recorder.is_some() {
+            Some(self._record_indices(&actions))
+        } else {
+            None
+        };
+        let players = self._step_core(actions)?;
+        if let (Some(rec), Some(indices)) = (self.recorder.as_mut(), recorded) {
+            rec.push(indices);
+        }
+        Ok(players)
+    }
+
+    /// Applies `auto_play` decisions until some seat in `players` needs the
+    /// caller; returns those seats.
+    fn _auto_advance(&mut self, mut players: Vec<u8>) -> PyResult<Vec<u8>> {
+        if self.auto_play == 0 {
+            return Ok(players);
+        }
+        let mut buf = Vec::with_capacity(32);
+        while !self.is_done && !players.is_empty() {
+            let mut auto = HashMap::new();
+            let mut manual = Vec::new();
+            for &pid in &players {
+                match crate::auto_play::choose(self, self.auto_play, pid, &mut buf) {
+                    Some(a) => {
+                        auto.insert(pid, a.to_action());
+                    }
+                    None => manual.push(pid),
+                }
+            }
+            if auto.is_empty() {
+                break;
+            }
+            if !manual.is_empty() {
+                self.auto_pending = auto;
+                return Ok(manual);
+            }
+            players = self._step_recorded(auto)?;
+        }
+        Ok(players)
+    }
+
+    /// `reset` without building observations; returns the players to act.
+    #[allow(clippy::too_many_arguments)]
+    pub(crate) fn _reset_core(
+        &mut self,
+        oya: Option<u8>,
+        wall: Option<Vec<u8>>,
+        bakaze: Option<u8>,
+        scores: Option<Vec<i32>>,
+        honba: Option<u8>,
+        kyotaku: Option<u32>,
+        seed: Option<u64>,
+    ) -> PyResult<Vec<u8>> {
+        if let Some(s) = seed {
+            self.seed = Some(s);
+        }
+        self.hand_index = 0;
+        self._y47_clear_cache();
+        self.auto_pending.clear();
+
+        // Reset MJAI log for new game/episode
+        self.mjai_log.clear();
+        for log in self.mjai_log_per_player.iter_mut() {
+            log.clear();
+        }
+        self.player_event_counts = [0; 4];
+
+        let initial_scores = if let Some(sc) = scores {
+            let mut s = [0; 4];
+            s.copy_from_slice(&sc[..4]);
+            s
+        } else {
+            [25000; 4]
+        };
+
+        if self.mjai_log.is_empty() && !self.skip_mjai_logging {
+            let mut start_game = serde_json::Map::new();
+            start_game.insert("type".to_string(), Value::String("start_game".to_string()));
+            start_game.insert("id".to_string(), Value::Number(0.into()));
+            // names skipped for brevity
+            self._push_mjai_event(Value::Object(start_game));
+        }
+
+        self.agari_results = HashMap::new();
+        self.last_agari_results = HashMap::new();
+        self.round_end_scores = None;
+
+        self._initialize_round(
+            oya.unwrap_or(self.oya),
+            bakaze.unwrap_or(self.round_wind),
+            honba.unwrap_or(self.honba),
+            kyotaku.unwrap_or(self.riichi_sticks),
+            wall,
+            Some(initial_scores),
+        );
+
+        self._step_core(HashMap::new())
+    }
+
     fn _y47_clear_cache(&mut self) {
         for table in self.y47_cached_actions.iter_mut() {
             table.clear();
@@ -757,45 +998,177 @@ impl RiichiEnv {
         ))
     }
 
-    fn _y47_encode_and_cache_turns(&mut self, py: Python<'_>) -> PyResult<HashMap<u8, Y47Turn>> {
+    /// Caches the legal action tables of the seats that have to act and
+    /// returns those seats in order.
+    fn _y47_cache_active(&mut self) -> Vec<u8> {
         self._y47_clear_cache();
 
         if self.active_players.is_empty() {
-            return Ok(HashMap::new());
+            return Vec::new();
         }
 
-        let mut active = self.active_players.clone();
+        let mut active: Vec<u8> = self
+            .active_players
+            .iter()
+            .copied()
+            .filter(|pid| !self.auto_pending.contains_key(pid))
+            .collect();
         active.sort();
 
-        let mut turns: HashMap<u8, Y47Turn> = HashMap::new();
         for pid in &active {
-            let actions = self._get_legal_actions_internal(*pid);
+            self.y47_cached_actions[*pid as usize] = self._get_legal_actions_internal(*pid);
+        }
+        self.y47_cached_active = active.clone();
+        self.y47_cache_valid = true;
+        active
+    }
+
+    fn _y47_encode_and_cache_turns(&mut self, py: Python<'_>) -> PyResult<HashMap<u8, Y47Turn>> {
+        let mut turns: HashMap<u8, Y47Turn> = HashMap::new();
+        for pid in self._y47_cache_active() {
             let turn = y47_encode::encode_turn(
                 py,
                 self,
-                *pid,
-                &self.hands[*pid as usize],
-                &actions,
+                pid,
+                &self.hands[pid as usize],
+                &self.y47_cached_actions[pid as usize],
             )?;
-            turns.insert(*pid, turn);
-            self.y47_cached_actions[*pid as usize] = actions;
+            turns.insert(pid, turn);
         }
-        self.y47_cached_active = active;
-        self.y47_cache_valid = true;
         Ok(turns)
     }
+
+    /// Like `_y47_encode_and_cache_turns`, but writes the turns into `out` and
+    /// marks the acting seats in `out["active"]`. Returns the number of turns.
+    fn _y47_write_turns(&mut self, out: &Bound<'_, PyDict>) -> PyResult<usize> {
+        let active = self._y47_cache_active();
+        let mut mask = Array1::<bool>::from_elem(y47_schema::NUM_PLAYERS, false);
+        for &pid in &active {
+            y47_encode::write_turn(
+                out,
+                self,
+                pid,
+                &self.hands[pid as usize],
+                &self.y47_cached_actions[pid as usize],
+            )?;
+            mask[pid as usize] = true;
+        }
+        let active_out = out
+            .get_item("active")?
+            .ok_or_else(|| PyErr::new::<pyo3::exceptions::PyKeyError, _>("active"))?;
+        let mut active_out = active_out.extract::<numpy::PyReadwriteArray1<'_, bool>>()?;
+        if active_out.as_array().len() != y47_schema::NUM_PLAYERS {
+            return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
+                "out[\"active\"] must have one entry per seat",
+            ));
+        }
+        active_out.as_array_mut().assign(&mask);
+        Ok(active.len())
+    }
+
+    #[allow(clippy::too_many_arguments)]
+    fn _y47_reset(
+        &mut self,
+        py: Python<'_>,
+        oya: Option<u8>,
+        wall: Option<Vec<u8>>,
+        bakaze: Option<u8>,
+        scores: Option<Vec<i32>>,
+        honba: Option<u8>,
+        kyotaku: Option<u32>,
+        seed: Option<u64>,
+    ) -> PyResult<()> {
+        self._y47_clear_cache();
+        let _ = self.reset(py, oya, wall, bakaze, scores, honba, kyotaku, seed, None)?;
+        if self.is_done {
+            return Err(PyErr::new::<pyo3::exceptions::PyRuntimeError, _>(
+                "env.done() returned True immediately after reset_y47()",
+            ));
+        }
+        self._y47_advance_after_kyoku_end(py)
+    }
+
+    /// Applies cached action indices; returns the rank rewards and the done flag.
+    fn _y47_step(
+        &mut self,
+        py: Python<'_>,
+        action_index: HashMap<u8, i64>,
+    ) -> PyResult<(Array1<f32>, bool)> {
+        if !self.y47_cache_valid {
+            return Err(PyErr::new::<pyo3::exceptions::PyRuntimeError, _>(
+                "step_y47 called without a valid cached turns",
+            ));
+        }
+
+        let mut expected = self.y47_cached_active.clone();
+        expected.sort();
+        let mut got: Vec<u8> = action_index.keys().copied().collect();
+        got.sort();
+        if got != expected {
+            return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
+                "action_index keys mismatch: expected={:?}, got={:?}",
+                expected, got
+            )));
+        }
+
+        let mut pending_actions: HashMap<u8, Action> = HashMap::new();
+        for pid in &expected {
+            let idx = action_index
+                .get(pid)
+                .ok_or_else(|| PyErr::new::<pyo3::exceptions::PyValueError, _>("missing pid"))?;
+            if *idx < 0 || *idx >= (y47_schema::MAX_ACTIONS as i64) {
+                return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
+                    "action index out of range: {idx}"
+                )));
+            }
+            let idx_u = *idx as usize;
+            let table = &self.y47_cached_actions[*pid as usize];
+            if idx_u >= table.len() {
+                return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
+                    "action is illegal according to legal_action_mask",
+                ));
+            }
+            pending_actions.insert(*pid, table[idx_u].clone());
+        }
+
+        let _ = self.step(py, pending_actions)?;
+
+        self._y47_advance_after_kyoku_end(py)?;
+
+        let done = self.is_done;
+        let mut rewards = Array1::<f32>::zeros(y47_schema::NUM_PLAYERS);
+        if done {
+            let ranks = self.ranks();
+            for p in 0..y47_schema::NUM_PLAYERS {
+                let r = ranks[p] as usize;
+                if r < 1 || r > y47_schema::NUM_PLAYERS {
+                    return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
+                        "invalid rank {r} for player {p}"
+                    )));
+                }
+                rewards[p] = y47_schema::RANK_REWARDS[r - 1];
+            }
+        }
+
+        self._y47_clear_cache();
+        Ok((rewards, done))
+    }
 }
 
 #[pymethods]
 impl RiichiEnv {
     #[new]
-    #[pyo3(signature = (game_mode=None, skip_mjai_logging=false, seed=None, round_wind=None, rule=None))]
+    #[pyo3(signature = (game_mode=None, skip_mjai_logging=false, seed=None, round_wind=None, rule=None, record=false, auto_play=None, rng=None, digest_version=1))]
     pub fn new(
         game_mode: Option<Bound<'_, PyAny>>,
         skip_mjai_logging: bool,
         seed: Option<u64>,
         round_wind: Option<u8>,
         rule: Option<crate::rule::GameRule>,
+        record: bool,
+        auto_play: Option<Bound<'_, PyAny>>,
+        rng: Option<&str>,
+        digest_version: u8,
     ) -> PyResult<Self> {
         let gt = if let Some(val) = game_mode {
             if let Ok(s) = val.extract::<String>() {
@@ -824,64 +1197,83 @@ impl RiichiEnv {
             0 // Default to 4p-red-single
         };
 
-        let mut env = RiichiEnv {
-            wall: Vec::new(),
-            hands: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
-            melds: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
-            discards: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
-            discard_flags: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
-            current_player: 0,
-            turn_count: 0,
-            is_done: false,
-            needs_tsumo: false,
-            needs_initialize_next_round: false,
-            pending_oya_won: false,
-            pending_is_draw: false,
-            scores: [25000; 4],
-            score_deltas: [0; 4],
-            riichi_sticks: 0,
-            riichi_declared: [false; 4],
-            riichi_stage: [false; 4],
-            double_riichi_declared: [false; 4],
-            phase: Phase::WaitAct,
-            active_players: vec![0],
-            y47_cached_actions: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
-            y47_cached_active: Vec::new(),
-            y47_cache_valid: false,
-            last_discard: None,
-            current_claims: HashMap::new(),
-            pending_kan: None,
-            oya: 0,
-            honba: 0,
-            kyoku_idx: 0,
-            dora_indicators: Vec::new(),
-            rinshan_draw_count: 0,
-            pending_kan_dora_count: 0,
-            is_rinshan_flag: false,
-            is_first_turn: true,
-            missed_agari_riichi: [false; 4],
-            missed_agari_doujun: [false; 4],
-            riichi_pending_acceptance: None,
-            nagashi_eligible: [true; 4],
-            drawn_tile: None,
-            wall_digest: String::new(),
-            salt: String::new(),
-            agari_results: HashMap::new(),
-            last_agari_results: HashMap::new(),
-            round_end_scores: None,
-            mjai_log: Vec::new(),
-            mjai_log_per_player: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
-            player_event_counts: [0; 4],
-            round_wind: round_wind.unwrap_or(0),
-            ippatsu_cycle: [false; 4],
-            game_mode: gt,
+        let mut env = Self::with_config(
+            gt,
             skip_mjai_logging,
             seed,
-            hand_index: 0,
-            forbidden_discards: [Vec::new(), Vec::new(), Vec::new(), Vec::new()],
-            rule: rule.unwrap_or_default(),
-        };
-        Python::attach(|py| env.reset(py, None, None, round_wind, None, None, None, seed))?;
+            round_wind,
+            rule.unwrap_or_default(),
+        );
+        if record {
+            env.recorder = Some(crate::record::Recorder::default());
+        }
+        if let Some(policies) = auto_play {
+            env.auto_play = crate::auto_play::parse(&policies)?;
+        }
+        if let Some(name) = rng {
+            env.wall_rng = WallRng::parse(name)?;
+        }
+        if digest_version > 2 {
+            return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
+                "Unsupported digest_version: {} (expected 0, 1 or 2)",
+                digest_version
+            )));
+        }
+        env.digest_version = digest_version;
+        Python::attach(|py| env.reset(py, None, None, round_wind, None, None, None, seed, None))?;
+        Ok(env)
+    }
+
+    /// Builds an env positioned after the first `step` logged decisions of `kyoku`.
+    ///
+    /// The wall is rebuilt from the log and the prefix is replayed natively with
+    /// MJAI logging disabled, so the returned env starts with an empty `mjai_log`.
+    /// Logging is switched back on for the steps after the seek point, and
+    /// `mjai_log` then holds the events from there on. `mjai_logging=False` keeps
+    /// the env quiet, which is faster for rollouts: it logs nothing, draws for
+    /// riichi players automatically instead of asking for their tsumogiri, and
+    /// its observations have no `new_events()`.
+    /// For repeated seeks into the same kyoku use `KyokuSeeker`.
+    #[staticmethod]
+    #[pyo3(signature = (kyoku, step=0, rule=None, *, mjai_logging=true))]
+    pub fn from_kyoku(
+        py: Python<'_>,
+        kyoku: PyRef<'_, crate::replay::Kyoku>,
+        step: usize,
+        rule: Option<crate::rule::GameRule>,
+        mjai_logging: bool,
+    ) -> PyResult<Self> {
+        let kyoku: crate::replay::Kyoku = (*kyoku).clone();
+        let rule = rule.unwrap_or_default();
+        let mut env = py
+            .detach(|| crate::replay_driver::seek_kyoku(&kyoku, step, rule))
+            .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)?;
+        env.skip_mjai_logging = !mjai_logging;
+        Ok(env)
+    }
+
+    /// Builds an env positioned after `events[:upto]` of an MJAI event stream.
+    ///
+    /// `events` are MJAI events as dicts or JSON strings and must not hide other
+    /// players' tiles. The round containing event `upto - 1` is replayed; its
+    /// later events are only used to rebuild the wall. `upto=None` seeks to the
+    /// end of the stream. `mjai_logging` works as in `from_kyoku`.
+    #[staticmethod]
+    #[pyo3(signature = (events, upto=None, rule=None, *, mjai_logging=true))]
+    pub fn from_mjai(
+        py: Python<'_>,
+        events: Vec<Bound<'_, PyAny>>,
+        upto: Option<usize>,
+        rule: Option<crate::rule::GameRule>,
+        mjai_logging: bool,
+    ) -> PyResult<Self> {
+        let parsed = crate::mjai_events::parse_events(py, events)?;
+        let upto = upto.unwrap_or(parsed.len());
+        let rule = rule.unwrap_or_default();
+        let mut env = py
+            .detach(|| crate::replay_driver::seek_mjai(&parsed, upto, rule))
+            .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)?;
+        env.skip_mjai_logging = !mjai_logging;
         Ok(env)
     }
 
@@ -905,6 +1297,14 @@ impl RiichiEnv {
         ]
     }
 
+    #[setter]
+    fn set_hands(&mut self, hands: [Vec<u32>; 4]) {
+        for (pid, hand) in hands.iter().enumerate() {
+            self.hands[pid] = hand.iter().map(|&x| x as u8).collect();
+        }
+        self._sync_hists();
+    }
+
     #[getter]
     fn get_discards(&self) -> [Vec<u32>; 4] {
         [
@@ -933,6 +1333,19 @@ impl RiichiEnv {
         self.active_players = active_players.iter().map(|&x| x as u8).collect();
     }
 
+    /// Built from the claim table on every read.
+    #[getter]
+    fn get_current_claims(&self) -> HashMap<u8, Vec<Action>> {
+        self.claims.to_map()
+    }
+
+    #[setter]
+    fn set_current_claims(&mut self, claims: HashMap<u8, Vec<Action>>) -> PyResult<()> {
+        self.claims = ClaimTable::from_map(&claims)
+            .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)?;
+        Ok(())
+    }
+
     #[getter]
     fn get_dora_indicators(&self) -> Vec<u32> {
         self.dora_indicators.iter().map(|&x| x as u32).collect()
@@ -965,7 +1378,10 @@ impl RiichiEnv {
         ]
     }
 
-    #[pyo3(signature = (oya=None, wall=None, bakaze=None, scores=None, honba=None, kyotaku=None, seed=None))]
+    /// `wall_index` deals the episode's hands from consecutive rows of the wall
+    /// bank (see `load_walls`), starting at that row. Past the last row the bank
+    /// wraps around to row 0; `wall_cursor` shows how far the episode has got.
+    #[pyo3(signature = (oya=None, wall=None, bakaze=None, scores=None, honba=None, kyotaku=None, seed=None, wall_index=None))]
     #[allow(clippy::too_many_arguments)]
     pub fn reset<'py>(
         &mut self,
@@ -977,51 +1393,118 @@ impl RiichiEnv {
         honba: Option<u8>,
         kyotaku: Option<u32>,
         seed: Option<u64>,
+        wall_index: Option<usize>,
     ) -> PyResult<Py<PyAny>> {
-        // ... existing reset impl ...
-        if let Some(s) = seed {
-            self.seed = Some(s);
+        if let Some(i) = wall_index {
+            if wall.is_some() {
+                return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
+                    "wall and wall_index are mutually exclusive",
+                ));
+            }
+            if i >= self.wall_bank.len() {
+                return Err(PyErr::new::<pyo3::exceptions::PyIndexError, _>(format!(
+                    "wall_index {} is out of range for a bank of {} walls",
+                    i,
+                    self.wall_bank.len()
+                )));
+            }
         }
-        self.hand_index = 0;
-        self._y47_clear_cache();
-
-        // Reset MJAI log for new game/episode
-        self.mjai_log.clear();
-        for log in self.mjai_log_per_player.iter_mut() {
-            log.clear();
+        self.wall_cursor = wall_index;
+        let start = crate::record::RecordStart {
+            round_wind: self.round_wind,
+            oya: oya.unwrap_or(self.oya),
+            bakaze: bakaze.unwrap_or(self.round_wind),
+            honba: honba.unwrap_or(self.honba),
+            kyotaku: kyotaku.unwrap_or(self.riichi_sticks),
+            scores: scores
+                .as_deref()
+                .and_then(|sc| sc.get(..4))
+                .map(|sc| [sc[0], sc[1], sc[2], sc[3]])
+                .unwrap_or([25000; 4]),
+        };
+        let custom_wall = wall.is_some() || wall_index.is_some();
+        let players = self._reset_core(oya, wall, bakaze, scores, honba, kyotaku, seed)?;
+        if let Some(rec) = self.recorder.as_mut() {
+            // A caller-provided wall cannot be regenerated from the seed.
+            rec.restart(start, self.seed.filter(|_| !custom_wall));
         }
-        self.player_event_counts = [0; 4];
+        let players = self._auto_advance(players)?;
+        self.get_obs_py(py, Some(players))
+    }
 
-        let initial_scores = if let Some(sc) = scores {
-            let mut s = [0; 4];
-            s.copy_from_slice(&sc[..4]);
-            s
-        } else {
-            [25000; 4]
-        };
+    /// Loads an `(N, 136)` uint8 array of walls (rows as `reset(wall=...)` takes
+    /// them, e.g. from `generate_walls`) for `reset(wall_index=...)`.
+    pub fn load_walls(&mut self, walls: numpy::PyReadonlyArray2<'_, u8>) -> PyResult<()> {
+        self.wall_bank = crate::wall::wall_bank(walls.as_array())?.into();
+        Ok(())
+    }
 
-        if self.mjai_log.is_empty() && !self.skip_mjai_logging {
-            let mut start_game = serde_json::Map::new();
-            start_game.insert("type".to_string(), Value::String("start_game".to_string()));
-            start_game.insert("id".to_string(), Value::Number(0.into()));
-            // names skipped for brevity
-            self._push_mjai_event(Value::Object(start_game));
+    /// SHA-256 commitment to this hand's wall, salted with `salt`; computed on
+    /// first read. Empty when the env was built with `digest_version=0`.
+    #[getter]
+    fn get_wall_digest(&self) -> String {
+        if self.digest_version == 0 {
+            return String::new();
         }
+        self.wall_digest
+            .get_or_init(|| {
+                crate::wall::wall_digest(self.digest_version, &self.salt, &self.dealt_wall)
+            })
+            .clone()
+    }
 
-        self.agari_results = HashMap::new();
-        self.last_agari_results = HashMap::new();
-        self.round_end_scores = None;
+    /// Number of walls loaded with `load_walls`.
+    #[getter]
+    fn get_num_walls(&self) -> usize {
+        self.wall_bank.len()
+    }
 
-        self._initialize_round(
-            oya.unwrap_or(self.oya),
-            bakaze.unwrap_or(self.round_wind),
-            honba.unwrap_or(self.honba),
-            kyotaku.unwrap_or(self.riichi_sticks),
-            wall,
-            Some(initial_scores),
-        );
+    /// Bank row for the next hand of an episode reset with `wall_index`, or
+    /// `None`. It keeps counting past `num_walls`: the row actually dealt is
+    /// `wall_cursor % num_walls`, so walls have been replayed once it exceeds
+    /// `wall_index + num_walls`.
+    #[getter]
+    fn get_wall_cursor(&self) -> Option<usize> {
+        self.wall_cursor
+    }
 
-        self.step(py, HashMap::new())
+    /// Wall generator name: "chacha" (default) or "xoshiro".
+    #[getter]
+    fn get_rng(&self) -> &'static str {
+        self.wall_rng.name()
+    }
+
+    /// The compact record of the episode so far; needs `record=True` and a seed.
+    pub fn game_record(&self) -> PyResult<crate::record::GameRecord> {
+        let rec = self.recorder.as_ref().ok_or_else(|| {
+            PyErr::new::<pyo3::exceptions::PyValueError, _>(
+                "recording is disabled; create the env with record=True",
+            )
+        })?;
+        rec.to_record(self.game_mode, self.rule, self.wall_rng)
+            .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)
+    }
+
+    /// Versioned binary snapshot of the game state, restored by `from_bytes`
+    /// and used for pickling. With `include_logs=False` the MJAI logs are
+    /// left out, so the restored env only logs events from that point on.
+    #[pyo3(signature = (include_logs=true))]
+    pub fn to_bytes<'py>(&self, py: Python<'py>, include_logs: bool) -> Bound<'py, PyBytes> {
+        PyBytes::new(py, &self.to_snapshot(include_logs))
+    }
+
+    #[staticmethod]
+    pub fn from_bytes(py: Python<'_>, data: &[u8]) -> PyResult<Self> {
+        py.detach(|| Self::from_snapshot(data))
+            .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)
+    }
+
+    fn __reduce__<'py>(
+        slf: &Bound<'py, Self>,
+    ) -> PyResult<(Bound<'py, PyAny>, (Bound<'py, PyBytes>,))> {
+        let from_bytes = slf.get_type().getattr("from_bytes")?;
+        let data = PyBytes::new(slf.py(), &slf.borrow().to_snapshot(true));
+        Ok((from_bytes, (data,)))
     }
 
     #[pyo3(signature = (oya=None, wall=None, bakaze=None, scores=None, honba=None, kyotaku=None, seed=None))]
@@ -1037,81 +1520,43 @@ impl RiichiEnv {
         kyotaku: Option<u32>,
         seed: Option<u64>,
     ) -> PyResult<HashMap<u8, Y47Turn>> {
-        self._y47_clear_cache();
-        let _ = self.reset(py, oya, wall, bakaze, scores, honba, kyotaku, seed)?;
-        if self.is_done {
-            return Err(PyErr::new::<pyo3::exceptions::PyRuntimeError, _>(
-                "env.done() returned True immediately after reset_y47()",
-            ));
-        }
-        self._y47_advance_after_kyoku_end(py)?;
+        self._y47_reset(py, oya, wall, bakaze, scores, honba, kyotaku, seed)?;
         self._y47_encode_and_cache_turns(py)
     }
 
-    pub fn step_y47(
-        &mut self,
-        py: Python<'_>,
-        action_index: HashMap<u8, i64>,
-    ) -> PyResult<(HashMap<u8, Y47Turn>, Py<PyArray1<f32>>, bool)> {
-        if !self.y47_cache_valid {
-            return Err(PyErr::new::<pyo3::exceptions::PyRuntimeError, _>(
-                "step_y47 called without a valid cached turns",
-            ));
-        }
-
-        let mut expected = self.y47_cached_active.clone();
-        expected.sort();
-        let mut got: Vec<u8> = action_index.keys().copied().collect();
-        got.sort();
-        if got != expected {
-            return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
-                "action_index keys mismatch: expected={:?}, got={:?}",
-                expected, got
-            )));
-        }
-
-        let mut pending_actions: HashMap<u8, Action> = HashMap::new();
-        for pid in &expected {
-            let idx = action_index
-                .get(pid)
-                .ok_or_else(|| PyErr::new::<pyo3::exceptions::PyValueError, _>("missing pid"))?;
-            if *idx < 0 || *idx >= (y47_schema::MAX_ACTIONS as i64) {
-                return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
-                    "action index out of range: {idx}"
-                )));
-            }
-            let idx_u = *idx as usize;
-            let table = &self.y47_cached_actions[*pid as usize];
-            if idx_u >= table.len() {
-                return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
-                    "action is illegal according to legal_action_mask",
-                ));
-            }
-            pending_actions.insert(*pid, table[idx_u].clone());
-        }
-
-        let _ = self.step(py, pending_actions)?;
-
-        self._y47_advance_after_kyoku_end(py)?;
+    /// `reset_y47` that writes the turns into preallocated arrays instead of
+    /// returning new ones.
+    ///
+    /// `out` maps every `Y47Turn` field name to a writable array shaped
+    /// `(4, ...)` and `"active"` to a `(4,)` bool array. Rows of acting seats
+    /// are overwritten and flagged in `active`; other rows are left as they are.
+    #[pyo3(signature = (out, oya=None, wall=None, bakaze=None, scores=None, honba=None, kyotaku=None, seed=None))]
+    #[allow(clippy::too_many_arguments)]
+    pub fn reset_y47_into(
+        &mut self,
+        py: Python<'_>,
+        out: &Bound<'_, PyDict>,
+        oya: Option<u8>,
+        wall: Option<Vec<u8>>,
+        bakaze: Option<u8>,
+        scores: Option<Vec<i32>>,
+        honba: Option<u8>,
+        kyotaku: Option<u32>,
+        seed: Option<u64>,
+    ) -> PyResult<()> {
+        self._y47_reset(py, oya, wall, bakaze, scores, honba, kyotaku, seed)?;
+        self._y47_write_turns(out)?;
+        Ok(())
+    }
 
-        let done = self.is_done;
-        let mut rewards = Array1::<f32>::zeros(y47_schema::NUM_PLAYERS);
-        if done {
-            let ranks = self.ranks();
-            for p in 0..y47_schema::NUM_PLAYERS {
-                let r = ranks[p] as usize;
-                if r < 1 || r > y47_schema::NUM_PLAYERS {
-                    return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
-                        "invalid rank {r} for player {p}"
-                    )));
-                }
-                rewards[p] = y47_schema::RANK_REWARDS[r - 1];
-            }
-        }
+    pub fn step_y47(
+        &mut self,
+        py: Python<'_>,
+        action_index: HashMap<u8, i64>,
+    ) -> PyResult<(HashMap<u8, Y47Turn>, Py<PyArray1<f32>>, bool)> {
+        let (rewards, done) = self._y47_step(py, action_index)?;
         let rewards_py = rewards.into_pyarray(py).unbind();
 
-        self._y47_clear_cache();
-
         if done {
             return Ok((HashMap::new(), rewards_py, true));
         }
@@ -1125,6 +1570,23 @@ impl RiichiEnv {
         Ok((turns, rewards_py, false))
     }
 
+    /// `step_y47` that writes the next turns into `out` (see `reset_y47_into`)
+    /// and returns only `(rewards, done)`. Nothing is written once the game is done.
+    pub fn step_y47_into(
+        &mut self,
+        py: Python<'_>,
+        action_index: HashMap<u8, i64>,
+        out: &Bound<'_, PyDict>,
+    ) -> PyResult<(Vec<f32>, bool)> {
+        let (rewards, done) = self._y47_step(py, action_index)?;
+        if !done && self._y47_write_turns(out)? == 0 {
+            return Err(PyErr::new::<pyo3::exceptions::PyRuntimeError, _>(
+                "env produced empty turns but not done",
+            ));
+        }
+        Ok((rewards.to_vec(), done))
+    }
+
     #[pyo3(signature = (players=None))]
     fn get_obs_py<'py>(
         &mut self,
@@ -1242,10 +1704,10 @@ impl RiichiEnv {
 
     pub fn _get_waits(&self, pid: u8) -> HashSet<u8> {
         let mut waits = HashSet::new();
-        let hand = &self.hands[pid as usize];
-        let melds = &self.melds[pid as usize];
-
-        let calc = crate::agari_calculator::AgariCalculator::new(hand.clone(), melds.clone());
+        let calc = crate::agari_calculator::AgariCalculator::from_hist(
+            &self.hists[pid as usize],
+            &self.melds[pid as usize],
+        );
         if !calc.is_tenpai() {
             return waits;
         }
@@ -1413,42 +1875,103 @@ impl RiichiEnv {
     pub fn step<'py>(
         &mut self,
         py: Python<'py>,
-        actions: HashMap<u8, Action>,
+        mut actions: HashMap<u8, Action>,
     ) -> PyResult<Py<PyAny>> {
+        for (pid, act) in std::mem::take(&mut self.auto_pending) {
+            actions.entry(pid).or_insert(act);
+        }
+        let players = self._step_recorded(actions)?;
+        let players = self._auto_advance(players)?;
+        self.get_obs_py(py, Some(players))
+    }
+
+    /// Policy names passed as `auto_play`.
+    #[getter]
+    fn get_auto_play(&self) -> Vec<&'static str> {
+        crate::auto_play::names(self.auto_play)
+    }
+
+    pub fn _reveal_kan_dora(&mut self) {
+        let target_idx =
+            (4 + 2 * self.dora_indicators.len()) as isize - self.rinshan_draw_count as isize;
+        if target_idx >= 0 && (target_idx as usize) < self.wall.len() {
+            self.dora_indicators.push(self.wall[target_idx as usize]);
+        }
+    }
+
+    pub fn _get_ura_markers(&self) -> Vec<String> {
+        let mut uras = Vec::new();
+        for i in 0..self.dora_indicators.len() {
+            let target_idx = (5 + 2 * i) as isize - self.rinshan_draw_count as isize;
+            if target_idx >= 0 && (target_idx as usize) < self.wall.len() {
+                uras.push(tid_to_mjai(self.wall[target_idx as usize]));
+            }
+        }
+        uras
+    }
+
+    pub fn _get_ura_markers_raw(&self) -> Vec<u8> {
+        let mut uras = Vec::new();
+        for i in 0..self.dora_indicators.len() {
+            let target_idx = (5 + 2 * i) as isize - self.rinshan_draw_count as isize;
+            if target_idx >= 0 && (target_idx as usize) < self.wall.len() {
+                uras.push(self.wall[target_idx as usize]);
+            }
+        }
+        uras
+    }
+
+    pub fn _get_ura_markers_u8(&self) -> Vec<u32> {
+        self._get_ura_markers_raw()
+            .iter()
+            .map(|&x| x as u32)
+            .collect()
+    }
+}
+
+impl RiichiEnv {
+    /// Runs the state machine until a player decision is required.
+    ///
+    /// Returns the players whose observations `step` hands back. No Python
+    /// objects are touched, so this can run with the GIL released.
+    pub(crate) fn _step_core(&mut self, actions: HashMap<u8, Action>) -> PyResult<Vec<u8>> {
         self._y47_clear_cache();
         while !self.is_done {
             if self.needs_initialize_next_round {
                 self._initialize_next_round(self.pending_oya_won, self.pending_is_draw);
                 if self.is_done {
                     // Game ended during initialization (e.g. Sudden Death)     
-                    return self.get_obs_py(py, Some(self.active_players.clone()));
+                    return Ok(self.active_players.clone());
                 }
             }
             if self.needs_tsumo {
                 // Midway draws logic
                 if self._check_midway_draws() {
-                    return self.get_obs_py(py, Some(self.active_players.clone()));
+                    return Ok(self.active_players.clone());
                 }
                 // Exhaustive draw check
                 if self.wall.len() <= 14 {
                     self._trigger_ryukyoku("exhaustive_draw");
-                    return self.get_obs_py(py, Some(self.active_players.clone()));
+                    return Ok(self.active_players.clone());
                 }
 
                 if self.is_rinshan_flag {
                     if !self.wall.is_empty() {
                         let t = self.wall.remove(0);
                         self.drawn_tile = Some(t);
-                        self.hands[self.current_player as usize].push(t);
+                        self._hand_push(self.current_player, t);
                         // self.is_rinshan_flag = false; // Keep flag for Agari/Test check
                         self.rinshan_draw_count += 1;
                     }
                 } else if !self.wall.is_empty() {
                     let t = self.wall.pop().unwrap();
                     self.drawn_tile = Some(t);
-                    self.hands[self.current_player as usize].push(t);
+                    self._hand_push(self.current_player, t);
                 }
 
+                if self.drawn_tile.is_some() {
+                    self._refresh_tenpai_table(self.current_player);
+                }
                 if let Some(t) = self.drawn_tile {
                     // Log
                     // Log
@@ -1469,7 +1992,7 @@ impl RiichiEnv {
                 self.active_players = vec![self.current_player];
 
                 if !self.skip_mjai_logging || !self.riichi_declared[self.current_player as usize] {
-                    return self.get_obs_py(py, Some(self.active_players.clone()));
+                    return Ok(self.active_players.clone());
                 }
                 continue;
             }
@@ -1481,7 +2004,7 @@ impl RiichiEnv {
                         let is_tsumogiri = act.tile == self.drawn_tile;
                         self._perform_discard(self.current_player, act.tile.unwrap(), is_tsumogiri);
                         if !self.active_players.is_empty() {
-                            return self.get_obs_py(py, Some(self.active_players.clone()));
+                            return Ok(self.active_players.clone());
                         }
                         continue;
                     }
@@ -1508,16 +2031,13 @@ impl RiichiEnv {
                             tsumi: self.honba as u32,
                         };
 
-                        let mut hand_for_calc = self.hands[winner as usize].clone();
                         // self.hands already contains the drawn tile (14 tiles).
-                        // AgariCalculator::calc(tile) usually adds the win_tile to the hand check.
-                        // So we should pass 13 tiles to AgariCalculator::new.
-                        if let Some(idx) = hand_for_calc.iter().rposition(|&t| t == tile) {
-                            hand_for_calc.remove(idx);
-                        }
-                        let calc = crate::agari_calculator::AgariCalculator::new(
-                            hand_for_calc,
-                            self.melds[winner as usize].clone(),
+                        // AgariCalculator::calc(tile) adds the win_tile back to the hand check.
+                        let mut hand_for_calc = self.hists[winner as usize];
+                        hand_for_calc.remove(tile);
+                        let calc = crate::agari_calculator::AgariCalculator::from_hist(
+                            &hand_for_calc,
+                            &self.melds[winner as usize],
                         );
                         let ura = if self.riichi_declared[winner as usize] {
                             self._get_ura_markers_raw()
@@ -1548,7 +2068,7 @@ impl RiichiEnv {
                         let mut agaris = HashMap::new();
                         agaris.insert(winner, agari);
                         self._end_kyoku_win(vec![winner], true, Some(winner), agaris);
-                        return self.get_obs_py(py, Some(self.active_players.clone()));
+                        return Ok(self.active_players.clone());
                     }
 
                     if act.action_type == ActionType::Kakan {
@@ -1586,11 +2106,9 @@ impl RiichiEnv {
                                     continue;
                                 }
                                 // Enhanced Check (Furiten)
-                                let hand = &self.hands[i as usize];
-                                let melds = &self.melds[i as usize];
-                                let calc = crate::agari_calculator::AgariCalculator::new(
-                                    hand.clone(),
-                                    melds.clone(),
+                                let calc = crate::agari_calculator::AgariCalculator::from_hist(
+                                    &self.hists[i as usize],
+                                    &self.melds[i as usize],
                                 );
                                 if calc
                                     .get_waits_u8()
@@ -1633,11 +2151,11 @@ impl RiichiEnv {
                                 self.active_players = chankan_ronners;
                                 self.active_players.sort();
                                 self.needs_tsumo = false;
-                                return self.get_obs_py(py, Some(self.active_players.clone()));
+                                return Ok(self.active_players.clone());
                             }
 
                             // Execute Kakan
-                            let t = self.hands[p_usize].remove(h_idx);
+                            let t = self._hand_remove_at(p_usize, h_idx);
                             let mut m = self.melds[p_usize][m_idx].clone();
                             m.meld_type = MeldType::Addgang;
                             m.tiles.push(t);
@@ -1712,10 +2230,9 @@ impl RiichiEnv {
                                         continue;
                                     }
 
-                                    let hand = &self.hands[i as usize];
-                                    let calc = crate::agari_calculator::AgariCalculator::new(
-                                        hand.clone(),
-                                        melds.clone(),
+                                    let calc = crate::agari_calculator::AgariCalculator::from_hist(
+                                        &self.hists[i as usize],
+                                        melds,
                                     );
 
                                     // Furiten Check
@@ -1773,14 +2290,14 @@ impl RiichiEnv {
                                 self.active_players = chankan_ronners;
                                 self.active_players.sort();
                                 self.needs_tsumo = false;
-                                return self.get_obs_py(py, Some(self.active_players.clone()));
+                                return Ok(self.active_players.clone());
                             }
 
                             // Execute Ankan
                             // Remove 4 tiles (reverse index to avoid shift)
                             let mut consumed = Vec::new();
                             for &idx in indices.iter().rev() {
-                                consumed.push(self.hands[p_usize].remove(idx));
+                                consumed.push(self._hand_remove_at(p_usize, idx));
                             }
                             consumed.sort(); // Should be 4 sorted tiles
 
@@ -1836,7 +2353,7 @@ impl RiichiEnv {
                             Value::Number(self.current_player.into()),
                         );
                         self._push_mjai_event(Value::Object(ev));
-                        return self.get_obs_py(py, Some(vec![self.current_player]));
+                        return Ok(vec![self.current_player]);
                     }
 
                     if act.action_type == ActionType::KyushuKyuhai {
@@ -1847,42 +2364,29 @@ impl RiichiEnv {
             } else if self.phase == Phase::WaitResponse {
                 // Check if all active players have responded
                 if !self.active_players.iter().all(|p| actions.contains_key(p)) {
-                    return self.get_obs_py(py, Some(self.active_players.clone()));
+                    return Ok(self.active_players.clone());
                 }
 
                 // 1. Check missed agari
                 for (pid, act) in &actions {
-                    if let Some(claims) = self.current_claims.get(pid) {
-                        let has_ron = claims.iter().any(|c| c.action_type == ActionType::Ron);
-                        let chosen_ron = act.action_type == ActionType::Ron;
-                        if has_ron && !chosen_ron {
-                            if self.riichi_declared[*pid as usize] {
-                                self.missed_agari_riichi[*pid as usize] = true;
-                            } else {
-                                self.missed_agari_doujun[*pid as usize] = true;
-                            }
+                    let has_ron = *pid < 4 && self.claims.can(*pid, ActionType::Ron);
+                    let chosen_ron = act.action_type == ActionType::Ron;
+                    if has_ron && !chosen_ron {
+                        if self.riichi_declared[*pid as usize] {
+                            self.missed_agari_riichi[*pid as usize] = true;
+                        } else {
+                            self.missed_agari_doujun[*pid as usize] = true;
                         }
                     }
                 }
 
-                // 2. Filter actions
-                let valid_actions: HashMap<u8, Action> = actions
-                    .iter()
-                    .filter(|(_, a)| a.action_type != ActionType::Pass)
-                    .map(|(&k, v)| (k, v.clone()))
-                    .collect();
+                // 2. Resolve priority: Ron > Pon / Daiminkan > Chi (Pass never wins)
+                let (winning, claimers) = crate::claims::resolve(&actions, self.current_player);
 
                 // 3. Ron Resolution
-                let ronners: Vec<u8> = valid_actions
-                    .iter()
-                    .filter(|(_, a)| a.action_type == ActionType::Ron)
-                    .map(|(&k, _)| k)
-                    .collect();
-
-                if !ronners.is_empty() {
+                if winning == ClaimPriority::Ron {
                     let discarder = self.current_player;
-                    let mut sorted_ronners = ronners.clone();
-                    sorted_ronners.sort_by_key(|&p| (p + 4 - discarder) % 4);
+                    let sorted_ronners = claimers;
 
                     let tile = if let Some(ld) = self.last_discard {
                         ld.1
@@ -1911,9 +2415,9 @@ impl RiichiEnv {
                             tsumi: self.honba as u32,
                         };
 
-                        let calc = crate::agari_calculator::AgariCalculator::new(
-                            self.hands[winner as usize].clone(),
-                            self.melds[winner as usize].clone(),
+                        let calc = crate::agari_calculator::AgariCalculator::from_hist(
+                            &self.hists[winner as usize],
+                            &self.melds[winner as usize],
                         );
                         let ura = if self.riichi_declared[winner as usize] {
                             self._get_ura_markers_raw()
@@ -1952,20 +2456,13 @@ impl RiichiEnv {
                     }
 
                     self._end_kyoku_win(sorted_ronners, false, Some(discarder), agaris);
-                    return self.get_obs_py(py, Some(self.active_players.clone()));
+                    return Ok(self.active_players.clone());
                 }
 
                 // 4. Pon / Daiminkan
-                let ponners: Vec<u8> = valid_actions
-                    .iter()
-                    .filter(|(_, a)| {
-                        a.action_type == ActionType::Pon || a.action_type == ActionType::Daiminkan
-                    })
-                    .map(|(&k, _)| k)
-                    .collect();
-
-                if let Some(&claimer) = ponners.first() {
-                    let action = valid_actions[&claimer].clone();
+                if winning == ClaimPriority::PonKan {
+                    let claimer = claimers[0];
+                    let action = actions[&claimer].clone();
                     let tile = self.last_discard.unwrap().1;
 
                     self._execute_claim(claimer, action.clone(), Some(self.current_player))?;
@@ -1984,7 +2481,7 @@ impl RiichiEnv {
                             self._reveal_kan_dora();
                             self._check_midway_draws();
                             if !self.skip_mjai_logging {
-                                return self.get_obs_py(py, Some(vec![]));
+                                return Ok(vec![]);
                             }
                             continue; // Proceed to draw
                         }
@@ -2019,12 +2516,10 @@ impl RiichiEnv {
                             self.active_players = chankan_ronners.clone();
                             self.active_players.sort();
                             self.pending_kan = Some((claimer, action)); // Store action to resume later
-                            self.current_claims = HashMap::new();
+                            self.claims.clear();
                             for &pid in &self.active_players {
-                                self.current_claims.insert(
-                                    pid,
-                                    vec![Action::new(ActionType::Ron, Some(tile), vec![])],
-                                );
+                                self.claims
+                                    .push(pid, RawAction::simple(ActionType::Ron, Some(tile)));
                             }
                             if !self.skip_mjai_logging {
                                 // return self.get_obs_py(py, Some(self.active_players.clone()));
@@ -2058,16 +2553,11 @@ impl RiichiEnv {
                 }
 
                 // 5. Chi
-                let chiers: Vec<u8> = valid_actions
-                    .iter()
-                    .filter(|(_, a)| a.action_type == ActionType::Chi)
-                    .map(|(&k, _)| k)
-                    .collect();
-
-                if let Some(&claimer) = chiers.first() {
+                if winning == ClaimPriority::Chi {
+                    let claimer = claimers[0];
                     self._execute_claim(
                         claimer,
-                        valid_actions[&claimer].clone(),
+                        actions[&claimer].clone(),
                         Some(self.current_player),
                     )?;
                     self.current_player = claimer;
@@ -2078,7 +2568,7 @@ impl RiichiEnv {
                     self.drawn_tile = None;
                     self.needs_tsumo = false;
 
-                    return self.get_obs_py(py, Some(self.active_players.clone()));
+                    return Ok(self.active_players.clone());
                 }
 
                 if self.pending_kan.is_some() {
@@ -2104,7 +2594,7 @@ impl RiichiEnv {
 
                         if let (Some(h_idx), Some(m_idx)) = (has_tile_idx, meld_idx) {
                             // Execute Kakan
-                            let t = self.hands[p_usize].remove(h_idx);
+                            let t = self._hand_remove_at(p_usize, h_idx);
 
                             // Capture original Pon tiles for logging
                             let _consumed_tiles = self.melds[p_usize][m_idx].tiles.clone();
@@ -2162,7 +2652,7 @@ impl RiichiEnv {
                             // Execute Ankan
                             let mut consumed = Vec::new();
                             for &idx in indices.iter().rev() {
-                                consumed.push(self.hands[p_usize].remove(idx));
+                                consumed.push(self._hand_remove_at(p_usize, idx));
                             }
                             consumed.sort();
 
@@ -2240,55 +2730,16 @@ impl RiichiEnv {
                 self.phase = Phase::WaitAct;
                 self.needs_tsumo = true;
                 self.active_players = vec![];
-                self.current_claims.clear(); // Clear stale claims
+                self.claims.clear(); // Clear stale claims
                 continue; // Loop back for tsumo
             }
 
             // Fallback to break loop
             break;
         }
-        self.get_obs_py(py, Some(self.active_players.clone()))
-    }
-
-    pub fn _reveal_kan_dora(&mut self) {
-        let target_idx =
-            (4 + 2 * self.dora_indicators.len()) as isize - self.rinshan_draw_count as isize;
-        if target_idx >= 0 && (target_idx as usize) < self.wall.len() {
-            self.dora_indicators.push(self.wall[target_idx as usize]);
-        }
-    }
-
-    pub fn _get_ura_markers(&self) -> Vec<String> {
-        let mut uras = Vec::new();
-        for i in 0..self.dora_indicators.len() {
-            let target_idx = (5 + 2 * i) as isize - self.rinshan_draw_count as isize;
-            if target_idx >= 0 && (target_idx as usize) < self.wall.len() {
-                uras.push(tid_to_mjai(self.wall[target_idx as usize]));
-            }
-        }
-        uras
-    }
-
-    pub fn _get_ura_markers_raw(&self) -> Vec<u8> {
-        let mut uras = Vec::new();
-        for i in 0..self.dora_indicators.len() {
-            let target_idx = (5 + 2 * i) as isize - self.rinshan_draw_count as isize;
-            if target_idx >= 0 && (target_idx as usize) < self.wall.len() {
-                uras.push(self.wall[target_idx as usize]);
-            }
-        }
-        uras
-    }
-
-    pub fn _get_ura_markers_u8(&self) -> Vec<u32> {
-        self._get_ura_markers_raw()
-            .iter()
-            .map(|&x| x as u32)
-            .collect()
+        Ok(self.active_players.clone())
     }
-}
 
-impl RiichiEnv {
     fn _perform_discard(&mut self, pid: u8, tile: u8, is_tsumogiri: bool) {
         self.is_rinshan_flag = false; // Clear Rinshan flag on discard
         self.ippatsu_cycle[pid as usize] = false; // Discard ends your Ippatsu chance
@@ -2296,7 +2747,7 @@ impl RiichiEnv {
         let tsumogiri = is_tsumogiri;
         // Simplified Discard Logic (14 tiles hand)
         if let Some(pos) = self.hands[pid as usize].iter().position(|&t| t == tile) {
-            self.hands[pid as usize].remove(pos);
+            self._hand_remove_at(pid as usize, pos);
             self.hands[pid as usize].sort();
         } else {
             // Should not happen if valid action
@@ -2334,10 +2785,9 @@ impl RiichiEnv {
 
         self._update_claims(pid, tile);
 
-        if !self.current_claims.is_empty() {
+        if !self.claims.is_empty() {
             self.phase = Phase::WaitResponse;
-            self.active_players = self.current_claims.keys().cloned().collect();
-            self.active_players.sort();
+            self.active_players = self.claims.seats();
             self.needs_tsumo = false;
         } else {
             // If riichi_stage, it's accepted (No claims detected)
@@ -2374,7 +2824,7 @@ impl RiichiEnv {
     }
 
     fn _update_claims(&mut self, discarded_pid: u8, tile: u8) {
-        self.current_claims.clear();
+        self.claims.clear();
 
         // 1. Ron Check
         for pid in 0..4 {
@@ -2403,9 +2853,10 @@ impl RiichiEnv {
             }
 
             // 2. Exact Furiten Check: Is ANY wait tile in discards?
-            let hand = &self.hands[pid as usize];
-            let melds = &self.melds[pid as usize];
-            let calc = crate::agari_calculator::AgariCalculator::new(hand.clone(), melds.clone());
+            let calc = crate::agari_calculator::AgariCalculator::from_hist(
+                &self.hists[pid as usize],
+                &self.melds[pid as usize],
+            );
             let waits = calc.get_waits_u8();
             if waits.is_empty() {
                 continue; // Not Tenpai -> Cannot Ron logic
@@ -2420,10 +2871,8 @@ impl RiichiEnv {
             }
 
             if self._check_ron(pid, tile, discarded_pid, false) {
-                self.current_claims
-                    .entry(pid)
-                    .or_default()
-                    .push(Action::new(ActionType::Ron, Some(tile), vec![]));
+                self.claims
+                    .push(pid, RawAction::simple(ActionType::Ron, Some(tile)));
             } else if waits.contains(&(tile / 4)) {
                 self.missed_agari_doujun[pid as usize] = true;
             }
@@ -2447,86 +2896,58 @@ impl RiichiEnv {
                     continue;
                 }
 
-                let hand = &self.hands[pid as usize];
-                // println!("PID {} checking claims for tile {}. Hand: {:?}", pid, tile, hand);
-                let count = hand.iter().filter(|&&t| t / 4 == tile / 4).count();
-                // println!("Count: {}", count);
+                let hist = &self.hists[pid as usize];
+                let t34 = tile / 4;
+                let count = hist.count(t34);
+
+                // At most one copy of a tile type is red. Consumed tiles are the
+                // lowest held ids (red five first), which is the sorted-hand order
+                // the baseline scan produced in play; a hand assigned unsorted
+                // from Python no longer changes which copies a call consumes.
+                let red = hist.tids_of(t34).find(|&t| is_red(t));
+                let mut blacks = [0u8; 4];
+                let mut n_blacks = 0;
+                for t in hist.tids_of(t34).filter(|&t| !is_red(t)) {
+                    blacks[n_blacks] = t;
+                    n_blacks += 1;
+                }
 
                 if count >= 2 {
                     // Pon
-                    // We need all distinct combinations of 2 tiles.
-                    // Possible counts of red: 0 or 1 (since total is 4 and only 1 is red).
-                    // Wait, POM can have:
-                    // 1. Two black tiles
-                    // 2. One red and one black
-                    let reds: Vec<u8> = hand
-                        .iter()
-                        .cloned()
-                        .filter(|&t| (t == 16 || t == 52 || t == 88) && t / 4 == tile / 4)
-                        .collect();
-                    let blacks: Vec<u8> = hand
-                        .iter()
-                        .cloned()
-                        .filter(|&t| (t != 16 && t != 52 && t != 88) && t / 4 == tile / 4)
-                        .collect();
-
                     // Option 1: Two blacks
-                    if blacks.len() >= 2 {
-                        self.current_claims
-                            .entry(pid)
-                            .or_default()
-                            .push(Action::new(
-                                ActionType::Pon,
-                                Some(tile),
-                                vec![blacks[0], blacks[1]],
-                            ));
+                    if n_blacks >= 2 {
+                        self.claims.push(
+                            pid,
+                            RawAction::new(ActionType::Pon, Some(tile), &blacks[..2]),
+                        );
                     }
                     // Option 2: One red, one black
-                    if !reds.is_empty() && !blacks.is_empty() {
-                        self.current_claims
-                            .entry(pid)
-                            .or_default()
-                            .push(Action::new(
-                                ActionType::Pon,
-                                Some(tile),
-                                vec![reds[0], blacks[0]],
-                            ));
+                    if let Some(r) = red.filter(|_| n_blacks >= 1) {
+                        self.claims.push(
+                            pid,
+                            RawAction::new(ActionType::Pon, Some(tile), &[r, blacks[0]]),
+                        );
                     }
                 }
                 if count >= 3 {
                     // Daiminkan
                     // Option 1: Three blacks
-                    // Option 2: One red, two blacks
-                    let reds: Vec<u8> = hand
-                        .iter()
-                        .cloned()
-                        .filter(|&t| (t == 16 || t == 52 || t == 88) && t / 4 == tile / 4)
-                        .collect();
-                    let blacks: Vec<u8> = hand
-                        .iter()
-                        .cloned()
-                        .filter(|&t| (t != 16 && t != 52 && t != 88) && t / 4 == tile / 4)
-                        .collect();
-
-                    if blacks.len() >= 3 {
-                        self.current_claims
-                            .entry(pid)
-                            .or_default()
-                            .push(Action::new(
-                                ActionType::Daiminkan,
-                                Some(tile),
-                                vec![blacks[0], blacks[1], blacks[2]],
-                            ));
+                    if n_blacks >= 3 {
+                        self.claims.push(
+                            pid,
+                            RawAction::new(ActionType::Daiminkan, Some(tile), &blacks[..3]),
+                        );
                     }
-                    if !reds.is_empty() && blacks.len() >= 2 {
-                        self.current_claims
-                            .entry(pid)
-                            .or_default()
-                            .push(Action::new(
+                    // Option 2: One red, two blacks
+                    if let Some(r) = red.filter(|_| n_blacks >= 2) {
+                        self.claims.push(
+                            pid,
+                            RawAction::new(
                                 ActionType::Daiminkan,
                                 Some(tile),
-                                vec![reds[0], blacks[0], blacks[1]],
-                            ));
+                                &[r, blacks[0], blacks[1]],
+                            ),
+                        );
                     }
                 }
             }
@@ -2539,150 +2960,34 @@ impl RiichiEnv {
                 && !self.riichi_stage[next_pid as usize]
                 && tile < 108
             {
-                let hand = &self.hands[next_pid as usize];
+                let hist = &self.hists[next_pid as usize];
                 let t_type = tile / 4;
                 let suit = t_type / 9;
                 let num = t_type % 9;
 
-                let has = |n: u8| -> bool {
-                    if n >= 9 {
-                        return false;
-                    }
-                    let target = suit * 9 + n;
-                    hand.iter().any(|&t| t / 4 == target)
-                };
-
-                // Left: T-2, T-1
-                if num >= 2 && has(num - 2) && has(num - 1) {
-                    let ts1: Vec<u8> = hand
-                        .iter()
-                        .cloned()
-                        .filter(|&t| t / 4 == suit * 9 + num - 2)
-                        .collect();
-                    let ts2: Vec<u8> = hand
-                        .iter()
-                        .cloned()
-                        .filter(|&t| t / 4 == suit * 9 + num - 1)
-                        .collect();
-                    let mut distinct1 = Vec::new();
-                    let mut seen1 = HashSet::new();
-                    for t in ts1 {
-                        let is_red = t == 16 || t == 52 || t == 88;
-                        if seen1.insert(is_red) {
-                            distinct1.push(t);
-                        }
-                    }
-                    let mut distinct2 = Vec::new();
-                    let mut seen2 = HashSet::new();
-                    for t in ts2 {
-                        let is_red = t == 16 || t == 52 || t == 88;
-                        if seen2.insert(is_red) {
-                            distinct2.push(t);
-                        }
-                    }
-
-                    for &t1 in &distinct1 {
-                        for &t2 in &distinct2 {
-                            let consumed = vec![t1, t2];
-                            if self._is_kuikae_valid(
-                                &self.hands[next_pid as usize],
-                                tile,
-                                &consumed,
-                            ) {
-                                self.current_claims
-                                    .entry(next_pid)
-                                    .or_default()
-                                    .push(Action::new(ActionType::Chi, Some(tile), consumed));
-                            }
-                        }
-                    }
-                }
-                // Middle: T-1, T+1
-                if (1..=7).contains(&num) && has(num - 1) && has(num + 1) {
-                    let ts1: Vec<u8> = hand
-                        .iter()
-                        .cloned()
-                        .filter(|&t| t / 4 == suit * 9 + num - 1)
-                        .collect();
-                    let ts2: Vec<u8> = hand
-                        .iter()
-                        .cloned()
-                        .filter(|&t| t / 4 == suit * 9 + num + 1)
-                        .collect();
-                    let mut distinct1 = Vec::new();
-                    let mut seen1 = HashSet::new();
-                    for t in ts1 {
-                        let is_red = t == 16 || t == 52 || t == 88;
-                        if seen1.insert(is_red) {
-                            distinct1.push(t);
-                        }
-                    }
-                    let mut distinct2 = Vec::new();
-                    let mut seen2 = HashSet::new();
-                    for t in ts2 {
-                        let is_red = t == 16 || t == 52 || t == 88;
-                        if seen2.insert(is_red) {
-                            distinct2.push(t);
-                        }
-                    }
+                let has = |n: u8| -> bool { n < 9 && hist.count(suit * 9 + n) > 0 };
 
-                    for &t1 in &distinct1 {
-                        for &t2 in &distinct2 {
-                            let consumed = vec![t1, t2];
-                            if self._is_kuikae_valid(
-                                &self.hands[next_pid as usize],
-                                tile,
-                                &consumed,
-                            ) {
-                                self.current_claims
-                                    .entry(next_pid)
-                                    .or_default()
-                                    .push(Action::new(ActionType::Chi, Some(tile), consumed));
-                            }
-                        }
-                    }
-                }
-                // Right: T+1, T+2
-                if num <= 6 && has(num + 1) && has(num + 2) {
-                    let ts1: Vec<u8> = hand
-                        .iter()
-                        .cloned()
-                        .filter(|&t| t / 4 == suit * 9 + num + 1)
-                        .collect();
-                    let ts2: Vec<u8> = hand
-                        .iter()
-                        .cloned()
-                        .filter(|&t| t / 4 == suit * 9 + num + 2)
-                        .collect();
-                    let mut distinct1 = Vec::new();
-                    let mut seen1 = HashSet::new();
-                    for t in ts1 {
-                        let is_red = t == 16 || t == 52 || t == 88;
-                        if seen1.insert(is_red) {
-                            distinct1.push(t);
-                        }
-                    }
-                    let mut distinct2 = Vec::new();
-                    let mut seen2 = HashSet::new();
-                    for t in ts2 {
-                        let is_red = t == 16 || t == 52 || t == 88;
-                        if seen2.insert(is_red) {
-                            distinct2.push(t);
-                        }
+                // Left: T-2, T-1 / Middle: T-1, T+1 / Right: T+1, T+2
+                let shapes = [
+                    (num >= 2, num.wrapping_sub(2), num.wrapping_sub(1)),
+                    ((1..=7).contains(&num), num.wrapping_sub(1), num + 1),
+                    (num <= 6, num + 1, num + 2),
+                ];
+                for (fits, n1, n2) in shapes {
+                    if !fits || !has(n1) || !has(n2) {
+                        continue;
                     }
-
-                    for &t1 in &distinct1 {
-                        for &t2 in &distinct2 {
-                            let consumed = vec![t1, t2];
-                            if self._is_kuikae_valid(
-                                &self.hands[next_pid as usize],
-                                tile,
-                                &consumed,
-                            ) {
-                                self.current_claims
-                                    .entry(next_pid)
-                                    .or_default()
-                                    .push(Action::new(ActionType::Chi, Some(tile), consumed));
+                    // One red and one black variant of each neighbour at most.
+                    let (distinct1, k1) = hist.variants(suit * 9 + n1);
+                    let (distinct2, k2) = hist.variants(suit * 9 + n2);
+                    for &t1 in &distinct1[..k1] {
+                        for &t2 in &distinct2[..k2] {
+                            let consumed = [t1, t2];
+                            if self._is_kuikae_valid(hist, tile, &consumed) {
+                                self.claims.push(
+                                    next_pid,
+                                    RawAction::new(ActionType::Chi, Some(tile), &consumed),
+                                );
                             }
                         }
                     }
@@ -2692,7 +2997,7 @@ impl RiichiEnv {
     }
 
     fn _check_ron(&self, pid: u8, tile: u8, _discarded_pid: u8, is_chankan: bool) -> bool {
-        let hand = &self.hands[pid as usize];
+        let hand = &self.hists[pid as usize];
         let melds = &self.melds[pid as usize];
 
         let cond = Conditions {
@@ -2711,14 +3016,14 @@ impl RiichiEnv {
             tsumi: self.honba as u32,
         };
 
-        let calc = crate::agari_calculator::AgariCalculator::new(hand.clone(), melds.clone());
+        let calc = crate::agari_calculator::AgariCalculator::from_hist(hand, melds);
         let agari = calc.calc(tile, self.dora_indicators.clone(), vec![], Some(cond));
 
         agari.agari && (agari.yakuman || agari.han >= 1)
     }
 }
 impl RiichiEnv {
-    fn _initialize_round(
+    pub(crate) fn _initialize_round(
         &mut self,
         oya: u8,
         bakaze: u8,
@@ -2733,11 +3038,12 @@ impl RiichiEnv {
         self.riichi_sticks = kyotaku; // Initialize sticks
         self.round_wind = bakaze;
         self.hands = [Vec::new(), Vec::new(), Vec::new(), Vec::new()];
+        self.hists = [TileHist::EMPTY; 4];
         self.melds = [Vec::new(), Vec::new(), Vec::new(), Vec::new()];
         self.discards = [Vec::new(), Vec::new(), Vec::new(), Vec::new()];
         self.discard_flags = [Vec::new(), Vec::new(), Vec::new(), Vec::new()];
         self.is_done = false;
-        self.current_claims = HashMap::new();
+        self.claims.clear();
         self.pending_kan = None;
         self.riichi_declared = [false; 4];
         self.riichi_stage = [false; 4];
@@ -2772,18 +3078,17 @@ impl RiichiEnv {
             //     &w[0..34]
             // );
             self.wall = w;
+        } else if let Some(i) = self.wall_cursor {
+            // Bank rows use the `wall=` convention (reversed drawing order); an
+            // exhausted bank starts over, which `wall_cursor` makes visible.
+            let row = self.wall_bank[i % self.wall_bank.len()];
+            self.wall_cursor = Some(i + 1);
+            self.wall.clear();
+            self.wall.extend(row.iter().rev());
         } else {
-            let mut w: Vec<u8> = (0..136).collect();
-            let mut rng = if let Some(episode_seed) = self.seed {
-                let hand_seed = splitmix64(episode_seed ^ self.hand_index);
-                self.hand_index = self.hand_index.wrapping_add(1);
-                StdRng::seed_from_u64(hand_seed)
-            } else {
-                self.hand_index = self.hand_index.wrapping_add(1);
-                StdRng::from_entropy()
-            };
-            w.shuffle(&mut rng);
-            self.wall = w;
+            let hand_seed = self.seed.map(|s| splitmix64(s ^ self.hand_index));
+            self.hand_index = self.hand_index.wrapping_add(1);
+            self.wall_rng.shuffle_into(hand_seed, &mut self.wall);
         }
 
         // println!(
@@ -2792,34 +3097,23 @@ impl RiichiEnv {
         // );
         self.dora_indicators = vec![self.wall[5]];
 
-        // Generate Salt
-        if self.salt.is_empty() {
-            let mut rng = if let Some(s) = self.seed {
-                StdRng::seed_from_u64(s)
-            } else {
-                StdRng::from_entropy()
-            };
-            // 16 chars random hex
-            let chars: Vec<u8> = (0..8).map(|_| rng.gen()).collect();
-            self.salt = hex::encode(chars);
+        // Salt and wall snapshot for the lazily computed wall_digest
+        self.wall_digest = std::sync::OnceLock::new();
+        if self.digest_version != 0 {
+            if self.salt.is_empty() {
+                let mut rng = if let Some(s) = self.seed {
+                    StdRng::seed_from_u64(s)
+                } else {
+                    StdRng::from_entropy()
+                };
+                // 16 chars random hex
+                let chars: Vec<u8> = (0..8).map(|_| rng.gen()).collect();
+                self.salt = hex::encode(chars);
+            }
+            self.dealt_wall.clear();
+            self.dealt_wall.extend_from_slice(&self.wall);
         }
 
-        // Calculate Wall Digest
-        // Format: salt + wall_str
-        // wall_str: join ints comma separated?
-        // Python: hashlib.sha256((self.salt + ",".join(map(str, self.wall))).encode()).hexdigest()
-        let wall_str = self
-            .wall
-            .iter()
-            .map(|t| t.to_string())
-            .collect::<Vec<String>>()
-            .join(",");
-        let input = format!("{}{}", self.salt, wall_str);
-        let mut hasher = sha2::Sha256::new();
-        hasher.update(input);
-        let result = hasher.finalize();
-        self.wall_digest = hex::encode(result);
-
         self.dora_indicators = vec![self.wall[4]];
 
         for i in 0..4 {
@@ -2852,6 +3146,7 @@ impl RiichiEnv {
             //     pid, self.hands[pid]
             // );
         }
+        self._sync_hists();
 
         self.current_player = self.oya;
         self.phase = Phase::WaitAct;
@@ -2948,6 +3243,7 @@ impl RiichiEnv {
             events_json: self.mjai_log_per_player[pid as usize].clone(),
             prev_events_size: self.player_event_counts[pid as usize],
             legal_actions: self._get_legal_actions_internal(pid),
+            mjai_keys: std::sync::OnceLock::new(),
         }
     }
 
@@ -3029,12 +3325,10 @@ impl RiichiEnv {
     }
 
     // Helper to check valid discards under Kuikae rules
-    fn _is_kuikae_valid(&self, hand: &[u8], tile: u8, consumed: &[u8]) -> bool {
-        let mut sim_hand = hand.to_vec();
+    fn _is_kuikae_valid(&self, hand: &TileHist, tile: u8, consumed: &[u8]) -> bool {
+        let mut sim_hand = *hand;
         for &c in consumed {
-            if let Some(pos) = sim_hand.iter().position(|&t| t == c) {
-                sim_hand.swap_remove(pos);
-            }
+            sim_hand.remove(c);
         }
 
         let called_kv = tile / 4;
@@ -3065,19 +3359,49 @@ impl RiichiEnv {
         }
 
         // Check if any legal discard remains
-        sim_hand.iter().any(|&t| !forbidden_kvs.contains(&(t / 4)))
+        (0..34u8).any(|t| sim_hand.count(t) > 0 && !forbidden_kvs.contains(&t))
+    }
+
+    pub(crate) fn _get_legal_actions_internal(&self, pid: u8) -> Vec<Action> {
+        let mut buf = Vec::with_capacity(32);
+        self._legal_actions_into(pid, &mut buf);
+        buf.into_iter().map(RawAction::to_action).collect()
+    }
+
+    /// Tenpai table of `pid`'s current hand, from the per-turn cache when it is
+    /// still valid.
+    pub(crate) fn _tenpai_table(&self, pid: u8) -> TenpaiTable {
+        let hist = &self.hists[pid as usize];
+        let melds = &self.melds[pid as usize];
+        match self.tenpai_tables[pid as usize] {
+            Some(table) if table.is_for(hist, melds) => table,
+            _ => TenpaiTable::compute(hist, melds),
+        }
+    }
+
+    /// Caches the tenpai table for the seat that just drew, if it may riichi.
+    fn _refresh_tenpai_table(&mut self, pid: u8) {
+        let p = pid as usize;
+        self.tenpai_tables[p] =
+            if !self.riichi_declared[p] && self.melds[p].iter().all(|m| !m.opened) {
+                Some(TenpaiTable::compute(&self.hists[p], &self.melds[p]))
+            } else {
+                None
+            };
     }
 
-    fn _get_legal_actions_internal(&self, pid: u8) -> Vec<Action> {
-        let mut actions = Vec::new();
-        let hand = &self.hands[pid as usize];
+    /// Writes `pid`'s legal actions into `out` (cleared first) in the order
+    /// Python sees them.
+    pub(crate) fn _legal_actions_into(&self, pid: u8, out: &mut Vec<RawAction>) {
+        use crate::agari_calculator::AgariCalculator;
 
-        let mut h14 = hand.clone();
-        h14.sort();
+        out.clear();
+        let hist = &self.hists[pid as usize];
+        let melds = &self.melds[pid as usize];
 
         if self.phase == Phase::WaitAct {
             if pid != self.current_player || self.needs_tsumo {
-                return Vec::new(); // Wait for tsumo or not your turn
+                return; // Wait for tsumo or not your turn
             }
 
             // If in Riichi
@@ -3087,57 +3411,50 @@ impl RiichiEnv {
                 // Tsumo Check
                 if let Some(dt) = self.drawn_tile {
                     if self._check_tsumo(pid, dt) {
-                        actions.push(Action::new(ActionType::Tsumo, None, vec![]));
+                        out.push(RawAction::simple(ActionType::Tsumo, None));
                     }
 
                     // Ankan Check logic (complex restrictions during Riichi)
                     // Rule: Ankan is allowed ONLY IF it does not change the waits.
                     let t_type = dt / 4;
-                    let matches: Vec<u8> =
-                        h14.iter().cloned().filter(|&t| t / 4 == t_type).collect();
-                    if matches.len() == 4 {
-                        use crate::agari_calculator::AgariCalculator;
-                        let mut hand13 = hand.clone();
-                        if let Some(pos) = hand13.iter().position(|&x| x == dt) {
-                            hand13.remove(pos);
-                        }
+                    if hist.count(t_type) == 4 {
+                        let matches: Vec<u8> = hist.tids_of(t_type).collect();
+                        let mut hand13 = *hist;
+                        hand13.remove(dt);
                         let mut old_waits =
-                            AgariCalculator::new(hand13, self.melds[pid as usize].clone())
-                                .get_waits_u8();
+                            AgariCalculator::from_hist(&hand13, melds).get_waits_u8();
                         old_waits.sort();
 
                         // Simulate ankan
-                        let mut next_melds = self.melds[pid as usize].clone();
+                        let mut next_melds = melds.clone();
                         next_melds.push(Meld::new(MeldType::Angang, matches.clone(), false));
-                        let mut next_hand = hand.clone();
+                        let mut next_hand = *hist;
                         for &m in &matches {
-                            if let Some(pos) = next_hand.iter().position(|&x| x == m) {
-                                next_hand.remove(pos);
-                            }
+                            next_hand.remove(m);
                         }
                         let mut new_waits =
-                            AgariCalculator::new(next_hand, next_melds).get_waits_u8();
+                            AgariCalculator::from_hist(&next_hand, &next_melds).get_waits_u8();
                         new_waits.sort();
 
                         if !old_waits.is_empty() && old_waits == new_waits {
-                            actions.push(Action::new(ActionType::Ankan, Some(dt), matches));
+                            out.push(RawAction::new(ActionType::Ankan, Some(dt), &matches));
                         }
                     }
                 }
 
                 if let Some(dt) = self.drawn_tile {
-                    actions.push(Action::new(ActionType::Discard, Some(dt), vec![]));
+                    out.push(RawAction::simple(ActionType::Discard, Some(dt)));
                 }
-                return actions;
+                return;
             }
 
             // Normal Turn
             if self.riichi_stage[pid as usize] {
                 // Must discard after declaring Riichi
-                for &t in &h14 {
-                    actions.push(Action::new(ActionType::Discard, Some(t), vec![]));
+                for t in hist.iter() {
+                    out.push(RawAction::simple(ActionType::Discard, Some(t)));
                 }
-                return actions;
+                return;
             }
 
             // 1. Kyushukyuhai
@@ -3146,113 +3463,76 @@ impl RiichiEnv {
             let no_melds = self.melds.iter().all(|pm| pm.is_empty());
 
             if is_first_turn_personal && no_melds {
-                let mut yaochuu_count = 0;
-                let mut seen = [false; 34];
-                for &t in &h14 {
-                    let tt = t / 4;
-                    let is_yaochuu = tt == 0
-                        || tt == 8
-                        || tt == 9
-                        || tt == 17
-                        || tt == 18
-                        || tt == 26
-                        || tt >= 27;
-                    if is_yaochuu && !seen[tt as usize] {
-                        seen[tt as usize] = true;
-                        yaochuu_count += 1;
-                    }
-                }
+                let yaochuu_count = (0..34u8)
+                    .filter(|&tt| hist.count(tt) > 0 && is_terminal_tile(tt * 4))
+                    .count();
                 if yaochuu_count >= 9 {
-                    actions.push(Action::new(ActionType::KyushuKyuhai, None, vec![]));
+                    out.push(RawAction::simple(ActionType::KyushuKyuhai, None));
                 }
             }
 
             // 2. Discards
-            for &t in &h14 {
+            for t in hist.iter() {
                 if self.forbidden_discards[pid as usize].contains(&(t / 4)) {
                     continue;
                 }
-                actions.push(Action::new(ActionType::Discard, Some(t), vec![]));
+                out.push(RawAction::simple(ActionType::Discard, Some(t)));
                 // Optimize: only unique tiles? Python does all.
             }
 
             // 3. Tsumo
             if let Some(dt) = self.drawn_tile {
                 if self._check_tsumo(pid, dt) {
-                    actions.push(Action::new(ActionType::Tsumo, None, vec![]));
+                    out.push(RawAction::simple(ActionType::Tsumo, None));
                 }
             }
 
             // 4. Riichi
             // menzen, socre >= 1000, wall >= 18
-            let is_menzen = self.melds[pid as usize].iter().all(|m| !m.opened);
-            if is_menzen && self.scores[pid as usize] >= 1000 && self.wall.len() >= 18 {
-                let mut can_riichi = false;
-                // De-dup tiles to check
-                let mut checked_types = std::collections::HashSet::new();
-                for &t in &h14 {
-                    let tt = t / 4;
-                    if checked_types.contains(&tt) {
-                        continue;
-                    }
-                    checked_types.insert(tt);
-
-                    let mut temp_hand = h14.clone();
-                    if let Some(pos) = temp_hand.iter().position(|&x| x == t) {
-                        temp_hand.remove(pos);
-                    }
-                    let calc = crate::agari_calculator::AgariCalculator::new(
-                        temp_hand,
-                        self.melds[pid as usize].clone(),
-                    );
-                    if calc.is_tenpai() {
-                        can_riichi = true;
-                        break;
-                    }
-                }
-                if can_riichi {
-                    actions.push(Action::new(ActionType::Riichi, None, vec![]));
-                }
+            let is_menzen = melds.iter().all(|m| !m.opened);
+            if is_menzen
+                && self.scores[pid as usize] >= 1000
+                && self.wall.len() >= 18
+                && self._tenpai_table(pid).any()
+            {
+                out.push(RawAction::simple(ActionType::Riichi, None));
             }
 
             // 5. Kan (Ankan / Kakan)
             if self.wall.len() > 14 {
                 // Kakan needs replacement tile? No, triggers rinshan.
                 // Kakan
-                for m in &self.melds[pid as usize] {
+                for m in melds {
                     if m.meld_type == MeldType::Peng {
                         // Check if we have the 4th tile
                         let target_type = m.tiles[0] / 4;
-                        if let Some(&kakan_tile) = h14.iter().find(|&&t| t / 4 == target_type) {
-                            let act =
-                                Action::new(ActionType::Kakan, Some(kakan_tile), m.tiles.clone());
-                            // Ensure we only send 3 tiles?
-                            // m.tiles should be 3.
-                            actions.push(act);
+                        if let Some(kakan_tile) = hist.tids_of(target_type).next() {
+                            // m.tiles holds the 3 Pon tiles.
+                            out.push(RawAction::new(
+                                ActionType::Kakan,
+                                Some(kakan_tile),
+                                &m.tiles,
+                            ));
                         }
                     }
                 }
                 // Ankan
-                let mut counts = HashMap::new();
-                for &t in &h14 {
-                    *counts.entry(t / 4).or_insert(0) += 1;
-                }
-                let mut keys: Vec<u8> = counts.keys().cloned().collect();
-                keys.sort(); // Deterministic order
-                for tt in keys {
-                    if counts[&tt] == 4 {
-                        let tiles: Vec<u8> = h14.iter().cloned().filter(|&t| t / 4 == tt).collect();
-                        actions.push(Action::new(ActionType::Ankan, Some(tiles[0]), tiles));
+                for tt in 0..34u8 {
+                    if hist.count(tt) == 4 {
+                        let mut tiles = [0u8; 4];
+                        for (slot, t) in tiles.iter_mut().zip(hist.tids_of(tt)) {
+                            *slot = t;
+                        }
+                        out.push(RawAction::new(ActionType::Ankan, Some(tiles[0]), &tiles));
                     }
                 }
             }
         } else {
             // WaitResponse
-            actions.push(Action::new(ActionType::Pass, None, vec![]));
-            if let Some(claims) = self.current_claims.get(&pid) {
-                for c in claims {
-                    actions.push(c.clone());
-                }
+            out.push(RawAction::simple(ActionType::Pass, None));
+            let claims = self.claims.get(pid);
+            if !claims.is_empty() {
+                out.extend_from_slice(claims);
             } else if self.pending_kan.is_some() {
                 // Chankan opportunity
                 // If this player is active (WaitResponse), and pending_kan exists,
@@ -3264,11 +3544,9 @@ impl RiichiEnv {
                 // We must verify Ron validity?
                 // step() logic filtered `active_players` using `_check_ron`.
                 // So if we are active, we can Ron.
-                actions.push(Action::new(ActionType::Ron, Some(tile), vec![]));
+                out.push(RawAction::simple(ActionType::Ron, Some(tile)));
             }
         }
-
-        actions
     }
 
     fn _execute_claim(&mut self, pid: u8, action: Action, from_pid: Option<u8>) -> PyResult<()> {
@@ -3348,6 +3626,7 @@ impl RiichiEnv {
                 // Special handling: Action tile removed from hand
                 if let Some(pos) = hand.iter().position(|&x| x == action.tile.unwrap()) {
                     hand.remove(pos);
+                    self.hists[pid as usize].sync_remove(hand, action.tile.unwrap());
                 }
                 // Find existing Pon logic
                 if let Some(pos) = self.melds[pid as usize].iter().position(|m| {
@@ -3475,6 +3754,7 @@ impl RiichiEnv {
             for &c in &consumed {
                 if let Some(pos) = hand.iter().position(|&x| x == c) {
                     hand.remove(pos);
+                    self.hists[pid as usize].sync_remove(hand, c);
                 } else {
                     return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
                         "Tile {} not in hand",
@@ -3532,7 +3812,7 @@ impl RiichiEnv {
     }
 
     fn _check_tsumo(&self, pid: u8, tile: u8) -> bool {
-        let hand = &self.hands[pid as usize];
+        let hand = &self.hists[pid as usize];
         let melds = &self.melds[pid as usize];
 
         // Is first turn?
@@ -3554,15 +3834,9 @@ impl RiichiEnv {
             tsumi: self.honba as u32,
         };
 
-        // Need to construct AgariCalculator
-        // ...
-        // It takes Vec<u8> of hand (13 tiles).
-        // self.hands has 13 tiles? Yes if we haven't added drawn tile yet.
-        // Wait, `_get_legal_actions` adds drawn tile to local `h14`.
-        // `AgariCalculator::new` takes `tiles_136` (hand).
-        // `calc` takes `win_tile`.
-        // So we pass `self.hands[pid]` (13 tiles) to `new`.
-        let calc = crate::agari_calculator::AgariCalculator::new(hand.clone(), melds.clone());
+        // The maintained histogram already holds the drawn tile, so `calc`
+        // sees a 14-tile hand and does not add `tile` again.
+        let calc = crate::agari_calculator::AgariCalculator::from_hist(hand, melds);
         let agari = calc.calc(tile, self.dora_indicators.clone(), vec![], Some(cond));
 
         agari.agari && (agari.yakuman || agari.han >= 1) // Simple check (ignore yaku 31-33 exclusion for now)
@@ -3573,35 +3847,3 @@ fn is_terminal_tile(tile: u8) -> bool {
     let t = tile / 4;
     t == 0 || t == 8 || t == 9 || t == 17 || t == 18 || t >= 26
 }
-
-#[allow(dead_code)]
-fn serde_json_to_pyobject(py: Python<'_>, value: &Value) -> PyResult<Py<PyAny>> {
-    match value {
-        Value::Null => Ok(py.None()),
-        Value::Bool(b) => Ok(b.into_pyobject(py)?.to_owned().unbind().into()),
-        Value::Number(n) => {
-            if let Some(i) = n.as_i64() {
-                Ok(i.into_pyobject(py)?.to_owned().unbind().into())
-            } else if let Some(f) = n.as_f64() {
-                Ok(f.into_pyobject(py)?.to_owned().unbind().into())
-            } else {
-                Ok(n.to_string().into_pyobject(py)?.to_owned().unbind().into())
-            }
-        }
-        Value::String(s) => Ok(s.into_pyobject(py)?.to_owned().unbind().into()),
-        Value::Array(arr) => {
-            let list = pyo3::types::PyList::empty(py);
-            for v in arr {
-                list.append(serde_json_to_pyobject(py, v)?)?;
-            }
-            Ok(list.unbind().into())
-        }
-        Value::Object(obj) => {
-            let dict = pyo3::types::PyDict::new(py);
-            for (k, v) in obj {
-                dict.set_item(k, serde_json_to_pyobject(py, v)?)?;
-            }
-            Ok(dict.unbind().into())
-        }
-    }
-}
@@ -0,0 +1,260 @@
+//! Allocation-free building blocks for legal action generation.
+//!
+//! `RawAction` is a fixed-size `Copy` record (type, tile and up to four consumed
+//! tiles stored inline) that `RiichiEnv::_legal_actions_into` writes into a
+//! caller-owned buffer. Conversion to the `Action` pyclass, which owns a
+//! `Vec` of consumed tiles, happens only where actions cross into Python.
+//!
+//! `TenpaiTable` records, for a 14-tile hand, which discards leave the hand
+//! tenpai. The env computes it once when a seat draws and reuses it for every
+//! legal-action query during that turn. `riichi_options` exposes the same
+//! traversal to Python together with the wait sets.
+
+use numpy::ndarray::{Array2, Array3};
+use numpy::{IntoPyArray, PyReadonlyArray2};
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use pyo3::types::PyDict;
+
+use crate::agari;
+use crate::agari_calculator::AgariCalculator;
+use crate::env::{Action, ActionType};
+use crate::tile_hist::TileHist;
+use crate::types::{Hand, Meld, TILE_MAX};
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub(crate) struct RawAction {
+    pub action_type: ActionType,
+    pub tile: Option<u8>,
+    consumed: [u8; 4],
+    n_consumed: u8,
+}
+
+impl RawAction {
+    #[inline]
+    pub(crate) fn new(action_type: ActionType, tile: Option<u8>, consumed: &[u8]) -> Self {
+        let mut buf = [0u8; 4];
+        let n = consumed.len().min(4);
+        buf[..n].copy_from_slice(&consumed[..n]);
+        Self {
+            action_type,
+            tile,
+            consumed: buf,
+            n_consumed: n as u8,
+        }
+    }
+
+    #[inline]
+    pub(crate) fn simple(action_type: ActionType, tile: Option<u8>) -> Self {
+        Self::new(action_type, tile, &[])
+    }
+
+    pub(crate) fn from_action(action: &Action) -> Self {
+        Self::new(action.action_type, action.tile, &action.consume_tiles)
+    }
+
+    #[inline]
+    pub(crate) fn consumed(&self) -> &[u8] {
+        &self.consumed[..self.n_consumed as usize]
+    }
+
+    pub(crate) fn to_action(self) -> Action {
+        Action::new(self.action_type, self.tile, self.consumed().to_vec())
+    }
+
+    /// Same type and tile, and the same consumed tiles in any order.
+    pub(crate) fn matches(&self, action: &Action) -> bool {
+        if self.action_type != action.action_type
+            || self.tile != action.tile
+            || self.consumed().len() != action.consume_tiles.len()
+        {
+            return false;
+        }
+        let mut ours = self.consumed;
+        ours[..self.n_consumed as usize].sort_unstable();
+        let mut theirs = [0u8; 4];
+        theirs[..action.consume_tiles.len()].copy_from_slice(&action.consume_tiles);
+        theirs[..action.consume_tiles.len()].sort_unstable();
+        ours == theirs
+    }
+}
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub(crate) struct TenpaiTable {
+    hist: TileHist,
+    n_melds: u8,
+    /// Bit `t` is set when discarding a tile of type `t` leaves the hand tenpai.
+    discards: u64,
+}
+
+impl TenpaiTable {
+    pub(crate) fn compute(hist: &TileHist, melds: &[Meld]) -> Self {
+        let mut calc = AgariCalculator::from_hist(hist, melds);
+        let waits = agari::discard_waits(&mut calc.hand);
+        let discards = (0..TILE_MAX)
+            .filter(|&t| waits[t] != 0)
+            .fold(0u64, |acc, t| acc | 1 << t);
+        Self {
+            hist: *hist,
+            n_melds: melds.len() as u8,
+            discards,
+        }
+    }
+
+    /// Whether the table was computed for exactly this hand.
+    #[inline]
+    pub(crate) fn is_for(&self, hist: &TileHist, melds: &[Meld]) -> bool {
+        self.n_melds as usize == melds.len() && self.hist == *hist
+    }
+
+    #[inline]
+    pub(crate) fn any(&self) -> bool {
+        self.discards != 0
+    }
+}
+
+/// Copies of each tile type not accounted for by `seen` and `visible`.
+fn remaining_counts(seen: &[u8; TILE_MAX], visible: Option<&[u8]>) -> [u8; TILE_MAX] {
+    let mut out = [0u8; TILE_MAX];
+    for (t, r) in out.iter_mut().enumerate() {
+        let v = visible.map_or(0, |v| v[t]);
+        *r = 4u8.saturating_sub(seen[t]).saturating_sub(v);
+    }
+    out
+}
+
+/// Tenpai-preserving discards of a hand and the waits each one leaves.
+///
+/// Returns one `(discard, waits, remaining)` tuple per held tile id whose
+/// discard leaves the hand tenpai, in ascending tile-id order. `waits` are
+/// 34-tile types and `remaining[i]` is how many copies of `waits[i]` are not
+/// in the hand (after the discard), in `melds` or in the optional 34-length
+/// `visible` counts (e.g. rivers and dora indicators).
+#[pyfunction]
+#[pyo3(signature = (tiles, melds=vec![], visible=None))]
+pub fn riichi_options(
+    tiles: Vec<u8>,
+    melds: Vec<Meld>,
+    visible: Option<Vec<u8>>,
+) -> PyResult<Vec<(u8, Vec<u8>, Vec<u8>)>> {
+    if tiles.iter().any(|&t| t >= 136) {
+        return Err(PyValueError::new_err("tile ids must be in 0..136"));
+    }
+    if visible.as_ref().is_some_and(|v| v.len() != TILE_MAX) {
+        return Err(PyValueError::new_err("visible must have 34 entries"));
+    }
+    let hist = TileHist::from_tiles(&tiles);
+    let mut calc = AgariCalculator::from_hist(&hist, &melds);
+    let n_tiles: usize = calc.hand.counts.iter().map(|&c| c as usize).sum();
+    if n_tiles + 3 * melds.len() != 14 {
+        return Err(PyValueError::new_err(
+            "hand must hold 14 tiles counting 3 per meld",
+        ));
+    }
+    let waits = agari::discard_waits(&mut calc.hand);
+
+    let mut seen = [0u8; TILE_MAX];
+    for &t in &tiles {
+        seen[t as usize / 4] += 1;
+    }
+    for m in &melds {
+        for &t in m.tiles.iter().filter(|t| !hist.contains(**t)) {
+            seen[t as usize / 4] += 1;
+        }
+    }
+
+    let mut out = Vec::new();
+    for &t in &tiles {
+        let d = t as usize / 4;
+        if waits[d] == 0 {
+            continue;
+        }
+        seen[d] -= 1;
+        let remaining = remaining_counts(&seen, visible.as_deref());
+        seen[d] += 1;
+        let ws: Vec<u8> = (0..TILE_MAX as u8)
+            .filter(|&w| waits[d] & (1 << w) != 0)
+            .collect();
+        let rs = ws.iter().map(|&w| remaining[w as usize]).collect();
+        out.push((t, ws, rs));
+    }
+    out.sort_by_key(|o| o.0);
+    Ok(out)
+}
+
+/// Batched `riichi_options` over 34-type hand counts.
+///
+/// `hands` is an `(N, 34)` uint8 array of concealed tile counts and `visible`
+/// an optional array of the same shape. Returns a dict with `discards`
+/// (`(N, 34)` bool, the tenpai-preserving discard types), `waits`
+/// (`(N, 34, 34)` bool, indexed by discard then wait type) and `remaining`
+/// (`(N, 34, 34)` uint8, unseen copies of each wait, zero elsewhere).
+#[pyfunction]
+#[pyo3(signature = (hands, visible=None))]
+pub fn riichi_options_batch<'py>(
+    py: Python<'py>,
+    hands: PyReadonlyArray2<'py, u8>,
+    visible: Option<PyReadonlyArray2<'py, u8>>,
+) -> PyResult<Bound<'py, PyDict>> {
+    let hands = hands.as_array();
+    let visible = visible.as_ref().map(|v| v.as_array());
+    if hands.ncols() != TILE_MAX {
+        return Err(PyValueError::new_err("hands must have shape (N, 34)"));
+    }
+    if visible.as_ref().is_some_and(|v| v.dim() != hands.dim()) {
+        return Err(PyValueError::new_err(
+            "visible must have the same shape as hands",
+        ));
+    }
+    if hands.iter().any(|&c| c > 4) {
+        return Err(PyValueError::new_err(
+            "hands must hold at most 4 copies of each tile type",
+        ));
+    }
+    if hands
+        .rows()
+        .into_iter()
+        .any(|row| row.iter().map(|&c| c as usize).sum::<usize>() % 3 != 2)
+    {
+        return Err(PyValueError::new_err(
+            "each hand must hold 3k + 2 tiles (14 minus 3 per meld)",
+        ));
+    }
+    let n = hands.nrows();
+    let mut discards = Array2::<bool>::default((n, TILE_MAX));
+    let mut waits = Array3::<bool>::default((n, TILE_MAX, TILE_MAX));
+    let mut remaining = Array3::<u8>::zeros((n, TILE_MAX, TILE_MAX));
+
+    py.detach(|| {
+        let mut vis_row = [0u8; TILE_MAX];
+        for i in 0..n {
+            let mut hand = Hand::default();
+            for (t, c) in hand.counts.iter_mut().enumerate() {
+                *c = hands[[i, t]];
+            }
+            if let Some(v) = &visible {
+                for (t, c) in vis_row.iter_mut().enumerate() {
+                    *c = v[[i, t]];
+                }
+            }
+            let row = agari::discard_waits(&mut hand);
+            let mut seen = hand.counts;
+            for d in (0..TILE_MAX).filter(|&d| row[d] != 0) {
+                discards[[i, d]] = true;
+                seen[d] -= 1;
+                let rem = remaining_counts(&seen, visible.as_ref().map(|_| &vis_row[..]));
+                seen[d] += 1;
+                for w in (0..TILE_MAX).filter(|&w| row[d] & (1 << w) != 0) {
+                    waits[[i, d, w]] = true;
+                    remaining[[i, d, w]] = rem[w];
+                }
+            }
+        }
+    });
+
+    let dict = PyDict::new(py);
+    dict.set_item("discards", discards.into_pyarray(py))?;
+    dict.set_item("waits", waits.into_pyarray(py))?;
+    dict.set_item("remaining", remaining.into_pyarray(py))?;
+    Ok(dict)
+}
@@ -7,51 +7,51 @@ mod tests;
 mod types;
 mod yaku;
 
+mod auto_play;
+mod claims;
 mod env;
+mod legal;
+mod metadata;
+mod mjai_events;
+mod mjai_index;
+mod npy;
 mod parser;
+mod record;
 mod replay;
+mod replay_arrays;
+mod replay_driver;
 mod rule;
+mod snapshot;
+mod stats;
+mod tile_hist;
+mod tile_str;
+mod wall;
+mod worker;
 mod y47_encode;
+mod y47_extract;
 mod y47_schema;
 mod y47_turn;
 
 #[pyfunction]
 fn check_riichi_candidates(tiles_136: Vec<u8>) -> Vec<u32> {
-    let mut candidates = Vec::new();
-    // Convert to 34-tile hand
-    let mut tiles_34 = Vec::with_capacity(tiles_136.len());
-    for t in &tiles_136 {
-        tiles_34.push(t / 4);
+    // Waits of every discard type in one pass; a tile is a candidate when
+    // discarding its type leaves any wait.
+    let mut hand = types::Hand::default();
+    for &t in &tiles_136 {
+        hand.add(t / 4);
     }
-
-    // We iterate each tile in 136-tiles as a discard candidate.
-    // However, since we care about valid discards that lead to Tenpai,
-    // and multiple 136-tiles map to the same 34-tile, we can optimize or check simply.
-    // For exact 136 return, we should check each unique 136 tile in hand.
-
-    // Count uniqueness to avoid redundant checks?
-    // Actually, simple iteration is fine for 14 tiles.
-
-    for (i, &t_discard) in tiles_136.iter().enumerate() {
-        // Construct hand effectively by removing this tile
-        // Re-construct Hand from scratch is safer/easier than modifying mutable hand repeatedly?
-        // Or remove from `tiles_34`.
-
-        let mut hand = types::Hand::default();
-        for (j, &t) in tiles_34.iter().enumerate() {
-            if i != j {
-                hand.add(t);
-            }
-        }
-
-        if agari::is_tenpai(&mut hand) {
-            candidates.push(t_discard as u32);
-        }
-    }
-    candidates
+    let waits = agari::discard_waits(&mut hand);
+    tiles_136
+        .iter()
+        .filter(|&&t| waits.get(t as usize / 4).is_some_and(|&w| w != 0))
+        .map(|&t| t as u32)
+        .collect()
 }
 
-#[pymodule]
+// No global mutable state: every pyclass is `Send + Sync` and keeps its state
+// behind PyO3's per-object borrow checking, so the module can run without the
+// GIL on free-threaded builds.
+#[pymodule(gil_used = false)]
 fn _riichienv(_py: Python, m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_class::<types::Meld>()?;
     m.add_class::<types::MeldType>()?;
@@ -74,10 +74,32 @@ fn _riichienv(_py: Python, m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_class::<env::Observation>()?;
     m.add_class::<env::RiichiEnv>()?;
     m.add_class::<y47_turn::Y47Turn>()?;
+    m.add_class::<replay_driver::KyokuSeeker>()?;
+    m.add_class::<stats::StatsAggregator>()?;
+    m.add_class::<record::GameRecord>()?;
 
     m.add_function(wrap_pyfunction!(score::calculate_score, m)?)?;
     m.add_function(wrap_pyfunction!(parser::parse_hand, m)?)?;
     m.add_function(wrap_pyfunction!(parser::parse_tile, m)?)?;
+    m.add_function(wrap_pyfunction!(tile_str::tid_to_mjai, m)?)?;
+    m.add_function(wrap_pyfunction!(tile_str::tid_to_mpsz, m)?)?;
+    m.add_function(wrap_pyfunction!(tile_str::mjai_to_tid, m)?)?;
+    m.add_function(wrap_pyfunction!(tile_str::mpsz_to_tid, m)?)?;
     m.add_function(wrap_pyfunction!(check_riichi_candidates, m)?)?;
+    m.add_function(wrap_pyfunction!(legal::riichi_options, m)?)?;
+    m.add_function(wrap_pyfunction!(metadata::inject_metadata, m)?)?;
+    m.add_function(wrap_pyfunction!(metadata::inject_metadata_batch, m)?)?;
+    m.add_function(wrap_pyfunction!(legal::riichi_options_batch, m)?)?;
+    m.add_function(wrap_pyfunction!(wall::generate_walls, m)?)?;
+    m.add_function(wrap_pyfunction!(y47_extract::extract_y47_samples, m)?)?;
+
+    // Array sizes of the Y47 encoding, for callers that preallocate buffers.
+    m.add("Y47_NUM_PLAYERS", y47_schema::NUM_PLAYERS)?;
+    m.add("Y47_MAX_STATE_TOKENS", y47_schema::MAX_STATE_TOKENS)?;
+    m.add("Y47_TOKEN_MAIN_DIM", y47_schema::TOKEN_MAIN_DIM)?;
+    m.add("Y47_TOKEN_SCALAR_DIM", y47_schema::TOKEN_SCALAR_DIM)?;
+    m.add("Y47_MAX_ACTIONS", y47_schema::MAX_ACTIONS)?;
+    m.add("Y47_ACTION_MAIN_DIM", y47_schema::ACTION_MAIN_DIM)?;
+    m.add("Y47_MAX_CONSUME_TILES", y47_schema::MAX_CONSUME_TILES)?;
     Ok(())
 }
@@ -0,0 +1,597 @@
+//! Viewer metadata (waits and hand scores) for MJAI logs.
+//!
+//! `inject_metadata` replays a log the way the visualizer's `MetadataInjector`
+//! always has: hands are tracked with tile ids handed out per kyoku in order of
+//! appearance, waits are reported for every tenpai discard and each hora gets
+//! its han, fu, points and yaku. Rather than rewriting the events it returns
+//! the fields to add to each event's `meta`, so the caller keeps its own
+//! objects and key order. `inject_metadata_batch` also takes whole logs as
+//! text or file paths and parses them on its worker threads.
+
+use std::collections::HashMap;
+use std::sync::atomic::{AtomicUsize, Ordering};
+
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use pyo3::types::{PyDict, PyList};
+use serde::Serialize;
+use serde_json::Value;
+
+use crate::agari_calculator::AgariCalculator;
+use crate::mjai_events::{parse_events, value_to_py, MjaiLog};
+use crate::tile_hist::is_red;
+use crate::tile_str::{mjai_name, parse_mjai};
+use crate::types::{Conditions, Meld, MeldType, Wind};
+use crate::worker::catch_panic;
+
+const WINDS: [Wind; 4] = [Wind::East, Wind::South, Wind::West, Wind::North];
+
+#[derive(Debug, Clone, Serialize)]
+struct Score {
+    han: u32,
+    fu: u32,
+    points: String,
+    yaku: Vec<u32>,
+}
+
+#[derive(Debug, Clone, Serialize)]
+struct KyokuResult {
+    actor: Value,
+    target: Value,
+    score: Score,
+}
+
+/// Fields added to one event's `meta`.
+#[derive(Debug, Default, Serialize)]
+struct Meta {
+    #[serde(skip_serializing_if = "Option::is_none")]
+    waits: Option<Vec<&'static str>>,
+    #[serde(skip_serializing_if = "Option::is_none")]
+    score: Option<Score>,
+    #[serde(skip_serializing_if = "Option::is_none")]
+    results: Option<Vec<KyokuResult>>,
+}
+
+#[derive(Default)]
+struct Injector {
+    hands: [Vec<u8>; 4],
+    melds: [Vec<Meld>; 4],
+    dora_markers: Vec<u8>,
+    round_wind: i64,
+    oya: i64,
+    riichi_declared: [bool; 4],
+    tile_counts: HashMap<u8, u8>,
+    kyoku_results: Vec<KyokuResult>,
+    last_tile: Option<String>,
+    last_tid: Option<u8>,
+    ippatsu_eligible: [bool; 4],
+    just_reached: [bool; 4],
+    is_rinshan: bool,
+    is_chankan: bool,
+    first_round: bool,
+    any_melds: bool,
+}
+
+fn tile(s: &str) -> Result<u8, String> {
+    parse_mjai(s).ok_or_else(|| format!("invalid MJAI tile: {:?}", s))
+}
+
+fn field<'a>(ev: &'a Value, key: &str) -> Result<&'a Value, String> {
+    ev.get(key)
+        .ok_or_else(|| format!("{} event without {:?}", ev["type"], key))
+}
+
+fn str_field<'a>(ev: &'a Value, key: &str) -> Result<&'a str, String> {
+    field(ev, key)?
+        .as_str()
+        .ok_or_else(|| format!("{:?} of {} is not a string", key, ev["type"]))
+}
+
+fn str_list<'a>(ev: &'a Value, key: &str) -> Result<Vec<&'a str>, String> {
+    field(ev, key)?
+        .as_array()
+        .and_then(|a| a.iter().map(Value::as_str).collect())
+        .ok_or_else(|| format!("{:?} of {} is not a list of tiles", key, ev["type"]))
+}
+
+fn seat(actor: Option<&Value>) -> Result<usize, String> {
+    match actor.and_then(Value::as_u64) {
+        Some(a) if a < 4 => Ok(a as usize),
+        _ => Err(format!("invalid actor: {:?}", actor)),
+    }
+}
+
+fn remove_tile(hand: &mut Vec<u8>, tid: u8) -> bool {
+    match hand.iter().position(|&t| t == tid) {
+        Some(i) => {
+            hand.remove(i);
+            true
+        }
+        None => false,
+    }
+}
+
+impl Injector {
+    /// A fresh id for the next copy of `s` seen this kyoku.
+    fn next_tid(&mut self, s: &str) -> Result<u8, String> {
+        let base = tile(s)?;
+        let cnt = self.tile_counts.entry(base).or_insert(0);
+        let tid = base as usize + *cnt as usize;
+        *cnt = cnt.saturating_add(1);
+        if tid >= 136 {
+            return Err(format!("too many copies of {}", s));
+        }
+        Ok(tid as u8)
+    }
+
+    /// The tile of type `s` in `hand`, preferring the same redness.
+    fn matching_tid(hand: &[u8], s: &str) -> Result<u8, String> {
+        let target = tile(s)?;
+        let mut first = None;
+        for &t in hand {
+            if t / 4 == target / 4 {
+                if is_red(t) == is_red(target) {
+                    return Ok(t);
+                }
+                first.get_or_insert(t);
+            }
+        }
+        Ok(first.unwrap_or(target))
+    }
+
+    /// Takes `tiles` out of `pid`'s hand, minting ids for any it lacks.
+    fn take_tiles(&mut self, pid: usize, tiles: &[&str]) -> Result<Vec<u8>, String> {
+        let mut out = Vec::with_capacity(tiles.len() + 1);
+        for s in tiles {
+            let tid = Self::matching_tid(&self.hands[pid], s)?;
+            if remove_tile(&mut self.hands[pid], tid) {
+                out.push(tid);
+            } else {
+                out.push(self.next_tid(s)?);
+            }
+        }
+        Ok(out)
+    }
+
+    fn waits(&self, pid: usize) -> Vec<&'static str> {
+        let calc = AgariCalculator::new(self.hands[pid].clone(), self.melds[pid].clone());
+        calc.get_waits_u8()
+            .iter()
+            .map(|&t34| mjai_name(t34 * 4))
+            .collect()
+    }
+
+    fn start_kyoku(&mut self, ev: &Value) -> Result<(), String> {
+        self.tile_counts.clear();
+        self.dora_markers = vec![self.next_tid(str_field(ev, "dora_marker")?)?];
+        self.round_wind = match ev.get("bakaze").map(|b| b.as_str()) {
+            None => 0,
+            Some(b) => ["E", "S", "W", "N"]
+                .iter()
+                .position(|&w| Some(w) == b)
+                .unwrap_or(0) as i64,
+        };
+        self.oya = match ev.get("oya") {
+            None => 0,
+            Some(o) => o.as_i64().ok_or("invalid oya")?,
+        };
+        self.riichi_declared = [false; 4];
+        self.hands = Default::default();
+        self.melds = Default::default();
+        self.kyoku_results.clear();
+        self.ippatsu_eligible = [false; 4];
+        self.just_reached = [false; 4];
+        self.is_rinshan = false;
+        self.is_chankan = false;
+        self.first_round = true;
+        self.any_melds = false;
+
+        let tehais = field(ev, "tehais")?
+            .as_array()
+            .ok_or("tehais is not a list")?;
+        for (pid, tehai) in tehais.iter().enumerate() {
+            let tehai = tehai
+                .as_array()
+                .and_then(|t| t.iter().map(Value::as_str).collect::<Option<Vec<_>>>())
+                .ok_or("tehai is not a list of tiles")?;
+            let mut hand = tehai
+                .iter()
+                .map(|s| self.next_tid(s))
+                .collect::<Result<Vec<_>, _>>()?;
+            hand.sort_unstable();
+            if let Some(h) = self.hands.get_mut(pid) {
+                *h = hand;
+            }
+        }
+        Ok(())
+    }
+
+    fn hora(&mut self, ev: &Value) -> Result<Option<Score>, String> {
+        let (Some(actor_v), Some(target_v)) = (
+            ev.get("actor").filter(|v| !v.is_null()),
+            ev.get("target").filter(|v| !v.is_null()),
+        ) else {
+            return Ok(None);
+        };
+        let actor = seat(Some(actor_v))?;
+        let is_tsumo = actor_v == target_v;
+        let pai = match ev.get("pai").and_then(Value::as_str) {
+            Some(p) if !p.is_empty() => Some(p.to_string()),
+            _ => self.last_tile.clone().filter(|p| !p.is_empty()),
+        };
+
+        let win_tile = match (is_tsumo, self.hands[actor].last(), self.last_tid, pai) {
+            (true, Some(&t), _, _) => t,
+            (false, _, Some(t), _) => t,
+            (_, _, _, Some(p)) => self.next_tid(&p)?,
+            _ => 0,
+        };
+
+        let conditions = Conditions {
+            tsumo: is_tsumo,
+            riichi: self.riichi_declared[actor],
+            double_riichi: self.riichi_declared[actor] && self.first_round && !self.any_melds,
+            ippatsu: self.ippatsu_eligible[actor],
+            rinshan: is_tsumo && self.is_rinshan,
+            chankan: !is_tsumo && self.is_chankan,
+            player_wind: WINDS[(actor as i64 - self.oya).rem_euclid(4) as usize],
+            round_wind: WINDS[self.round_wind.rem_euclid(4) as usize],
+            ..Default::default()
+        };
+
+        let ura = match ev.get("ura_markers") {
+            Some(_) => str_list(ev, "ura_markers")?
+                .into_iter()
+                .map(|s| self.next_tid(s))
+                .collect::<Result<Vec<_>, _>>()?,
+            None => vec![],
+        };
+
+        let calc = AgariCalculator::new(self.hands[actor].clone(), self.melds[actor].clone());
+        let res = calc.calc(win_tile, self.dora_markers.clone(), ura, Some(conditions));
+        if !res.agari {
+            return Ok(None);
+        }
+        let points = if !is_tsumo {
+            res.ron_agari.to_string()
+        } else if actor as i64 == self.oya {
+            format!("{} all", res.tsumo_agari_ko)
+        } else {
+            format!("{}/{}", res.tsumo_agari_ko, res.tsumo_agari_oya)
+        };
+        let score = Score {
+            han: res.han,
+            fu: res.fu,
+            points,
+            yaku: res.yaku,
+        };
+        self.kyoku_results.push(KyokuResult {
+            actor: actor_v.clone(),
+            target: target_v.clone(),
+            score: score.clone(),
+        });
+        Ok(Some(score))
+    }
+
+    fn event(&mut self, ev: &Value) -> Result<Meta, String> {
+        let etype = ev
+            .get("type")
+            .ok_or("event without \"type\"")?
+            .as_str()
+            .unwrap_or_default();
+        let actor = ev.get("actor").filter(|v| !v.is_null());
+        let mut meta = Meta::default();
+
+        match etype {
+            "start_kyoku" => self.start_kyoku(ev)?,
+            "tsumo" => {
+                let pid = seat(actor)?;
+                let pai = str_field(ev, "pai")?;
+                self.last_tile = Some(pai.to_string());
+                let tid = self.next_tid(pai)?;
+                self.hands[pid].push(tid);
+                self.is_rinshan = false;
+                self.is_chankan = false;
+            }
+            "dahai" => {
+                let pid = seat(actor)?;
+                let pai = str_field(ev, "pai")?;
+                self.last_tile = Some(pai.to_string());
+                let tid = Self::matching_tid(&self.hands[pid], pai)?;
+                self.last_tid = Some(tid);
+                remove_tile(&mut self.hands[pid], tid);
+
+                let waits = self.waits(pid);
+                if !waits.is_empty() {
+                    meta.waits = Some(waits);
+                }
+                if is_truthy(ev.get("reach")) {
+                    self.riichi_declared[pid] = true;
+                    self.ippatsu_eligible[pid] = true;
+                }
+                if pid == 3 {
+                    self.first_round = false;
+                }
+                if self.just_reached[pid] {
+                    self.just_reached[pid] = false;
+                } else {
+                    self.ippatsu_eligible[pid] = false;
+                }
+            }
+            "reach" => {
+                let pid = seat(actor)?;
+                self.riichi_declared[pid] = true;
+                self.ippatsu_eligible[pid] = true;
+                self.just_reached[pid] = true;
+            }
+            "pon" | "chi" | "daiminkan" => {
+                let pid = seat(actor)?;
+                let mut tiles = self.take_tiles(pid, &str_list(ev, "consumed")?)?;
+                let pai = str_field(ev, "pai")?;
+                let stolen = match self.last_tid {
+                    Some(t) => t,
+                    None => self.next_tid(pai)?,
+                };
+                tiles.push(stolen);
+                tiles.sort_unstable();
+
+                let meld_type = match etype {
+                    "chi" => MeldType::Chi,
+                    "daiminkan" => {
+                        self.is_rinshan = true;
+                        MeldType::Gang
+                    }
+                    _ => MeldType::Peng,
+                };
+                self.melds[pid].push(Meld::new(meld_type, tiles, true));
+                self.any_melds = true;
+                self.ippatsu_eligible = [false; 4];
+            }
+            "kakan" => {
+                let pid = seat(actor)?;
+                let pai = str_field(ev, "pai")?;
+                self.last_tile = Some(pai.to_string());
+                let tid = Self::matching_tid(&self.hands[pid], pai)?;
+                remove_tile(&mut self.hands[pid], tid);
+
+                let melds = &mut self.melds[pid];
+                if let Some(i) = melds
+                    .iter()
+                    .position(|m| m.meld_type == MeldType::Peng && m.tiles[0] / 4 == tid / 4)
+                {
+                    let mut tiles = melds.remove(i).tiles;
+                    tiles.push(tid);
+                    tiles.sort_unstable();
+                    melds.push(Meld::new(MeldType::Addgang, tiles, true));
+                    self.is_rinshan = true;
+                    self.is_chankan = true;
+                }
+                self.any_melds = true;
+                self.ippatsu_eligible = [false; 4];
+            }
+            "ankan" => {
+                let pid = seat(actor)?;
+                let mut tiles = self.take_tiles(pid, &str_list(ev, "consumed")?)?;
+                tiles.sort_unstable();
+                self.melds[pid].push(Meld::new(MeldType::Angang, tiles, false));
+                self.is_rinshan = true;
+                self.ippatsu_eligible = [false; 4];
+            }
+            "dora" => {
+                let tid = self.next_tid(str_field(ev, "dora_marker")?)?;
+                self.dora_markers.push(tid);
+            }
+            "hora" => meta.score = self.hora(ev)?,
+            "end_kyoku" => {
+                if !self.kyoku_results.is_empty() {
+                    meta.results = Some(self.kyoku_results.clone());
+                }
+            }
+            _ => {}
+        }
+        Ok(meta)
+    }
+}
+
+fn is_truthy(v: Option<&Value>) -> bool {
+    match v {
+        None | Some(Value::Null) => false,
+        Some(Value::Bool(b)) => *b,
+        Some(Value::Number(n)) => n.as_f64() != Some(0.0),
+        Some(Value::String(s)) => !s.is_empty(),
+        Some(Value::Array(a)) => !a.is_empty(),
+        Some(Value::Object(o)) => !o.is_empty(),
+    }
+}
+
+impl Score {
+    fn to_py<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let d = PyDict::new(py);
+        d.set_item("han", self.han)?;
+        d.set_item("fu", self.fu)?;
+        d.set_item("points", &self.points)?;
+        d.set_item("yaku", &self.yaku)?;
+        Ok(d)
+    }
+}
+
+impl Meta {
+    fn is_empty(&self) -> bool {
+        self.waits.is_none() && self.score.is_none() && self.results.is_none()
+    }
+
+    /// The fields as a dict, in declaration order.
+    fn to_py<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let d = PyDict::new(py);
+        if let Some(waits) = &self.waits {
+            d.set_item("waits", waits)?;
+        }
+        if let Some(score) = &self.score {
+            d.set_item("score", score.to_py(py)?)?;
+        }
+        if let Some(results) = &self.results {
+            let list = PyList::empty(py);
+            for r in results {
+                let item = PyDict::new(py);
+                item.set_item("actor", value_to_py(py, &r.actor)?)?;
+                item.set_item("target", value_to_py(py, &r.target)?)?;
+                item.set_item("score", r.score.to_py(py)?)?;
+                list.append(item)?;
+            }
+            d.set_item("results", list)?;
+        }
+        Ok(d)
+    }
+}
+
+/// The `meta` fields to add to each event.
+fn inject(events: &[Value]) -> Result<Vec<Meta>, String> {
+    let mut injector = Injector {
+        first_round: true,
+        ..Default::default()
+    };
+    events
+        .iter()
+        .enumerate()
+        .map(|(i, ev)| {
+            injector
+                .event(ev)
+                .map_err(|e| format!("event {}: {}", i, e))
+        })
+        .collect()
+}
+
+/// Adds the fields to the `meta` object of each event, creating it if needed.
+fn merge_meta(events: &mut [Value], metas: Vec<Meta>) -> Result<(), String> {
+    for (ev, meta) in events.iter_mut().zip(metas) {
+        let Some(ev) = ev.as_object_mut() else {
+            continue;
+        };
+        let entry = ev
+            .entry("meta")
+            .or_insert_with(|| Value::Object(Default::default()));
+        if let (Some(obj), Value::Object(fields)) = (
+            entry.as_object_mut(),
+            serde_json::to_value(&meta).map_err(|e| e.to_string())?,
+        ) {
+            obj.extend(fields);
+        }
+    }
+    Ok(())
+}
+
+fn patches_to_py<'py>(py: Python<'py>, metas: &[Meta]) -> PyResult<Bound<'py, PyList>> {
+    let list = PyList::empty(py);
+    for meta in metas {
+        if meta.is_empty() {
+            list.append(py.None())?;
+        } else {
+            list.append(meta.to_py(py)?)?;
+        }
+    }
+    Ok(list)
+}
+
+/// Metadata for one MJAI log (events as dicts or JSON strings): the fields to
+/// add to each event's `meta`, or `None` when there is nothing to add. See
+/// `visualizer.MetadataInjector`.
+#[pyfunction]
+pub fn inject_metadata<'py>(
+    py: Python<'py>,
+    events: Vec<Bound<'py, PyAny>>,
+) -> PyResult<Bound<'py, PyList>> {
+    let events = parse_events(py, events)?;
+    let metas = py
+        .detach(|| inject(&events))
+        .map_err(PyValueError::new_err)?;
+    patches_to_py(py, &metas)
+}
+
+enum Injected {
+    Patches(Vec<Meta>),
+    Events(Vec<Value>),
+}
+
+impl Injected {
+    fn to_py<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyList>> {
+        match self {
+            Injected::Patches(metas) => patches_to_py(py, metas),
+            Injected::Events(events) => {
+                let list = PyList::empty(py);
+                for ev in events {
+                    list.append(value_to_py(py, ev)?)?;
+                }
+                Ok(list)
+            }
+        }
+    }
+}
+
+fn inject_log(log: &MjaiLog) -> Result<Injected, String> {
+    let events = log.load()?;
+    let metas = inject(&events)?;
+    if log.is_events() {
+        return Ok(Injected::Patches(metas));
+    }
+    let mut events = events.into_owned();
+    merge_meta(&mut events, metas)?;
+    Ok(Injected::Events(events))
+}
+
+/// `inject_metadata` for many logs on `num_workers` threads (default: all
+/// cores) without holding the GIL.
+///
+/// A log given as a list of events yields the `meta` fields per event. A log
+/// given as text or a file path is parsed on the worker threads and yields
+/// its events with `meta` already filled in.
+#[pyfunction]
+#[pyo3(signature = (logs, num_workers=None))]
+pub fn inject_metadata_batch<'py>(
+    py: Python<'py>,
+    logs: Vec<Bound<'py, PyAny>>,
+    num_workers: Option<usize>,
+) -> PyResult<Vec<Bound<'py, PyList>>> {
+    let logs = logs
+        .iter()
+        .map(MjaiLog::from_py)
+        .collect::<PyResult<Vec<_>>>()?;
+    let workers = num_workers
+        .unwrap_or_else(|| {
+            std::thread::available_parallelism()
+                .map(|n| n.get())
+                .unwrap_or(1)
+        })
+        .clamp(1, logs.len().max(1));
+    let next = AtomicUsize::new(0);
+    let mut results: Vec<(usize, Result<Injected, String>)> = py.detach(|| {
+        std::thread::scope(|scope| {
+            let handles: Vec<_> = (0..workers)
+                .map(|_| {
+                    scope.spawn(|| {
+                        let mut local = Vec::new();
+                        loop {
+                            let i = next.fetch_add(1, Ordering::Relaxed);
+                            let Some(log) = logs.get(i) else {
+                                break;
+                            };
+                            local.push((i, catch_panic(|| inject_log(log)).and_then(|r| r)));
+                        }
+                        local
+                    })
+                })
+                .collect();
+            handles
+                .into_iter()
+                .flat_map(|h| h.join().expect("metadata worker panicked"))
+                .collect()
+        })
+    });
+    results.sort_unstable_by_key(|(i, _)| *i);
+    results
+        .into_iter()
+        .map(|(i, r)| {
+            let injected = r.map_err(|e| PyValueError::new_err(format!("log {}: {}", i, e)))?;
+            injected.to_py(py)
+        })
+        .collect()
+}
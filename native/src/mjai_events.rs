@@ -0,0 +1,197 @@
+//! MJAI event streams coming from Python: event lists, whole-log text or files.
+//!
+//! Event lists are converted under the GIL. Text and file logs are only
+//! captured there and parsed later with `MjaiLog::load`, so batch functions can
+//! do the parsing on their worker threads.
+
+use std::borrow::Cow;
+use std::io::Read;
+use std::path::{Path, PathBuf};
+
+use flate2::read::GzDecoder;
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use pyo3::types::{PyBool, PyDict, PyFloat, PyInt, PyList, PyString, PyTuple};
+use serde_json::{Map, Number, Value};
+
+/// The JSON value of a dict/list/str/number/bool/None tree, or `None` for
+/// anything `json.dumps` has to handle (e.g. non-string keys).
+fn py_to_value(obj: &Bound<'_, PyAny>) -> Option<Value> {
+    if obj.is_none() {
+        Some(Value::Null)
+    } else if let Ok(s) = obj.cast::<PyString>() {
+        Some(Value::String(s.to_str().ok()?.to_string()))
+    } else if let Ok(b) = obj.cast::<PyBool>() {
+        Some(Value::Bool(b.is_true()))
+    } else if obj.is_instance_of::<PyInt>() {
+        if let Ok(i) = obj.extract::<i64>() {
+            Some(Value::Number(i.into()))
+        } else {
+            obj.extract::<u64>().ok().map(|u| Value::Number(u.into()))
+        }
+    } else if let Ok(f) = obj.cast::<PyFloat>() {
+        Number::from_f64(f.value()).map(Value::Number)
+    } else if let Ok(d) = obj.cast::<PyDict>() {
+        let mut map = Map::new();
+        for (k, v) in d.iter() {
+            let k = k.cast::<PyString>().ok()?.to_str().ok()?.to_string();
+            map.insert(k, py_to_value(&v)?);
+        }
+        Some(Value::Object(map))
+    } else if let Ok(l) = obj.cast::<PyList>() {
+        l.iter()
+            .map(|v| py_to_value(&v))
+            .collect::<Option<_>>()
+            .map(Value::Array)
+    } else if let Ok(t) = obj.cast::<PyTuple>() {
+        t.iter()
+            .map(|v| py_to_value(&v))
+            .collect::<Option<_>>()
+            .map(Value::Array)
+    } else {
+        None
+    }
+}
+
+/// Parses MJAI events given as dicts or JSON strings.
+pub(crate) fn parse_events(py: Python<'_>, events: Vec<Bound<'_, PyAny>>) -> PyResult<Vec<Value>> {
+    let json = py.import("json")?;
+    events
+        .iter()
+        .map(|ev| {
+            if !ev.is_instance_of::<PyString>() {
+                if let Some(v) = py_to_value(ev) {
+                    return Ok(v);
+                }
+            }
+            let s: String = match ev.extract() {
+                Ok(s) => s,
+                Err(_) => json.call_method1("dumps", (ev,))?.extract()?,
+            };
+            serde_json::from_str(&s)
+                .map_err(|e| PyValueError::new_err(format!("Invalid MJAI event: {}", e)))
+        })
+        .collect()
+}
+
+/// Events of a whole log: a JSON array of events, or one event per line.
+pub(crate) fn parse_log_text(text: &str) -> Result<Vec<Value>, String> {
+    if text.trim_start().starts_with('[') {
+        return serde_json::from_str(text).map_err(|e| format!("Invalid MJAI log: {}", e));
+    }
+    text.lines()
+        .enumerate()
+        .filter(|(_, line)| !line.trim().is_empty())
+        .map(|(i, line)| {
+            serde_json::from_str(line)
+                .map_err(|e| format!("line {}: Invalid MJAI event: {}", i + 1, e))
+        })
+        .collect()
+}
+
+/// Events of a (possibly gzipped) JSONL or JSON-array log file.
+pub(crate) fn read_log_file(path: &Path) -> Result<Vec<Value>, String> {
+    let data =
+        std::fs::read(path).map_err(|e| format!("Failed to open {}: {}", path.display(), e))?;
+    let text = if data.starts_with(&[0x1f, 0x8b]) {
+        let mut text = String::new();
+        GzDecoder::new(&data[..])
+            .read_to_string(&mut text)
+            .map_err(|e| format!("Failed to decompress {}: {}", path.display(), e))?;
+        text
+    } else {
+        String::from_utf8(data).map_err(|e| format!("{}: {}", path.display(), e))?
+    };
+    parse_log_text(&text)
+}
+
+/// One MJAI log as passed from Python.
+pub(crate) enum MjaiLog {
+    Events(Vec<Value>),
+    Text(String),
+    Path(PathBuf),
+}
+
+impl MjaiLog {
+    /// A list of events (dicts or JSON strings), the text of a whole log (a
+    /// `str` starting with `[` or `{`) or the path of a log file.
+    pub(crate) fn from_py(obj: &Bound<'_, PyAny>) -> PyResult<Self> {
+        if let Ok(s) = obj.cast::<PyString>() {
+            let s = s.to_str()?;
+            return Ok(if s.trim_start().starts_with(['[', '{']) {
+                MjaiLog::Text(s.to_string())
+            } else {
+                MjaiLog::Path(PathBuf::from(s))
+            });
+        }
+        if let Ok(events) = obj.extract::<Vec<Bound<'_, PyAny>>>() {
+            return parse_events(obj.py(), events).map(MjaiLog::Events);
+        }
+        Ok(MjaiLog::Path(obj.extract::<PathBuf>()?))
+    }
+
+    /// Whether the events came from Python objects rather than text or a file.
+    pub(crate) fn is_events(&self) -> bool {
+        matches!(self, MjaiLog::Events(_))
+    }
+
+    /// The parsed events; text and files are parsed here, without the GIL.
+    pub(crate) fn load(&self) -> Result<Cow<'_, [Value]>, String> {
+        match self {
+            MjaiLog::Events(events) => Ok(Cow::Borrowed(events)),
+            MjaiLog::Text(text) => parse_log_text(text).map(Cow::Owned),
+            MjaiLog::Path(path) => read_log_file(path).map(Cow::Owned),
+        }
+    }
+}
+
+/// Converts a JSON value into the equivalent Python object.
+pub(crate) fn value_to_py<'py>(py: Python<'py>, value: &Value) -> PyResult<Bound<'py, PyAny>> {
+    Ok(match value {
+        Value::Null => py.None().into_bound(py),
+        Value::Bool(b) => PyBool::new(py, *b).to_owned().into_any(),
+        Value::Number(n) => {
+            if let Some(i) = n.as_i64() {
+                i.into_pyobject(py)?.into_any()
+            } else if let Some(u) = n.as_u64() {
+                u.into_pyobject(py)?.into_any()
+            } else {
+                n.as_f64().unwrap_or(f64::NAN).into_pyobject(py)?.into_any()
+            }
+        }
+        Value::String(s) => PyString::new(py, s).into_any(),
+        Value::Array(arr) => {
+            let list = PyList::empty(py);
+            for v in arr {
+                list.append(value_to_py(py, v)?)?;
+            }
+            list.into_any()
+        }
+        Value::Object(obj) => {
+            let dict = PyDict::new(py);
+            for (k, v) in obj {
+                dict.set_item(k, value_to_py(py, v)?)?;
+            }
+            dict.into_any()
+        }
+    })
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn log_text_formats() {
+        let jsonl = "{\"type\":\"start_game\"}\n\n{\"type\":\"end_game\"}\n";
+        let array = "[{\"type\":\"start_game\"},{\"type\":\"end_game\"}]";
+        assert_eq!(
+            parse_log_text(jsonl).unwrap(),
+            parse_log_text(array).unwrap()
+        );
+        assert_eq!(parse_log_text(jsonl).unwrap().len(), 2);
+        assert!(parse_log_text("{\"type\":}")
+            .unwrap_err()
+            .starts_with("line 1"));
+    }
+}
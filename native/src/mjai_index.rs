@@ -0,0 +1,229 @@
+//! Matching MJAI responses against an observation's legal actions.
+//!
+//! Every legal action is reduced once to an `MjaiKey`: the MJAI type, the tile
+//! and the sorted consumed tiles as tile-34 codes with red fives as 34..=36.
+//! A response is parsed into the same codes (`MjaiQuery`), so selecting an
+//! action compares a few bytes per candidate instead of formatting tile
+//! strings.
+
+use pyo3::prelude::*;
+use pyo3::types::PyDict;
+use serde_json::Value;
+
+use crate::env::{Action, ActionType};
+use crate::tile_hist::is_red;
+
+/// Code of a tile string no legal action can have.
+const INVALID: u8 = u8::MAX;
+const MAX_CONSUMED: usize = 4;
+
+const TYPES: [&str; 10] = [
+    "dahai",
+    "chi",
+    "pon",
+    "daiminkan",
+    "ankan",
+    "kakan",
+    "reach",
+    "hora",
+    "none",
+    "ryukyoku",
+];
+
+fn type_code(action_type: ActionType) -> u8 {
+    match action_type {
+        ActionType::Discard => 0,
+        ActionType::Chi => 1,
+        ActionType::Pon => 2,
+        ActionType::Daiminkan => 3,
+        ActionType::Ankan => 4,
+        ActionType::Kakan => 5,
+        ActionType::Riichi => 6,
+        ActionType::Tsumo | ActionType::Ron => 7,
+        ActionType::Pass => 8,
+        ActionType::KyushuKyuhai => 9,
+    }
+}
+
+/// Tile-34 index, with the red fives as 34 (m), 35 (p) and 36 (s).
+#[inline]
+pub(crate) fn tile_code(tid: u8) -> u8 {
+    if is_red(tid) {
+        34 + tid / 36
+    } else {
+        tid / 4
+    }
+}
+
+/// `tile_code` of an MJAI tile string, or `INVALID`.
+pub(crate) fn mjai_code(s: &str) -> u8 {
+    match s.as_bytes() {
+        [b'E'] => 27,
+        [b'S'] => 28,
+        [b'W'] => 29,
+        [b'N'] => 30,
+        [b'P'] => 31,
+        [b'F'] => 32,
+        [b'C'] => 33,
+        &[n @ b'1'..=b'9', suit] | &[n @ b'5', suit, b'r'] => {
+            let base = match suit {
+                b'm' => 0,
+                b'p' => 1,
+                b's' => 2,
+                _ => return INVALID,
+            };
+            if s.len() == 3 {
+                34 + base
+            } else {
+                base * 9 + (n - b'1')
+            }
+        }
+        _ => INVALID,
+    }
+}
+
+/// Sorted tile codes with their count; a count above `MAX_CONSUMED` never
+/// matches.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+struct Consumed {
+    codes: [u8; MAX_CONSUMED],
+    len: u8,
+}
+
+impl Consumed {
+    fn from_codes(codes: impl ExactSizeIterator<Item = u8>) -> Self {
+        let mut out = Consumed {
+            codes: [0; MAX_CONSUMED],
+            len: codes.len().min(u8::MAX as usize) as u8,
+        };
+        if (out.len as usize) <= MAX_CONSUMED {
+            for (slot, c) in out.codes.iter_mut().zip(codes) {
+                *slot = c;
+            }
+            out.codes[..out.len as usize].sort_unstable();
+        }
+        out
+    }
+}
+
+/// A legal action as the fields an MJAI response is compared on.
+#[derive(Debug, Clone, Copy)]
+pub(crate) struct MjaiKey {
+    kind: u8,
+    tile: Option<u8>,
+    /// Tile-less actions whose response may still name a tile.
+    any_pai: bool,
+    consumed: Consumed,
+}
+
+impl MjaiKey {
+    pub(crate) fn new(action: &Action) -> Self {
+        MjaiKey {
+            kind: type_code(action.action_type),
+            tile: action.tile.map(tile_code),
+            any_pai: matches!(
+                action.action_type,
+                ActionType::Riichi
+                    | ActionType::Tsumo
+                    | ActionType::Ron
+                    | ActionType::Ankan
+                    | ActionType::Kakan
+            ),
+            consumed: Consumed::from_codes(action.consume_tiles.iter().map(|&t| tile_code(t))),
+        }
+    }
+
+    fn matches(&self, q: &MjaiQuery) -> bool {
+        if self.kind != q.kind {
+            return false;
+        }
+        if let Some(pai) = q.pai {
+            match self.tile {
+                Some(t) if t != pai => return false,
+                None if !self.any_pai => return false,
+                _ => {}
+            }
+        }
+        match q.consumed {
+            Some(c) => c == self.consumed,
+            None => self.consumed.len == 0,
+        }
+    }
+}
+
+/// The fields of an MJAI response used to pick an action.
+pub(crate) struct MjaiQuery {
+    kind: u8,
+    pai: Option<u8>,
+    consumed: Option<Consumed>,
+}
+
+impl MjaiQuery {
+    fn new(kind: &str, pai: Option<&str>, consumed: Option<Vec<&str>>) -> Self {
+        MjaiQuery {
+            kind: TYPES
+                .iter()
+                .position(|&t| t == kind)
+                .map_or(INVALID, |i| i as u8),
+            pai: pai.map(mjai_code),
+            consumed: consumed.map(|c| Consumed::from_codes(c.into_iter().map(mjai_code))),
+        }
+    }
+
+    /// Reads `type`, `pai` and `consumed`; a `pai` that is not a string or a
+    /// `consumed` that is not a list of strings counts as absent.
+    pub(crate) fn from_dict(resp: &Bound<'_, PyDict>) -> PyResult<Self> {
+        let kind: String = resp
+            .get_item("type")?
+            .ok_or_else(|| pyo3::exceptions::PyKeyError::new_err("missing type"))?
+            .extract()?;
+        let pai: Option<String> = resp.get_item("pai")?.and_then(|v| v.extract().ok());
+        let consumed: Option<Vec<String>> =
+            resp.get_item("consumed")?.and_then(|v| v.extract().ok());
+        Ok(Self::new(
+            &kind,
+            pai.as_deref(),
+            consumed
+                .as_ref()
+                .map(|c| c.iter().map(String::as_str).collect()),
+        ))
+    }
+
+    /// Same as `from_dict` for a JSON object.
+    pub(crate) fn from_json(resp: &str) -> Result<Self, String> {
+        let v: Value = serde_json::from_str(resp).map_err(|e| e.to_string())?;
+        let kind = v
+            .get("type")
+            .and_then(Value::as_str)
+            .ok_or("MJAI response has no string type")?;
+        let consumed = v
+            .get("consumed")
+            .and_then(Value::as_array)
+            .and_then(|c| c.iter().map(Value::as_str).collect::<Option<Vec<&str>>>());
+        Ok(Self::new(
+            kind,
+            v.get("pai").and_then(Value::as_str),
+            consumed,
+        ))
+    }
+
+    /// Index of the first key matching this response.
+    pub(crate) fn select(&self, keys: &[MjaiKey]) -> Option<usize> {
+        keys.iter().position(|k| k.matches(self))
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::parser::tid_to_mjai;
+
+    #[test]
+    fn mjai_code_inverts_tid_to_mjai() {
+        for tid in 0..136u8 {
+            assert_eq!(mjai_code(&tid_to_mjai(tid)), tile_code(tid), "tid {}", tid);
+        }
+        assert_eq!(mjai_code("0m"), INVALID);
+        assert_eq!(mjai_code("5zr"), INVALID);
+    }
+}
@@ -0,0 +1,174 @@
+//! Minimal writers for NumPy `.npy` arrays and `.npz` archives.
+//!
+//! Only what the sample extractor needs: C-ordered little-endian arrays of a few
+//! dtypes, and zip archives without zip64 (each member and the archive must stay
+//! under 4 GiB).
+
+use flate2::write::DeflateEncoder;
+use flate2::{Compression, Crc};
+use std::fs::File;
+use std::io::{self, BufWriter, Write};
+use std::path::Path;
+
+pub(crate) trait NpyElement: Copy {
+    const DESCR: &'static str;
+    fn extend_le(values: &[Self], out: &mut Vec<u8>);
+}
+
+impl NpyElement for i64 {
+    const DESCR: &'static str = "<i8";
+    fn extend_le(values: &[Self], out: &mut Vec<u8>) {
+        out.reserve(values.len() * 8);
+        for v in values {
+            out.extend_from_slice(&v.to_le_bytes());
+        }
+    }
+}
+
+impl NpyElement for f32 {
+    const DESCR: &'static str = "<f4";
+    fn extend_le(values: &[Self], out: &mut Vec<u8>) {
+        out.reserve(values.len() * 4);
+        for v in values {
+            out.extend_from_slice(&v.to_le_bytes());
+        }
+    }
+}
+
+impl NpyElement for bool {
+    const DESCR: &'static str = "|b1";
+    fn extend_le(values: &[Self], out: &mut Vec<u8>) {
+        out.extend(values.iter().map(|&v| v as u8));
+    }
+}
+
+impl NpyElement for u8 {
+    const DESCR: &'static str = "|u1";
+    fn extend_le(values: &[Self], out: &mut Vec<u8>) {
+        out.extend_from_slice(values);
+    }
+}
+
+/// Serializes `data` as a version 1.0 `.npy` file with the given C-order shape.
+pub(crate) fn npy_bytes<T: NpyElement>(shape: &[usize], data: &[T]) -> Vec<u8> {
+    debug_assert_eq!(shape.iter().product::<usize>(), data.len());
+    let shape_str = if shape.len() == 1 {
+        format!("({},)", shape[0])
+    } else {
+        let dims: Vec<String> = shape.iter().map(|d| d.to_string()).collect();
+        format!("({})", dims.join(", "))
+    };
+    let mut header = format!(
+        "{{'descr': '{}', 'fortran_order': False, 'shape': {}, }}",
+        T::DESCR,
+        shape_str
+    );
+    // magic + version + header length, then the header padded to 64 bytes and ended by '\n'.
+    let unpadded = 10 + header.len() + 1;
+    header.push_str(&" ".repeat((64 - unpadded % 64) % 64));
+    header.push('\n');
+
+    let mut out = Vec::with_capacity(10 + header.len() + std::mem::size_of_val(data));
+    out.extend_from_slice(b"\x93NUMPY\x01\x00");
+    out.extend_from_slice(&(header.len() as u16).to_le_bytes());
+    out.extend_from_slice(header.as_bytes());
+    T::extend_le(data, &mut out);
+    out
+}
+
+fn put_u16(out: &mut Vec<u8>, v: u16) {
+    out.extend_from_slice(&v.to_le_bytes());
+}
+
+fn put_u32(out: &mut Vec<u8>, v: u32) {
+    out.extend_from_slice(&v.to_le_bytes());
+}
+
+fn zip_u32(v: usize) -> io::Result<u32> {
+    u32::try_from(v).map_err(|_| {
+        io::Error::new(
+            io::ErrorKind::InvalidData,
+            "npz member exceeds 4 GiB; use a smaller shard size",
+        )
+    })
+}
+
+/// Writes `(name, npy bytes)` pairs as an `.npz` archive readable by `numpy.load`.
+pub(crate) fn write_npz(
+    path: &Path,
+    entries: &[(&str, Vec<u8>)],
+    compress: bool,
+) -> io::Result<()> {
+    // 1980-01-01 00:00 in MS-DOS format; zip has no earlier representable date.
+    const DOS_DATE: u16 = (1 << 5) | 1;
+
+    let mut out = BufWriter::new(File::create(path)?);
+    let mut central = Vec::new();
+    let mut offset = 0usize;
+    for (name, data) in entries {
+        let file_name = format!("{}.npy", name);
+        let mut crc = Crc::new();
+        crc.update(data);
+
+        let deflated;
+        let (method, payload): (u16, &[u8]) = if compress {
+            let mut enc = DeflateEncoder::new(Vec::new(), Compression::default());
+            enc.write_all(data)?;
+            deflated = enc.finish()?;
+            (8, &deflated)
+        } else {
+            (0, data)
+        };
+
+        let mut local = Vec::with_capacity(30 + file_name.len());
+        put_u32(&mut local, 0x0403_4b50);
+        put_u16(&mut local, 20);
+        put_u16(&mut local, 0);
+        put_u16(&mut local, method);
+        put_u16(&mut local, 0);
+        put_u16(&mut local, DOS_DATE);
+        put_u32(&mut local, crc.sum());
+        put_u32(&mut local, zip_u32(payload.len())?);
+        put_u32(&mut local, zip_u32(data.len())?);
+        put_u16(&mut local, file_name.len() as u16);
+        put_u16(&mut local, 0);
+        local.extend_from_slice(file_name.as_bytes());
+
+        put_u32(&mut central, 0x0201_4b50);
+        put_u16(&mut central, 20);
+        put_u16(&mut central, 20);
+        put_u16(&mut central, 0);
+        put_u16(&mut central, method);
+        put_u16(&mut central, 0);
+        put_u16(&mut central, DOS_DATE);
+        put_u32(&mut central, crc.sum());
+        put_u32(&mut central, zip_u32(payload.len())?);
+        put_u32(&mut central, zip_u32(data.len())?);
+        put_u16(&mut central, file_name.len() as u16);
+        put_u16(&mut central, 0);
+        put_u16(&mut central, 0);
+        put_u16(&mut central, 0);
+        put_u16(&mut central, 0);
+        put_u32(&mut central, 0);
+        put_u32(&mut central, zip_u32(offset)?);
+        central.extend_from_slice(file_name.as_bytes());
+
+        out.write_all(&local)?;
+        out.write_all(payload)?;
+        offset += local.len() + payload.len();
+    }
+
+    let mut end = Vec::with_capacity(22);
+    put_u32(&mut end, 0x0605_4b50);
+    put_u16(&mut end, 0);
+    put_u16(&mut end, 0);
+    put_u16(&mut end, entries.len() as u16);
+    put_u16(&mut end, entries.len() as u16);
+    put_u32(&mut end, zip_u32(central.len())?);
+    put_u32(&mut end, zip_u32(offset)?);
+    put_u16(&mut end, 0);
+
+    out.write_all(&central)?;
+    out.write_all(&end)?;
+    out.flush()
+}
@@ -0,0 +1,406 @@
+//! Compact, seed-based game records.
+//!
+//! With a seed, `RiichiEnv` deals every wall from `splitmix64(seed ^ hand_index)`,
+//! so a game is fully determined by its configuration, the reset arguments and
+//! the index of each chosen action in the legal action list. A `GameRecord`
+//! stores exactly that (one byte per decision) and regenerates MJAI logs, Y47
+//! samples or `Kyoku` objects by replaying natively.
+
+use std::collections::HashMap;
+
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use pyo3::types::{PyBytes, PyDict};
+use serde_json::Value;
+
+use crate::env::RiichiEnv;
+use crate::replay::Kyoku;
+use crate::replay_driver::{kyoku_from_mjai, Decision};
+use crate::rule::GameRule;
+use crate::snapshot::{Reader, Snap};
+use crate::wall::WallRng;
+use crate::y47_extract::SampleBuffer;
+
+/// Marks a seat that was asked to act but sent no action in that step.
+pub(crate) const NO_ACTION: u8 = u8::MAX;
+
+const MAGIC: &[u8; 4] = b"RREC";
+const VERSION: u8 = 1;
+const HEADER_LEN: usize = 4 + 1 + 1 + 8 + 1 + 4 + 4 + 4 + 16 + 4;
+
+/// Reset arguments as resolved by `reset()`, so replays do not depend on the
+/// state the env was in before.
+#[derive(Debug, Clone, Copy)]
+pub(crate) struct RecordStart {
+    pub round_wind: u8,
+    pub oya: u8,
+    pub bakaze: u8,
+    pub honba: u8,
+    pub kyotaku: u32,
+    pub scores: [i32; 4],
+}
+
+/// Per-env recording state; restarted by every `reset()`.
+#[derive(Debug, Clone, Default)]
+pub(crate) struct Recorder {
+    start: Option<RecordStart>,
+    seed: Option<u64>,
+    actions: Vec<u8>,
+    error: Option<String>,
+}
+
+impl Recorder {
+    pub(crate) fn restart(&mut self, start: RecordStart, seed: Option<u64>) {
+        *self = Recorder {
+            start: Some(start),
+            seed,
+            actions: Vec::new(),
+            error: None,
+        };
+    }
+
+    pub(crate) fn push(&mut self, indices: Result<Vec<u8>, String>) {
+        match indices {
+            Ok(indices) => self.actions.extend(indices),
+            Err(e) => {
+                self.error.get_or_insert(e);
+            }
+        }
+    }
+
+    pub(crate) fn to_record(
+        &self,
+        game_mode: u8,
+        rule: GameRule,
+        rng: WallRng,
+    ) -> Result<GameRecord, String> {
+        if let Some(e) = &self.error {
+            return Err(format!("episode cannot be recorded: {}", e));
+        }
+        let start = self.start.ok_or("no episode has been recorded yet")?;
+        let seed = self
+            .seed
+            .ok_or("episode is not reproducible: it has no seed or was reset with a custom wall")?;
+        Ok(GameRecord {
+            game_mode,
+            seed,
+            rule,
+            rng,
+            start,
+            actions: self.actions.clone(),
+        })
+    }
+}
+
+/// Rule flags in bits 0-1; bit 2 marks walls shuffled with `rng="xoshiro"`.
+fn flag_bits(rule: &GameRule, rng: WallRng) -> u8 {
+    (rule.allows_ron_on_ankan_for_kokushi_musou as u8)
+        | ((rule.is_kokushi_musou_13machi_double as u8) << 1)
+        | (((rng == WallRng::Xoshiro) as u8) << 2)
+}
+
+impl Snap for RecordStart {
+    fn put(&self, out: &mut Vec<u8>) {
+        self.round_wind.put(out);
+        self.oya.put(out);
+        self.bakaze.put(out);
+        self.honba.put(out);
+        self.kyotaku.put(out);
+        self.scores.put(out);
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        Ok(RecordStart {
+            round_wind: Snap::take(r)?,
+            oya: Snap::take(r)?,
+            bakaze: Snap::take(r)?,
+            honba: Snap::take(r)?,
+            kyotaku: Snap::take(r)?,
+            scores: Snap::take(r)?,
+        })
+    }
+}
+
+impl Snap for Recorder {
+    fn put(&self, out: &mut Vec<u8>) {
+        self.start.put(out);
+        self.seed.put(out);
+        self.actions.put(out);
+        self.error.put(out);
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        Ok(Recorder {
+            start: Snap::take(r)?,
+            seed: Snap::take(r)?,
+            actions: Snap::take(r)?,
+            error: Snap::take(r)?,
+        })
+    }
+}
+
+/// `(game_mode, seed, rule, reset arguments, action indices)` of one episode.
+#[pyclass(module = "riichienv._riichienv")]
+#[derive(Debug, Clone)]
+pub struct GameRecord {
+    #[pyo3(get)]
+    game_mode: u8,
+    #[pyo3(get)]
+    seed: u64,
+    #[pyo3(get)]
+    rule: GameRule,
+    rng: WallRng,
+    start: RecordStart,
+    actions: Vec<u8>,
+}
+
+impl GameRecord {
+    fn encode(&self) -> Vec<u8> {
+        let mut out = Vec::with_capacity(HEADER_LEN + self.actions.len());
+        out.extend_from_slice(MAGIC);
+        out.push(VERSION);
+        out.push(self.game_mode);
+        out.extend_from_slice(&self.seed.to_le_bytes());
+        out.push(flag_bits(&self.rule, self.rng));
+        out.extend_from_slice(&[
+            self.start.round_wind,
+            self.start.oya,
+            self.start.bakaze,
+            self.start.honba,
+        ]);
+        out.extend_from_slice(&self.start.kyotaku.to_le_bytes());
+        for s in self.start.scores {
+            out.extend_from_slice(&s.to_le_bytes());
+        }
+        out.extend_from_slice(&(self.actions.len() as u32).to_le_bytes());
+        out.extend_from_slice(&self.actions);
+        out
+    }
+
+    fn decode(data: &[u8]) -> Result<Self, String> {
+        if data.len() < HEADER_LEN || &data[..4] != MAGIC {
+            return Err("not a game record".to_string());
+        }
+        if data[4] != VERSION {
+            return Err(format!("unsupported game record version: {}", data[4]));
+        }
+        let u32_at = |i: usize| u32::from_le_bytes(data[i..i + 4].try_into().unwrap());
+        let rule = data[14];
+        let mut scores = [0i32; 4];
+        for (k, s) in scores.iter_mut().enumerate() {
+            *s = u32_at(23 + 4 * k) as i32;
+        }
+        let n = u32_at(39) as usize;
+        let actions = &data[HEADER_LEN..];
+        if actions.len() != n {
+            return Err(format!(
+                "game record is truncated: expected {} actions, got {}",
+                n,
+                actions.len()
+            ));
+        }
+        Ok(GameRecord {
+            game_mode: data[5],
+            seed: u64::from_le_bytes(data[6..14].try_into().unwrap()),
+            rule: GameRule {
+                allows_ron_on_ankan_for_kokushi_musou: rule & 1 != 0,
+                is_kokushi_musou_13machi_double: rule & 2 != 0,
+            },
+            rng: if rule & 4 != 0 {
+                WallRng::Xoshiro
+            } else {
+                WallRng::ChaCha
+            },
+            start: RecordStart {
+                round_wind: data[15],
+                oya: data[16],
+                bakaze: data[17],
+                honba: data[18],
+                kyotaku: u32_at(19),
+                scores,
+            },
+            actions: actions.to_vec(),
+        })
+    }
+
+    /// Replays the record on a fresh env; `visit` sees every recorded decision
+    /// before it is applied.
+    pub(crate) fn replay_with<F>(
+        &self,
+        skip_mjai_logging: bool,
+        mut visit: F,
+    ) -> Result<RiichiEnv, String>
+    where
+        F: FnMut(&RiichiEnv, &Decision) -> Result<(), String>,
+    {
+        let s = self.start;
+        let mut env = RiichiEnv::with_config(
+            self.game_mode,
+            skip_mjai_logging,
+            Some(self.seed),
+            Some(s.round_wind),
+            self.rule,
+        );
+        env.wall_rng = self.rng;
+        env._reset_core(
+            Some(s.oya),
+            None,
+            Some(s.bakaze),
+            Some(s.scores.to_vec()),
+            Some(s.honba),
+            Some(s.kyotaku),
+            Some(self.seed),
+        )
+        .map_err(|e| e.to_string())?;
+
+        let mut cursor = 0;
+        let mut idle_steps = 0;
+        while cursor < self.actions.len() {
+            if env.is_done {
+                return Err(format!(
+                    "record continues for {} actions after the game ended",
+                    self.actions.len() - cursor
+                ));
+            }
+            let mut active = env.active_players.clone();
+            active.sort();
+            if active.is_empty() {
+                idle_steps += 1;
+                if idle_steps > 64 {
+                    return Err("replay is stuck with no player to act".to_string());
+                }
+            } else {
+                idle_steps = 0;
+            }
+
+            let mut step = HashMap::new();
+            for pid in active {
+                let idx = *self
+                    .actions
+                    .get(cursor)
+                    .ok_or("record ends in the middle of a step")?;
+                cursor += 1;
+                if idx == NO_ACTION {
+                    continue;
+                }
+                let legal = env._get_legal_actions_internal(pid);
+                let action = legal.get(idx as usize).cloned().ok_or_else(|| {
+                    format!(
+                        "action index {} is out of range for seat {} ({} legal actions)",
+                        idx,
+                        pid,
+                        legal.len()
+                    )
+                })?;
+                visit(
+                    &env,
+                    &Decision {
+                        pid,
+                        legal,
+                        chosen: idx as usize,
+                    },
+                )?;
+                step.insert(pid, action);
+            }
+            env._step_core(step).map_err(|e| e.to_string())?;
+        }
+        Ok(env)
+    }
+}
+
+#[pymethods]
+impl GameRecord {
+    /// Serialized record: a fixed 43-byte header plus one byte per decision.
+    pub fn to_bytes<'py>(&self, py: Python<'py>) -> Bound<'py, PyBytes> {
+        PyBytes::new(py, &self.encode())
+    }
+
+    #[staticmethod]
+    pub fn from_bytes(data: &[u8]) -> PyResult<Self> {
+        Self::decode(data).map_err(PyValueError::new_err)
+    }
+
+    /// Replays the game and returns the env in its final state.
+    #[pyo3(signature = (skip_mjai_logging=false))]
+    pub fn replay(&self, py: Python<'_>, skip_mjai_logging: bool) -> PyResult<RiichiEnv> {
+        py.detach(|| self.replay_with(skip_mjai_logging, |_, _| Ok(())))
+            .map_err(PyValueError::new_err)
+    }
+
+    /// The full MJAI log of the game, as `RiichiEnv.mjai_log` would return it.
+    pub fn to_mjai(&self, py: Python<'_>) -> PyResult<Py<PyAny>> {
+        self.replay(py, false)?.mjai_log(py)
+    }
+
+    /// One `Kyoku` per round, rebuilt from the MJAI log. Win entries carry the
+    /// winner and tile but no hand value.
+    pub fn to_kyokus(&self, py: Python<'_>) -> PyResult<Vec<Kyoku>> {
+        py.detach(|| {
+            let env = self.replay_with(false, |_, _| Ok(()))?;
+            let events = env
+                .mjai_log
+                .iter()
+                .map(|s| serde_json::from_str(s).map_err(|e| e.to_string()))
+                .collect::<Result<Vec<Value>, _>>()?;
+            let starts: Vec<usize> = events
+                .iter()
+                .enumerate()
+                .filter(|(_, ev)| ev.get("type").and_then(Value::as_str) == Some("start_kyoku"))
+                .map(|(i, _)| i)
+                .collect();
+            starts
+                .iter()
+                .enumerate()
+                .map(|(k, _)| {
+                    let end = starts.get(k + 1).copied().unwrap_or(events.len());
+                    kyoku_from_mjai(&events, end).map(|m| m.kyoku)
+                })
+                .collect()
+        })
+        .map_err(PyValueError::new_err)
+    }
+
+    /// Y47 samples for every recorded decision, in the layout of
+    /// `extract_y47_samples` shards (`source` is 0, `kyoku` the env's kyoku index).
+    pub fn to_y47<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let samples = py
+            .detach(|| {
+                let mut samples = SampleBuffer::default();
+                self.replay_with(true, |env, decision| {
+                    samples
+                        .push(env, decision, 0, env.kyoku_idx as i64)
+                        .map_err(|e| e.to_string())
+                })?;
+                Ok::<_, String>(samples)
+            })
+            .map_err(PyValueError::new_err)?;
+        samples.into_pydict(py)
+    }
+
+    /// Wall generator the game was dealt with.
+    #[getter]
+    fn rng(&self) -> &'static str {
+        self.rng.name()
+    }
+
+    fn __len__(&self) -> usize {
+        self.actions.len()
+    }
+
+    fn __reduce__<'py>(
+        slf: &Bound<'py, Self>,
+    ) -> PyResult<(Bound<'py, PyAny>, (Bound<'py, PyBytes>,))> {
+        let from_bytes = slf.get_type().getattr("from_bytes")?;
+        let data = PyBytes::new(slf.py(), &slf.borrow().encode());
+        Ok((from_bytes, (data,)))
+    }
+
+    fn __repr__(&self) -> String {
+        format!(
+            "GameRecord(game_mode={}, seed={}, actions={})",
+            self.game_mode,
+            self.seed,
+            self.actions.len()
+        )
+    }
+}
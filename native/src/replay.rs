@@ -1,5 +1,6 @@
 #![allow(clippy::useless_conversion)]
 use flate2::read::GzDecoder;
+use numpy::IntoPyArray;
 use pyo3::exceptions::PyValueError;
 use pyo3::prelude::*;
 use pyo3::types::{PyDict, PyDictMethods, PyList, PyListMethods};
@@ -10,6 +11,7 @@ use std::fs::File;
 use std::io::BufReader;
 
 use crate::agari_calculator::AgariCalculator;
+use crate::replay_arrays::KyokuColumns;
 use crate::types::{Agari, Conditions, Meld, MeldType};
 
 use std::sync::Arc;
@@ -130,11 +132,18 @@ pub enum RawAction {
         tiles: String,
     },
     #[serde(rename = "Hule")]
-    Hule { hules: Vec<HuleDataRaw> },
+    Hule {
+        hules: Vec<HuleDataRaw>,
+        #[serde(default)]
+        delta_scores: Option<Vec<i32>>,
+    },
     #[serde(rename = "dora")]
     Dora { dora_marker: String },
     #[serde(rename = "NoTile")]
-    NoTile {},
+    NoTile {
+        #[serde(default)]
+        scores: Vec<NoTileScoreRaw>,
+    },
     #[serde(rename = "LiuJu")]
     LiuJu {
         #[serde(rename = "type", default)]
@@ -165,6 +174,12 @@ pub struct HuleDataRaw {
     pub point_zimo_xian: u32,
 }
 
+#[derive(Deserialize, Serialize, Clone, Debug)]
+pub struct NoTileScoreRaw {
+    #[serde(default)]
+    pub delta_scores: Option<Vec<i32>>,
+}
+
 #[derive(Deserialize, Serialize, Clone, Debug)]
 pub struct FanRaw {
     pub id: u32,
@@ -190,31 +205,14 @@ pub struct GameLog {
 
 #[pyclass]
 pub struct ReplayGame {
-    rounds: Vec<Kyoku>,
+    pub(crate) rounds: Vec<Kyoku>,
 }
 
 #[pymethods]
 impl ReplayGame {
     #[staticmethod]
     fn from_json(path: String) -> PyResult<Self> {
-        let file = File::open(&path)
-            .map_err(|e| PyValueError::new_err(format!("Failed to open file: {}", e)))?;
-        let reader = BufReader::with_capacity(65536, file);
-        let mut decoder = GzDecoder::new(reader);
-        let mut buffer = Vec::with_capacity(128 * 1024);
-        use std::io::Read;
-        decoder
-            .read_to_end(&mut buffer)
-            .map_err(|e| PyValueError::new_err(format!("Failed to decompress: {}", e)))?;
-
-        let log: GameLog = serde_json::from_slice(&buffer)
-            .map_err(|e| PyValueError::new_err(format!("Failed to parse JSON: {}", e)))?;
-
-        let mut rounds = Vec::with_capacity(log.rounds.len());
-        for r_raw in log.rounds {
-            rounds.push(Kyoku::from_raw_actions(r_raw));
-        }
-
+        let rounds = Self::read_rounds(&path).map_err(PyValueError::new_err)?;
         Ok(ReplayGame { rounds })
     }
 
@@ -222,6 +220,43 @@ impl ReplayGame {
         self.rounds.len()
     }
 
+    /// All kyokus of the game as NumPy columns; see `Kyoku.to_arrays`.
+    fn to_arrays<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let mut cols = KyokuColumns::default();
+        for kyoku in &self.rounds {
+            cols.push_kyoku(kyoku);
+        }
+        cols.into_pydict(py)
+    }
+
+    /// Reads every game in `paths` and concatenates their columns.
+    ///
+    /// Adds `game_offsets` (length `len(paths) + 1`), indexing the kyoku axis:
+    /// game `g` owns kyokus `game_offsets[g]:game_offsets[g + 1]`.
+    #[staticmethod]
+    fn corpus_to_arrays<'py>(py: Python<'py>, paths: Vec<String>) -> PyResult<Bound<'py, PyDict>> {
+        let (cols, game_offsets) = py
+            .detach(|| {
+                let mut cols = KyokuColumns::default();
+                let mut game_offsets = vec![0i64];
+                for path in &paths {
+                    let rounds = Self::read_rounds(path).map_err(|e| format!("{}: {}", path, e))?;
+                    for kyoku in &rounds {
+                        cols.push_kyoku(kyoku);
+                    }
+                    game_offsets.push(game_offsets[game_offsets.len() - 1] + rounds.len() as i64);
+                }
+                Ok::<_, String>((cols, game_offsets))
+            })
+            .map_err(PyValueError::new_err)?;
+        let dict = cols.into_pydict(py)?;
+        dict.set_item(
+            "game_offsets",
+            numpy::ndarray::Array1::from(game_offsets).into_pyarray(py),
+        )?;
+        Ok(dict)
+    }
+
     fn take_kyokus(slf: Py<Self>, py: Python<'_>) -> PyResult<KyokuIterator> {
         let logs_len = slf.borrow(py).rounds.len();
         Ok(KyokuIterator {
@@ -313,6 +348,29 @@ impl ReplayGame {
     }
 }
 
+impl ReplayGame {
+    /// Reads a gzipped JSON game log into its kyokus without touching Python.
+    pub(crate) fn read_rounds(path: &str) -> Result<Vec<Kyoku>, String> {
+        let file = File::open(path).map_err(|e| format!("Failed to open file: {}", e))?;
+        let reader = BufReader::with_capacity(65536, file);
+        let mut decoder = GzDecoder::new(reader);
+        let mut buffer = Vec::with_capacity(128 * 1024);
+        use std::io::Read;
+        decoder
+            .read_to_end(&mut buffer)
+            .map_err(|e| format!("Failed to decompress: {}", e))?;
+
+        let log: GameLog =
+            serde_json::from_slice(&buffer).map_err(|e| format!("Failed to parse JSON: {}", e))?;
+
+        let mut rounds = Vec::with_capacity(log.rounds.len());
+        for r_raw in log.rounds {
+            rounds.push(Kyoku::from_raw_actions(r_raw));
+        }
+        Ok(rounds)
+    }
+}
+
 #[pyclass]
 pub struct KyokuIterator {
     game: Py<ReplayGame>,
@@ -344,16 +402,18 @@ impl KyokuIterator {
 #[pyclass]
 #[derive(Clone)]
 pub struct Kyoku {
-    _scores: Vec<i32>,
-    doras: Vec<u8>,
-    ura_doras: Vec<u8>,
-    hands: Vec<Vec<u8>>,
-    chang: u8,
-    ju: u8,
-    ben: u8,
-    liqibang: u8,
-    left_tile_count: u8,
-    paishan: Option<String>,
+    pub(crate) _scores: Vec<i32>,
+    pub(crate) doras: Vec<u8>,
+    pub(crate) ura_doras: Vec<u8>,
+    pub(crate) hands: Vec<Vec<u8>>,
+    pub(crate) chang: u8,
+    pub(crate) ju: u8,
+    pub(crate) ben: u8,
+    pub(crate) liqibang: u8,
+    pub(crate) left_tile_count: u8,
+    pub(crate) paishan: Option<String>,
+    /// Score changes at the end of the kyoku, when the source records them.
+    pub(crate) delta_scores: Option<Vec<i32>>,
     pub actions: Arc<[Action]>,
 }
 
@@ -363,6 +423,29 @@ impl Kyoku {
         Ok(AgariContextIterator::new(self.clone()))
     }
 
+    /// Actions and initial state as a dict of NumPy columns.
+    ///
+    /// Per-action columns (one row per action, one per winner for `Hule`):
+    /// `action_type` (code into `Kyoku.ACTION_TYPE_NAMES`), `actor`, `target`
+    /// (discarder of a claimed tile), `tile`, `consumed` (own tiles of a call,
+    /// shape `(n, 4)`), `is_riichi`, `is_double_riichi`, `is_tsumo`, `han` and `fu`.
+    /// Per-kyoku columns, with a leading axis of length 1: `chang`, `ju`, `ben`,
+    /// `liqibang`, `scores` `(1, 4)`, `hands` `(1, 4, 14)`, `doras` and
+    /// `ura_doras` `(1, 5)`, plus `kyoku_offsets` `[0, n]`.
+    ///
+    /// Tiles are canonical 136-ids and `-1` pads missing values.
+    fn to_arrays<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let mut cols = KyokuColumns::default();
+        cols.push_kyoku(self);
+        cols.into_pydict(py)
+    }
+
+    #[classattr]
+    #[allow(non_snake_case)]
+    fn ACTION_TYPE_NAMES() -> Vec<&'static str> {
+        crate::replay_arrays::ACTION_TYPE_NAMES.to_vec()
+    }
+
     fn events(&self, py: Python) -> PyResult<Py<PyAny>> {
         let events = PyList::empty(py);
 
@@ -638,6 +721,27 @@ impl Kyoku {
             paishan = p.clone();
         }
 
+        let mut delta_scores: Option<Vec<i32>> = None;
+        for ma in &raw_actions {
+            let deltas: Vec<&Vec<i32>> = match ma {
+                RawAction::Hule {
+                    delta_scores: Some(d),
+                    ..
+                } => vec![d],
+                RawAction::NoTile { scores } => scores
+                    .iter()
+                    .filter_map(|s| s.delta_scores.as_ref())
+                    .collect(),
+                _ => continue,
+            };
+            for d in deltas {
+                let total = delta_scores.get_or_insert_with(|| vec![0; d.len()]);
+                for (t, v) in total.iter_mut().zip(d) {
+                    *t += v;
+                }
+            }
+        }
+
         let mut actions = Vec::with_capacity(raw_actions.len());
         for ma in raw_actions {
             actions.push(Self::parse_raw_action(ma));
@@ -654,6 +758,7 @@ impl Kyoku {
             liqibang,
             left_tile_count,
             paishan,
+            delta_scores,
             actions: Arc::from(actions),
         }
     }
@@ -753,7 +858,7 @@ impl Kyoku {
                     doras: None, // Will be updated by Dora action or DealTile
                 }
             }
-            RawAction::Hule { hules } => {
+            RawAction::Hule { hules, .. } => {
                 let hules_typed = hules
                     .into_iter()
                     .map(|h| HuleData {
@@ -778,7 +883,7 @@ impl Kyoku {
             RawAction::Dora { dora_marker } => Action::Dora {
                 dora_marker: TileConverter::parse_tile_136(&dora_marker),
             },
-            RawAction::NoTile {} => Action::NoTile,
+            RawAction::NoTile { .. } => Action::NoTile,
             RawAction::LiuJu {
                 lj_type,
                 seat,
@@ -1187,7 +1292,7 @@ impl AgariContext {
     }
 }
 
-struct TileConverter {}
+pub(crate) struct TileConverter {}
 
 impl TileConverter {
     /*
@@ -0,0 +1,288 @@
+//! Columnar NumPy export of replay logs.
+//!
+//! `Kyoku.events()` materialises one dict per action with tile strings; these
+//! columns hold the same information as flat integer arrays so corpus-wide
+//! analysis can stay vectorised. Tiles are the canonical 136-ids used by the
+//! replay parser (see `TileConverter::parse_tile_136`), `-1` marks "none".
+
+use numpy::ndarray::{Array1, Array2, Array3};
+use numpy::IntoPyArray;
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use pyo3::types::PyDict;
+
+use crate::replay::{Action, Kyoku};
+use crate::types::MeldType;
+
+/// Names of the `action_type` codes, indexed by code.
+pub const ACTION_TYPE_NAMES: [&str; 12] = [
+    "discard",
+    "deal",
+    "chi",
+    "pon",
+    "daiminkan",
+    "ankan",
+    "kakan",
+    "dora",
+    "hule",
+    "no_tile",
+    "liuju",
+    "other",
+];
+
+const MAX_CONSUMED: usize = 4;
+const MAX_HAND: usize = 14;
+const MAX_DORA: usize = 5;
+
+fn shape_err(e: impl std::fmt::Display) -> PyErr {
+    PyValueError::new_err(format!("Invalid array shape: {}", e))
+}
+
+fn padded<const N: usize>(tiles: &[u8]) -> [i16; N] {
+    let mut row = [-1i16; N];
+    for (slot, &t) in row.iter_mut().zip(tiles) {
+        *slot = t as i16;
+    }
+    row
+}
+
+/// Action rows plus per-kyoku initial state for any number of kyokus.
+#[derive(Default)]
+pub(crate) struct KyokuColumns {
+    action_type: Vec<u8>,
+    actor: Vec<i8>,
+    target: Vec<i8>,
+    tile: Vec<i16>,
+    consumed: Vec<i16>,
+    is_riichi: Vec<bool>,
+    is_double_riichi: Vec<bool>,
+    is_tsumo: Vec<bool>,
+    han: Vec<i16>,
+    fu: Vec<i16>,
+
+    // One entry per kyoku; `kyoku_offsets` has one extra trailing entry.
+    kyoku_offsets: Vec<i64>,
+    chang: Vec<u8>,
+    ju: Vec<u8>,
+    ben: Vec<u8>,
+    liqibang: Vec<u8>,
+    scores: Vec<i32>,
+    hands: Vec<i16>,
+    doras: Vec<i16>,
+    ura_doras: Vec<i16>,
+}
+
+impl KyokuColumns {
+    fn num_kyokus(&self) -> usize {
+        self.chang.len()
+    }
+
+    #[allow(clippy::too_many_arguments)]
+    fn push_row(
+        &mut self,
+        action_type: u8,
+        actor: Option<usize>,
+        target: Option<usize>,
+        tile: Option<u8>,
+        consumed: &[u8],
+        flags: (bool, bool, bool),
+        han_fu: (u32, u32),
+    ) {
+        self.action_type.push(action_type);
+        self.actor.push(actor.map_or(-1, |s| s as i8));
+        self.target.push(target.map_or(-1, |s| s as i8));
+        self.tile.push(tile.map_or(-1, |t| t as i16));
+        self.consumed
+            .extend_from_slice(&padded::<MAX_CONSUMED>(consumed));
+        self.is_riichi.push(flags.0);
+        self.is_double_riichi.push(flags.1);
+        self.is_tsumo.push(flags.2);
+        self.han.push(han_fu.0 as i16);
+        self.fu.push(han_fu.1 as i16);
+    }
+
+    pub(crate) fn push_kyoku(&mut self, kyoku: &Kyoku) {
+        if self.kyoku_offsets.is_empty() {
+            self.kyoku_offsets.push(0);
+        }
+        self.chang.push(kyoku.chang);
+        self.ju.push(kyoku.ju);
+        self.ben.push(kyoku.ben);
+        self.liqibang.push(kyoku.liqibang);
+        let mut scores = [0i32; 4];
+        for (slot, &s) in scores.iter_mut().zip(&kyoku._scores) {
+            *slot = s;
+        }
+        self.scores.extend_from_slice(&scores);
+        for seat in 0..4 {
+            let hand = kyoku.hands.get(seat).map_or(&[][..], |h| h.as_slice());
+            self.hands.extend_from_slice(&padded::<MAX_HAND>(hand));
+        }
+        self.doras
+            .extend_from_slice(&padded::<MAX_DORA>(&kyoku.doras));
+        self.ura_doras
+            .extend_from_slice(&padded::<MAX_DORA>(&kyoku.ura_doras));
+
+        const NO_FLAGS: (bool, bool, bool) = (false, false, false);
+        for action in kyoku.actions.iter() {
+            match action {
+                Action::DiscardTile {
+                    seat,
+                    tile,
+                    is_liqi,
+                    is_wliqi,
+                    ..
+                } => self.push_row(
+                    0,
+                    Some(*seat),
+                    None,
+                    Some(*tile),
+                    &[],
+                    (*is_liqi || *is_wliqi, *is_wliqi, false),
+                    (0, 0),
+                ),
+                Action::DealTile { seat, tile, .. } => {
+                    self.push_row(1, Some(*seat), None, Some(*tile), &[], NO_FLAGS, (0, 0))
+                }
+                Action::ChiPengGang {
+                    seat,
+                    meld_type,
+                    tiles,
+                    froms,
+                } => {
+                    let code = match meld_type {
+                        MeldType::Chi => 2,
+                        MeldType::Peng => 3,
+                        _ => 4,
+                    };
+                    let mut own = Vec::with_capacity(tiles.len());
+                    let mut claimed = None;
+                    for (&t, &from) in tiles.iter().zip(froms) {
+                        if from == *seat {
+                            own.push(t);
+                        } else {
+                            claimed = Some((t, from));
+                        }
+                    }
+                    self.push_row(
+                        code,
+                        Some(*seat),
+                        claimed.map(|(_, from)| from),
+                        claimed.map(|(t, _)| t),
+                        &own,
+                        NO_FLAGS,
+                        (0, 0),
+                    );
+                }
+                Action::AnGangAddGang {
+                    seat,
+                    meld_type,
+                    tiles,
+                    ..
+                } => {
+                    let code = if *meld_type == MeldType::Angang { 5 } else { 6 };
+                    self.push_row(
+                        code,
+                        Some(*seat),
+                        None,
+                        tiles.first().copied(),
+                        &[],
+                        NO_FLAGS,
+                        (0, 0),
+                    );
+                }
+                Action::Dora { dora_marker } => {
+                    self.push_row(7, None, None, Some(*dora_marker), &[], NO_FLAGS, (0, 0))
+                }
+                Action::Hule { hules } => {
+                    // One row per winner so multiple ron keeps every hand's value.
+                    for h in hules {
+                        self.push_row(
+                            8,
+                            Some(h.seat),
+                            None,
+                            Some(h.hu_tile),
+                            &[],
+                            (false, false, h.zimo),
+                            (h.count, h.fu),
+                        );
+                    }
+                }
+                Action::NoTile => self.push_row(9, None, None, None, &[], NO_FLAGS, (0, 0)),
+                Action::LiuJu { seat, .. } => {
+                    self.push_row(10, Some(*seat), None, None, &[], NO_FLAGS, (0, 0))
+                }
+                Action::Other(_) => self.push_row(11, None, None, None, &[], NO_FLAGS, (0, 0)),
+            }
+        }
+        self.kyoku_offsets.push(self.action_type.len() as i64);
+    }
+
+    /// Moves the columns into a dict of NumPy arrays.
+    pub(crate) fn into_pydict<'py>(self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let n = self.action_type.len();
+        let k = self.num_kyokus();
+        let kyoku_offsets = if self.kyoku_offsets.is_empty() {
+            vec![0]
+        } else {
+            self.kyoku_offsets
+        };
+
+        let dict = PyDict::new(py);
+        dict.set_item(
+            "action_type",
+            Array1::from(self.action_type).into_pyarray(py),
+        )?;
+        dict.set_item("actor", Array1::from(self.actor).into_pyarray(py))?;
+        dict.set_item("target", Array1::from(self.target).into_pyarray(py))?;
+        dict.set_item("tile", Array1::from(self.tile).into_pyarray(py))?;
+        dict.set_item(
+            "consumed",
+            Array2::from_shape_vec((n, MAX_CONSUMED), self.consumed)
+                .map_err(shape_err)?
+                .into_pyarray(py),
+        )?;
+        dict.set_item("is_riichi", Array1::from(self.is_riichi).into_pyarray(py))?;
+        dict.set_item(
+            "is_double_riichi",
+            Array1::from(self.is_double_riichi).into_pyarray(py),
+        )?;
+        dict.set_item("is_tsumo", Array1::from(self.is_tsumo).into_pyarray(py))?;
+        dict.set_item("han", Array1::from(self.han).into_pyarray(py))?;
+        dict.set_item("fu", Array1::from(self.fu).into_pyarray(py))?;
+
+        dict.set_item(
+            "kyoku_offsets",
+            Array1::from(kyoku_offsets).into_pyarray(py),
+        )?;
+        dict.set_item("chang", Array1::from(self.chang).into_pyarray(py))?;
+        dict.set_item("ju", Array1::from(self.ju).into_pyarray(py))?;
+        dict.set_item("ben", Array1::from(self.ben).into_pyarray(py))?;
+        dict.set_item("liqibang", Array1::from(self.liqibang).into_pyarray(py))?;
+        dict.set_item(
+            "scores",
+            Array2::from_shape_vec((k, 4), self.scores)
+                .map_err(shape_err)?
+                .into_pyarray(py),
+        )?;
+        dict.set_item(
+            "hands",
+            Array3::from_shape_vec((k, 4, MAX_HAND), self.hands)
+                .map_err(shape_err)?
+                .into_pyarray(py),
+        )?;
+        dict.set_item(
+            "doras",
+            Array2::from_shape_vec((k, MAX_DORA), self.doras)
+                .map_err(shape_err)?
+                .into_pyarray(py),
+        )?;
+        dict.set_item(
+            "ura_doras",
+            Array2::from_shape_vec((k, MAX_DORA), self.ura_doras)
+                .map_err(shape_err)?
+                .into_pyarray(py),
+        )?;
+        Ok(dict)
+    }
+}
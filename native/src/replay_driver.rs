@@ -0,0 +1,777 @@
+//! Drives a `RiichiEnv` through a logged `Kyoku`.
+//!
+//! Replay logs only carry canonical tile ids (one id per tile kind, plus the red
+//! fives), while the env works on the 136 unique ids. The driver rebuilds a wall
+//! that deals the logged hands and reproduces the logged draws, then feeds each
+//! logged decision back into the env as the matching legal `Action`.
+
+use std::collections::HashMap;
+use std::sync::Arc;
+
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use serde_json::Value;
+
+use crate::env::{Action, ActionType, Phase, RiichiEnv};
+use crate::parser::mjai_to_tid;
+use crate::replay::{Action as LogAction, HuleData, Kyoku, TileConverter};
+use crate::rule::GameRule;
+use crate::types::MeldType;
+
+fn is_red(tile: u8) -> bool {
+    tile == 16 || tile == 52 || tile == 88
+}
+
+/// Whether an env tile id and a canonical log tile are the same kind and redness.
+fn same_tile(tid: u8, canonical: u8) -> bool {
+    tid / 4 == canonical / 4 && is_red(tid) == is_red(canonical)
+}
+
+/// Hands out unique 136-ids for canonical log tiles.
+struct TileAllocator {
+    used: [bool; 136],
+}
+
+impl TileAllocator {
+    fn new() -> Self {
+        TileAllocator { used: [false; 136] }
+    }
+
+    fn alloc(&mut self, canonical: u8) -> Option<u8> {
+        if canonical >= 136 {
+            return None;
+        }
+        let base = (canonical / 4) * 4;
+        let red = is_red(canonical);
+        let tid = (base..base + 4)
+            .find(|&t| !self.used[t as usize] && is_red(t) == red)
+            .or_else(|| (base..base + 4).find(|&t| !self.used[t as usize]))?;
+        self.used[tid as usize] = true;
+        Some(tid)
+    }
+}
+
+/// Rebuilds a 136-tile wall, in `RiichiEnv.reset(wall=...)` order, that deals the
+/// logged starting hands and reproduces every logged draw, dora and ura indicator.
+///
+/// Slots the log never reveals are filled from `paishan` when the source provides
+/// one, otherwise with the remaining tiles in ascending order.
+pub(crate) fn reconstruct_wall(kyoku: &Kyoku) -> Result<Vec<u8>, String> {
+    if kyoku.hands.len() != 4 || kyoku.hands.iter().any(|h| h.len() < 13) {
+        return Err("only 4-player logs with 13-tile starting hands are supported".to_string());
+    }
+    let oya = (kyoku.ju % 4) as usize;
+    let mut slots: [Option<u8>; 136] = [None; 136];
+
+    // 4-4-4-1 deal starting from the dealer, as in `_initialize_round`.
+    for round in 0..3 {
+        for idx in 0..4 {
+            let hand = &kyoku.hands[(idx + oya) % 4];
+            for k in 0..4 {
+                slots[round * 16 + idx * 4 + k] = Some(hand[round * 4 + k]);
+            }
+        }
+    }
+    for idx in 0..4 {
+        slots[48 + idx] = Some(kyoku.hands[(idx + oya) % 4][12]);
+    }
+
+    // Some sources deal the dealer's first draw as a 14th starting tile.
+    let mut live: Vec<u8> = kyoku.hands[oya].iter().skip(13).copied().collect();
+    let mut rinshan = Vec::new();
+    let mut doras = kyoku.doras.clone();
+    let mut uras = kyoku.ura_doras.clone();
+    let mut after_kan = false;
+    for action in kyoku.actions.iter() {
+        match action {
+            LogAction::DealTile { tile, doras: d, .. } => {
+                if after_kan {
+                    rinshan.push(*tile);
+                } else {
+                    live.push(*tile);
+                }
+                after_kan = false;
+                if let Some(d) = d {
+                    if d.len() > doras.len() {
+                        doras = d.clone();
+                    }
+                }
+            }
+            LogAction::DiscardTile { doras: Some(d), .. } => {
+                if d.len() > doras.len() {
+                    doras = d.clone();
+                }
+            }
+            LogAction::ChiPengGang {
+                meld_type: MeldType::Gang,
+                ..
+            }
+            | LogAction::AnGangAddGang { .. } => after_kan = true,
+            LogAction::Dora { dora_marker } => doras.push(*dora_marker),
+            LogAction::Hule { hules } => {
+                for h in hules {
+                    if let Some(ld) = &h.li_doras {
+                        if ld.len() > uras.len() {
+                            uras = ld.clone();
+                        }
+                    }
+                }
+            }
+            _ => {}
+        }
+    }
+
+    if rinshan.len() > 4 {
+        return Err(format!("too many rinshan draws: {}", rinshan.len()));
+    }
+    if live.len() > 70 - rinshan.len() {
+        return Err(format!("too many live wall draws: {}", live.len()));
+    }
+    for (j, &t) in live.iter().enumerate() {
+        slots[52 + j] = Some(t);
+    }
+    for (k, &t) in rinshan.iter().enumerate() {
+        slots[135 - k] = Some(t);
+    }
+    for (i, &t) in doras.iter().take(5).enumerate() {
+        slots[131 - 2 * i] = Some(t);
+    }
+    for (i, &t) in uras.iter().take(5).enumerate() {
+        slots[130 - 2 * i] = Some(t);
+    }
+
+    let mut alloc = TileAllocator::new();
+    let mut wall: Vec<Option<u8>> = vec![None; 136];
+    for (pos, slot) in slots.iter().enumerate() {
+        if let Some(c) = *slot {
+            let tid = alloc.alloc(c).ok_or_else(|| {
+                format!(
+                    "tile {} appears more than four times in the log",
+                    TileConverter::to_string(c)
+                )
+            })?;
+            wall[pos] = Some(tid);
+        }
+    }
+    if let Some(paishan) = &kyoku.paishan {
+        for (pos, slot) in wall.iter_mut().enumerate() {
+            if slot.is_some() {
+                continue;
+            }
+            if let Some(chunk) = paishan.get(pos * 2..pos * 2 + 2) {
+                *slot = alloc.alloc(TileConverter::parse_tile_136(chunk));
+            }
+        }
+    }
+    let mut rest = (0u8..136).filter(|&t| !alloc.used[t as usize]);
+    wall.into_iter()
+        .map(|slot| {
+            slot.or_else(|| rest.next())
+                .ok_or_else(|| "ran out of tiles while filling the wall".to_string())
+        })
+        .collect()
+}
+
+fn find_discard(legal: &[Action], tile: u8, drawn: Option<u8>) -> Option<usize> {
+    let mut found = None;
+    for (i, a) in legal.iter().enumerate() {
+        if a.action_type != ActionType::Discard {
+            continue;
+        }
+        if let Some(t) = a.tile {
+            if same_tile(t, tile) {
+                // The log does not say which copy left the hand; prefer tsumogiri.
+                if drawn == Some(t) {
+                    return Some(i);
+                }
+                found.get_or_insert(i);
+            }
+        }
+    }
+    found
+}
+
+fn find_claim(legal: &[Action], kind: ActionType, own: &[u8]) -> Option<usize> {
+    legal.iter().position(|a| {
+        if a.action_type != kind || a.consume_tiles.len() != own.len() {
+            return false;
+        }
+        let mut want = own.to_vec();
+        a.consume_tiles.iter().all(|&t| {
+            if let Some(pos) = want.iter().position(|&c| same_tile(t, c)) {
+                want.remove(pos);
+                true
+            } else {
+                false
+            }
+        })
+    })
+}
+
+fn find_kind(legal: &[Action], kind: ActionType) -> Option<usize> {
+    legal.iter().position(|a| a.action_type == kind)
+}
+
+/// One logged decision: the acting seat, its legal actions and the logged choice.
+pub(crate) struct Decision {
+    pub pid: u8,
+    pub legal: Vec<Action>,
+    pub chosen: usize,
+}
+
+/// Replays a kyoku decision by decision on a fresh env with MJAI logging disabled.
+#[derive(Clone)]
+pub(crate) struct KyokuDriver {
+    pub env: RiichiEnv,
+    actions: Arc<[LogAction]>,
+    cursor: usize,
+}
+
+impl KyokuDriver {
+    pub(crate) fn new(kyoku: &Kyoku, rule: GameRule) -> Result<Self, String> {
+        let wall = reconstruct_wall(kyoku)?;
+        let mut scores = [25000; 4];
+        if kyoku._scores.len() >= 4 {
+            scores.copy_from_slice(&kyoku._scores[..4]);
+        }
+        let mut env = RiichiEnv::with_config(0, true, None, Some(kyoku.chang), rule);
+        env._initialize_round(
+            kyoku.ju % 4,
+            kyoku.chang,
+            kyoku.ben,
+            kyoku.liqibang as u32,
+            Some(wall),
+            Some(scores),
+        );
+        env._step_core(HashMap::new()).map_err(|e| e.to_string())?;
+        Ok(KyokuDriver {
+            env,
+            actions: kyoku.actions.clone(),
+            cursor: 0,
+        })
+    }
+
+    /// Whether the logged kyoku has been played out.
+    pub(crate) fn finished(&self) -> bool {
+        self.env.is_done
+            || self.env.needs_initialize_next_round
+            || self.env.active_players.is_empty()
+    }
+
+    /// Number of log entries consumed so far.
+    pub(crate) fn cursor(&self) -> usize {
+        self.cursor
+    }
+
+    /// Steps over log entries the env performs by itself (draws, dora reveals).
+    fn skip_passive(&mut self) {
+        while let Some(LogAction::DealTile { .. } | LogAction::Dora { .. } | LogAction::Other(_)) =
+            self.actions.get(self.cursor)
+        {
+            self.cursor += 1;
+        }
+    }
+
+    /// Replays up to `steps` decisions; returns how many were replayed before the
+    /// kyoku ended.
+    pub(crate) fn advance(&mut self, steps: usize) -> Result<usize, String> {
+        for done in 0..steps {
+            if !self.next_step(|_, _| Ok(()))? {
+                return Ok(done);
+            }
+        }
+        Ok(steps)
+    }
+
+    /// Resolves the next decision point with the logged actions and steps the env.
+    ///
+    /// `visit` sees every decision while the env still shows the state the player
+    /// decided in. Returns `Ok(false)` once the kyoku is over.
+    pub(crate) fn next_step<F>(&mut self, mut visit: F) -> Result<bool, String>
+    where
+        F: FnMut(&RiichiEnv, &Decision) -> Result<(), String>,
+    {
+        if self.finished() {
+            return Ok(false);
+        }
+        self.skip_passive();
+        let decisions = match self.env.phase {
+            Phase::WaitAct => vec![self.resolve_act()?],
+            Phase::WaitResponse => self.resolve_response()?,
+        };
+        let mut step_actions = HashMap::new();
+        for d in &decisions {
+            visit(&self.env, d)?;
+            step_actions.insert(d.pid, d.legal[d.chosen].clone());
+        }
+        self.env
+            ._step_core(step_actions)
+            .map_err(|e| e.to_string())?;
+        Ok(true)
+    }
+
+    fn resolve_act(&mut self) -> Result<Decision, String> {
+        let pid = self.env.current_player;
+        let p = pid as usize;
+        let legal = self.env._get_legal_actions_internal(pid);
+        let entry = self
+            .actions
+            .get(self.cursor)
+            .ok_or_else(|| format!("log ended while seat {} was to act", pid))?;
+
+        let (chosen, advance) = match entry {
+            LogAction::DiscardTile {
+                seat,
+                tile,
+                is_liqi,
+                is_wliqi,
+                ..
+            } if *seat == p => {
+                if (*is_liqi || *is_wliqi)
+                    && !self.env.riichi_stage[p]
+                    && !self.env.riichi_declared[p]
+                {
+                    // The declaration is its own decision; the discard follows.
+                    (find_kind(&legal, ActionType::Riichi), false)
+                } else {
+                    (find_discard(&legal, *tile, self.env.drawn_tile), true)
+                }
+            }
+            LogAction::AnGangAddGang {
+                seat,
+                meld_type,
+                tile_raw_id,
+                ..
+            } if *seat == p => {
+                let kind = if *meld_type == MeldType::Angang {
+                    ActionType::Ankan
+                } else {
+                    ActionType::Kakan
+                };
+                let chosen = legal.iter().position(|a| {
+                    a.action_type == kind && a.tile.is_some_and(|t| t / 4 == *tile_raw_id)
+                });
+                (chosen, true)
+            }
+            LogAction::Hule { hules } if hules.iter().any(|h| h.zimo && h.seat == p) => {
+                (find_kind(&legal, ActionType::Tsumo), true)
+            }
+            LogAction::LiuJu { .. } => (find_kind(&legal, ActionType::KyushuKyuhai), true),
+            other => {
+                return Err(format!(
+                    "seat {} is to act but the log has {:?}",
+                    pid, other
+                ))
+            }
+        };
+        let chosen =
+            chosen.ok_or_else(|| format!("logged {:?} is not legal for seat {}", entry, pid))?;
+        if advance {
+            self.cursor += 1;
+        }
+        Ok(Decision { pid, legal, chosen })
+    }
+
+    fn resolve_response(&mut self) -> Result<Vec<Decision>, String> {
+        let mut active = self.env.active_players.clone();
+        active.sort();
+        let entry = self.actions.get(self.cursor);
+
+        let mut claimed = false;
+        let mut decisions = Vec::with_capacity(active.len());
+        for pid in active {
+            let p = pid as usize;
+            let legal = self.env._get_legal_actions_internal(pid);
+            let chosen = match entry {
+                Some(LogAction::ChiPengGang {
+                    seat,
+                    meld_type,
+                    tiles,
+                    froms,
+                }) if *seat == p => {
+                    claimed = true;
+                    let kind = match meld_type {
+                        MeldType::Chi => ActionType::Chi,
+                        MeldType::Peng => ActionType::Pon,
+                        _ => ActionType::Daiminkan,
+                    };
+                    let own: Vec<u8> = tiles
+                        .iter()
+                        .zip(froms.iter())
+                        .filter(|(_, &from)| from == p)
+                        .map(|(&t, _)| t)
+                        .collect();
+                    find_claim(&legal, kind, &own)
+                }
+                Some(LogAction::Hule { hules }) if hules.iter().any(|h| !h.zimo && h.seat == p) => {
+                    claimed = true;
+                    find_kind(&legal, ActionType::Ron)
+                }
+                _ => find_kind(&legal, ActionType::Pass),
+            };
+            let chosen = chosen
+                .ok_or_else(|| format!("logged {:?} is not legal for seat {}", entry, pid))?;
+            decisions.push(Decision { pid, legal, chosen });
+        }
+
+        if claimed {
+            self.cursor += 1;
+        } else if let Some(e @ (LogAction::ChiPengGang { .. } | LogAction::Hule { .. })) = entry {
+            return Err(format!("logged {:?} was not offered by the env", e));
+        }
+        Ok(decisions)
+    }
+}
+
+/// Replays the first `step` decisions of `kyoku` and returns the env at that point.
+pub(crate) fn seek_kyoku(kyoku: &Kyoku, step: usize, rule: GameRule) -> Result<RiichiEnv, String> {
+    let mut driver = KyokuDriver::new(kyoku, rule)?;
+    let done = driver.advance(step)?;
+    if done < step {
+        return Err(format!(
+            "step {} is past the end of the kyoku ({} steps)",
+            step, done
+        ));
+    }
+    Ok(driver.env)
+}
+
+fn mjai_tile(v: &Value) -> Result<u8, String> {
+    let s = v
+        .as_str()
+        .ok_or_else(|| format!("expected a tile string, got {}", v))?;
+    if s == "?" {
+        return Err("hidden tiles cannot be replayed; pass the unfiltered log".to_string());
+    }
+    mjai_to_tid(s).ok_or_else(|| format!("invalid MJAI tile: {}", s))
+}
+
+fn mjai_tiles(v: Option<&Value>) -> Result<Vec<u8>, String> {
+    match v.and_then(Value::as_array) {
+        Some(arr) => arr.iter().map(mjai_tile).collect(),
+        None => Ok(Vec::new()),
+    }
+}
+
+fn mjai_seat(ev: &Value, key: &str) -> Result<usize, String> {
+    ev.get(key)
+        .and_then(Value::as_u64)
+        .filter(|&s| s < 4)
+        .map(|s| s as usize)
+        .ok_or_else(|| format!("event is missing a valid '{}': {}", key, ev))
+}
+
+/// A `Kyoku` rebuilt from the MJAI events of one round, plus how many of its
+/// log entries correspond to the events before the seek point.
+pub(crate) struct MjaiKyoku {
+    pub kyoku: Kyoku,
+    pub prefix: usize,
+    /// The seek point falls between a `reach` and its discard.
+    pub pending_reach: Option<u8>,
+}
+
+/// Converts the round containing event `upto - 1` of an MJAI stream into a `Kyoku`.
+///
+/// The whole round (up to its `end_kyoku`) is used to rebuild the wall; only the
+/// events before `upto` count towards the seek point.
+pub(crate) fn kyoku_from_mjai(events: &[Value], upto: usize) -> Result<MjaiKyoku, String> {
+    let upto = upto.min(events.len());
+    let start = events[..upto]
+        .iter()
+        .rposition(|ev| ev.get("type").and_then(Value::as_str) == Some("start_kyoku"))
+        .ok_or_else(|| format!("no start_kyoku before event {}", upto))?;
+    let head = &events[start];
+
+    let bakaze = head.get("bakaze").and_then(Value::as_str).unwrap_or("E");
+    let chang = match bakaze {
+        "E" => 0,
+        "S" => 1,
+        "W" => 2,
+        "N" => 3,
+        _ => return Err(format!("invalid bakaze: {}", bakaze)),
+    };
+    let oya = match head.get("oya").and_then(Value::as_u64) {
+        Some(o) => o as u8,
+        None => head
+            .get("kyoku")
+            .and_then(Value::as_u64)
+            .map(|k| (k.max(1) - 1) as u8)
+            .unwrap_or(0),
+    };
+    let honba = head.get("honba").and_then(Value::as_u64).unwrap_or(0) as u8;
+    let kyotaku = head.get("kyotaku").and_then(Value::as_u64).unwrap_or(0) as u8;
+    let scores: Vec<i32> = head
+        .get("scores")
+        .and_then(Value::as_array)
+        .map(|a| {
+            a.iter()
+                .filter_map(Value::as_i64)
+                .map(|s| s as i32)
+                .collect()
+        })
+        .unwrap_or_else(|| vec![25000; 4]);
+    let hands = head
+        .get("tehais")
+        .and_then(Value::as_array)
+        .ok_or("start_kyoku is missing 'tehais'")?
+        .iter()
+        .map(|h| mjai_tiles(Some(h)))
+        .collect::<Result<Vec<_>, _>>()?;
+    let doras = match head.get("dora_marker") {
+        Some(d) => vec![mjai_tile(d)?],
+        None => Vec::new(),
+    };
+
+    let mut actions: Vec<LogAction> = Vec::new();
+    let mut cut = None;
+    let mut reach = [false; 4];
+    let mut last_type = "start_kyoku";
+    let mut last_actor = oya as usize;
+    for (idx, ev) in events.iter().enumerate().skip(start + 1) {
+        if idx == upto {
+            cut = Some((actions.len(), (0..4u8).find(|&s| reach[s as usize])));
+        }
+        let ty = ev.get("type").and_then(Value::as_str).unwrap_or("");
+        let action = match ty {
+            "start_kyoku" | "end_kyoku" | "end_game" => break,
+            "tsumo" => Some(LogAction::DealTile {
+                seat: mjai_seat(ev, "actor")?,
+                tile: mjai_tile(ev.get("pai").unwrap_or(&Value::Null))?,
+                doras: None,
+                left_tile_count: None,
+            }),
+            "dahai" => {
+                let seat = mjai_seat(ev, "actor")?;
+                let is_liqi = std::mem::take(&mut reach[seat]);
+                Some(LogAction::DiscardTile {
+                    seat,
+                    tile: mjai_tile(ev.get("pai").unwrap_or(&Value::Null))?,
+                    is_liqi,
+                    is_wliqi: false,
+                    doras: None,
+                })
+            }
+            "reach" => {
+                reach[mjai_seat(ev, "actor")?] = true;
+                None
+            }
+            "chi" | "pon" | "daiminkan" => {
+                let seat = mjai_seat(ev, "actor")?;
+                let mut tiles = mjai_tiles(ev.get("consumed"))?;
+                let mut froms = vec![seat; tiles.len()];
+                tiles.push(mjai_tile(ev.get("pai").unwrap_or(&Value::Null))?);
+                froms.push(mjai_seat(ev, "target")?);
+                let meld_type = match ty {
+                    "chi" => MeldType::Chi,
+                    "pon" => MeldType::Peng,
+                    _ => MeldType::Gang,
+                };
+                Some(LogAction::ChiPengGang {
+                    seat,
+                    meld_type,
+                    tiles,
+                    froms,
+                })
+            }
+            "ankan" | "kakan" => {
+                let seat = mjai_seat(ev, "actor")?;
+                let (meld_type, tile) = if ty == "ankan" {
+                    let consumed = mjai_tiles(ev.get("consumed"))?;
+                    let tile = *consumed.first().ok_or("ankan without consumed tiles")?;
+                    (MeldType::Angang, tile)
+                } else {
+                    (
+                        MeldType::Addgang,
+                        mjai_tile(ev.get("pai").unwrap_or(&Value::Null))?,
+                    )
+                };
+                Some(LogAction::AnGangAddGang {
+                    seat,
+                    meld_type,
+                    tiles: vec![tile],
+                    tile_raw_id: tile / 4,
+                    doras: None,
+                })
+            }
+            "dora" => Some(LogAction::Dora {
+                dora_marker: mjai_tile(ev.get("dora_marker").unwrap_or(&Value::Null))?,
+            }),
+            "hora" => {
+                let seat = mjai_seat(ev, "actor")?;
+                let target = mjai_seat(ev, "target")?;
+                let hule = HuleData {
+                    seat,
+                    hu_tile: match ev.get("pai") {
+                        Some(p) => mjai_tile(p)?,
+                        None => 0,
+                    },
+                    zimo: seat == target,
+                    count: 0,
+                    fu: 0,
+                    fans: Vec::new(),
+                    li_doras: Some(mjai_tiles(ev.get("ura_markers"))?),
+                    yiman: false,
+                    point_rong: 0,
+                    point_zimo_qin: 0,
+                    point_zimo_xian: 0,
+                };
+                // Multiple ron on one discard become one entry, as in MJSoul logs.
+                if last_type == "hora" {
+                    if let Some(LogAction::Hule { hules }) = actions.last_mut() {
+                        hules.push(hule);
+                        continue;
+                    }
+                }
+                Some(LogAction::Hule { hules: vec![hule] })
+            }
+            "ryukyoku" => {
+                // Only an abortive draw right after a draw is a player decision.
+                if last_type == "tsumo" {
+                    Some(LogAction::LiuJu {
+                        lj_type: 0,
+                        seat: last_actor,
+                        tiles: Vec::new(),
+                    })
+                } else {
+                    Some(LogAction::NoTile)
+                }
+            }
+            _ => None,
+        };
+        if let Some(a) = action {
+            actions.push(a);
+        }
+        if let Some(actor) = ev.get("actor").and_then(Value::as_u64) {
+            last_actor = actor as usize;
+        }
+        if !ty.is_empty() {
+            last_type = ty;
+        }
+    }
+    // The seek point is at or past the end of the round.
+    let (prefix, pending_reach) =
+        cut.unwrap_or((actions.len(), (0..4u8).find(|&s| reach[s as usize])));
+
+    Ok(MjaiKyoku {
+        kyoku: Kyoku {
+            _scores: scores,
+            doras,
+            ura_doras: Vec::new(),
+            hands,
+            chang,
+            ju: oya,
+            ben: honba,
+            liqibang: kyotaku,
+            left_tile_count: 70,
+            paishan: None,
+            delta_scores: None,
+            actions: Arc::from(actions),
+        },
+        prefix,
+        pending_reach,
+    })
+}
+
+/// Replays `events[..upto]` of an MJAI stream and returns the env at that point.
+pub(crate) fn seek_mjai(
+    events: &[Value],
+    upto: usize,
+    rule: GameRule,
+) -> Result<RiichiEnv, String> {
+    let MjaiKyoku {
+        kyoku,
+        prefix,
+        pending_reach,
+    } = kyoku_from_mjai(events, upto)?;
+    let mut driver = KyokuDriver::new(&kyoku, rule)?;
+    loop {
+        driver.skip_passive();
+        if driver.cursor() >= prefix || !driver.next_step(|_, _| Ok(()))? {
+            break;
+        }
+    }
+    if let Some(seat) = pending_reach {
+        // `reach` was seen but not its discard: declare, then stop.
+        let env = &mut driver.env;
+        if env.phase == Phase::WaitAct && env.current_player == seat {
+            let legal = env._get_legal_actions_internal(seat);
+            let riichi = find_kind(&legal, ActionType::Riichi)
+                .ok_or_else(|| format!("logged reach is not legal for seat {}", seat))?;
+            env._step_core(HashMap::from([(seat, legal[riichi].clone())]))
+                .map_err(|e| e.to_string())?;
+        }
+    }
+    Ok(driver.env)
+}
+
+/// Random access into one kyoku: `seek(step)` returns a fresh `RiichiEnv` positioned
+/// after `step` logged decisions.
+///
+/// The kyoku is replayed once up front and the env is snapshotted every
+/// `checkpoint_every` decisions, so each seek replays fewer than
+/// `checkpoint_every` decisions regardless of where in the kyoku it lands.
+#[pyclass(module = "riichienv._riichienv")]
+pub struct KyokuSeeker {
+    checkpoints: Vec<KyokuDriver>,
+    checkpoint_every: usize,
+    num_steps: usize,
+}
+
+#[pymethods]
+impl KyokuSeeker {
+    #[new]
+    #[pyo3(signature = (kyoku, checkpoint_every=16, rule=None))]
+    pub fn new(kyoku: &Kyoku, checkpoint_every: usize, rule: Option<GameRule>) -> PyResult<Self> {
+        if checkpoint_every == 0 {
+            return Err(PyValueError::new_err("checkpoint_every must be positive"));
+        }
+        let mut driver =
+            KyokuDriver::new(kyoku, rule.unwrap_or_default()).map_err(PyValueError::new_err)?;
+        let mut checkpoints = vec![driver.clone()];
+        let mut num_steps = 0;
+        while driver
+            .next_step(|_, _| Ok(()))
+            .map_err(PyValueError::new_err)?
+        {
+            num_steps += 1;
+            if num_steps % checkpoint_every == 0 {
+                checkpoints.push(driver.clone());
+            }
+        }
+        Ok(KyokuSeeker {
+            checkpoints,
+            checkpoint_every,
+            num_steps,
+        })
+    }
+
+    /// Number of decisions in the kyoku; `seek` accepts `0..=num_steps`.
+    #[getter]
+    pub fn num_steps(&self) -> usize {
+        self.num_steps
+    }
+
+    /// The env after `step` decisions. Like `RiichiEnv.from_kyoku`, it logs MJAI
+    /// events from the seek point on unless `mjai_logging=False`.
+    #[pyo3(signature = (step, *, mjai_logging=true))]
+    pub fn seek(&self, step: usize, mjai_logging: bool) -> PyResult<RiichiEnv> {
+        if step > self.num_steps {
+            return Err(PyValueError::new_err(format!(
+                "step {} is past the end of the kyoku ({} steps)",
+                step, self.num_steps
+            )));
+        }
+        let base = step / self.checkpoint_every;
+        let mut driver = self.checkpoints[base].clone();
+        driver
+            .advance(step - base * self.checkpoint_every)
+            .map_err(PyValueError::new_err)?;
+        let mut env = driver.env;
+        env.skip_mjai_logging = !mjai_logging;
+        Ok(env)
+    }
+
+    fn __len__(&self) -> usize {
+        self.num_steps + 1
+    }
+}
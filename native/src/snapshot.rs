@@ -0,0 +1,534 @@
+//! Versioned binary snapshots of `RiichiEnv` and `Observation`.
+//!
+//! Both are written field by field in little-endian order behind a magic
+//! header, so pickling an env or sending an observation to another process
+//! copies one `bytes` object instead of going through the Python getters.
+//! Caches the env can rebuild (tile histograms, tenpai tables, the wall
+//! digest) are not stored.
+
+use std::collections::HashMap;
+use std::hash::Hash;
+
+use crate::claims::ClaimTable;
+use crate::env::{Action, ActionType, Observation, Phase, RiichiEnv};
+use crate::rule::GameRule;
+use crate::types::{Agari, Meld, MeldType};
+use crate::wall::{WallRng, WALL_SIZE};
+
+const ENV_MAGIC: &[u8; 4] = b"RENV";
+const OBS_MAGIC: &[u8; 4] = b"ROBS";
+const VERSION: u8 = 1;
+/// Env snapshot flag: the MJAI logs are included.
+const WITH_LOGS: u8 = 1;
+
+pub(crate) struct Reader<'a> {
+    data: &'a [u8],
+    pos: usize,
+}
+
+impl<'a> Reader<'a> {
+    fn new(data: &'a [u8]) -> Self {
+        Self { data, pos: 0 }
+    }
+
+    fn bytes(&mut self, n: usize) -> Result<&'a [u8], String> {
+        let end = self
+            .pos
+            .checked_add(n)
+            .filter(|&end| end <= self.data.len())
+            .ok_or("snapshot is truncated")?;
+        let out = &self.data[self.pos..end];
+        self.pos = end;
+        Ok(out)
+    }
+
+    fn finish(&self) -> Result<(), String> {
+        if self.pos != self.data.len() {
+            return Err(format!(
+                "snapshot has {} trailing bytes",
+                self.data.len() - self.pos
+            ));
+        }
+        Ok(())
+    }
+
+    fn header(&mut self, magic: &[u8; 4], what: &str) -> Result<(), String> {
+        if self.bytes(4).ok() != Some(magic.as_slice()) {
+            return Err(format!("not a {} snapshot", what));
+        }
+        let version = u8::take(self)?;
+        if version != VERSION {
+            return Err(format!(
+                "unsupported {} snapshot version: {}",
+                what, version
+            ));
+        }
+        Ok(())
+    }
+}
+
+/// A value with a fixed binary layout.
+pub(crate) trait Snap: Sized {
+    fn put(&self, out: &mut Vec<u8>);
+    fn take(r: &mut Reader<'_>) -> Result<Self, String>;
+}
+
+macro_rules! snap_int {
+    ($($ty:ty),+) => {
+        $(impl Snap for $ty {
+            fn put(&self, out: &mut Vec<u8>) {
+                out.extend_from_slice(&self.to_le_bytes());
+            }
+
+            fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+                let bytes = r.bytes(std::mem::size_of::<$ty>())?;
+                Ok(<$ty>::from_le_bytes(bytes.try_into().unwrap()))
+            }
+        })+
+    };
+}
+
+snap_int!(u8, u32, u64, i32);
+
+macro_rules! snap_enum {
+    ($ty:ident { $($variant:ident),+ $(,)? }) => {
+        impl Snap for $ty {
+            fn put(&self, out: &mut Vec<u8>) {
+                out.push(*self as u8);
+            }
+
+            fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+                let tag = u8::take(r)?;
+                [$($ty::$variant),+]
+                    .into_iter()
+                    .find(|v| *v as u8 == tag)
+                    .ok_or_else(|| format!("invalid {} in snapshot: {}", stringify!($ty), tag))
+            }
+        }
+    };
+}
+
+snap_enum!(Phase {
+    WaitAct,
+    WaitResponse
+});
+snap_enum!(ActionType {
+    Discard,
+    Chi,
+    Pon,
+    Daiminkan,
+    Ron,
+    Riichi,
+    Tsumo,
+    Pass,
+    Ankan,
+    Kakan,
+    KyushuKyuhai,
+});
+snap_enum!(MeldType {
+    Chi,
+    Peng,
+    Gang,
+    Angang,
+    Addgang,
+});
+snap_enum!(WallRng { ChaCha, Xoshiro });
+
+impl Snap for usize {
+    fn put(&self, out: &mut Vec<u8>) {
+        (*self as u64).put(out);
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        usize::try_from(u64::take(r)?).map_err(|e| e.to_string())
+    }
+}
+
+impl Snap for bool {
+    fn put(&self, out: &mut Vec<u8>) {
+        out.push(*self as u8);
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        match u8::take(r)? {
+            0 => Ok(false),
+            1 => Ok(true),
+            b => Err(format!("invalid bool in snapshot: {}", b)),
+        }
+    }
+}
+
+impl Snap for String {
+    fn put(&self, out: &mut Vec<u8>) {
+        (self.len() as u32).put(out);
+        out.extend_from_slice(self.as_bytes());
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        let n = u32::take(r)? as usize;
+        String::from_utf8(r.bytes(n)?.to_vec()).map_err(|e| e.to_string())
+    }
+}
+
+impl<T: Snap> Snap for Option<T> {
+    fn put(&self, out: &mut Vec<u8>) {
+        self.is_some().put(out);
+        if let Some(v) = self {
+            v.put(out);
+        }
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        Ok(if bool::take(r)? {
+            Some(T::take(r)?)
+        } else {
+            None
+        })
+    }
+}
+
+impl<T: Snap> Snap for Vec<T> {
+    fn put(&self, out: &mut Vec<u8>) {
+        (self.len() as u32).put(out);
+        for v in self {
+            v.put(out);
+        }
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        let n = u32::take(r)? as usize;
+        // Every element takes at least one byte, which bounds the allocation.
+        let mut out = Vec::with_capacity(n.min(r.data.len() - r.pos));
+        for _ in 0..n {
+            out.push(T::take(r)?);
+        }
+        Ok(out)
+    }
+}
+
+impl<T: Snap, const N: usize> Snap for [T; N] {
+    fn put(&self, out: &mut Vec<u8>) {
+        for v in self {
+            v.put(out);
+        }
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        let items = (0..N).map(|_| T::take(r)).collect::<Result<Vec<_>, _>>()?;
+        items
+            .try_into()
+            .map_err(|_| "array length mismatch".to_string())
+    }
+}
+
+impl<A: Snap, B: Snap> Snap for (A, B) {
+    fn put(&self, out: &mut Vec<u8>) {
+        self.0.put(out);
+        self.1.put(out);
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        Ok((A::take(r)?, B::take(r)?))
+    }
+}
+
+/// Written in key order so equal maps give equal bytes.
+impl<K: Snap + Copy + Ord + Hash, V: Snap> Snap for HashMap<K, V> {
+    fn put(&self, out: &mut Vec<u8>) {
+        let mut keys: Vec<K> = self.keys().copied().collect();
+        keys.sort();
+        (keys.len() as u32).put(out);
+        for k in keys {
+            k.put(out);
+            self[&k].put(out);
+        }
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        let n = u32::take(r)? as usize;
+        let mut out = HashMap::new();
+        for _ in 0..n {
+            let k = K::take(r)?;
+            out.insert(k, V::take(r)?);
+        }
+        Ok(out)
+    }
+}
+
+impl Snap for Action {
+    fn put(&self, out: &mut Vec<u8>) {
+        self.action_type.put(out);
+        self.tile.put(out);
+        self.consume_tiles.put(out);
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        Ok(Action {
+            action_type: Snap::take(r)?,
+            tile: Snap::take(r)?,
+            consume_tiles: Snap::take(r)?,
+        })
+    }
+}
+
+impl Snap for Meld {
+    fn put(&self, out: &mut Vec<u8>) {
+        self.meld_type.put(out);
+        self.tiles.put(out);
+        self.opened.put(out);
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        Ok(Meld {
+            meld_type: Snap::take(r)?,
+            tiles: Snap::take(r)?,
+            opened: Snap::take(r)?,
+        })
+    }
+}
+
+impl Snap for Agari {
+    fn put(&self, out: &mut Vec<u8>) {
+        self.agari.put(out);
+        self.yakuman.put(out);
+        self.ron_agari.put(out);
+        self.tsumo_agari_oya.put(out);
+        self.tsumo_agari_ko.put(out);
+        self.yaku.put(out);
+        self.han.put(out);
+        self.fu.put(out);
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        Ok(Agari {
+            agari: Snap::take(r)?,
+            yakuman: Snap::take(r)?,
+            ron_agari: Snap::take(r)?,
+            tsumo_agari_oya: Snap::take(r)?,
+            tsumo_agari_ko: Snap::take(r)?,
+            yaku: Snap::take(r)?,
+            han: Snap::take(r)?,
+            fu: Snap::take(r)?,
+        })
+    }
+}
+
+impl Snap for GameRule {
+    fn put(&self, out: &mut Vec<u8>) {
+        self.allows_ron_on_ankan_for_kokushi_musou.put(out);
+        self.is_kokushi_musou_13machi_double.put(out);
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        Ok(GameRule {
+            allows_ron_on_ankan_for_kokushi_musou: Snap::take(r)?,
+            is_kokushi_musou_13machi_double: Snap::take(r)?,
+        })
+    }
+}
+
+impl Snap for ClaimTable {
+    fn put(&self, out: &mut Vec<u8>) {
+        self.to_map().put(out);
+    }
+
+    fn take(r: &mut Reader<'_>) -> Result<Self, String> {
+        ClaimTable::from_map(&Snap::take(r)?)
+    }
+}
+
+impl Observation {
+    pub(crate) fn to_snapshot(&self) -> Vec<u8> {
+        let mut out = Vec::new();
+        out.extend_from_slice(OBS_MAGIC);
+        VERSION.put(&mut out);
+        self.player_id.put(&mut out);
+        self.hand.put(&mut out);
+        self.events_json.put(&mut out);
+        self.prev_events_size.put(&mut out);
+        self.legal_actions.put(&mut out);
+        out
+    }
+
+    pub(crate) fn from_snapshot(data: &[u8]) -> Result<Self, String> {
+        let mut r = Reader::new(data);
+        r.header(OBS_MAGIC, "observation")?;
+        let obs = Observation {
+            player_id: Snap::take(&mut r)?,
+            hand: Snap::take(&mut r)?,
+            events_json: Snap::take(&mut r)?,
+            prev_events_size: Snap::take(&mut r)?,
+            legal_actions: Snap::take(&mut r)?,
+            mjai_keys: std::sync::OnceLock::new(),
+        };
+        r.finish()?;
+        Ok(obs)
+    }
+}
+
+impl RiichiEnv {
+    /// The full game state; `logs` also stores the MJAI logs.
+    pub(crate) fn to_snapshot(&self, logs: bool) -> Vec<u8> {
+        let mut out = Vec::with_capacity(1024);
+        out.extend_from_slice(ENV_MAGIC);
+        VERSION.put(&mut out);
+        (if logs { WITH_LOGS } else { 0 }).put(&mut out);
+        let o = &mut out;
+
+        // Configuration
+        self.game_mode.put(o);
+        self.skip_mjai_logging.put(o);
+        self.seed.put(o);
+        self.rule.put(o);
+        self.auto_play.put(o);
+        self.wall_rng.put(o);
+        self.digest_version.put(o);
+        self.hand_index.put(o);
+        self.recorder.put(o);
+        (self.wall_bank.len() as u32).put(o);
+        for row in self.wall_bank.iter() {
+            o.extend_from_slice(row);
+        }
+        self.wall_cursor.put(o);
+
+        // Round and game state
+        self.wall.put(o);
+        self.dealt_wall.put(o);
+        self.salt.put(o);
+        self.hands.put(o);
+        self.melds.put(o);
+        self.discards.put(o);
+        self.discard_flags.put(o);
+        self.forbidden_discards.put(o);
+        self.current_player.put(o);
+        self.turn_count.put(o);
+        self.is_done.put(o);
+        self.needs_tsumo.put(o);
+        self.needs_initialize_next_round.put(o);
+        self.pending_oya_won.put(o);
+        self.pending_is_draw.put(o);
+        self.scores.put(o);
+        self.score_deltas.put(o);
+        self.riichi_sticks.put(o);
+        self.riichi_declared.put(o);
+        self.riichi_stage.put(o);
+        self.double_riichi_declared.put(o);
+        self.phase.put(o);
+        self.active_players.put(o);
+        self.last_discard.put(o);
+        self.claims.put(o);
+        self.pending_kan.put(o);
+        self.oya.put(o);
+        self.honba.put(o);
+        self.kyoku_idx.put(o);
+        self.round_wind.put(o);
+        self.dora_indicators.put(o);
+        self.rinshan_draw_count.put(o);
+        self.pending_kan_dora_count.put(o);
+        self.is_rinshan_flag.put(o);
+        self.is_first_turn.put(o);
+        self.missed_agari_riichi.put(o);
+        self.missed_agari_doujun.put(o);
+        self.riichi_pending_acceptance.put(o);
+        self.nagashi_eligible.put(o);
+        self.drawn_tile.put(o);
+        self.ippatsu_cycle.put(o);
+        self.agari_results.put(o);
+        self.last_agari_results.put(o);
+        self.round_end_scores.put(o);
+        self.auto_pending.put(o);
+        self.y47_cached_actions.put(o);
+        self.y47_cached_active.put(o);
+        self.y47_cache_valid.put(o);
+
+        if logs {
+            self.mjai_log.put(o);
+            self.mjai_log_per_player.put(o);
+            self.player_event_counts.put(o);
+        }
+        out
+    }
+
+    pub(crate) fn from_snapshot(data: &[u8]) -> Result<Self, String> {
+        let mut r = Reader::new(data);
+        r.header(ENV_MAGIC, "env")?;
+        let flags = u8::take(&mut r)?;
+        let r = &mut r;
+
+        let game_mode = Snap::take(r)?;
+        let skip_mjai_logging = Snap::take(r)?;
+        let seed = Snap::take(r)?;
+        let rule = Snap::take(r)?;
+        let mut env = RiichiEnv::with_config(game_mode, skip_mjai_logging, seed, None, rule);
+        env.auto_play = Snap::take(r)?;
+        env.wall_rng = Snap::take(r)?;
+        env.digest_version = Snap::take(r)?;
+        env.hand_index = Snap::take(r)?;
+        env.recorder = Snap::take(r)?;
+        let n_walls = u32::take(r)? as usize;
+        let bank = r.bytes(n_walls.saturating_mul(WALL_SIZE))?;
+        env.wall_bank = bank
+            .chunks_exact(WALL_SIZE)
+            .map(|row| <[u8; WALL_SIZE]>::try_from(row).unwrap())
+            .collect();
+        env.wall_cursor = Snap::take(r)?;
+
+        env.wall = Snap::take(r)?;
+        env.dealt_wall = Snap::take(r)?;
+        env.salt = Snap::take(r)?;
+        env.hands = Snap::take(r)?;
+        env.melds = Snap::take(r)?;
+        env.discards = Snap::take(r)?;
+        env.discard_flags = Snap::take(r)?;
+        env.forbidden_discards = Snap::take(r)?;
+        env.current_player = Snap::take(r)?;
+        env.turn_count = Snap::take(r)?;
+        env.is_done = Snap::take(r)?;
+        env.needs_tsumo = Snap::take(r)?;
+        env.needs_initialize_next_round = Snap::take(r)?;
+        env.pending_oya_won = Snap::take(r)?;
+        env.pending_is_draw = Snap::take(r)?;
+        env.scores = Snap::take(r)?;
+        env.score_deltas = Snap::take(r)?;
+        env.riichi_sticks = Snap::take(r)?;
+        env.riichi_declared = Snap::take(r)?;
+        env.riichi_stage = Snap::take(r)?;
+        env.double_riichi_declared = Snap::take(r)?;
+        env.phase = Snap::take(r)?;
+        env.active_players = Snap::take(r)?;
+        env.last_discard = Snap::take(r)?;
+        env.claims = Snap::take(r)?;
+        env.pending_kan = Snap::take(r)?;
+        env.oya = Snap::take(r)?;
+        env.honba = Snap::take(r)?;
+        env.kyoku_idx = Snap::take(r)?;
+        env.round_wind = Snap::take(r)?;
+        env.dora_indicators = Snap::take(r)?;
+        env.rinshan_draw_count = Snap::take(r)?;
+        env.pending_kan_dora_count = Snap::take(r)?;
+        env.is_rinshan_flag = Snap::take(r)?;
+        env.is_first_turn = Snap::take(r)?;
+        env.missed_agari_riichi = Snap::take(r)?;
+        env.missed_agari_doujun = Snap::take(r)?;
+        env.riichi_pending_acceptance = Snap::take(r)?;
+        env.nagashi_eligible = Snap::take(r)?;
+        env.drawn_tile = Snap::take(r)?;
+        env.ippatsu_cycle = Snap::take(r)?;
+        env.agari_results = Snap::take(r)?;
+        env.last_agari_results = Snap::take(r)?;
+        env.round_end_scores = Snap::take(r)?;
+        env.auto_pending = Snap::take(r)?;
+        env.y47_cached_actions = Snap::take(r)?;
+        env.y47_cached_active = Snap::take(r)?;
+        env.y47_cache_valid = Snap::take(r)?;
+
+        if flags & WITH_LOGS != 0 {
+            env.mjai_log = Snap::take(r)?;
+            env.mjai_log_per_player = Snap::take(r)?;
+            env.player_event_counts = Snap::take(r)?;
+        }
+        r.finish()?;
+        env._sync_hists();
+        Ok(env)
+    }
+}
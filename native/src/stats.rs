@@ -0,0 +1,443 @@
+//! Streaming corpus statistics.
+//!
+//! `StatsAggregator` folds games into plain counters as they are read, so
+//! corpus-wide placement, win, deal-in and riichi rates need neither the parsed
+//! events in memory nor a Python ETL pass. Aggregators from different threads or
+//! processes are combined with `merge` (they pickle as compact JSON).
+
+use std::collections::BTreeMap;
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::sync::Mutex;
+
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use pyo3::types::{PyBytes, PyDict};
+use serde::{Deserialize, Serialize};
+use serde_json::Value;
+
+use crate::env::RiichiEnv;
+use crate::mjai_events::parse_events;
+use crate::replay::{Action as LogAction, Kyoku, ReplayGame};
+use crate::types::MeldType;
+use crate::worker::catch_panic;
+
+/// Seat order for equal scores: the seat closer to the first dealer ranks higher.
+fn placements(scores: &[i32; 4]) -> [usize; 4] {
+    let mut order = [0usize, 1, 2, 3];
+    order.sort_by(|&a, &b| scores[b].cmp(&scores[a]).then(a.cmp(&b)));
+    let mut rank = [0; 4];
+    for (r, &seat) in order.iter().enumerate() {
+        rank[seat] = r;
+    }
+    rank
+}
+
+#[derive(Default)]
+struct KyokuFlags {
+    riichi: [bool; 4],
+    called: [bool; 4],
+    dealt_in: [bool; 4],
+}
+
+/// Mergeable counters over 4-player games; see `summary()` for the derived rates.
+#[pyclass(module = "riichienv._riichienv")]
+#[derive(Debug, Clone, Default, Serialize, Deserialize)]
+pub struct StatsAggregator {
+    games: u64,
+    placed_games: u64,
+    kyokus: u64,
+    draws: u64,
+    /// `placements[seat][rank]`
+    placements: [[u64; 4]; 4],
+    agari: [u64; 4],
+    tsumo: [u64; 4],
+    deal_in: [u64; 4],
+    riichi: [u64; 4],
+    called: [u64; 4],
+    agari_points: [i64; 4],
+    /// Han totals only cover wins whose han the source records, which leaves
+    /// out yakuman.
+    agari_han: [u64; 4],
+    agari_with_han: [u64; 4],
+    yaku: BTreeMap<u32, u64>,
+}
+
+impl StatsAggregator {
+    fn end_kyoku(&mut self, flags: &KyokuFlags) {
+        self.kyokus += 1;
+        for seat in 0..4 {
+            self.riichi[seat] += flags.riichi[seat] as u64;
+            self.called[seat] += flags.called[seat] as u64;
+            self.deal_in[seat] += flags.dealt_in[seat] as u64;
+        }
+    }
+
+    fn add_placement(&mut self, scores: &[i32; 4]) {
+        self.placed_games += 1;
+        for (seat, rank) in placements(scores).into_iter().enumerate() {
+            self.placements[seat][rank] += 1;
+        }
+    }
+
+    fn add_kyoku(&mut self, kyoku: &Kyoku) {
+        let oya = (kyoku.ju % 4) as usize;
+        let mut flags = KyokuFlags::default();
+        let mut last_discarder = None;
+        for action in kyoku.actions.iter() {
+            match action {
+                LogAction::DiscardTile {
+                    seat,
+                    is_liqi,
+                    is_wliqi,
+                    ..
+                } => {
+                    flags.riichi[*seat] |= *is_liqi || *is_wliqi;
+                    last_discarder = Some(*seat);
+                }
+                LogAction::ChiPengGang { seat, .. } => flags.called[*seat] = true,
+                LogAction::AnGangAddGang {
+                    seat, meld_type, ..
+                } if *meld_type == MeldType::Addgang => last_discarder = Some(*seat),
+                LogAction::Hule { hules } => {
+                    for h in hules {
+                        self.agari[h.seat] += 1;
+                        let points = if !h.zimo {
+                            h.point_rong
+                        } else if h.seat == oya {
+                            3 * h.point_zimo_xian
+                        } else {
+                            h.point_zimo_qin + 2 * h.point_zimo_xian
+                        };
+                        self.agari_points[h.seat] += points as i64;
+                        // For yakuman `count` is the yakuman multiple, not han.
+                        if !h.yiman {
+                            self.agari_han[h.seat] += h.count as u64;
+                            self.agari_with_han[h.seat] += 1;
+                        }
+                        for &fan in &h.fans {
+                            *self.yaku.entry(fan).or_default() += 1;
+                        }
+                        if h.zimo {
+                            self.tsumo[h.seat] += 1;
+                        } else if let Some(d) = last_discarder {
+                            flags.dealt_in[d] = true;
+                        }
+                    }
+                }
+                LogAction::NoTile => self.draws += 1,
+                LogAction::LiuJu { .. } => self.draws += 1,
+                _ => {}
+            }
+        }
+        self.end_kyoku(&flags);
+    }
+
+    pub(crate) fn add_rounds(&mut self, rounds: &[Kyoku]) {
+        self.games += 1;
+        for kyoku in rounds {
+            self.add_kyoku(kyoku);
+        }
+        // Final scores: the last kyoku's starting scores, minus the riichi deposits
+        // made in it, plus its recorded score changes.
+        let Some(last) = rounds.last() else {
+            return;
+        };
+        let Some(deltas) = &last.delta_scores else {
+            return;
+        };
+        if last._scores.len() != 4 || deltas.len() != 4 {
+            return;
+        }
+        let mut scores: [i32; 4] = std::array::from_fn(|seat| last._scores[seat] + deltas[seat]);
+        for action in last.actions.iter() {
+            if let LogAction::DiscardTile {
+                seat,
+                is_liqi,
+                is_wliqi,
+                ..
+            } = action
+            {
+                if *is_liqi || *is_wliqi {
+                    scores[*seat] -= 1000;
+                }
+            }
+        }
+        self.add_placement(&scores);
+    }
+
+    /// Folds one game of MJAI events. Placement comes from `final_scores`, or
+    /// from the `end_game` event's `scores` when the stream has one.
+    pub(crate) fn add_mjai_events(&mut self, events: &[Value], final_scores: Option<[i32; 4]>) {
+        self.games += 1;
+        let mut flags = None;
+        let mut end_scores = final_scores;
+        for ev in events {
+            let seat = |key: &str| {
+                ev.get(key)
+                    .and_then(Value::as_u64)
+                    .filter(|&s| s < 4)
+                    .map(|s| s as usize)
+            };
+            match ev.get("type").and_then(Value::as_str).unwrap_or("") {
+                "start_kyoku" => {
+                    if let Some(f) = flags.replace(KyokuFlags::default()) {
+                        self.end_kyoku(&f);
+                    }
+                }
+                "reach" => {
+                    if let (Some(f), Some(a)) = (flags.as_mut(), seat("actor")) {
+                        f.riichi[a] = true;
+                    }
+                }
+                "chi" | "pon" | "daiminkan" => {
+                    if let (Some(f), Some(a)) = (flags.as_mut(), seat("actor")) {
+                        f.called[a] = true;
+                    }
+                }
+                "hora" => {
+                    let (Some(a), Some(t)) = (seat("actor"), seat("target")) else {
+                        continue;
+                    };
+                    self.agari[a] += 1;
+                    if a == t {
+                        self.tsumo[a] += 1;
+                    } else if let Some(f) = flags.as_mut() {
+                        f.dealt_in[t] = true;
+                    }
+                    if let Some(d) = ev
+                        .get("deltas")
+                        .and_then(Value::as_array)
+                        .and_then(|d| d.get(a))
+                        .and_then(Value::as_i64)
+                    {
+                        self.agari_points[a] += d;
+                    }
+                }
+                "ryukyoku" => self.draws += 1,
+                "end_game" => {
+                    if end_scores.is_none() {
+                        end_scores = ev
+                            .get("scores")
+                            .and_then(Value::as_array)
+                            .filter(|s| s.len() == 4)
+                            .map(|s| {
+                                let mut out = [0i32; 4];
+                                for (o, v) in out.iter_mut().zip(s) {
+                                    *o = v.as_i64().unwrap_or(0) as i32;
+                                }
+                                out
+                            });
+                    }
+                }
+                _ => {}
+            }
+        }
+        if let Some(f) = flags {
+            self.end_kyoku(&f);
+        }
+        if let Some(scores) = end_scores {
+            self.add_placement(&scores);
+        }
+    }
+
+    fn merge_from(&mut self, other: &StatsAggregator) {
+        self.games += other.games;
+        self.placed_games += other.placed_games;
+        self.kyokus += other.kyokus;
+        self.draws += other.draws;
+        for seat in 0..4 {
+            for rank in 0..4 {
+                self.placements[seat][rank] += other.placements[seat][rank];
+            }
+            self.agari[seat] += other.agari[seat];
+            self.tsumo[seat] += other.tsumo[seat];
+            self.deal_in[seat] += other.deal_in[seat];
+            self.riichi[seat] += other.riichi[seat];
+            self.called[seat] += other.called[seat];
+            self.agari_points[seat] += other.agari_points[seat];
+            self.agari_han[seat] += other.agari_han[seat];
+            self.agari_with_han[seat] += other.agari_with_han[seat];
+        }
+        for (&fan, &n) in &other.yaku {
+            *self.yaku.entry(fan).or_default() += n;
+        }
+    }
+}
+
+fn ratio(num: u64, den: u64) -> f64 {
+    if den == 0 {
+        0.0
+    } else {
+        num as f64 / den as f64
+    }
+}
+
+#[pymethods]
+impl StatsAggregator {
+    #[new]
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Adds every kyoku of a parsed replay log.
+    pub fn add_replay(&mut self, game: PyRef<'_, ReplayGame>) {
+        self.add_rounds(&game.rounds);
+    }
+
+    /// Reads and adds replay log files on `num_workers` threads (default: all
+    /// cores) without holding the GIL. Returns `(path, error)` for files that
+    /// cannot be read or whose replay panics; those add nothing.
+    #[pyo3(signature = (paths, num_workers=None))]
+    pub fn add_files(
+        &mut self,
+        py: Python<'_>,
+        paths: Vec<String>,
+        num_workers: Option<usize>,
+    ) -> Vec<(String, String)> {
+        let workers = num_workers
+            .unwrap_or_else(|| {
+                std::thread::available_parallelism()
+                    .map(|n| n.get())
+                    .unwrap_or(1)
+            })
+            .clamp(1, paths.len().max(1));
+        let next = AtomicUsize::new(0);
+        let failed = Mutex::new(Vec::new());
+        let partials: Vec<StatsAggregator> = py.detach(|| {
+            std::thread::scope(|scope| {
+                let handles: Vec<_> = (0..workers)
+                    .map(|_| {
+                        scope.spawn(|| {
+                            let mut local = StatsAggregator::default();
+                            while let Some(path) = paths.get(next.fetch_add(1, Ordering::Relaxed)) {
+                                // Each game is counted on its own first, so a panic
+                                // halfway through leaves no partial counts behind.
+                                let res = catch_panic(|| -> Result<StatsAggregator, String> {
+                                    let mut game = StatsAggregator::default();
+                                    game.add_rounds(&ReplayGame::read_rounds(path)?);
+                                    Ok(game)
+                                })
+                                .and_then(|r| r);
+                                match res {
+                                    Ok(game) => local.merge_from(&game),
+                                    Err(e) => failed.lock().unwrap().push((path.clone(), e)),
+                                }
+                            }
+                            local
+                        })
+                    })
+                    .collect();
+                handles
+                    .into_iter()
+                    .map(|h| h.join().expect("stats worker panicked"))
+                    .collect()
+            })
+        });
+        for p in &partials {
+            self.merge_from(p);
+        }
+        let mut failed = failed.into_inner().unwrap();
+        failed.sort();
+        failed
+    }
+
+    /// Adds one game given as MJAI events (dicts or JSON strings).
+    pub fn add_mjai(&mut self, py: Python<'_>, events: Vec<Bound<'_, PyAny>>) -> PyResult<()> {
+        let events = parse_events(py, events)?;
+        self.add_mjai_events(&events, None);
+        Ok(())
+    }
+
+    /// Adds a finished `RiichiEnv` episode from its MJAI log and final scores.
+    pub fn add_env(&mut self, env: PyRef<'_, RiichiEnv>) -> PyResult<()> {
+        if env.skip_mjai_logging {
+            return Err(PyValueError::new_err(
+                "add_env needs the MJAI log; create the env with skip_mjai_logging=False",
+            ));
+        }
+        let events = env
+            .mjai_log
+            .iter()
+            .map(|s| serde_json::from_str(s))
+            .collect::<Result<Vec<Value>, _>>()
+            .map_err(|e| PyValueError::new_err(format!("Invalid MJAI event: {}", e)))?;
+        let final_scores = env.is_done.then_some(env.scores);
+        self.add_mjai_events(&events, final_scores);
+        Ok(())
+    }
+
+    /// Adds the counters of `other` into this aggregator.
+    pub fn merge(&mut self, other: PyRef<'_, StatsAggregator>) {
+        self.merge_from(&other);
+    }
+
+    /// Counts and per-seat rates as plain Python values.
+    ///
+    /// Rates are per kyoku (`agari_rate`, `tsumo_rate`, `deal_in_rate`,
+    /// `riichi_rate`, `call_rate`, `draw_rate`) or per placed game
+    /// (`placement_rate[seat][rank]`, `avg_rank`). `avg_agari_points` is the
+    /// hand value for replay logs and the winner's score change for MJAI streams.
+    /// `avg_agari_han` averages over replay-log wins other than yakuman.
+    /// `yaku_counts` maps MJSoul fan ids to counts (MJAI events carry no yaku).
+    pub fn summary<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let per_kyoku = |c: &[u64; 4]| c.map(|n| ratio(n, self.kyokus));
+        let dict = PyDict::new(py);
+        dict.set_item("games", self.games)?;
+        dict.set_item("placed_games", self.placed_games)?;
+        dict.set_item("kyokus", self.kyokus)?;
+        dict.set_item("placements", self.placements)?;
+        dict.set_item(
+            "placement_rate",
+            self.placements
+                .map(|row| row.map(|n| ratio(n, self.placed_games))),
+        )?;
+        dict.set_item(
+            "avg_rank",
+            self.placements.map(|row| {
+                let total: u64 = row.iter().sum();
+                let weighted: u64 = row
+                    .iter()
+                    .enumerate()
+                    .map(|(r, n)| (r as u64 + 1) * n)
+                    .sum();
+                ratio(weighted, total)
+            }),
+        )?;
+        dict.set_item("agari_rate", per_kyoku(&self.agari))?;
+        dict.set_item("tsumo_rate", per_kyoku(&self.tsumo))?;
+        dict.set_item("deal_in_rate", per_kyoku(&self.deal_in))?;
+        dict.set_item("riichi_rate", per_kyoku(&self.riichi))?;
+        dict.set_item("call_rate", per_kyoku(&self.called))?;
+        dict.set_item("draw_rate", ratio(self.draws, self.kyokus))?;
+        let avg_points: [f64; 4] = std::array::from_fn(|seat| {
+            if self.agari[seat] == 0 {
+                0.0
+            } else {
+                self.agari_points[seat] as f64 / self.agari[seat] as f64
+            }
+        });
+        let avg_han: [f64; 4] =
+            std::array::from_fn(|seat| ratio(self.agari_han[seat], self.agari_with_han[seat]));
+        dict.set_item("avg_agari_points", avg_points)?;
+        dict.set_item("avg_agari_han", avg_han)?;
+        dict.set_item("yaku_counts", self.yaku.clone())?;
+        Ok(dict)
+    }
+
+    fn __getstate__<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyBytes>> {
+        let bytes = serde_json::to_vec(self).map_err(|e| PyValueError::new_err(e.to_string()))?;
+        Ok(PyBytes::new(py, &bytes))
+    }
+
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        *self = serde_json::from_slice(state).map_err(|e| PyValueError::new_err(e.to_string()))?;
+        Ok(())
+    }
+
+    fn __repr__(&self) -> String {
+        format!(
+            "StatsAggregator(games={}, kyokus={})",
+            self.games, self.kyokus
+        )
+    }
+}
@@ -0,0 +1,136 @@
+//! Per-seat tile histogram kept in sync with `RiichiEnv::hands`.
+//!
+//! A hand is stored as a 136-bit membership set (one bit per tile id) plus the
+//! 34-type count array, so legality and agari checks can read counts, red-five
+//! flags and the concrete copies of a tile type without scanning or sorting the
+//! hand `Vec`. Iteration is in ascending tile-id order, matching a sorted hand.
+
+use crate::types::{Hand, TILE_MAX};
+
+/// Tile ids of the red fives (5m, 5p, 5s).
+pub(crate) const RED_FIVES: [u8; 3] = [16, 52, 88];
+
+#[inline]
+pub(crate) fn is_red(tid: u8) -> bool {
+    tid == 16 || tid == 52 || tid == 88
+}
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub(crate) struct TileHist {
+    bits: [u64; 3],
+    counts: [u8; TILE_MAX],
+}
+
+impl Default for TileHist {
+    fn default() -> Self {
+        Self::EMPTY
+    }
+}
+
+impl TileHist {
+    pub(crate) const EMPTY: TileHist = TileHist {
+        bits: [0; 3],
+        counts: [0; TILE_MAX],
+    };
+
+    pub(crate) fn from_tiles(tiles: &[u8]) -> Self {
+        let mut hist = Self::EMPTY;
+        for &t in tiles {
+            hist.insert(t);
+        }
+        hist
+    }
+
+    #[inline]
+    pub(crate) fn contains(&self, tid: u8) -> bool {
+        self.bits[(tid / 64) as usize] & (1u64 << (tid % 64)) != 0
+    }
+
+    /// Adds `tid`. Tile ids are unique in play; a repeated id (only seen in
+    /// hand-crafted hands) is counted but enumerated once.
+    #[inline]
+    pub(crate) fn insert(&mut self, tid: u8) {
+        if tid >= 136 {
+            return;
+        }
+        self.bits[(tid / 64) as usize] |= 1u64 << (tid % 64);
+        self.counts[(tid / 4) as usize] += 1;
+    }
+
+    /// Removes `tid`, returning whether it was present.
+    #[inline]
+    pub(crate) fn remove(&mut self, tid: u8) -> bool {
+        if tid >= 136 || !self.contains(tid) {
+            return false;
+        }
+        self.bits[(tid / 64) as usize] &= !(1u64 << (tid % 64));
+        self.counts[(tid / 4) as usize] -= 1;
+        true
+    }
+
+    /// Mirrors removing one copy of `tid` from `hand` (already done by the
+    /// caller). Recounts from `hand` if another copy of the same id remains.
+    pub(crate) fn sync_remove(&mut self, hand: &[u8], tid: u8) {
+        if hand.contains(&tid) {
+            *self = Self::from_tiles(hand);
+        } else {
+            self.remove(tid);
+        }
+    }
+
+    #[inline]
+    pub(crate) fn count(&self, t34: u8) -> u8 {
+        self.counts[t34 as usize]
+    }
+
+    /// Number of red fives held.
+    pub(crate) fn red_count(&self) -> u8 {
+        RED_FIVES.iter().filter(|&&t| self.contains(t)).count() as u8
+    }
+
+    /// Copies of tile type `t34` held, in ascending tile-id order.
+    #[inline]
+    pub(crate) fn tids_of(&self, t34: u8) -> impl Iterator<Item = u8> + '_ {
+        (t34 * 4..t34 * 4 + 4).filter(move |&t| self.contains(t))
+    }
+
+    /// The lowest held copy of `t34` of each colour (red first, then black for
+    /// fives), i.e. the distinct tiles a call can consume.
+    pub(crate) fn variants(&self, t34: u8) -> ([u8; 2], usize) {
+        let mut out = [0u8; 2];
+        let mut n = 0;
+        let mut seen = [false; 2];
+        for t in self.tids_of(t34) {
+            let red = is_red(t) as usize;
+            if !seen[red] {
+                seen[red] = true;
+                out[n] = t;
+                n += 1;
+            }
+        }
+        (out, n)
+    }
+
+    /// All held tile ids in ascending order.
+    pub(crate) fn iter(&self) -> impl Iterator<Item = u8> + '_ {
+        self.bits.iter().enumerate().flat_map(|(w, &word)| {
+            let mut rest = word;
+            std::iter::from_fn(move || {
+                if rest == 0 {
+                    return None;
+                }
+                let bit = rest.trailing_zeros() as u8;
+                rest &= rest - 1;
+                Some(w as u8 * 64 + bit)
+            })
+        })
+    }
+
+    /// 34-type counts in the agari module's representation.
+    pub(crate) fn to_hand(&self) -> Hand {
+        Hand {
+            counts: self.counts,
+            ..Hand::default()
+        }
+    }
+}
@@ -0,0 +1,135 @@
+//! Table-driven conversions between 136-tile ids and MJAI / MPSZ strings.
+//!
+//! These back the scalar functions in `riichienv.convert`. Parsing only
+//! accepts the canonical spellings; the Python front-ends fall back to their
+//! original parser for anything else, so leniency and error messages stay the
+//! same.
+
+use pyo3::prelude::*;
+
+use crate::tile_hist::is_red;
+
+const MJAI: [&str; 34] = [
+    "1m", "2m", "3m", "4m", "5m", "6m", "7m", "8m", "9m", //
+    "1p", "2p", "3p", "4p", "5p", "6p", "7p", "8p", "9p", //
+    "1s", "2s", "3s", "4s", "5s", "6s", "7s", "8s", "9s", //
+    "E", "S", "W", "N", "P", "F", "C",
+];
+const MJAI_RED: [&str; 3] = ["5mr", "5pr", "5sr"];
+
+const MPSZ: [&str; 34] = [
+    "1m", "2m", "3m", "4m", "5m", "6m", "7m", "8m", "9m", //
+    "1p", "2p", "3p", "4p", "5p", "6p", "7p", "8p", "9p", //
+    "1s", "2s", "3s", "4s", "5s", "6s", "7s", "8s", "9s", //
+    "1z", "2z", "3z", "4z", "5z", "6z", "7z",
+];
+const MPSZ_RED: [&str; 3] = ["0m", "0p", "0s"];
+
+/// MJAI name of a tile id below 136, e.g. `5pr` or `E`.
+pub fn mjai_name(tid: u8) -> &'static str {
+    if is_red(tid) {
+        MJAI_RED[tid as usize / 36]
+    } else {
+        MJAI[tid as usize / 4]
+    }
+}
+
+/// MPSZ name of a tile id below 136, e.g. `0p` or `1z`.
+pub fn mpsz_name(tid: u8) -> &'static str {
+    if is_red(tid) {
+        MPSZ_RED[tid as usize / 36]
+    } else {
+        MPSZ[tid as usize / 4]
+    }
+}
+
+/// Canonical id of an MPSZ tile (`5p` is 53, `0p` is 52).
+fn parse_mpsz(s: &str) -> Option<u8> {
+    let &[n, suit] = s.as_bytes() else {
+        return None;
+    };
+    if !n.is_ascii_digit() {
+        return None;
+    }
+    let num = n - b'0';
+    let suit = match suit {
+        b'm' => 0,
+        b'p' => 1,
+        b's' => 2,
+        b'z' if (1..=7).contains(&num) => return Some(108 + (num - 1) * 4),
+        _ => return None,
+    };
+    Some(match num {
+        0 => suit * 36 + 16,
+        5 => suit * 36 + 17,
+        _ => suit * 36 + (num - 1) * 4,
+    })
+}
+
+/// Canonical id of an MJAI tile; MPSZ spellings are accepted as well.
+pub(crate) fn parse_mjai(s: &str) -> Option<u8> {
+    if let Some(i) = MJAI[27..].iter().position(|&h| h == s) {
+        return Some(108 + i as u8 * 4);
+    }
+    if let Some(i) = MJAI_RED.iter().position(|&r| r == s) {
+        return Some(i as u8 * 36 + 16);
+    }
+    parse_mpsz(s)
+}
+
+fn checked_tid(tid: i64) -> PyResult<u8> {
+    if (0..136).contains(&tid) {
+        Ok(tid as u8)
+    } else {
+        Err(pyo3::exceptions::PyValueError::new_err(format!(
+            "Invalid TID: {}",
+            tid
+        )))
+    }
+}
+
+#[pyfunction]
+pub fn tid_to_mjai(tid: i64) -> PyResult<&'static str> {
+    Ok(mjai_name(checked_tid(tid)?))
+}
+
+#[pyfunction]
+pub fn tid_to_mpsz(tid: i64) -> PyResult<&'static str> {
+    Ok(mpsz_name(checked_tid(tid)?))
+}
+
+/// Canonical id of a canonically spelled MJAI (or MPSZ) tile, else `None`.
+#[pyfunction]
+pub fn mjai_to_tid(s: &str) -> Option<u8> {
+    parse_mjai(s)
+}
+
+/// Canonical id of a canonically spelled MPSZ tile, else `None`.
+#[pyfunction]
+pub fn mpsz_to_tid(s: &str) -> Option<u8> {
+    parse_mpsz(s)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn names_round_trip() {
+        for tid in 0..136u8 {
+            let canonical = if is_red(tid) {
+                tid
+            } else if tid < 108 && tid % 36 / 4 == 4 {
+                tid / 36 * 36 + 17
+            } else {
+                tid / 4 * 4
+            };
+            assert_eq!(parse_mjai(mjai_name(tid)), Some(canonical), "{}", tid);
+            assert_eq!(parse_mpsz(mpsz_name(tid)), Some(canonical), "{}", tid);
+            assert_eq!(parse_mjai(mpsz_name(tid)), Some(canonical), "{}", tid);
+        }
+        assert_eq!(parse_mpsz("8z"), None);
+        assert_eq!(parse_mpsz("5mr"), None);
+        assert_eq!(parse_mjai("5zr"), None);
+    }
+}
@@ -0,0 +1,206 @@
+//! Wall shuffling and bulk wall generation.
+//!
+//! A seeded env deals hand `k` of an episode from `splitmix64(seed ^ k)`. The
+//! default generator is `StdRng` (ChaCha12), which keeps walls identical to
+//! earlier releases; `xoshiro` selects xoshiro256++ for throughput when
+//! cryptographic quality and cross-version reproducibility are not needed.
+//!
+//! `wall_digest` is the fairness commitment to a dealt wall; the env computes
+//! it only when `RiichiEnv.wall_digest` is read.
+
+use numpy::ndarray::Array2;
+use numpy::IntoPyArray;
+use numpy::PyArray2;
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use rand::prelude::*;
+use rand::rngs::StdRng;
+use sha2::Digest;
+
+pub(crate) const WALL_SIZE: usize = 136;
+
+pub(crate) fn splitmix64(x: u64) -> u64 {
+    let mut z = x.wrapping_add(0x9E3779B97F4A7C15);
+    z = (z ^ (z >> 30)).wrapping_mul(0xBF58476D1CE4E5B9);
+    z = (z ^ (z >> 27)).wrapping_mul(0x94D049BB133111EB);
+    z ^ (z >> 31)
+}
+
+/// Generator used to shuffle walls.
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Default)]
+pub(crate) enum WallRng {
+    #[default]
+    ChaCha,
+    Xoshiro,
+}
+
+impl WallRng {
+    pub(crate) fn parse(name: &str) -> PyResult<Self> {
+        match name {
+            "chacha" => Ok(WallRng::ChaCha),
+            "xoshiro" => Ok(WallRng::Xoshiro),
+            _ => Err(PyValueError::new_err(format!(
+                "Unsupported rng: {} (expected 'chacha' or 'xoshiro')",
+                name
+            ))),
+        }
+    }
+
+    pub(crate) fn name(self) -> &'static str {
+        match self {
+            WallRng::ChaCha => "chacha",
+            WallRng::Xoshiro => "xoshiro",
+        }
+    }
+
+    /// Shuffles `0..136` into `wall` (in drawing order: the env pops from the
+    /// back). `hand_seed` is `None` for an entropy-seeded wall.
+    pub(crate) fn shuffle_into(self, hand_seed: Option<u64>, wall: &mut Vec<u8>) {
+        wall.clear();
+        wall.extend(0..WALL_SIZE as u8);
+        match self {
+            WallRng::ChaCha => {
+                let mut rng = match hand_seed {
+                    Some(s) => StdRng::seed_from_u64(s),
+                    None => StdRng::from_entropy(),
+                };
+                wall.shuffle(&mut rng);
+            }
+            WallRng::Xoshiro => {
+                let mut rng = Xoshiro256pp::new(hand_seed.unwrap_or_else(rand::random));
+                for i in (1..wall.len()).rev() {
+                    let j = rng.below(i as u32 + 1) as usize;
+                    wall.swap(i, j);
+                }
+            }
+        }
+    }
+}
+
+/// xoshiro256++ (Blackman & Vigna), seeded through splitmix64.
+struct Xoshiro256pp {
+    s: [u64; 4],
+}
+
+impl Xoshiro256pp {
+    fn new(seed: u64) -> Self {
+        let mut x = seed;
+        let mut s = [0u64; 4];
+        for word in s.iter_mut() {
+            x = x.wrapping_add(0x9E3779B97F4A7C15);
+            *word = splitmix64(x);
+        }
+        Self { s }
+    }
+
+    #[inline]
+    fn next_u64(&mut self) -> u64 {
+        let s = &mut self.s;
+        let result = s[0].wrapping_add(s[3]).rotate_left(23).wrapping_add(s[0]);
+        let t = s[1] << 17;
+        s[2] ^= s[0];
+        s[3] ^= s[1];
+        s[1] ^= s[2];
+        s[0] ^= s[3];
+        s[2] ^= t;
+        s[3] = s[3].rotate_left(45);
+        result
+    }
+
+    /// Uniform in `0..n` (Lemire's multiply-and-reject).
+    #[inline]
+    fn below(&mut self, n: u32) -> u32 {
+        let threshold = n.wrapping_neg() % n;
+        loop {
+            let m = (self.next_u64() >> 32) * n as u64;
+            if (m as u32) >= threshold {
+                return (m >> 32) as u32;
+            }
+        }
+    }
+}
+
+/// Seeded walls for hands `0..n`, one per row, as `reset(wall=...)` takes them.
+///
+/// Row `k` is the wall a `RiichiEnv(seed=seed, rng=rng)` deals for the `k`-th
+/// hand of an episode, so `reset(wall=list(walls[k]))` or a wall bank loaded
+/// with `load_walls` reproduces it.
+#[pyfunction]
+#[pyo3(signature = (n, seed, rng="chacha"))]
+pub fn generate_walls<'py>(
+    py: Python<'py>,
+    n: usize,
+    seed: u64,
+    rng: &str,
+) -> PyResult<Bound<'py, PyArray2<u8>>> {
+    let kind = WallRng::parse(rng)?;
+    let data = py.detach(|| {
+        let mut data = Vec::with_capacity(n * WALL_SIZE);
+        let mut wall = Vec::with_capacity(WALL_SIZE);
+        for k in 0..n as u64 {
+            kind.shuffle_into(Some(splitmix64(seed ^ k)), &mut wall);
+            data.extend(wall.iter().rev());
+        }
+        data
+    });
+    let walls = Array2::from_shape_vec((n, WALL_SIZE), data)
+        .map_err(|e| PyValueError::new_err(format!("Invalid array shape: {}", e)))?;
+    Ok(walls.into_pyarray(py))
+}
+
+/// Rows of a `(N, 136)` array checked to be permutations of `0..136`.
+pub(crate) fn wall_bank(
+    walls: numpy::ndarray::ArrayView2<'_, u8>,
+) -> PyResult<Vec<[u8; WALL_SIZE]>> {
+    if walls.ncols() != WALL_SIZE {
+        return Err(PyValueError::new_err("walls must have shape (N, 136)"));
+    }
+    walls
+        .rows()
+        .into_iter()
+        .enumerate()
+        .map(|(i, row)| {
+            let mut wall = [0u8; WALL_SIZE];
+            let mut seen = [false; WALL_SIZE];
+            for (slot, &t) in wall.iter_mut().zip(row.iter()) {
+                if (t as usize) >= WALL_SIZE || std::mem::replace(&mut seen[t as usize], true) {
+                    return Err(PyValueError::new_err(format!(
+                        "wall {} is not a permutation of 0..136",
+                        i
+                    )));
+                }
+                *slot = t;
+            }
+            Ok(wall)
+        })
+        .collect()
+}
+
+/// Hex SHA-256 commitment to a dealt wall.
+///
+/// Version 1 hashes `salt + ",".join(map(str, wall))` as earlier releases did,
+/// streaming the decimal text into the hasher instead of building it. Version
+/// 2 hashes the salt followed by the raw tile bytes.
+pub(crate) fn wall_digest(version: u8, salt: &str, wall: &[u8]) -> String {
+    let mut hasher = sha2::Sha256::new();
+    hasher.update(salt.as_bytes());
+    if version >= 2 {
+        hasher.update(wall);
+    } else {
+        for (i, &t) in wall.iter().enumerate() {
+            if i > 0 {
+                hasher.update(b",");
+            }
+            let digits = [b'0' + t / 100, b'0' + t / 10 % 10, b'0' + t % 10];
+            let skip = if t >= 100 {
+                0
+            } else if t >= 10 {
+                1
+            } else {
+                2
+            };
+            hasher.update(&digits[skip..]);
+        }
+    }
+    hex::encode(hasher.finalize())
+}
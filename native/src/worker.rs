@@ -0,0 +1,16 @@
+//! Shared helpers for the thread-pool batch functions.
+
+use std::panic::{catch_unwind, AssertUnwindSafe};
+
+/// Runs one work item, turning a panic into an error message so a single bad
+/// input does not take down the whole batch.
+pub(crate) fn catch_panic<T>(f: impl FnOnce() -> T) -> Result<T, String> {
+    catch_unwind(AssertUnwindSafe(f)).map_err(|payload| {
+        let msg = payload
+            .downcast_ref::<&str>()
+            .map(|s| s.to_string())
+            .or_else(|| payload.downcast_ref::<String>().cloned())
+            .unwrap_or_else(|| "unknown panic".to_string());
+        format!("panicked: {}", msg)
+    })
+}
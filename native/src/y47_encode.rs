@@ -1,10 +1,11 @@
 use numpy::ndarray::{Array1, Array2};
 use numpy::IntoPyArray;
 use pyo3::prelude::*;
+use pyo3::types::PyDict;
 
 use crate::env::{Action, RiichiEnv};
 use crate::y47_schema as schema;
-use crate::y47_turn::Y47Turn;
+use crate::y47_turn::{write_row, Y47Turn};
 
 fn validate_real_tid(tid: u8) -> PyResult<i64> {
     let tid_i = tid as i64;
@@ -37,9 +38,9 @@ fn push_token(token_mask: &mut Array1<bool>, cur: &mut usize) -> PyResult<usize>
     Ok(idx)
 }
 
-fn encode_observation(env: &RiichiEnv, me: u8, hand: &[u8]) -> PyResult<(Array2<i64>, Array2<f32>, Array1<bool>)> {
+pub(crate) fn encode_observation(env: &RiichiEnv, me: u8, hand: &[u8]) -> PyResult<(Array2<i64>, Array2<f32>, Array1<bool>)> {
     let mut token_main = Array2::<i64>::zeros((schema::MAX_STATE_TOKENS, schema::TOKEN_MAIN_DIM));
-    let mut token_scalar = Array2::<f32>::zeros((schema::MAX_STATE_TOKENS, 3));
+    let mut token_scalar = Array2::<f32>::zeros((schema::MAX_STATE_TOKENS, schema::TOKEN_SCALAR_DIM));
     let mut token_mask = Array1::<bool>::from_elem(schema::MAX_STATE_TOKENS, false);
 
     let mut cur = 0usize;
@@ -182,7 +183,7 @@ fn encode_observation(env: &RiichiEnv, me: u8, hand: &[u8]) -> PyResult<(Array2<
     Ok((token_main, token_scalar, token_mask))
 }
 
-fn encode_actions(env: &RiichiEnv, me: u8, actions: &[Action]) -> PyResult<(Array2<i64>, Array2<i64>, Array2<bool>, Array1<bool>)> {
+pub(crate) fn encode_actions(env: &RiichiEnv, me: u8, actions: &[Action]) -> PyResult<(Array2<i64>, Array2<i64>, Array2<bool>, Array1<bool>)> {
     if actions.is_empty() {
         return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
             "no legal actions",
@@ -291,3 +292,34 @@ pub fn encode_turn(py: Python<'_>, env: &RiichiEnv, me: u8, hand: &[u8], actions
         legal_action_mask: legal_action_mask.into_pyarray(py).unbind(),
     })
 }
+
+/// `encode_turn` written into row `me` of the arrays in `out` instead of new arrays.
+pub(crate) fn write_turn(
+    out: &Bound<'_, PyDict>,
+    env: &RiichiEnv,
+    me: u8,
+    hand: &[u8],
+    actions: &[Action],
+) -> PyResult<()> {
+    let (token_main, token_scalar, token_mask) = encode_observation(env, me, hand)?;
+    let (action_main, action_consume, action_consume_mask, legal_action_mask) =
+        encode_actions(env, me, actions)?;
+    let row = me as usize;
+    write_row(out, "token_main", row, token_main.view().into_dyn())?;
+    write_row(out, "token_scalar", row, token_scalar.view().into_dyn())?;
+    write_row(out, "token_mask", row, token_mask.view().into_dyn())?;
+    write_row(out, "action_main", row, action_main.view().into_dyn())?;
+    write_row(out, "action_consume", row, action_consume.view().into_dyn())?;
+    write_row(
+        out,
+        "action_consume_mask",
+        row,
+        action_consume_mask.view().into_dyn(),
+    )?;
+    write_row(
+        out,
+        "legal_action_mask",
+        row,
+        legal_action_mask.view().into_dyn(),
+    )
+}
@@ -0,0 +1,462 @@
+//! Supervised-learning samples from expert logs.
+//!
+//! Every logged decision is replayed through `RiichiEnv`, encoded exactly like
+//! `RiichiEnv.step_y47` turns, and paired with the index of the logged action in
+//! the legal action table. Samples are written as shards so corpora larger than
+//! memory can be processed, with files spread across worker threads.
+
+use std::path::{Path, PathBuf};
+use std::sync::atomic::{AtomicUsize, Ordering};
+
+use numpy::ndarray::{ArrayD, IxDyn};
+use numpy::IntoPyArray;
+use pyo3::exceptions::{PyOSError, PyValueError};
+use pyo3::prelude::*;
+use pyo3::types::PyDict;
+
+use crate::env::RiichiEnv;
+use crate::npy::{npy_bytes, write_npz, NpyElement};
+use crate::replay::{Kyoku, ReplayGame};
+use crate::replay_driver::{Decision, KyokuDriver};
+use crate::rule::GameRule;
+use crate::worker::catch_panic;
+use crate::y47_encode;
+use crate::y47_schema as schema;
+
+const TOKEN_MAIN: usize = schema::MAX_STATE_TOKENS * schema::TOKEN_MAIN_DIM;
+const TOKEN_SCALAR: usize = schema::MAX_STATE_TOKENS * schema::TOKEN_SCALAR_DIM;
+const ACTION_MAIN: usize = schema::MAX_ACTIONS * schema::ACTION_MAIN_DIM;
+const ACTION_CONSUME: usize = schema::MAX_ACTIONS * schema::MAX_CONSUME_TILES;
+
+#[derive(Clone, Copy, PartialEq, Eq)]
+enum ShardFormat {
+    Npz,
+    Npy,
+}
+
+/// Column-major buffer of encoded samples; one row per decision.
+#[derive(Default)]
+pub(crate) struct SampleBuffer {
+    token_main: Vec<i64>,
+    token_scalar: Vec<f32>,
+    token_mask: Vec<bool>,
+    action_main: Vec<i64>,
+    action_consume: Vec<i64>,
+    action_consume_mask: Vec<bool>,
+    legal_action_mask: Vec<bool>,
+    action_index: Vec<i64>,
+    player_id: Vec<i64>,
+    source: Vec<i64>,
+    kyoku: Vec<i64>,
+}
+
+fn split_front<T>(col: &mut Vec<T>, at: usize) -> Vec<T> {
+    let tail = col.split_off(at);
+    std::mem::replace(col, tail)
+}
+
+impl SampleBuffer {
+    pub(crate) fn len(&self) -> usize {
+        self.action_index.len()
+    }
+
+    pub(crate) fn push(
+        &mut self,
+        env: &RiichiEnv,
+        decision: &Decision,
+        source: i64,
+        kyoku: i64,
+    ) -> PyResult<()> {
+        let pid = decision.pid;
+        let (token_main, token_scalar, token_mask) =
+            y47_encode::encode_observation(env, pid, &env.hands[pid as usize])?;
+        let (action_main, action_consume, action_consume_mask, legal_action_mask) =
+            y47_encode::encode_actions(env, pid, &decision.legal)?;
+
+        self.token_main.extend(token_main.iter().copied());
+        self.token_scalar.extend(token_scalar.iter().copied());
+        self.token_mask.extend(token_mask.iter().copied());
+        self.action_main.extend(action_main.iter().copied());
+        self.action_consume.extend(action_consume.iter().copied());
+        self.action_consume_mask
+            .extend(action_consume_mask.iter().copied());
+        self.legal_action_mask
+            .extend(legal_action_mask.iter().copied());
+        self.action_index.push(decision.chosen as i64);
+        self.player_id.push(pid as i64);
+        self.source.push(source);
+        self.kyoku.push(kyoku);
+        Ok(())
+    }
+
+    fn append(&mut self, mut other: SampleBuffer) {
+        self.token_main.append(&mut other.token_main);
+        self.token_scalar.append(&mut other.token_scalar);
+        self.token_mask.append(&mut other.token_mask);
+        self.action_main.append(&mut other.action_main);
+        self.action_consume.append(&mut other.action_consume);
+        self.action_consume_mask
+            .append(&mut other.action_consume_mask);
+        self.legal_action_mask.append(&mut other.legal_action_mask);
+        self.action_index.append(&mut other.action_index);
+        self.player_id.append(&mut other.player_id);
+        self.source.append(&mut other.source);
+        self.kyoku.append(&mut other.kyoku);
+    }
+
+    /// Splits off the first `n` samples.
+    fn take_front(&mut self, n: usize) -> SampleBuffer {
+        SampleBuffer {
+            token_main: split_front(&mut self.token_main, n * TOKEN_MAIN),
+            token_scalar: split_front(&mut self.token_scalar, n * TOKEN_SCALAR),
+            token_mask: split_front(&mut self.token_mask, n * schema::MAX_STATE_TOKENS),
+            action_main: split_front(&mut self.action_main, n * ACTION_MAIN),
+            action_consume: split_front(&mut self.action_consume, n * ACTION_CONSUME),
+            action_consume_mask: split_front(&mut self.action_consume_mask, n * ACTION_CONSUME),
+            legal_action_mask: split_front(&mut self.legal_action_mask, n * schema::MAX_ACTIONS),
+            action_index: split_front(&mut self.action_index, n),
+            player_id: split_front(&mut self.player_id, n),
+            source: split_front(&mut self.source, n),
+            kyoku: split_front(&mut self.kyoku, n),
+        }
+    }
+
+    /// Encodes every column as `.npy` bytes, keyed like the `Y47Turn` attributes.
+    fn to_npy(&self) -> Vec<(&'static str, Vec<u8>)> {
+        fn col<T: NpyElement>(
+            name: &'static str,
+            shape: &[usize],
+            data: &[T],
+        ) -> (&'static str, Vec<u8>) {
+            (name, npy_bytes(shape, data))
+        }
+        let n = self.len();
+        vec![
+            col(
+                "token_main",
+                &[n, schema::MAX_STATE_TOKENS, schema::TOKEN_MAIN_DIM],
+                &self.token_main,
+            ),
+            col(
+                "token_scalar",
+                &[n, schema::MAX_STATE_TOKENS, 3],
+                &self.token_scalar,
+            ),
+            col(
+                "token_mask",
+                &[n, schema::MAX_STATE_TOKENS],
+                &self.token_mask,
+            ),
+            col(
+                "action_main",
+                &[n, schema::MAX_ACTIONS, schema::ACTION_MAIN_DIM],
+                &self.action_main,
+            ),
+            col(
+                "action_consume",
+                &[n, schema::MAX_ACTIONS, schema::MAX_CONSUME_TILES],
+                &self.action_consume,
+            ),
+            col(
+                "action_consume_mask",
+                &[n, schema::MAX_ACTIONS, schema::MAX_CONSUME_TILES],
+                &self.action_consume_mask,
+            ),
+            col(
+                "legal_action_mask",
+                &[n, schema::MAX_ACTIONS],
+                &self.legal_action_mask,
+            ),
+            col("action_index", &[n], &self.action_index),
+            col("player_id", &[n], &self.player_id),
+            col("source", &[n], &self.source),
+            col("kyoku", &[n], &self.kyoku),
+        ]
+    }
+
+    /// Moves the columns into a dict of NumPy arrays with the same keys and shapes
+    /// as the `.npy` shard members.
+    pub(crate) fn into_pydict(self, py: Python<'_>) -> PyResult<Bound<'_, PyDict>> {
+        fn put<'py, T: numpy::Element>(
+            dict: &Bound<'py, PyDict>,
+            name: &str,
+            shape: &[usize],
+            data: Vec<T>,
+        ) -> PyResult<()> {
+            let array = ArrayD::from_shape_vec(IxDyn(shape), data)
+                .map_err(|e| PyValueError::new_err(format!("Invalid array shape: {}", e)))?;
+            dict.set_item(name, array.into_pyarray(dict.py()))
+        }
+        let n = self.len();
+        let (tokens, actions) = (schema::MAX_STATE_TOKENS, schema::MAX_ACTIONS);
+        let dict = PyDict::new(py);
+        put(
+            &dict,
+            "token_main",
+            &[n, tokens, schema::TOKEN_MAIN_DIM],
+            self.token_main,
+        )?;
+        put(&dict, "token_scalar", &[n, tokens, 3], self.token_scalar)?;
+        put(&dict, "token_mask", &[n, tokens], self.token_mask)?;
+        put(
+            &dict,
+            "action_main",
+            &[n, actions, schema::ACTION_MAIN_DIM],
+            self.action_main,
+        )?;
+        put(
+            &dict,
+            "action_consume",
+            &[n, actions, schema::MAX_CONSUME_TILES],
+            self.action_consume,
+        )?;
+        put(
+            &dict,
+            "action_consume_mask",
+            &[n, actions, schema::MAX_CONSUME_TILES],
+            self.action_consume_mask,
+        )?;
+        put(
+            &dict,
+            "legal_action_mask",
+            &[n, actions],
+            self.legal_action_mask,
+        )?;
+        put(&dict, "action_index", &[n], self.action_index)?;
+        put(&dict, "player_id", &[n], self.player_id)?;
+        put(&dict, "source", &[n], self.source)?;
+        put(&dict, "kyoku", &[n], self.kyoku)?;
+        Ok(dict)
+    }
+}
+
+struct ExtractJob<'a> {
+    paths: &'a [String],
+    out_dir: PathBuf,
+    shard_size: usize,
+    format: ShardFormat,
+    compress: bool,
+    include_forced: bool,
+    rule: GameRule,
+}
+
+#[derive(Default)]
+struct WorkerReport {
+    shards: Vec<(String, usize)>,
+    num_kyokus: usize,
+    skipped_kyokus: usize,
+    failed_files: Vec<(String, String)>,
+    io_error: Option<String>,
+}
+
+/// Replays one kyoku; a kyoku that cannot be replayed contributes no samples.
+fn extract_kyoku(
+    job: &ExtractJob<'_>,
+    kyoku: &Kyoku,
+    source: i64,
+    index: i64,
+) -> Result<SampleBuffer, String> {
+    let mut driver = KyokuDriver::new(kyoku, job.rule)?;
+    let mut samples = SampleBuffer::default();
+    while driver.next_step(|env, decision| {
+        if !job.include_forced && decision.legal.len() < 2 {
+            return Ok(());
+        }
+        samples
+            .push(env, decision, source, index)
+            .map_err(|e| e.to_string())
+    })? {}
+    Ok(samples)
+}
+
+/// Samples, kyoku count and skipped kyoku count of one file. Samples are only
+/// handed over once the whole file is done, so a file that fails halfway
+/// contributes nothing.
+fn extract_file(
+    job: &ExtractJob<'_>,
+    path: &str,
+    source: i64,
+) -> Result<(SampleBuffer, usize, usize), String> {
+    let kyokus = ReplayGame::read_rounds(path)?;
+    let mut samples = SampleBuffer::default();
+    let mut skipped = 0;
+    for (k_idx, kyoku) in kyokus.iter().enumerate() {
+        match extract_kyoku(job, kyoku, source, k_idx as i64) {
+            Ok(s) => samples.append(s),
+            Err(_) => skipped += 1,
+        }
+    }
+    Ok((samples, kyokus.len(), skipped))
+}
+
+fn write_shard(job: &ExtractJob<'_>, shard: &SampleBuffer, id: usize) -> std::io::Result<String> {
+    let columns = shard.to_npy();
+    let path = match job.format {
+        ShardFormat::Npz => {
+            let path = job.out_dir.join(format!("shard-{:05}.npz", id));
+            write_npz(&path, &columns, job.compress)?;
+            path
+        }
+        ShardFormat::Npy => {
+            let path = job.out_dir.join(format!("shard-{:05}", id));
+            std::fs::create_dir_all(&path)?;
+            for (name, bytes) in &columns {
+                std::fs::write(path.join(format!("{}.npy", name)), bytes)?;
+            }
+            path
+        }
+    };
+    Ok(path.to_string_lossy().into_owned())
+}
+
+fn run_worker(
+    job: &ExtractJob<'_>,
+    next_file: &AtomicUsize,
+    next_shard: &AtomicUsize,
+) -> WorkerReport {
+    let mut report = WorkerReport::default();
+    let mut pending = SampleBuffer::default();
+
+    let mut flush = |pending: &mut SampleBuffer, report: &mut WorkerReport, n: usize| -> bool {
+        let shard = pending.take_front(n);
+        let id = next_shard.fetch_add(1, Ordering::Relaxed);
+        match write_shard(job, &shard, id) {
+            Ok(path) => {
+                report.shards.push((path, n));
+                true
+            }
+            Err(e) => {
+                report.io_error = Some(e.to_string());
+                false
+            }
+        }
+    };
+
+    loop {
+        let file_idx = next_file.fetch_add(1, Ordering::Relaxed);
+        let Some(path) = job.paths.get(file_idx) else {
+            break;
+        };
+        let (samples, num_kyokus, skipped) =
+            match catch_panic(|| extract_file(job, path, file_idx as i64)).and_then(|r| r) {
+                Ok(file) => file,
+                Err(e) => {
+                    report.failed_files.push((path.clone(), e));
+                    continue;
+                }
+            };
+        report.num_kyokus += num_kyokus;
+        report.skipped_kyokus += skipped;
+        pending.append(samples);
+        while pending.len() >= job.shard_size {
+            if !flush(&mut pending, &mut report, job.shard_size) {
+                return report;
+            }
+        }
+    }
+    let rest = pending.len();
+    if rest > 0 {
+        flush(&mut pending, &mut report, rest);
+    }
+    report
+}
+
+/// Replays logged games and writes Y47 training samples as shards under `out_dir`.
+///
+/// Each sample is one logged decision: the Y47 observation/action tensors of the
+/// deciding seat (named like the `Y47Turn` attributes, with a leading sample axis)
+/// plus `action_index`, the row of the logged action in the legal action table.
+/// `player_id`, `source` (index into `paths`) and `kyoku` (index within the file)
+/// identify where a sample came from.
+///
+/// Files are distributed across `num_workers` threads (default: all cores). With
+/// `format="npz"` every shard is one `shard-NNNNN.npz`; with `format="npy"` it is
+/// a `shard-NNNNN/` directory holding one `.npy` per column. Kyokus the env cannot
+/// replay are skipped and counted; files that cannot be read, or whose replay
+/// panics, are listed in `failed_files`. Decisions with a single legal action (e.g.
+/// tsumogiri while in riichi) are dropped unless `include_forced` is set.
+///
+/// Returns a dict with `shards` (list of `(path, num_samples)`), `num_samples`,
+/// `num_kyokus`, `skipped_kyokus` and `failed_files` (list of `(path, error)`).
+#[pyfunction]
+#[pyo3(signature = (paths, out_dir, shard_size=2048, num_workers=None, format="npz", compress=false, include_forced=false, rule=None))]
+#[allow(clippy::too_many_arguments)]
+pub fn extract_y47_samples(
+    py: Python<'_>,
+    paths: Vec<String>,
+    out_dir: String,
+    shard_size: usize,
+    num_workers: Option<usize>,
+    format: &str,
+    compress: bool,
+    include_forced: bool,
+    rule: Option<GameRule>,
+) -> PyResult<Py<PyAny>> {
+    let format = match format {
+        "npz" => ShardFormat::Npz,
+        "npy" => ShardFormat::Npy,
+        _ => {
+            return Err(PyValueError::new_err(format!(
+                "Unsupported format: {} (expected 'npz' or 'npy')",
+                format
+            )))
+        }
+    };
+    if shard_size == 0 {
+        return Err(PyValueError::new_err("shard_size must be positive"));
+    }
+    std::fs::create_dir_all(&out_dir)
+        .map_err(|e| PyOSError::new_err(format!("Failed to create {}: {}", out_dir, e)))?;
+
+    let job = ExtractJob {
+        paths: &paths,
+        out_dir: Path::new(&out_dir).to_path_buf(),
+        shard_size,
+        format,
+        compress,
+        include_forced,
+        rule: rule.unwrap_or_default(),
+    };
+    let workers = num_workers
+        .unwrap_or_else(|| {
+            std::thread::available_parallelism()
+                .map(|n| n.get())
+                .unwrap_or(1)
+        })
+        .clamp(1, paths.len().max(1));
+
+    let reports: Vec<WorkerReport> = py.detach(|| {
+        let next_file = AtomicUsize::new(0);
+        let next_shard = AtomicUsize::new(0);
+        std::thread::scope(|scope| {
+            let handles: Vec<_> = (0..workers)
+                .map(|_| scope.spawn(|| run_worker(&job, &next_file, &next_shard)))
+                .collect();
+            handles
+                .into_iter()
+                .map(|h| h.join().expect("extract worker panicked"))
+                .collect()
+        })
+    });
+
+    let mut summary = WorkerReport::default();
+    for r in reports {
+        if let Some(e) = r.io_error {
+            return Err(PyOSError::new_err(format!("Failed to write shard: {}", e)));
+        }
+        summary.shards.extend(r.shards);
+        summary.num_kyokus += r.num_kyokus;
+        summary.skipped_kyokus += r.skipped_kyokus;
+        summary.failed_files.extend(r.failed_files);
+    }
+    summary.shards.sort();
+
+    let dict = PyDict::new(py);
+    let num_samples: usize = summary.shards.iter().map(|(_, n)| n).sum();
+    dict.set_item("shards", summary.shards)?;
+    dict.set_item("num_samples", num_samples)?;
+    dict.set_item("num_kyokus", summary.num_kyokus)?;
+    dict.set_item("skipped_kyokus", summary.skipped_kyokus)?;
+    dict.set_item("failed_files", summary.failed_files)?;
+    Ok(dict.into_any().unbind())
+}
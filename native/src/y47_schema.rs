@@ -6,6 +6,7 @@ pub const NUM_PLAYERS: usize = 4;
 pub const MAX_STATE_TOKENS: usize = 256;
 pub const MAX_ACTIONS: usize = 128;
 pub const MAX_CONSUME_TILES: usize = 4;
+pub const TOKEN_SCALAR_DIM: usize = 3;
 
 pub const TOKEN_MAIN_DIM: usize = 7;
 pub const TOK_TYPE: usize = 0;
@@ -1,5 +1,8 @@
-use numpy::{PyArray1, PyArray2};
+use numpy::ndarray::{ArrayViewD, Axis};
+use numpy::{Element, PyArray1, PyArray2, PyReadwriteArrayDyn};
+use pyo3::exceptions::{PyKeyError, PyValueError};
 use pyo3::prelude::*;
+use pyo3::types::PyDict;
 
 #[pyclass(module = "riichienv._riichienv")]
 pub struct Y47Turn {
@@ -42,4 +45,61 @@ impl Y47Turn {
             legal_action_mask,
         }
     }
+
+    /// Pickles as the seven arrays, so protocol 5 can send them out-of-band.
+    #[allow(clippy::type_complexity)]
+    fn __reduce__<'py>(
+        slf: &Bound<'py, Self>,
+    ) -> (
+        Bound<'py, PyAny>,
+        (
+            Py<PyArray2<i64>>,
+            Py<PyArray2<f32>>,
+            Py<PyArray1<bool>>,
+            Py<PyArray2<i64>>,
+            Py<PyArray2<i64>>,
+            Py<PyArray2<bool>>,
+            Py<PyArray1<bool>>,
+        ),
+    ) {
+        let py = slf.py();
+        let t = slf.borrow();
+        (
+            slf.get_type().into_any(),
+            (
+                t.token_main.clone_ref(py),
+                t.token_scalar.clone_ref(py),
+                t.token_mask.clone_ref(py),
+                t.action_main.clone_ref(py),
+                t.action_consume.clone_ref(py),
+                t.action_consume_mask.clone_ref(py),
+                t.legal_action_mask.clone_ref(py),
+            ),
+        )
+    }
+}
+
+/// Copies `src` into `out[name][row]`, where `out` maps field names to writable
+/// arrays with one row per seat (e.g. views of shared memory).
+pub(crate) fn write_row<T: Element>(
+    out: &Bound<'_, PyDict>,
+    name: &str,
+    row: usize,
+    src: ArrayViewD<'_, T>,
+) -> PyResult<()> {
+    let item = out
+        .get_item(name)?
+        .ok_or_else(|| PyKeyError::new_err(name.to_string()))?;
+    let mut array = item.extract::<PyReadwriteArrayDyn<'_, T>>()?;
+    let mut view = array.as_array_mut();
+    if view.ndim() == 0 || row >= view.shape()[0] || view.shape()[1..] != *src.shape() {
+        return Err(PyValueError::new_err(format!(
+            "out[{:?}] has shape {:?}, expected (4, {:?})",
+            name,
+            view.shape(),
+            src.shape()
+        )));
+    }
+    view.index_axis_mut(Axis(0), row).assign(&src);
+    Ok(())
 }
@@ -1,8 +1,10 @@
 from . import convert
 from ._riichienv import (  # type: ignore
     AgariContext,
+    GameRecord,
     GameRule,
     Kyoku,
+    KyokuSeeker,
     Meld,
     MeldType,
     Observation,
@@ -10,12 +12,17 @@ from ._riichienv import (  # type: ignore
     ReplayGame,
     RiichiEnv,
     Score,
+    StatsAggregator,
     Wind,
     Y47Turn,
     calculate_score,
     check_riichi_candidates,
+    extract_y47_samples,
+    generate_walls,
     parse_hand,
     parse_tile,
+    riichi_options,
+    riichi_options_batch,
 )
 from .action import Action, ActionType
 from .game_mode import GameType
@@ -30,18 +37,25 @@ NORTH = Wind.North
 __all__ = [
     "convert",
     "AgariContext",
+    "GameRecord",
     "Kyoku",
+    "KyokuSeeker",
     "Meld",
     "MeldType",
     "Observation",
     "ReplayGame",
     "Score",
+    "StatsAggregator",
     "Wind",
     "Y47Turn",
     "calculate_score",
     "check_riichi_candidates",
+    "extract_y47_samples",
+    "generate_walls",
     "parse_hand",
     "parse_tile",
+    "riichi_options",
+    "riichi_options_batch",
     "Action",
     "ActionType",
     "RiichiEnv",
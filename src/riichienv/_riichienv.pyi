@@ -1,3 +1,5 @@
+import os
+from collections.abc import Iterable
 from enum import IntEnum
 from typing import Any
 
@@ -140,6 +142,13 @@ class AgariCalculator:
     def calc(
         self, win_tile: int, dora_indicators: list[int], ura_indicators: list[int], conditions: Conditions
     ) -> Agari: ...
+    def calc_many(
+        self,
+        win_tiles: list[int],
+        dora_indicators: list[int] = [],
+        ura_indicators: list[int] = [],
+        conditions: Conditions | None = None,
+    ) -> list[Agari]: ...
     def is_tenpai(self) -> bool: ...
     def get_waits(self) -> list[int]: ...
     @staticmethod
@@ -152,8 +161,14 @@ class Observation:
     prev_events_size: int
     def new_events(self) -> list[str]: ...
     def legal_actions(self) -> list[Action]: ...
-    def select_action_from_mjai(self, mjai: str | dict[str, Any]) -> Action | None: ...
+    def select_action_from_mjai(self, mjai_resp: dict[str, Any]) -> Action | None: ...
+    def select_action_from_mjai_str(self, mjai_resp: str) -> Action | None: ...
+    @staticmethod
+    def select_actions_from_mjai(observations: list[Observation], mjai_resps: list[str]) -> list[Action | None]: ...
     def to_dict(self) -> dict[str, Any]: ...
+    def to_bytes(self) -> bytes: ...
+    @staticmethod
+    def from_bytes(data: bytes) -> Observation: ...
     def __init__(self, *args: Any, **kwargs: Any): ...
 
 class Y47Turn:
@@ -167,10 +182,18 @@ class Y47Turn:
     def __init__(self, *args: Any, **kwargs: Any): ...
 
 class Kyoku:
+    ACTION_TYPE_NAMES: list[str]
     events: list[dict]
     def take_agari_contexts(self) -> list[list[AgariContext]]: ...
+    def to_arrays(self) -> dict[str, Any]: ...
     def __iter__(self) -> KyokuIterator: ...
 
+class KyokuSeeker:
+    num_steps: int
+    def __init__(self, kyoku: Kyoku, checkpoint_every: int = 16, rule: GameRule | None = None) -> None: ...
+    def seek(self, step: int, *, mjai_logging: bool = True) -> RiichiEnv: ...
+    def __len__(self) -> int: ...
+
 class KyokuIterator:
     def __next__(self) -> Any: ...
     def __iter__(self) -> KyokuIterator: ...
@@ -180,6 +203,9 @@ class ReplayGame:
     @staticmethod
     def from_json(json_str: str) -> ReplayGame: ...
     def take_kyokus(self) -> list[Kyoku]: ...
+    def to_arrays(self) -> dict[str, Any]: ...
+    @staticmethod
+    def corpus_to_arrays(paths: list[str]) -> dict[str, Any]: ...
     def verify(self) -> None: ...
     def __init__(self, *args: Any, **kwargs: Any): ...
 
@@ -236,7 +262,8 @@ class RiichiEnv:
     turn_count: int
     wall_digest: str
     pao: list[dict[int, int]]
-
+    @property
+    def auto_play(self) -> list[str]: ...
     def __init__(
         self,
         game_mode: str | int | None = None,
@@ -244,7 +271,23 @@ class RiichiEnv:
         seed: int | None = None,
         round_wind: int | None = None,
         rule: GameRule | None = None,
+        record: bool = False,
+        auto_play: str | Iterable[str] | None = None,  # e.g. {"riichi_tsumogiri", "always_ron"}
+        rng: str | None = None,  # "chacha" (default) or "xoshiro"
+        digest_version: int = 1,  # 0 disables wall_digest, 2 hashes raw tile bytes
     ) -> None: ...
+    @staticmethod
+    def from_kyoku(
+        kyoku: Kyoku, step: int = 0, rule: GameRule | None = None, *, mjai_logging: bool = True
+    ) -> RiichiEnv: ...
+    @staticmethod
+    def from_mjai(
+        events: list[dict[str, Any]] | list[str],
+        upto: int | None = None,
+        rule: GameRule | None = None,
+        *,
+        mjai_logging: bool = True,
+    ) -> RiichiEnv: ...
     @property
     def game_mode(self) -> int: ...
     def scores(self) -> list[int]: ...
@@ -253,11 +296,24 @@ class RiichiEnv:
     def reset(
         self, oya: int | None = None, honba: int | None = None, *args: Any, **kwargs: Any
     ) -> dict[int, Observation]: ...
+    def game_record(self) -> GameRecord: ...
+    def to_bytes(self, include_logs: bool = True) -> bytes: ...
+    @staticmethod
+    def from_bytes(data: bytes) -> RiichiEnv: ...
+    def load_walls(self, walls: Any) -> None: ...
+    @property
+    def num_walls(self) -> int: ...
+    @property
+    def wall_cursor(self) -> int | None: ...
+    @property
+    def rng(self) -> str: ...
     def step(
         self, action: Action | int | dict[int, Action] | None = None, *args: Any, **kwargs: Any
     ) -> dict[int, Observation]: ...
     def reset_y47(self, *args: Any, **kwargs: Any) -> dict[int, Y47Turn]: ...
     def step_y47(self, action_index: dict[int, int]) -> tuple[dict[int, Y47Turn], Any, bool]: ...
+    def reset_y47_into(self, out: dict[str, Any], *args: Any, **kwargs: Any) -> None: ...
+    def step_y47_into(self, action_index: dict[int, int], out: dict[str, Any]) -> tuple[list[float], bool]: ...
     def done(self) -> bool: ...
     def get_observations(self, players: list[int] | None = None) -> dict[int, Observation]: ...
     def get_obs_py(self, player_id: int) -> Observation: ...
@@ -269,6 +325,29 @@ class RiichiEnv:
     def _is_furiten(self, player_id: int) -> bool: ...
     def _reveal_kan_dora(self) -> None: ...
 
+class GameRecord:
+    game_mode: int
+    seed: int
+    rule: GameRule
+    rng: str
+    def to_bytes(self) -> bytes: ...
+    @staticmethod
+    def from_bytes(data: bytes) -> GameRecord: ...
+    def replay(self, skip_mjai_logging: bool = False) -> RiichiEnv: ...
+    def to_mjai(self) -> list[dict[str, Any]]: ...
+    def to_kyokus(self) -> list[Kyoku]: ...
+    def to_y47(self) -> dict[str, Any]: ...
+    def __len__(self) -> int: ...
+
+class StatsAggregator:
+    def __init__(self) -> None: ...
+    def add_replay(self, game: ReplayGame) -> None: ...
+    def add_files(self, paths: list[str], num_workers: int | None = None) -> list[tuple[str, str]]: ...
+    def add_mjai(self, events: list[dict[str, Any]] | list[str]) -> None: ...
+    def add_env(self, env: RiichiEnv) -> None: ...
+    def merge(self, other: StatsAggregator) -> None: ...
+    def summary(self) -> dict[str, Any]: ...
+
 class Score:
     total: int
     def pay_ron(self, *args: Any, **kwargs: Any) -> None: ...
@@ -278,8 +357,39 @@ class Score:
 
 def calculate_score(han: int, fu: int, is_oya: bool, is_tsumo: bool) -> tuple[int, int]: ...
 def check_riichi_candidates(tiles: list[int]) -> list[int]: ...
+def extract_y47_samples(
+    paths: list[str],
+    out_dir: str,
+    shard_size: int = 2048,
+    num_workers: int | None = None,
+    format: str = "npz",  # noqa: A002
+    compress: bool = False,
+    include_forced: bool = False,
+    rule: GameRule | None = None,
+) -> dict[str, Any]: ...
+def generate_walls(n: int, seed: int, rng: str = "chacha") -> Any: ...
+def inject_metadata(events: list[Any]) -> list[dict[str, Any] | None]: ...
+def inject_metadata_batch(
+    logs: list[list[Any] | str | os.PathLike[str]], num_workers: int | None = None
+) -> list[list[dict[str, Any] | None]]: ...
+def mjai_to_tid(mjai_str: str) -> int | None: ...
+def mpsz_to_tid(mpsz_str: str) -> int | None: ...
 def parse_hand(hand_str: str) -> tuple[list[int], list[Meld]]: ...
 def parse_tile(tile_str: str) -> int: ...
+def riichi_options(
+    tiles: list[int], melds: list[Meld] = [], visible: list[int] | None = None
+) -> list[tuple[int, list[int], list[int]]]: ...
+def riichi_options_batch(hands: Any, visible: Any | None = None) -> dict[str, Any]: ...
+def tid_to_mjai(tid: int) -> str: ...
+def tid_to_mpsz(tid: int) -> str: ...
+
+Y47_NUM_PLAYERS: int
+Y47_MAX_STATE_TOKENS: int
+Y47_TOKEN_MAIN_DIM: int
+Y47_TOKEN_SCALAR_DIM: int
+Y47_MAX_ACTIONS: int
+Y47_ACTION_MAIN_DIM: int
+Y47_MAX_CONSUME_TILES: int
 
 __all__ = [
     "Action",
@@ -303,6 +413,9 @@ __all__ = [
     "Wind",
     "calculate_score",
     "check_riichi_candidates",
+    "generate_walls",
     "parse_hand",
     "parse_tile",
+    "riichi_options",
+    "riichi_options_batch",
 ]
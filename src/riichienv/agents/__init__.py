@@ -1,3 +1,4 @@
+from .default_agent import default_action
 from .random_agent import RandomAgent
 
-__all__ = ["RandomAgent"]
+__all__ = ["RandomAgent", "default_action"]
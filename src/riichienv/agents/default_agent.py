@@ -0,0 +1,13 @@
+from riichienv import Action, ActionType, Observation, RiichiEnv
+
+
+def default_action(env: RiichiEnv, obs: Observation) -> Action:
+    """Pass when possible, otherwise tsumogiri, otherwise the first legal action."""
+    legal = obs.legal_actions()
+    for act in legal:
+        if act.action_type == ActionType.PASS:
+            return act
+    for act in legal:
+        if act.action_type == ActionType.DISCARD and act.tile == env.drawn_tile:
+            return act
+    return legal[0]
@@ -0,0 +1,247 @@
+"""
+Multi-process arena for evaluating agents against each other.
+
+``run_arena`` plays games across a process pool. Each worker builds its own
+agents from picklable factories (classes, top-level functions or
+``functools.partial`` objects), so no observation ever crosses a process
+boundary: workers send back plain scores, ranks and points, plus the episode's
+``GameRecord`` bytes when ``keep_records=True``, which ``GameRecord.from_bytes``
+turns back into a replayable game.
+
+Games come in blocks of four sharing a seed, with the agents rotated one seat
+per game, so every agent plays every wall from every seat.
+"""
+
+import math
+import multiprocessing
+import statistics
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from ._riichienv import RiichiEnv  # type: ignore
+
+AgentFactory = Callable[[], Any]
+
+
+@dataclass
+class GameResult:
+    """
+    Outcome of one arena game.
+
+    ``seats[p]`` is the index of the agent that played seat ``p``; ``scores``,
+    ``ranks`` and ``points`` are indexed by seat.
+    """
+
+    game: int
+    seed: int
+    seats: list[int]
+    scores: list[int]
+    ranks: list[int]
+    points: list[int]
+    record: bytes | None = None
+
+
+@dataclass
+class AgentSummary:
+    games: int
+    rank_counts: list[int]
+    mean_rank: float
+    mean_rank_ci: tuple[float, float]
+    mean_points: float
+    mean_points_ci: tuple[float, float]
+    mean_score: float
+    stable_dan: float
+
+
+def _seating(game: int, n_agents: int) -> list[int]:
+    # Rotate the four "slots" through the seats; with fewer than four agents
+    # the slots cycle through them.
+    rotation = game % 4
+    return [(seat - rotation) % 4 % n_agents for seat in range(4)]
+
+
+def _play_game(
+    factories: Sequence[AgentFactory],
+    game: int,
+    seed: int,
+    *,
+    preset_rule: str | None,
+    keep_records: bool,
+    env_kwargs: dict[str, Any],
+    agents_cache: dict[int, Any],
+) -> GameResult:
+    seats = _seating(game, len(factories))
+    acts = []
+    for agent_idx in seats:
+        if agent_idx not in agents_cache:
+            agent = factories[agent_idx]()
+            agents_cache[agent_idx] = agent.act if hasattr(agent, "act") else agent
+        acts.append(agents_cache[agent_idx])
+
+    env = RiichiEnv(seed=seed, record=keep_records, **env_kwargs)
+    obs = env.reset()
+    while not env.done():
+        obs = env.step({pid: acts[pid](o) for pid, o in obs.items()})
+
+    return GameResult(
+        game=game,
+        seed=seed,
+        seats=seats,
+        scores=list(env.scores()),
+        ranks=list(env.ranks()),
+        points=list(env.points(preset_rule)),
+        record=env.game_record().to_bytes() if keep_records else None,
+    )
+
+
+# Per-process state, set once by the pool initializer.
+_worker: dict[str, Any] = {}
+
+
+def _init_worker(
+    factories: Sequence[AgentFactory],
+    preset_rule: str | None,
+    keep_records: bool,
+    env_kwargs: dict[str, Any],
+) -> None:
+    _worker.update(
+        factories=factories,
+        preset_rule=preset_rule,
+        keep_records=keep_records,
+        env_kwargs=env_kwargs,
+        agents={},
+    )
+
+
+def _run_worker(job: tuple[int, int]) -> GameResult:
+    game, seed = job
+    return _play_game(
+        _worker["factories"],
+        game,
+        seed,
+        preset_rule=_worker["preset_rule"],
+        keep_records=_worker["keep_records"],
+        env_kwargs=_worker["env_kwargs"],
+        agents_cache=_worker["agents"],
+    )
+
+
+def run_arena(
+    agent_factories: Sequence[AgentFactory],
+    n_games: int,
+    *,
+    seed: int = 0,
+    processes: int | None = None,
+    preset_rule: str | None = None,
+    keep_records: bool = False,
+    mp_context: str | None = None,
+    **env_kwargs: Any,
+) -> Iterator[GameResult]:
+    """
+    Plays ``n_games`` games and yields their results as they finish.
+
+    ``agent_factories`` holds one to four zero-argument callables returning an
+    agent (an object with ``act(obs)`` or a plain callable). Game ``g`` uses
+    seed ``seed + g // 4`` and seats the agents rotated by ``g % 4``.
+    ``processes=0`` plays in the calling process, which is useful for
+    debugging; otherwise each pool worker builds its agents once and reuses
+    them. Results are yielded in completion order; sort by ``game`` for a
+    deterministic order. The remaining keyword arguments go to ``RiichiEnv``.
+    """
+    if not 1 <= len(agent_factories) <= 4:
+        raise ValueError(f"arena needs 1 to 4 agent factories, got {len(agent_factories)}")
+    if "seed" in env_kwargs or "record" in env_kwargs:
+        raise ValueError("pass seed and keep_records to run_arena instead of env kwargs")
+    jobs = [(g, seed + g // 4) for g in range(n_games)]
+
+    if processes == 0:
+        agents: dict[int, Any] = {}
+        for game, game_seed in jobs:
+            yield _play_game(
+                agent_factories,
+                game,
+                game_seed,
+                preset_rule=preset_rule,
+                keep_records=keep_records,
+                env_kwargs=env_kwargs,
+                agents_cache=agents,
+            )
+        return
+
+    ctx = multiprocessing.get_context(mp_context)
+    with ctx.Pool(
+        processes,
+        initializer=_init_worker,
+        initargs=(list(agent_factories), preset_rule, keep_records, env_kwargs),
+    ) as pool:
+        yield from pool.imap_unordered(_run_worker, jobs)
+
+
+def stable_dan(
+    rank_counts: Sequence[int],
+    first: float = 90.0,
+    second: float = 45.0,
+    fourth_base: float = 30.0,
+    fourth_step: float = 15.0,
+) -> float:
+    """
+    Dan at which the expected rank-point change is zero.
+
+    A 4th place at dan ``d`` costs ``fourth_base + fourth_step * d`` points
+    against ``first`` and ``second`` for 1st and 2nd place; the defaults are
+    Tenhou's phoenix-table hanchan values (1-dan = 1), where a 4th place costs
+    ``15 * (d + 2)`` and the result is ``(6 * r1 + 3 * r2) / r4 - 2``. Returns
+    ``inf`` when no game ended in 4th place and ``nan`` when there are no
+    games.
+    """
+    total = sum(rank_counts)
+    if total == 0:
+        return math.nan
+    r1, r2, _, r4 = (c / total for c in rank_counts)
+    if r4 == 0:
+        return math.inf
+    return (first * r1 + second * r2 - fourth_base * r4) / (fourth_step * r4)
+
+
+def _mean_ci(values: list[float], z: float) -> tuple[float, tuple[float, float]]:
+    mean = statistics.fmean(values)
+    if len(values) < 2:
+        return mean, (math.nan, math.nan)
+    half = z * statistics.stdev(values) / math.sqrt(len(values))
+    return mean, (mean - half, mean + half)
+
+
+def summarize(results: Iterable[GameResult], z: float = 1.96) -> dict[int, AgentSummary]:
+    """
+    Per-agent summary of arena results.
+
+    Confidence intervals are normal approximations at ``z`` standard errors
+    (95% by default) over the per-seat results; seats taken by the same agent
+    in one game are counted separately.
+    """
+    ranks: dict[int, list[int]] = {}
+    points: dict[int, list[int]] = {}
+    scores: dict[int, list[int]] = {}
+    for r in results:
+        for seat, agent in enumerate(r.seats):
+            ranks.setdefault(agent, []).append(r.ranks[seat])
+            points.setdefault(agent, []).append(r.points[seat])
+            scores.setdefault(agent, []).append(r.scores[seat])
+
+    out = {}
+    for agent in sorted(ranks):
+        counts = [ranks[agent].count(k) for k in range(1, 5)]
+        mean_rank, rank_ci = _mean_ci(ranks[agent], z)
+        mean_points, points_ci = _mean_ci(points[agent], z)
+        out[agent] = AgentSummary(
+            games=len(ranks[agent]),
+            rank_counts=counts,
+            mean_rank=mean_rank,
+            mean_rank_ci=rank_ci,
+            mean_points=mean_points,
+            mean_points_ci=points_ci,
+            mean_score=statistics.fmean(scores[agent]),
+            stable_dan=stable_dan(counts),
+        )
+    return out
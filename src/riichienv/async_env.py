@@ -0,0 +1,74 @@
+"""
+Awaiting agent decisions concurrently.
+
+``AsyncRiichiEnv`` wraps a ``RiichiEnv`` whose seats are played by agents that
+may answer asynchronously (remote inference, subprocess bots). Each ``step``
+asks every active seat at once, so the three opponents deciding on a claim
+wait in parallel, and a seat that misses ``timeout`` gets the default action
+(pass, otherwise tsumogiri). Game rules still run in ``RiichiEnv.step``; many
+tables can be played in one event loop with ``asyncio.gather``.
+"""
+
+import asyncio
+import inspect
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+
+from ._riichienv import Action, Observation, RiichiEnv  # type: ignore
+from .agents import default_action
+
+AsyncAgent = Callable[[Observation], Action | Awaitable[Action]]
+
+
+class AsyncRiichiEnv:
+    """
+    ``RiichiEnv`` driven by four possibly asynchronous agents.
+
+    ``agents[p]`` plays seat ``p`` and is an object with ``act(obs)`` or a
+    callable; either may return an ``Action`` or an awaitable of one.
+    ``timeout`` (seconds, per decision) is off by default. Keyword arguments
+    go to ``RiichiEnv``; the wrapped env is available as ``env``.
+    """
+
+    def __init__(self, agents: Sequence[Any], timeout: float | None = None, **env_kwargs: Any):
+        if len(agents) != 4:
+            raise ValueError(f"AsyncRiichiEnv needs 4 agents, got {len(agents)}")
+        self.env = RiichiEnv(**env_kwargs)
+        self.timeout = timeout
+        self._acts: list[AsyncAgent] = [a.act if hasattr(a, "act") else a for a in agents]
+        self.obs: dict[int, Observation] = {}
+        # Decisions replaced by the default action after a timeout, per seat.
+        self.timeouts = [0] * 4
+
+    def reset(self, **kwargs: Any) -> dict[int, Observation]:
+        self.obs = self.env.reset(**kwargs)
+        return self.obs
+
+    def done(self) -> bool:
+        return self.env.done()
+
+    async def _decide(self, pid: int, obs: Observation) -> Action:
+        action = self._acts[pid](obs)
+        if not inspect.isawaitable(action):
+            return action
+        try:
+            return await asyncio.wait_for(action, self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts[pid] += 1
+            return default_action(self.env, obs)
+
+    async def step(self) -> dict[int, Observation]:
+        """Collects the active seats' decisions concurrently and applies them."""
+        if not self.obs:
+            raise RuntimeError("no pending decisions; call reset() first")
+        pids = list(self.obs)
+        actions = await asyncio.gather(*(self._decide(pid, self.obs[pid]) for pid in pids))
+        self.obs = self.env.step(dict(zip(pids, actions)))
+        return self.obs
+
+    async def play(self, **reset_kwargs: Any) -> RiichiEnv:
+        """Resets and plays to the end of the game, returning the env."""
+        self.reset(**reset_kwargs)
+        while not self.env.done():
+            await self.step()
+        return self.env
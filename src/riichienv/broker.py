@@ -0,0 +1,149 @@
+"""
+Batched Y47 inference over many environments.
+
+``InferenceBroker`` keeps ``num_envs`` environments running through
+``reset_y47``/``step_y47``, gathers every seat that has to act into one batch
+of stacked Y47 arrays, asks a policy for all of their action indices in a
+single call and sends the answers back, resetting finished games with fresh
+seeds. This keeps a batched forward pass busy with one decision per pending
+seat instead of one observation per env.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from ._riichienv import RiichiEnv  # type: ignore
+
+Y47_FIELDS = (
+    "token_main",
+    "token_scalar",
+    "token_mask",
+    "action_main",
+    "action_consume",
+    "action_consume_mask",
+    "legal_action_mask",
+)
+
+
+@dataclass
+class Episode:
+    """A finished game: the env it ran in, its seed and the per-seat rewards."""
+
+    env_id: int
+    seed: int
+    rewards: np.ndarray
+
+
+class InferenceBroker:
+    """
+    Runs ``num_envs`` environments in lockstep for batched action selection.
+
+    Episode seeds are ``seed, seed + 1, ...`` in the order games start, so a
+    run is reproducible for a deterministic policy. The remaining keyword
+    arguments go to every ``RiichiEnv``.
+    """
+
+    def __init__(self, num_envs: int, seed: int = 0, **env_kwargs: Any):
+        if num_envs < 1:
+            raise ValueError(f"num_envs must be positive, got {num_envs}")
+        self.envs = [RiichiEnv(**env_kwargs) for _ in range(num_envs)]
+        self._next_seed = seed
+        self._seeds = [0] * num_envs
+        self._turns: list[dict] = [{} for _ in range(num_envs)]
+        self._env_ids = np.zeros(4 * num_envs, dtype=np.int64)
+        self._seats = np.zeros(4 * num_envs, dtype=np.int64)
+        self._buffers: dict[str, np.ndarray] = {}
+        self._batch_size = 0
+        for env_id in range(num_envs):
+            self._reset_env(env_id)
+
+    @property
+    def num_envs(self) -> int:
+        return len(self.envs)
+
+    def _reset_env(self, env_id: int) -> None:
+        self._seeds[env_id] = self._next_seed
+        self._next_seed += 1
+        self._turns[env_id] = self.envs[env_id].reset_y47(seed=self._seeds[env_id])
+
+    def collect(self) -> dict[str, np.ndarray]:
+        """
+        Stacks the pending turns of every env into one batch.
+
+        Returns the seven Y47 fields with a leading batch axis plus ``env_id``
+        and ``seat`` arrays identifying each row. Rows are ordered by env and
+        then seat. The arrays are views of buffers reused by the next call, so
+        copy anything that must outlive it.
+        """
+        n = 0
+        for env_id, turns in enumerate(self._turns):
+            for seat in sorted(turns):
+                turn = turns[seat]
+                for name in Y47_FIELDS:
+                    value = np.asarray(getattr(turn, name))
+                    buf = self._buffers.get(name)
+                    if buf is None:
+                        buf = np.empty((len(self._env_ids), *value.shape), dtype=value.dtype)
+                        self._buffers[name] = buf
+                    buf[n] = value
+                self._env_ids[n] = env_id
+                self._seats[n] = seat
+                n += 1
+        self._batch_size = n
+        batch = {name: buf[:n] for name, buf in self._buffers.items()}
+        batch["env_id"] = self._env_ids[:n]
+        batch["seat"] = self._seats[:n]
+        return batch
+
+    def step(self, action_indices: Any) -> list[Episode]:
+        """
+        Applies one action index per row of the last ``collect`` batch.
+
+        Finished games are reset with the next seed and returned as episodes.
+        """
+        actions = np.asarray(action_indices).reshape(-1)
+        if len(actions) != self._batch_size:
+            raise ValueError(f"expected {self._batch_size} action indices, got {len(actions)}")
+
+        per_env: dict[int, dict[int, int]] = {}
+        for env_id, seat, idx in zip(
+            self._env_ids[: self._batch_size].tolist(),
+            self._seats[: self._batch_size].tolist(),
+            actions.tolist(),
+        ):
+            per_env.setdefault(env_id, {})[seat] = int(idx)
+
+        finished = []
+        for env_id, action_index in per_env.items():
+            turns, rewards, done = self.envs[env_id].step_y47(action_index)
+            if done:
+                finished.append(Episode(env_id, self._seeds[env_id], np.asarray(rewards)))
+                self._reset_env(env_id)
+            else:
+                self._turns[env_id] = turns
+        self._batch_size = 0
+        return finished
+
+    def run(
+        self,
+        policy: Callable[[dict[str, np.ndarray]], Any],
+        num_steps: int | None = None,
+        num_episodes: int | None = None,
+    ) -> list[Episode]:
+        """
+        Alternates ``collect``, ``policy(batch)`` and ``step``.
+
+        Stops after ``num_steps`` batched steps or once ``num_episodes`` games
+        have finished, whichever comes first; at least one limit is required.
+        """
+        if num_steps is None and num_episodes is None:
+            raise ValueError("run() needs num_steps or num_episodes")
+        episodes: list[Episode] = []
+        steps = 0
+        while (num_steps is None or steps < num_steps) and (num_episodes is None or len(episodes) < num_episodes):
+            episodes.extend(self.step(policy(self.collect())))
+            steps += 1
+        return episodes
@@ -1,63 +1,31 @@
+"""
+Conversions between 136-tile ids and MPSZ / MJAI strings.
+
+The scalar functions are front-ends to table-driven native versions. The
+``*_array`` functions convert whole NumPy arrays at once for log
+preprocessing; unlike the ``*_list`` helpers they return canonical ids and do
+not number repeated tiles.
+"""
+
+import functools
+from typing import Any
+
+from . import _riichienv as _native  # type: ignore
+
+
 def tid_to_mpsz(tid: int) -> str:
     """
     Convert 136-based tile ID to MPSZ string (e.g. 1z, 5p, 0p).
     0-based index: 0 is red 5 for m, p, s.
     """
-    if not (0 <= tid < 136):
-        raise ValueError(f"Invalid TID: {tid}")
-
-    # Check Red 5
-    # 5m: 16-19. 16 is red (usually).
-    # 5p: 52-55. 52 is red.
-    # 5s: 88-91. 88 is red.
-    if tid == 16:
-        return "0m"
-    if tid == 52:
-        return "0p"
-    if tid == 88:
-        return "0s"
-
-    kind = tid // 36
-    if kind < 3:
-        suit_char = ["m", "p", "s"][kind]
-        offset = tid % 36
-        num = offset // 4 + 1
-        return f"{num}{suit_char}"
-    else:
-        offset = tid - 108
-        num = offset // 4 + 1
-        return f"{num}z"
+    return _native.tid_to_mpsz(tid)
 
 
 def tid_to_mjai(tid: int) -> str:
     """
     Convert 136-based tile ID to MJAI string (e.g. E, 5p, 5pr).
     """
-    if not (0 <= tid < 136):
-        raise ValueError(f"Invalid TID: {tid}")
-
-    # Red 5s
-    if tid == 16:
-        return "5mr"
-    if tid == 52:
-        return "5pr"
-    if tid == 88:
-        return "5sr"
-
-    kind = tid // 36
-    if kind < 3:
-        suit_char = ["m", "p", "s"][kind]
-        offset = tid % 36
-        num = offset // 4 + 1
-        return f"{num}{suit_char}"
-    else:
-        offset = tid - 108
-        num = offset // 4 + 1
-        # MJAI Honors: E, S, W, N, P, F, C
-        mjai_honors = ["E", "S", "W", "N", "P", "F", "C"]
-        if 1 <= num <= 7:
-            return mjai_honors[num - 1]
-        return f"{num}z"  # Fallback? Should not reach
+    return _native.tid_to_mjai(tid)
 
 
 def mpsz_to_tid(mpsz_str: str) -> int:
@@ -65,6 +33,12 @@ def mpsz_to_tid(mpsz_str: str) -> int:
     Convert MPSZ string to TID. Returns canonical TID.
     e.g. 1z -> 108, 0p -> 52, 5p -> 53 (non-red).
     """
+    tid = _native.mpsz_to_tid(mpsz_str) if isinstance(mpsz_str, str) else None
+    return _parse_mpsz(mpsz_str) if tid is None else tid
+
+
+def _parse_mpsz(mpsz_str: str) -> int:
+    # Spellings the native parser does not take, and their errors.
     if not mpsz_str:
         raise ValueError("Empty string")
 
@@ -134,6 +108,11 @@ def mjai_to_tid(mjai_str: str) -> int:
     5pr -> Red 5p (52)
     5p -> Non-red 5p (53)
     """
+    tid = _native.mjai_to_tid(mjai_str) if isinstance(mjai_str, str) else None
+    return _parse_mjai(mjai_str) if tid is None else tid
+
+
+def _parse_mjai(mjai_str: str) -> int:
     # Check Honors
     honors_map = {"E": 1, "S": 2, "W": 3, "N": 4, "P": 5, "F": 6, "C": 7}
     if mjai_str in honors_map:
@@ -161,9 +140,9 @@ def mjai_to_tid(mjai_str: str) -> int:
             raise ValueError(f"Invalid red spec: {mjai_str}")
         # Convert to 0m, 0p, 0s
         mpsz_equiv = "0" + core[1:]
-        return mpsz_to_tid(mpsz_equiv)
+        return _parse_mpsz(mpsz_equiv)
 
-    return mpsz_to_tid(mjai_str)
+    return _parse_mpsz(mjai_str)
 
 
 def mjai_to_mpsz(mjai_str: str) -> str:
@@ -290,3 +269,71 @@ def paishan_to_wall(paishan_str: str) -> list[int]:
         wall.append(final_tid)
 
     return wall
+
+
+# Array versions
+@functools.cache
+def _numpy() -> Any:
+    # Imported on first use: riichienv itself does not depend on NumPy.
+    import numpy  # noqa: PLC0415
+
+    return numpy
+
+
+@functools.cache
+def _tables() -> dict[str, Any]:
+    np = _numpy()
+    tids = range(136)
+    mpsz = sorted({tid_to_mpsz(t) for t in tids})
+    mjai = sorted({tid_to_mjai(t) for t in tids} | set(mpsz))
+    return {
+        "tid_to_mpsz": np.array([tid_to_mpsz(t) for t in tids]),
+        "tid_to_mjai": np.array([tid_to_mjai(t) for t in tids]),
+        "mpsz": (np.array(mpsz), np.array([mpsz_to_tid(s) for s in mpsz], dtype=np.int64)),
+        "mjai": (np.array(mjai), np.array([mjai_to_tid(s) for s in mjai], dtype=np.int64)),
+    }
+
+
+def _tid_array_to_str(tids: Any, table: Any) -> Any:
+    np = _numpy()
+    tids = np.asarray(tids)
+    if tids.dtype.kind not in "iu":
+        raise TypeError(f"tile ids must be integers, got dtype {tids.dtype}")
+    if tids.size and (tids.min() < 0 or tids.max() >= 136):
+        bad = tids[(tids < 0) | (tids >= 136)].flat[0]
+        raise ValueError(f"Invalid TID: {bad}")
+    return table[tids]
+
+
+def _str_array_to_tid(strs: Any, names: Any, ids: Any, scalar: Any) -> Any:
+    np = _numpy()
+    strs = np.asarray(strs)
+    flat = strs.ravel()
+    keys = flat if flat.dtype.kind == "U" else flat.astype(str)
+    pos = np.minimum(np.searchsorted(names, keys), len(names) - 1)
+    out = ids[pos]
+    # Anything but a canonical spelling goes through the scalar parser, which
+    # accepts it or raises the usual error.
+    for i in np.flatnonzero(names[pos] != keys):
+        out[i] = scalar(str(flat[i]) if flat.dtype.kind == "U" else flat[i])
+    return out.reshape(strs.shape)
+
+
+def tid_to_mpsz_array(tids: Any) -> Any:
+    """Integer array of tile IDs -> array of MPSZ strings of the same shape."""
+    return _tid_array_to_str(tids, _tables()["tid_to_mpsz"])
+
+
+def tid_to_mjai_array(tids: Any) -> Any:
+    """Integer array of tile IDs -> array of MJAI strings of the same shape."""
+    return _tid_array_to_str(tids, _tables()["tid_to_mjai"])
+
+
+def mpsz_to_tid_array(strs: Any) -> Any:
+    """Array (str or object dtype) of MPSZ strings -> int64 array of canonical tile IDs."""
+    return _str_array_to_tid(strs, *_tables()["mpsz"], mpsz_to_tid)
+
+
+def mjai_to_tid_array(strs: Any) -> Any:
+    """Array (str or object dtype) of MJAI strings -> int64 array of canonical tile IDs."""
+    return _str_array_to_tid(strs, *_tables()["mjai"], mjai_to_tid)
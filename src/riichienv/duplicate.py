@@ -0,0 +1,134 @@
+"""
+Duplicate-mahjong evaluation.
+
+Each *set* plays the same sequence of walls four times, rotating the agents
+through the seats, so every agent receives every hand from every seat. Wall
+luck then cancels out of per-agent comparisons, which need far fewer games to
+separate than results on independent random walls.
+
+Walls come from the env's seeding scheme (hand ``k`` of a game seeded with
+``s`` is always dealt from the same wall) or from a wall bank such as
+``generate_walls(...)``.
+"""
+
+import math
+import statistics
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+from ._riichienv import Action, Observation, RiichiEnv  # type: ignore
+
+
+class Agent(Protocol):
+    def act(self, obs: Observation) -> Action: ...
+
+
+@dataclass
+class DuplicateResult:
+    """
+    Per-game outcomes indexed as ``[set][rotation][agent]``.
+
+    Agent ``i`` sits in seat ``(i + rotation) % 4``.
+    """
+
+    scores: list[list[list[int]]] = field(default_factory=list)
+    ranks: list[list[list[int]]] = field(default_factory=list)
+    points: list[list[list[int]]] = field(default_factory=list)
+
+    @property
+    def n_sets(self) -> int:
+        return len(self.scores)
+
+    def _metric(self, metric: str) -> list[list[list[int]]]:
+        if metric not in ("scores", "ranks", "points"):
+            raise ValueError(f"Unknown metric: {metric}")
+        return getattr(self, metric)
+
+    def per_set(self, agent: int, metric: str = "points") -> list[float]:
+        """Mean of ``metric`` for ``agent`` over the four rotations of each set."""
+        return [sum(rot[agent] for rot in games) / len(games) for games in self._metric(metric)]
+
+    def paired_diff(self, a: int, b: int, metric: str = "points") -> tuple[float, float]:
+        """
+        Mean and standard error of ``metric[a] - metric[b]``, paired per set.
+
+        Both agents play the same walls from every seat within a set, so the
+        set means are the independent samples.
+        """
+        diffs = [x - y for x, y in zip(self.per_set(a, metric), self.per_set(b, metric))]
+        if not diffs:
+            raise ValueError("no sets have been played")
+        stderr = statistics.stdev(diffs) / math.sqrt(len(diffs)) if len(diffs) > 1 else math.nan
+        return statistics.fmean(diffs), stderr
+
+    def summary(self) -> list[dict[str, float]]:
+        """Per-agent means of scores, ranks and points with their standard errors."""
+        out = []
+        for agent in range(4):
+            row: dict[str, float] = {}
+            for metric in ("scores", "ranks", "points"):
+                values = self.per_set(agent, metric)
+                row[f"mean_{metric}"] = statistics.fmean(values) if values else math.nan
+                row[f"{metric}_stderr"] = (
+                    statistics.stdev(values) / math.sqrt(len(values)) if len(values) > 1 else math.nan
+                )
+            out.append(row)
+        return out
+
+
+def play_duplicate(
+    agents: Sequence[Agent | Callable[[Observation], Action]],
+    n_sets: int,
+    seed: int | None = None,
+    walls: Any = None,
+    preset_rule: str | None = None,
+    **env_kwargs: Any,
+) -> DuplicateResult:
+    """
+    Plays ``n_sets`` duplicate sets of four seat-rotated games.
+
+    ``agents`` are four objects with ``act(obs)`` (such as ``RandomAgent``) or
+    plain callables; the same object may be passed more than once. Set ``s``
+    uses seed ``seed + s`` (``seed`` defaults to 0). With ``walls`` (an
+    ``(N, 136)`` wall bank; ``seed`` must then be left out) every set gets its
+    own slice of ``N // n_sets`` consecutive rows instead, so sets never share a
+    wall. A game that needs more hands than its slice holds starts over at the
+    slice's first row. ``preset_rule`` is passed to ``RiichiEnv.points`` and the
+    remaining keyword arguments to ``RiichiEnv``.
+    """
+    if len(agents) != 4:
+        raise ValueError(f"duplicate play needs 4 agents, got {len(agents)}")
+    if "seed" in env_kwargs:
+        raise ValueError("pass the seed as play_duplicate(seed=...)")
+    if walls is not None:
+        if seed is not None:
+            raise ValueError("seed and walls are mutually exclusive")
+        if len(walls) < n_sets:
+            raise ValueError(f"a bank of {len(walls)} walls is too small for {n_sets} sets")
+        stride = len(walls) // n_sets
+    seed = seed or 0
+    acts = [a.act if hasattr(a, "act") else a for a in agents]
+
+    result = DuplicateResult()
+    for s in range(n_sets):
+        set_scores, set_ranks, set_points = [], [], []
+        for rotation in range(4):
+            env = RiichiEnv(seed=seed + s, **env_kwargs)
+            if walls is not None:
+                env.load_walls(walls[s * stride : (s + 1) * stride])
+                obs = env.reset(wall_index=0)
+            else:
+                obs = env.reset()
+            while not env.done():
+                obs = env.step({pid: acts[(pid - rotation) % 4](o) for pid, o in obs.items()})
+
+            seats = [(i + rotation) % 4 for i in range(4)]
+            scores, ranks, points = env.scores(), env.ranks(), env.points(preset_rule)
+            set_scores.append([scores[p] for p in seats])
+            set_ranks.append([ranks[p] for p in seats])
+            set_points.append([points[p] for p in seats])
+        result.scores.append(set_scores)
+        result.ranks.append(set_ranks)
+        result.points.append(set_points)
+    return result
@@ -91,7 +91,7 @@ class YakuList:
         raise ValueError(f"Invalid mjsoul_id: {mjsoul_id}")
 
 
-@dataclass
+@dataclass(slots=True)
 class Agari:
     agari: bool
     yakuman: bool = False
@@ -121,6 +121,45 @@ class Conditions:
     kyoutaku: int = 0
     tsumi: int = 0
 
+    def to_rust(self) -> rust_core.Conditions:
+        """The native ``Conditions``; reuse it to skip this conversion per call."""
+        p_wind = self.player_wind
+        if isinstance(p_wind, int):
+            p_wind = WINDS[p_wind % 4]
+
+        r_wind = self.round_wind
+        if isinstance(r_wind, int):
+            r_wind = WINDS[r_wind % 4]
+
+        return rust_core.Conditions(
+            tsumo=self.tsumo,
+            riichi=self.riichi,
+            double_riichi=self.double_riichi,
+            ippatsu=self.ippatsu,
+            haitei=self.haitei,
+            houtei=self.houtei,
+            rinshan=self.rinshan,
+            chankan=self.chankan,
+            tsumo_first_turn=self.tsumo_first_turn,
+            player_wind=p_wind,
+            round_wind=r_wind,
+            kyoutaku=self.kyoutaku,
+            tsumi=self.tsumi,
+        )
+
+
+def _rust_conditions(conditions: "Conditions | rust_core.Conditions | None") -> "rust_core.Conditions | None":
+    if conditions is None or isinstance(conditions, rust_core.Conditions):
+        return conditions
+    return conditions.to_rust()
+
+
+def _to_agari(res: rust_core.Agari) -> Agari:
+    if not res.agari:
+        return Agari(agari=False)
+    # Rust core now returns MJSoul IDs directly
+    return Agari(True, res.yakuman, res.ron_agari, res.tsumo_agari_oya, res.tsumo_agari_ko, res.yaku, res.han, res.fu)
+
 
 class AgariCalculator:
     def __init__(self, tiles: list[int], melds: list[Meld] | None = None) -> None:
@@ -350,74 +389,31 @@ class AgariCalculator:
         self,
         win_tile: int,
         dora_indicators: list[int] | None = None,
-        conditions: Conditions | None = None,
+        conditions: "Conditions | rust_core.Conditions | None" = None,
         ura_indicators: list[int] | None = None,
     ) -> Agari:
-        conditions = conditions or Conditions()
-        if dora_indicators is None:
-            dora_indicators = []
-        if ura_indicators is None:
-            ura_indicators = []
-        # Convert winds to Rust Wind enum if they are integers
-        p_wind = conditions.player_wind
-        if isinstance(p_wind, int):
-            p_wind = WINDS[p_wind % 4]
-
-        r_wind = conditions.round_wind
-        if isinstance(r_wind, int):
-            r_wind = WINDS[r_wind % 4]
+        # The native calculator adds win_tile itself when the hand is short of
+        # it, so one calculator serves every call.
+        res = self.calc_rust.calc(win_tile, dora_indicators or [], ura_indicators or [], _rust_conditions(conditions))
+        return _to_agari(res)
 
-        rust_conditions = rust_core.Conditions(
-            tsumo=conditions.tsumo,
-            riichi=conditions.riichi,
-            double_riichi=conditions.double_riichi,
-            ippatsu=conditions.ippatsu,
-            haitei=conditions.haitei,
-            houtei=conditions.houtei,
-            rinshan=conditions.rinshan,
-            chankan=conditions.chankan,
-            tsumo_first_turn=conditions.tsumo_first_turn,
-            player_wind=p_wind,
-            round_wind=r_wind,
-            kyoutaku=conditions.kyoutaku,
-            tsumi=conditions.tsumi,
-        )
-
-        dora_inds_136 = dora_indicators if dora_indicators else []
-        ura_inds_136 = ura_indicators if ura_indicators else []
-
-        # Determine if we need to add the win tile to a temporary calculator
-        # Rust AgariCalculator expects 14 tiles (strictly).
-        # We check total tiles in the current calculator.
-        rust_melds = self._rust_melds
-        # All melds (including Kans) count as 3 tiles for sizing purposes
-        total_tiles = len(self.tiles_136) + len(rust_melds) * 3
-
-        calc_obj = self.calc_rust
-        if total_tiles % 3 == 1:
-            # 13 tiles -> Add win_tile to standing tiles
-            temp_tiles = sorted(self.tiles_136 + [win_tile])
-            # Recreate calculator with 14 tiles
-            calc_obj = rust_core.AgariCalculator(temp_tiles, rust_melds)
-
-        res = calc_obj.calc(win_tile, dora_inds_136, ura_inds_136, rust_conditions)
-
-        if not res.agari:
-            return Agari(agari=False)
-
-        # Rust core now returns MJSoul IDs directly
-        mjsoul_yaku = res.yaku
-
-        return Agari(
-            agari=True,
-            yakuman=res.yakuman,
-            ron_agari=res.ron_agari,
-            tsumo_agari_oya=res.tsumo_agari_oya,
-            tsumo_agari_ko=res.tsumo_agari_ko,
-            yaku=mjsoul_yaku,
-            han=res.han,
-            fu=res.fu,
+    def calc_many(
+        self,
+        win_tiles: list[int] | None = None,
+        dora_indicators: list[int] | None = None,
+        conditions: "Conditions | rust_core.Conditions | None" = None,
+        ura_indicators: list[int] | None = None,
+    ) -> list[Agari]:
+        """
+        ``calc`` for each of ``win_tiles`` in one native call.
+        Defaults to one non-red copy of every wait of a 13-tile hand.
+        """
+        if win_tiles is None:
+            win_tiles = [w * 4 + (w * 4 in (16, 52, 88)) for w in self.calc_rust.get_waits()]
+        results = self.calc_rust.calc_many(
+            list(win_tiles), dora_indicators or [], ura_indicators or [], _rust_conditions(conditions)
         )
+        return [_to_agari(res) for res in results]
 
     def is_tenpai(self) -> bool:
         return self.calc_rust.is_tenpai()
@@ -0,0 +1,249 @@
+"""
+asyncio MJAI server for playing external bots.
+
+Bots are separate processes speaking the line-based MJAI protocol: for every
+decision the server writes the seat's unseen events as one JSON array per line
+(filtered as in ``RiichiEnv.mjai_log_per_player``) and the bot answers with one
+JSON action per line. Responses are checked against the legal actions; an
+invalid, late or missing response is replaced by a default action (pass,
+otherwise tsumogiri, otherwise the first legal action) and counted against the
+seat.
+
+``play_table`` runs one game between four connected bots, and ``MjaiServer``
+accepts TCP connections and seats every four of them at a new table, so one
+event loop can host many tables at once. ``open_tcp_bot`` and ``spawn_bot``
+connect to bots listening on a socket or speaking over stdio.
+"""
+
+import asyncio
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from ._riichienv import Action, Observation, RiichiEnv  # type: ignore
+from .agents import default_action
+
+
+class MjaiBot:
+    """One MJAI bot reached through a pair of asyncio streams."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: Any, name: str = "bot"):
+        self.name = name
+        self._reader = reader
+        self._writer = writer
+        self._stale = 0
+        self.closed = False
+
+    async def query(self, events: Sequence[str]) -> str:
+        """Sends ``events`` (MJAI JSON strings) and returns the response line."""
+        if self.closed:
+            raise ConnectionError(f"{self.name} is disconnected")
+        self._writer.write(("[" + ",".join(events) + "]\n").encode())
+        await self._writer.drain()
+        # Skip answers to earlier queries that timed out.
+        while self._stale:
+            await self._readline()
+            self._stale -= 1
+        return await self._readline()
+
+    async def _readline(self) -> str:
+        line = await self._reader.readline()
+        if not line:
+            self.closed = True
+            raise ConnectionError(f"{self.name} closed the connection")
+        return line.decode()
+
+    def timed_out(self) -> None:
+        """Records that the current query's answer is still outstanding."""
+        self._stale += 1
+
+    async def close(self) -> None:
+        self.closed = True
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, AttributeError):
+            pass
+
+
+class _ProcessWriter:
+    """Closes a subprocess together with its stdin; kills it if it outlives ``kill_timeout``."""
+
+    def __init__(self, proc: asyncio.subprocess.Process, kill_timeout: float = 5.0):
+        self._proc = proc
+        self._kill_timeout = kill_timeout
+        self.write = proc.stdin.write
+        self.drain = proc.stdin.drain
+
+    def close(self) -> None:
+        self._proc.stdin.close()
+
+    async def wait_closed(self) -> None:
+        try:
+            await asyncio.wait_for(self._proc.wait(), self._kill_timeout)
+        except asyncio.TimeoutError:
+            self._proc.kill()
+            await self._proc.wait()
+
+
+async def open_tcp_bot(host: str, port: int, name: str | None = None) -> MjaiBot:
+    reader, writer = await asyncio.open_connection(host, port)
+    return MjaiBot(reader, writer, name or f"{host}:{port}")
+
+
+async def spawn_bot(*cmd: str, name: str | None = None, kill_timeout: float = 5.0) -> MjaiBot:
+    """
+    Starts ``cmd`` and talks MJAI over its stdin/stdout. On ``close`` the bot's
+    stdin is closed and the process is killed if it has not exited within
+    ``kill_timeout`` seconds.
+    """
+    proc = await asyncio.create_subprocess_exec(*cmd, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE)
+    return MjaiBot(proc.stdout, _ProcessWriter(proc, kill_timeout), name or cmd[0])
+
+
+@dataclass
+class TableResult:
+    names: list[str]
+    scores: list[int]
+    ranks: list[int]
+    points: list[int]
+    # Responses replaced by the default action, per seat.
+    violations: list[int] = field(default_factory=lambda: [0] * 4)
+    mjai_log: list[str] = field(default_factory=list)
+
+
+def _seat_events(events: list[str], seat: int) -> list[str]:
+    # The env logs start_game with id 0; each bot needs its own seat.
+    out = []
+    for e in events:
+        event = json.loads(e)
+        if event.get("type") == "start_game":
+            out.append(json.dumps({**event, "id": seat}, separators=(",", ":")))
+        else:
+            out.append(e)
+    return out
+
+
+async def _decide(bot: MjaiBot, env: RiichiEnv, obs: Observation, seat: int, timeout: float) -> tuple[Action, bool]:
+    try:
+        line = await asyncio.wait_for(bot.query(_seat_events(obs.new_events(), seat)), timeout)
+    except asyncio.TimeoutError:
+        bot.timed_out()
+        return default_action(env, obs), False
+    except ConnectionError:
+        return default_action(env, obs), False
+    try:
+        response = json.loads(line)
+        action = obs.select_action_from_mjai(response) if isinstance(response, dict) else None
+    except (ValueError, KeyError, TypeError):
+        action = None
+    if action is None:
+        return default_action(env, obs), False
+    return action, True
+
+
+async def play_table(
+    bots: Sequence[MjaiBot],
+    seed: int | None = None,
+    timeout: float = 5.0,
+    preset_rule: str | None = None,
+    keep_log: bool = False,
+    **env_kwargs: Any,
+) -> TableResult:
+    """
+    Plays one game with ``bots[p]`` in seat ``p``.
+
+    ``timeout`` applies to each response. Keyword arguments go to
+    ``RiichiEnv``; MJAI logging must stay enabled.
+    """
+    if len(bots) != 4:
+        raise ValueError(f"a table needs 4 bots, got {len(bots)}")
+    if env_kwargs.get("skip_mjai_logging"):
+        raise ValueError("the MJAI server needs MJAI logging")
+    env = RiichiEnv(seed=seed, **env_kwargs)
+    result = TableResult([b.name for b in bots], [], [], [])
+    sent = [0] * 4
+
+    obs = env.reset()
+    while not env.done():
+        seats = sorted(obs)
+        decisions = await asyncio.gather(*(_decide(bots[p], env, obs[p], p, timeout) for p in seats))
+        actions = {}
+        for p, (action, ok) in zip(seats, decisions):
+            actions[p] = action
+            result.violations[p] += not ok
+            sent[p] = obs[p].prev_events_size + len(obs[p].new_events())
+        obs = env.step(actions)
+
+    # Let every bot see the end of the game; answers are not checked.
+    logs = env.mjai_log_per_player
+
+    async def flush(p: int) -> None:
+        if bots[p].closed:
+            return
+        try:
+            await asyncio.wait_for(bots[p].query(_seat_events(logs[p][sent[p] :], p)), timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            bots[p].timed_out()
+
+    await asyncio.gather(*(flush(p) for p in range(4)))
+
+    result.scores = list(env.scores())
+    result.ranks = list(env.ranks())
+    result.points = list(env.points(preset_rule))
+    if keep_log:
+        result.mjai_log = list(env.mjai_log)
+    return result
+
+
+class MjaiServer:
+    """
+    Seats every four bots that connect over TCP at a new table.
+
+    Table ``k`` uses seed ``seed + k``. Finished tables are put on
+    ``results`` as ``(table_index, TableResult)`` and the bots' connections
+    are closed. Keyword arguments go to ``play_table``.
+    """
+
+    def __init__(self, seed: int = 0, **table_kwargs: Any):
+        self._seed = seed
+        self._table_kwargs = table_kwargs
+        self._lobby: list[MjaiBot] = []
+        self._tables: set[asyncio.Task] = set()
+        self._server: asyncio.AbstractServer | None = None
+        self._next_table = 0
+        self.results: asyncio.Queue = asyncio.Queue()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> tuple[str, int]:
+        """Starts listening and returns the bound address."""
+        self._server = await asyncio.start_server(self._on_connect, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def _on_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername")
+        self._lobby.append(MjaiBot(reader, writer, f"{peer[0]}:{peer[1]}" if peer else "bot"))
+        if len(self._lobby) >= 4:
+            bots, self._lobby = self._lobby[:4], self._lobby[4:]
+            index = self._next_table
+            self._next_table += 1
+            task = asyncio.create_task(self._run_table(index, bots))
+            self._tables.add(task)
+            task.add_done_callback(self._tables.discard)
+
+    async def _run_table(self, index: int, bots: list[MjaiBot]) -> None:
+        try:
+            result = await play_table(bots, seed=self._seed + index, **self._table_kwargs)
+            await self.results.put((index, result))
+        finally:
+            await asyncio.gather(*(b.close() for b in bots))
+
+    async def close(self) -> None:
+        """Stops accepting bots and waits for running tables to finish."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._tables:
+            await asyncio.gather(*self._tables)
+        await asyncio.gather(*(b.close() for b in self._lobby))
+        self._lobby.clear()
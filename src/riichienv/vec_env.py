@@ -0,0 +1,262 @@
+"""
+Vectorised Y47 environments stepped in worker processes.
+
+``SubprocRiichiVecEnv`` runs ``envs_per_worker`` ``RiichiEnv`` instances per
+worker process. Every Y47 tensor, action, reward and done flag lives in a single
+``multiprocessing.shared_memory`` block laid out from the ``Y47_*`` schema
+constants: workers have the native encoder write straight into their rows
+(``reset_y47_into`` / ``step_y47_into``) and the parent reads them as NumPy
+views, so the pipes only carry one-word commands.
+
+Each env has one row per seat; ``active[e, seat]`` marks the seats that have to
+act. Finished games are reset automatically with the next seed. An env that
+raises is reported by index; the other envs of its worker still run the command.
+"""
+
+import contextlib
+import multiprocessing
+import sys
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any
+
+import numpy as np
+
+from ._riichienv import (  # type: ignore
+    Y47_ACTION_MAIN_DIM,
+    Y47_MAX_ACTIONS,
+    Y47_MAX_CONSUME_TILES,
+    Y47_MAX_STATE_TOKENS,
+    Y47_NUM_PLAYERS,
+    Y47_TOKEN_MAIN_DIM,
+    Y47_TOKEN_SCALAR_DIM,
+    RiichiEnv,
+)
+from .broker import Y47_FIELDS
+
+# Per-seat shape and dtype of every Y47 field.
+Y47_SPECS: dict[str, tuple[tuple[int, ...], Any]] = {
+    "token_main": ((Y47_MAX_STATE_TOKENS, Y47_TOKEN_MAIN_DIM), np.int64),
+    "token_scalar": ((Y47_MAX_STATE_TOKENS, Y47_TOKEN_SCALAR_DIM), np.float32),
+    "token_mask": ((Y47_MAX_STATE_TOKENS,), np.bool_),
+    "action_main": ((Y47_MAX_ACTIONS, Y47_ACTION_MAIN_DIM), np.int64),
+    "action_consume": ((Y47_MAX_ACTIONS, Y47_MAX_CONSUME_TILES), np.int64),
+    "action_consume_mask": ((Y47_MAX_ACTIONS, Y47_MAX_CONSUME_TILES), np.bool_),
+    "legal_action_mask": ((Y47_MAX_ACTIONS,), np.bool_),
+}
+
+_ALIGN = 64
+
+
+def _layout(num_envs: int) -> tuple[dict[str, tuple[int, tuple[int, ...], Any]], int]:
+    """Offsets, shapes and dtypes of every array in the shared block."""
+    specs: dict[str, tuple[tuple[int, ...], Any]] = {
+        name: ((num_envs, Y47_NUM_PLAYERS, *shape), dtype) for name, (shape, dtype) in Y47_SPECS.items()
+    }
+    specs["active"] = ((num_envs, Y47_NUM_PLAYERS), np.bool_)
+    specs["actions"] = ((num_envs, Y47_NUM_PLAYERS), np.int64)
+    specs["rewards"] = ((num_envs, Y47_NUM_PLAYERS), np.float32)
+    specs["dones"] = ((num_envs,), np.bool_)
+    specs["seeds"] = ((num_envs,), np.int64)
+
+    layout = {}
+    offset = 0
+    for name, (shape, dtype) in specs.items():
+        layout[name] = (offset, shape, dtype)
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        offset += -(-nbytes // _ALIGN) * _ALIGN
+    return layout, offset
+
+
+def _views(buf: Any, layout: dict[str, tuple[int, tuple[int, ...], Any]]) -> dict[str, np.ndarray]:
+    return {
+        name: np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+        for name, (offset, shape, dtype) in layout.items()
+    }
+
+
+def _serve(conn: Any, buf: Any, *, num_envs: int, env_ids: list[int], seed: int, env_kwargs: dict[str, Any]) -> None:
+    layout, _ = _layout(num_envs)
+    views = _views(buf, layout)
+    envs = {env_id: RiichiEnv(**env_kwargs) for env_id in env_ids}
+    episodes = dict.fromkeys(env_ids, 0)
+    # Per-env output rows the native encoder writes into.
+    outs = {env_id: {name: views[name][env_id] for name in (*Y47_FIELDS, "active")} for env_id in env_ids}
+
+    def reset(env_id: int) -> None:
+        episode_seed = seed + env_id + episodes[env_id] * num_envs
+        episodes[env_id] += 1
+        views["seeds"][env_id] = episode_seed
+        envs[env_id].reset_y47_into(outs[env_id], seed=episode_seed)
+
+    def step(env_id: int) -> None:
+        actions = views["actions"][env_id]
+        action_index = {int(s): int(actions[s]) for s in np.flatnonzero(views["active"][env_id])}
+        rewards, done = envs[env_id].step_y47_into(action_index, outs[env_id])
+        views["rewards"][env_id] = rewards
+        views["dones"][env_id] = done
+        if done:
+            reset(env_id)
+
+    def reset_all(env_id: int) -> None:
+        episodes[env_id] = 0
+        reset(env_id)
+        views["rewards"][env_id] = 0.0
+        views["dones"][env_id] = False
+
+    commands = {"reset": reset_all, "step": step}
+    while True:
+        cmd = conn.recv()
+        if cmd == "close":
+            conn.send([])
+            return
+        if cmd not in commands:
+            conn.send([f"unknown command: {cmd!r}"])
+            continue
+        # Errors are collected per env so the rest of the group stays in step.
+        errors = []
+        for env_id in env_ids:
+            try:
+                commands[cmd](env_id)
+            except Exception as e:
+                errors.append(f"env {env_id}: {type(e).__name__}: {e}")
+        conn.send(errors)
+
+
+def _attach(name: str, *, own_tracker: bool) -> shared_memory.SharedMemory:
+    """Attaches to the parent's block without the child's resource tracker claiming it."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # A forked child shares the parent's tracker, which already knows the block;
+    # a spawned one would otherwise warn about it or unlink it at exit.
+    if own_tracker:
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    return shm
+
+
+def _worker(conn: Any, shm_name: str, *, own_tracker: bool, **kwargs: Any) -> None:
+    shm = _attach(shm_name, own_tracker=own_tracker)
+    try:
+        _serve(conn, shm.buf, **kwargs)
+    finally:
+        with contextlib.suppress(BufferError):
+            shm.close()
+
+
+class SubprocRiichiVecEnv:
+    """
+    ``num_envs`` Y47 environments stepped in worker processes.
+
+    Each process runs ``envs_per_worker`` consecutive envs one after another,
+    which trades parallelism for fewer processes and pipe round-trips per step.
+    Episode ``k`` of env ``e`` uses seed ``seed + e + k * num_envs``; the
+    seed of the current episode is in ``seeds``. Keyword arguments go to every
+    ``RiichiEnv``. The arrays returned by ``reset`` and ``step`` are views of
+    shared memory that the next call overwrites.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        seed: int = 0,
+        start_method: str | None = None,
+        *,
+        envs_per_worker: int = 1,
+        **env_kwargs: Any,
+    ):
+        if num_envs < 1:
+            raise ValueError(f"num_envs must be positive, got {num_envs}")
+        if envs_per_worker < 1:
+            raise ValueError(f"envs_per_worker must be positive, got {envs_per_worker}")
+        self.num_envs = num_envs
+        layout, size = _layout(num_envs)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._views = _views(self._shm.buf, layout)
+        self._closed = False
+
+        ctx = multiprocessing.get_context(start_method)
+        self._conns = []
+        self._procs = []
+        for start in range(0, num_envs, envs_per_worker):
+            env_ids = list(range(start, min(start + envs_per_worker, num_envs)))
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_worker,
+                args=(child, self._shm.name),
+                kwargs=dict(
+                    own_tracker=ctx.get_start_method() != "fork",
+                    num_envs=num_envs,
+                    env_ids=env_ids,
+                    seed=seed,
+                    env_kwargs=env_kwargs,
+                ),
+                daemon=True,
+            )
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    @property
+    def observations(self) -> dict[str, np.ndarray]:
+        """The Y47 fields, shaped ``(num_envs, 4, ...)``, plus ``active``."""
+        obs = {name: self._views[name] for name in Y47_FIELDS}
+        obs["active"] = self._views["active"]
+        return obs
+
+    @property
+    def seeds(self) -> np.ndarray:
+        return self._views["seeds"]
+
+    def _broadcast(self, cmd: str) -> None:
+        for conn in self._conns:
+            conn.send(cmd)
+        errors = [error for conn in self._conns for error in conn.recv()]
+        if errors:
+            raise RuntimeError(f"{cmd} failed: {'; '.join(errors)}")
+
+    def reset(self) -> dict[str, np.ndarray]:
+        """Restarts every env from its first seed."""
+        self._broadcast("reset")
+        return self.observations
+
+    def step(self, actions: Any) -> tuple[dict[str, np.ndarray], np.ndarray, np.ndarray]:
+        """
+        Applies ``actions``, an ``(num_envs, 4)`` array of action indices of
+        which only the active seats are read.
+
+        Returns the observations, the ``(num_envs, 4)`` rewards and the
+        ``(num_envs,)`` done flags. A done env has already been reset, so its
+        observations belong to the next game.
+        """
+        np.copyto(self._views["actions"], np.asarray(actions, dtype=np.int64).reshape(self.num_envs, Y47_NUM_PLAYERS))
+        self._broadcast("step")
+        return self.observations, self._views["rewards"], self._views["dones"]
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for conn in self._conns:
+            try:
+                conn.send("close")
+                conn.recv()
+            except (BrokenPipeError, EOFError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+        self._views.clear()
+        # Arrays handed out by reset()/step() may still reference the block.
+        with contextlib.suppress(BufferError):
+            self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SubprocRiichiVecEnv":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        if not getattr(self, "_closed", True):
+            self.close()
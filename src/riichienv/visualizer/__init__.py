@@ -1,3 +1,3 @@
-from .viewer import Replay, show_replay
+from .viewer import Replay, inject_metadata_batch, show_replay
 
-__all__ = ["show_replay", "Replay"]
+__all__ = ["show_replay", "Replay", "inject_metadata_batch"]
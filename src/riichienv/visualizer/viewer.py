@@ -1,17 +1,16 @@
 import base64
-import copy
 import gzip
 import hashlib
 import json
 import os
 import traceback
 import uuid
+from collections.abc import Iterable, Iterator
 from typing import Any
 
 from IPython.display import HTML
 
-from riichienv import AgariCalculator, Conditions, Meld, MeldType, Wind
-from riichienv import convert as cvt
+from riichienv import _riichienv
 
 
 def _get_viewer_js_compressed_base64() -> tuple[str, str]:
@@ -39,371 +38,183 @@ def _get_viewer_js_compressed_base64() -> tuple[str, str]:
     return "", ""
 
 
+def _copy_events(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [{**ev, "meta": dict(ev.get("meta", {}))} for ev in events]
+
+
+def _merge_meta(events: list[dict[str, Any]], patches: list[dict[str, Any] | None]) -> list[dict[str, Any]]:
+    for ev, patch in zip(events, patches, strict=True):
+        if patch is not None:
+            ev["meta"].update(patch)
+    return events
+
+
 class MetadataInjector:
+    """Adds waits on tenpai discards and han/fu/points/yaku on hora to an MJAI log.
+
+    The hand tracking runs in the native extension. Each event is copied
+    shallowly and given its own ``meta`` dict; the other values are shared
+    with the input.
+    """
+
     def __init__(self, events: list[dict[str, Any]]):
-        self.events = copy.deepcopy(events)
-        self.hands: dict[int, list[int]] = {0: [], 1: [], 2: [], 3: []}
-        self.melds: dict[int, list[Meld]] = {0: [], 1: [], 2: [], 3: []}  # List of Meld objects
-        self.dora_markers: list[int] = []
-        self.round_wind = 0  # 0: East, 1: South, etc.
-        self.bakaze_map = {"E": 0, "S": 1, "W": 2, "N": 3}
-        self.oya = 0
-        self.riichi_declared = [False] * 4
-        self.tile_counts = {}  # To track unique IDs for string tiles
-        self.kyoku_results = []
-        self.last_tile: str | None = None
-        self.last_tid: int | None = None
-
-        # State for Conditions
-        self.ippatsu_eligible = [False] * 4
-        self.is_rinshan = False
-        self.is_chankan = False
-        self.is_haitei = False
-        self.is_first_round_of_kyoku = True
-        self.any_melds_in_kyoku = False
-        self.turn_count = 0
-        self.kyoku_num = 0
-        self.honba = 0
-
-    def _get_tid(self, tile_str: str) -> int:
-        """Get a unique 136-ID for a tile string to maintain valid state."""
-        base_tid = cvt.mjai_to_tid(tile_str)
-        cnt = self.tile_counts.get(base_tid, 0)
-        self.tile_counts[base_tid] = cnt + 1
-        return base_tid + cnt
-
-    def _get_matching_tid(self, hand: list[int], tile_str: str) -> int:
-        """Find a tile in hand that matches the tile_str type."""
-        target_base = cvt.mjai_to_tid(tile_str)
-        # Check for exact match first (e.g. Red vs Non-Red)
-        # cvt.mpai_to_tid handles '5mr' -> 16, '5m' -> 17.
-        # But ID 17 is just one of 17,18,19.
-
-        # Helper to check if ID is red
-        def is_red(t):
-            return t in [16, 52, 88]
-
-        target_is_red = is_red(target_base)
-
-        candidates = []
-        for t in hand:
-            if t // 4 == target_base // 4:
-                # Type match
-                candidates.append(t)
-
-        # Filter by Redness
-        better = [t for t in candidates if is_red(t) == target_is_red]
-        if better:
-            return better[0]
-        if candidates:
-            return candidates[0]
-        # Should not happen if log is valid
-        return target_base
-
-    def process(self) -> list[dict[str, Any]]:  # noqa: PLR0915
-        for ev in self.events:
-            etype = ev["type"]
-            actor = ev.get("actor")
-
-            # Initialize meta
-            if "meta" not in ev:
-                ev["meta"] = {}
-
-            if etype == "start_kyoku":
-                self.tile_counts = {}  # Reset for new kyoku
-                self.dora_markers = [self._get_tid(ev["dora_marker"])]
-                self.round_wind = self.bakaze_map.get(ev.get("bakaze", "E"), 0)
-                self.oya = ev.get("oya", 0)
-                self.kyoku_num = ev.get("kyoku", 1)  # Default to 1
-                self.honba = ev.get("honba", 0)
-                self.riichi_declared = [False] * 4
-                self.hands = {0: [], 1: [], 2: [], 3: []}
-                self.melds = {0: [], 1: [], 2: [], 3: []}
-                self.kyoku_results = []
-                self.kyoku_results = []
-                self.ippatsu_eligible = [False] * 4
-                self.just_reached = [False] * 4  # Track declaration discard
-                self.is_rinshan = False
-                self.is_chankan = False
-                self.is_haitei = False
-                self.is_first_round_of_kyoku = True
-                self.any_melds_in_kyoku = False
-                self.turn_count = 0
-
-                for pid, tehai in enumerate(ev["tehais"]):
-                    # tehai is list of strings
-                    self.hands[pid] = sorted([self._get_tid(t) for t in tehai])
-
-            elif etype == "tsumo":
-                assert actor is not None
-                self.last_tile = ev.get("pai")
-                tile = self._get_tid(ev["pai"])
-                self.hands[actor].append(tile)
-                self.is_rinshan = False  # Reset unless set by Kan
-                self.is_chankan = False
-
-            elif etype == "dahai":
-                assert actor is not None
-                self.last_tile = ev.get("pai")
-                pai = ev["pai"]
-
-                # Identify which tile was discarded
-                tid = self._get_matching_tid(self.hands[actor], pai)
-                self.last_tid = tid  # Track the exact TID for calls
-                if tid in self.hands[actor]:
-                    self.hands[actor].remove(tid)
-
-                # CHECK WAITS (Tenpai)
-                # Calculate waits for this player after discard
-                waits = self._calculate_waits(actor)
-                if waits:
-                    ev["meta"]["waits"] = waits
-
-                if ev.get("reach"):
-                    self.riichi_declared[actor] = True
-                    self.ippatsu_eligible[actor] = True
-
-                # If anyone discards, first round might be over
-                if actor == 3:  # End of round
-                    self.is_first_round_of_kyoku = False
-
-                # Any discard clears ippatsu if it's not the riichi-er's first discard
-                if self.just_reached[actor]:
-                    self.just_reached[actor] = False
-                else:
-                    self.ippatsu_eligible[actor] = False
-
-                self.turn_count += 1
-
-            elif etype == "reach":
-                assert actor is not None
-                # Set Riichi declared flag immediately on announcement
-                self.riichi_declared[actor] = True
-                self.ippatsu_eligible[actor] = True
-                self.just_reached[actor] = True
-
-            elif etype in ["pon", "chi", "daiminkan"]:
-                assert actor is not None
-                # Remove consumed tiles from hand
-                consumed = ev["consumed"]  # list of strings
-                consumed_tids = []
-
-                for c_str in consumed:
-                    tid = self._get_matching_tid(self.hands[actor], c_str)
-
-                    if tid in self.hands[actor]:
-                        self.hands[actor].remove(tid)
-                        consumed_tids.append(tid)
-                    else:
-                        # Fallback if not found (should generally not happen in valid log)
-                        consumed_tids.append(self._get_tid(c_str))
-
-                # Create Meld object
-                stolen_str = ev["pai"]
-                stolen_tid = 0
-                if self.last_tid is not None:
-                    stolen_tid = self.last_tid
-                else:
-                    # Fallback if logic mismatch (should not happen in valid log)
-                    stolen_tid = self._get_tid(stolen_str)
-
-                m_tiles = sorted(consumed_tids + [stolen_tid])
-
-                m_type = MeldType.Peng
-                if etype == "chi":
-                    m_type = MeldType.Chi
-                if etype == "daiminkan":
-                    m_type = MeldType.Gang
-                    self.is_rinshan = True
-
-                self.melds[actor].append(Meld(m_type, m_tiles, True))
-                self.any_melds_in_kyoku = True
-                # Clear all ippatsu on any call
-                self.ippatsu_eligible = [False] * 4
-
-            elif etype == "kakan":
-                assert actor is not None
-                self.last_tile = ev.get("pai")
-                pai = ev["pai"]
-                tid = self._get_matching_tid(self.hands[actor], pai)
-                if tid in self.hands[actor]:
-                    self.hands[actor].remove(tid)
-
-                # Replace Pon with AddGang
-                found_idx = -1
-                for midx, m in enumerate(self.melds[actor]):
-                    if m.meld_type == MeldType.Peng and m.tiles[0] // 4 == tid // 4:
-                        found_idx = midx
-                        break
-                if found_idx != -1:
-                    old_m = self.melds[actor].pop(found_idx)
-                    new_tiles = sorted(old_m.tiles + [tid])
-                    self.melds[actor].append(Meld(MeldType.Addgang, new_tiles, True))
-                    self.is_rinshan = True
-                    self.is_chankan = True  # Eligible for Chankan
-
-                self.any_melds_in_kyoku = True
-                self.ippatsu_eligible = [False] * 4
-
-            elif etype == "ankan":
-                assert actor is not None
-                consumed = ev["consumed"]
-                m_tiles = []
-                for c_str in consumed:
-                    tid = self._get_matching_tid(self.hands[actor], c_str)
-                    if tid in self.hands[actor]:
-                        self.hands[actor].remove(tid)
-                        m_tiles.append(tid)
-                    else:
-                        m_tiles.append(self._get_tid(c_str))
-
-                m_tiles.sort()
-                self.melds[actor].append(Meld(MeldType.Angang, m_tiles, False))
-                self.is_rinshan = True
-                self.ippatsu_eligible = [False] * 4
-
-            elif etype == "dora":
-                self.dora_markers.append(self._get_tid(ev["dora_marker"]))
-
-            elif etype == "hora":
-                actor = ev.get("actor")
-                target = ev.get("target")
-
-                if actor is None or target is None:
-                    continue
-
-                is_tsumo = actor == target
-                pai_str = ev.get("pai") or self.last_tile
-                pai_tid = 0
-
-                if is_tsumo:
-                    # Tsumo: The winning tile should be the last one in hand
-                    if self.hands[actor]:
-                        pai_tid = self.hands[actor][-1]
-                    elif pai_str:
-                        pai_tid = self._get_tid(pai_str)
-                # Ron: Use last_tid from dahai if available
-                elif self.last_tid is not None:
-                    pai_tid = self.last_tid
-                elif pai_str:
-                    pai_tid = self._get_tid(pai_str)
-
-                # Double Riichi check
-                is_double_riichi = False
-                if self.riichi_declared[actor] and self.is_first_round_of_kyoku and not self.any_melds_in_kyoku:
-                    is_double_riichi = True
-
-                # Helpers for Wind conversion
-                def get_wind(idx: int) -> Wind:
-                    idx = idx % 4
-                    if idx == 0:
-                        return Wind.East
-                    if idx == 1:
-                        return Wind.South
-                    if idx == 2:
-                        return Wind.West
-                    return Wind.North
-
-                cond = Conditions(
-                    tsumo=is_tsumo,
-                    riichi=self.riichi_declared[actor],
-                    double_riichi=is_double_riichi,
-                    ippatsu=self.ippatsu_eligible[actor],
-                    rinshan=self.is_rinshan if is_tsumo else False,
-                    chankan=self.is_chankan if not is_tsumo else False,
-                    player_wind=get_wind(actor - self.oya),
-                    round_wind=get_wind(self.round_wind),
-                    # haitei/houtei based on wall (if we had wall count)
-                    # double_riichi if first round and no calls
-                )
-
-                # Ura markers
-                ura_in = []
-                if "ura_markers" in ev:
-                    ura_in = [self._get_tid(u) for u in ev["ura_markers"]]
-
-                calc = AgariCalculator(self.hands[actor], self.melds[actor])
-                res = calc.calc(pai_tid, dora_indicators=self.dora_markers, conditions=cond, ura_indicators=ura_in)
-
-                if res.agari:
-                    pt_str = ""
-                    if is_tsumo:
-                        if actor == self.oya:
-                            pt_str = f"{res.tsumo_agari_ko} all"
-                        else:
-                            pt_str = f"{res.tsumo_agari_ko}/{res.tsumo_agari_oya}"
-                    else:
-                        pt_str = str(res.ron_agari)
-
-                    score_data = {"han": res.han, "fu": res.fu, "points": pt_str, "yaku": res.yaku}
-                    ev["meta"]["score"] = score_data
-
-                    self.kyoku_results.append({"actor": actor, "target": target, "score": score_data})
-
-            elif etype == "end_kyoku":
-                if self.kyoku_results:
-                    ev["meta"]["results"] = self.kyoku_results
-
-        return self.events
-
-    def _calculate_waits(self, pid: int) -> list[str]:
-        """Use AgariCalculator API to find waits."""
-        hand = self.hands[pid]
-        melds = self.melds[pid]
-
-        calc = AgariCalculator(hand, melds)
-
-        # get_waits returns list of u32 (0-33)
-        wait_tids = calc.get_waits()
-
-        waits = []
-        for t34 in wait_tids:
-            # Convert 34-tile ID to MJAI string (use *4 to get base 136 ID)
-            waits.append(cvt.tid_to_mjai(t34 * 4))
-
-        return waits
+        self.events = _copy_events(events)
+
+    def process(self) -> list[dict[str, Any]]:
+        return _merge_meta(self.events, _riichienv.inject_metadata(self.events))
+
+
+def inject_metadata_batch(
+    logs: list[list[dict[str, Any]] | str | os.PathLike[str]], num_workers: int | None = None
+) -> list[list[dict[str, Any]]]:
+    """
+    Enriches many MJAI logs at once, like ``MetadataInjector(log).process()`` for each.
+    The logs are processed in parallel on ``num_workers`` threads (default: all cores).
+
+    A log is a list of events, the text of a whole log (a ``str`` starting with
+    ``[`` or ``{``: a JSON array or JSONL) or the path of a JSONL/JSON file,
+    optionally gzipped. Text and files are parsed on the worker threads; their
+    events come back with keys in sorted order.
+    """
+    logs = [_copy_events(log) if isinstance(log, list) else log for log in logs]
+    results = _riichienv.inject_metadata_batch(logs, num_workers=num_workers)
+    return [_merge_meta(log, res) if isinstance(log, list) else res for log, res in zip(logs, results, strict=True)]
+
+
+def _gzip_base64(obj: Any) -> str:
+    """Compact JSON, gzipped (without a timestamp) and base64 encoded."""
+    data = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    return base64.b64encode(gzip.compress(data, mtime=0)).decode("ascii")
+
+
+def _iter_kyoku(events: Iterable[dict[str, Any]]) -> Iterator[list[dict[str, Any]]]:
+    """Yields the log split at each ``start_kyoku`` as soon as each chunk is complete.
+
+    Events before the first ``start_kyoku`` join the first chunk.
+    """
+    chunk: list[dict[str, Any]] = []
+    seen_kyoku = False
+    for ev in events:
+        if ev.get("type") == "start_kyoku":
+            if seen_kyoku:
+                yield chunk
+                chunk = []
+            seen_kyoku = True
+        chunk.append(ev)
+    yield chunk
+
+
+def _split_kyoku(log: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
+    return list(_iter_kyoku(log))
+
+
+def _with_metadata(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Injects metadata (waits, scores), falling back to the plain events."""
+    try:
+        return MetadataInjector(events).process()
+    except Exception as e:
+        traceback.print_exc()
+        print(f"Warning: Metadata injection failed: {e}")
+        return events
+
+
+def _kyoku_label(chunk: list[dict[str, Any]]) -> str:
+    for ev in chunk:
+        if ev.get("type") == "start_kyoku":
+            return f"{ev.get('bakaze', '?')}{ev.get('kyoku', '?')}-{ev.get('honba', 0)}"
+    return "-"
+
+
+def _iter_jsonl(path: str) -> Iterator[dict[str, Any]]:
+    """Yields the events of a (optionally gzipped) JSONL file one line at a time."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
 
 
 class Replay:
+    """
+    Jupyter replay viewer for an MJAI log.
+
+    The log is embedded gzip-compressed and decompressed in the browser. With
+    ``chunked=True`` every kyoku is compressed separately and only decoded when
+    it is picked from the kyoku selector, so long sessions render immediately;
+    the viewer then shows one kyoku at a time.
+
+    ``log`` may also be an iterator of events, which ``show()`` consumes. With
+    ``chunked=True`` each kyoku is enriched and compressed as soon as it has
+    been read, so only the compressed chunks stay in memory.
+    """
+
     def __init__(
-        self, log: list[dict[str, Any]], step: int | None = None, perspective: int | None = None, freeze: bool = False
+        self,
+        log: Iterable[dict[str, Any]],
+        step: int | None = None,
+        perspective: int | None = None,
+        freeze: bool = False,
+        *,
+        chunked: bool = False,
     ):
         self.log = log
         self.step = step
         self.perspective = perspective
         self.freeze = freeze
+        self.chunked = chunked
 
     @classmethod
     def from_jsonl(
-        cls, path: str, step: int | None = None, perspective: int | None = None, freeze: bool = False
+        cls,
+        path: str,
+        step: int | None = None,
+        perspective: int | None = None,
+        freeze: bool = False,
+        *,
+        chunked: bool = False,
     ) -> HTML:
-        with open(path, encoding="utf-8") as f:
-            events = [json.loads(line) for line in f]
-        return cls(events, step=step, perspective=perspective, freeze=freeze).show()
+        return cls(_iter_jsonl(path), step=step, perspective=perspective, freeze=freeze, chunked=chunked).show()
 
     @classmethod
     def from_list(
-        cls, events: list[dict[str, Any]], step: int | None = None, perspective: int | None = None, freeze: bool = False
+        cls,
+        events: list[dict[str, Any]],
+        step: int | None = None,
+        perspective: int | None = None,
+        freeze: bool = False,
+        *,
+        chunked: bool = False,
     ) -> HTML:
-        return cls(events, step=step, perspective=perspective, freeze=freeze).show()
+        return cls(events, step=step, perspective=perspective, freeze=freeze, chunked=chunked).show()
+
+    def _payload(self, log: Iterable[dict[str, Any]]) -> tuple[list[str], list[str], int, int | None]:
+        """Compressed chunks with metadata, their labels, and the chunk and local step to open first."""
+        if not self.chunked:
+            return [_gzip_base64(_with_metadata(list(log)))], [], 0, self.step
+
+        # Metadata only depends on the current kyoku, so each chunk is enriched
+        # on its own. The viewer counts steps without start_game/end_game, so
+        # the global step is mapped onto the chunk containing it.
+        chunks: list[str] = []
+        labels: list[str] = []
+        first_chunk, step = 0, self.step
+        offset = 0
+        for i, chunk in enumerate(_iter_kyoku(log)):
+            n = sum(1 for ev in chunk if ev.get("type") not in ("start_game", "end_game"))
+            if self.step is not None and offset <= self.step:
+                first_chunk, step = i, self.step - offset
+            offset += n
+            chunks.append(_gzip_base64(_with_metadata(chunk)))
+            labels.append(_kyoku_label(chunk))
+        return chunks, labels, first_chunk, step
 
     def show(self) -> HTML:
         """
         Generates the HTML/JS viewer for the replay Log.
         Injects metadata (waits, scores) before rendering.
         """
-        # Inject Metadata (Waits, Scores)
-        try:
-            injector = MetadataInjector(self.log)
-            enriched_log = injector.process()
-        except Exception as e:
-            # Fallback if injection fails
-            traceback.print_exc()
-            print(f"Warning: Metadata injection failed: {e}")
-            enriched_log = self.log
-
         unique_id = f"riichienv-viewer-{uuid.uuid4()}"
-        log_json = json.dumps(enriched_log)
+        chunks, labels, first_chunk, step = self._payload(self.log)
         viewer_js_b64, viewer_js_hash = _get_viewer_js_compressed_base64()
 
         if not viewer_js_b64:
@@ -412,58 +223,97 @@ class Replay:
 
         html_content = f"""
         <div id="{unique_id}" style="width: 100%; min-height: 600px; border: 1px solid #ddd; box-sizing: border-box;">
-             <div style="padding: 20px; text-align: center; font-family: sans-serif; color: #666;">
-                Loading RiichiEnv Replay...
+             <div id="{unique_id}-board">
+                <div style="padding: 20px; text-align: center; font-family: sans-serif; color: #666;">
+                    Loading RiichiEnv Replay...
+                </div>
              </div>
         </div>
         <script>
         (function() {{
             const expectedHash = "{viewer_js_hash}";
-
-            const runViewer = (jsCode) => {{
-                try {{
-                    if (jsCode) {{
-                        const script = document.createElement('script');
-                        script.text = jsCode;
-                        document.head.appendChild(script);
-                        // Store the hash after loading new code
-                        window.RiichiEnvViewerHash = expectedHash;
-                    }}
-
-                    const logData = {log_json};
-                    const initialStep = {self.step if self.step is not None else "undefined"};
-                    const perspective = {self.perspective if self.perspective is not None else "undefined"};
-                    const freeze = {"true" if self.freeze else "false"};
-                    if (window.RiichiEnvViewer) {{
-                        new window.RiichiEnvViewer("{unique_id}", logData, initialStep, perspective, freeze);
-                    }} else {{
-                        throw new Error("RiichiEnvViewer global not found after injection");
-                    }}
-                }} catch (e) {{
-                    console.error("RiichiEnv Viewer Error:", e);
-                    document.getElementById("{unique_id}").innerHTML = "Error: " + e.message;
+            const root = document.getElementById("{unique_id}");
+            const boardId = "{unique_id}-board";
+            const chunks = {json.dumps(chunks)};
+            const labels = {json.dumps(labels)};
+            const perspective = {self.perspective if self.perspective is not None else "undefined"};
+            const freeze = {"true" if self.freeze else "false"};
+
+            // One viewer at a time; the previous one detaches its window listeners
+            let viewer = null;
+            const dropViewer = () => {{
+                if (viewer) {{
+                    viewer.destroy();
+                    viewer = null;
                 }}
             }};
 
-            // Check if global exists AND matches expected hash
-            if (window.RiichiEnvViewer && window.RiichiEnvViewerHash === expectedHash) {{
-                runViewer("");
-            }} else {{
-                // Decompress and load New Code
-                const b64Data = "{viewer_js_b64}";
+            // Errors replace the board only, so the kyoku selector stays usable
+            const fail = (prefix) => (e) => {{
+                console.error("RiichiEnv Viewer Error:", e);
+                dropViewer();
+                document.getElementById(boardId).textContent = prefix + e.message;
+            }};
+
+            if (!window.DecompressionStream) {{
+                root.innerHTML = "Error: Browser too old (DecompressionStream missing).";
+                return;
+            }}
+
+            const gunzip = (b64Data) => {{
                 const compressed = Uint8Array.from(atob(b64Data), c => c.charCodeAt(0));
+                const ds = new DecompressionStream('gzip');
+                return new Response(new Response(compressed).body.pipeThrough(ds));
+            }};
 
-                if (window.DecompressionStream) {{
-                    const ds = new DecompressionStream('gzip');
-                    const decompressedStream = new Response(compressed).body.pipeThrough(ds);
-                    new Response(decompressedStream).text().then(runViewer).catch(e => {{
-                        document.getElementById("{unique_id}").innerHTML = "Error decompressing: " + e.message;
+            // Check if global exists AND matches expected hash, else decompress and load new code
+            const loadViewer = () => {{
+                if (window.RiichiEnvViewer && window.RiichiEnvViewerHash === expectedHash) {{
+                    return Promise.resolve();
+                }}
+                return gunzip("{viewer_js_b64}").text().then(jsCode => {{
+                    const script = document.createElement('script');
+                    script.text = jsCode;
+                    document.head.appendChild(script);
+                    // Store the hash after loading new code
+                    window.RiichiEnvViewerHash = expectedHash;
+                }});
+            }};
+
+            // Chunks are decoded on first use only
+            const decoded = new Array(chunks.length);
+            const loadChunk = (i) => {{
+                if (!decoded[i]) {{
+                    decoded[i] = gunzip(chunks[i]).json().catch(e => {{
+                        decoded[i] = undefined;
+                        throw e;
                     }});
-                }} else {{
-                    const err = "Error: Browser too old (DecompressionStream missing).";
-                    document.getElementById("{unique_id}").innerHTML = err;
                 }}
+                return decoded[i];
+            }};
+
+            const showChunk = (i, step) => loadChunk(i).then(logData => {{
+                if (!window.RiichiEnvViewer) {{
+                    throw new Error("RiichiEnvViewer global not found after injection");
+                }}
+                dropViewer();
+                viewer = new window.RiichiEnvViewer(boardId, logData, step, perspective, freeze);
+            }});
+
+            if (labels.length > 1) {{
+                const select = document.createElement('select');
+                select.style.margin = '4px';
+                labels.forEach((label, i) => select.add(new Option(label, String(i))));
+                select.value = String({first_chunk});
+                select.addEventListener('change', () => {{
+                    showChunk(Number(select.value), undefined).catch(fail("Error: "));
+                }});
+                root.insertBefore(select, root.firstChild);
             }}
+
+            loadViewer()
+                .then(() => showChunk({first_chunk}, {step if step is not None else "undefined"}))
+                .catch(fail("Error: "));
         }})();
         </script>
         """
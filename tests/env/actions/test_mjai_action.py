@@ -1,7 +1,10 @@
 import json
 
-from riichienv import Observation
+import pytest
+
+from riichienv import Observation, RiichiEnv
 from riichienv.action import Action, ActionType
+from riichienv.agents import RandomAgent
 
 
 def test_action_to_mjai_dahai():
@@ -71,3 +74,52 @@ def test_select_action_from_mjai():
     assert selected is not None
     assert selected.action_type == ActionType.DISCARD
     assert selected.tile == 53
+
+
+def test_select_action_from_mjai_red_and_consumed():
+    legal_actions = [
+        Action(ActionType.CHI, tile=52, consume_tiles=[48, 56]),  # 5pr with 4p 6p
+        Action(ActionType.CHI, tile=53, consume_tiles=[48, 56]),  # 5p with 4p 6p
+        Action(ActionType.PON, tile=17, consume_tiles=[16, 18]),  # 5m with 5mr 5m
+        Action(ActionType.PASS),
+    ]
+    obs = Observation(0, [], [], 0, legal_actions)
+
+    selected = obs.select_action_from_mjai({"type": "chi", "pai": "5p", "consumed": ["6p", "4p"]})
+    assert selected.tile == 53
+    selected = obs.select_action_from_mjai({"type": "chi", "pai": "5pr", "consumed": ["4p", "6p"]})
+    assert selected.tile == 52
+    selected = obs.select_action_from_mjai({"type": "pon", "pai": "5m", "consumed": ["5m", "5mr"]})
+    assert selected.consume_tiles == [16, 18]
+    assert obs.select_action_from_mjai({"type": "pon", "pai": "5m", "consumed": ["5m", "5m"]}) is None
+    # Melds must name their consumed tiles.
+    assert obs.select_action_from_mjai({"type": "chi", "pai": "5p"}) is None
+    assert obs.select_action_from_mjai({"type": "none"}).action_type == ActionType.PASS
+
+
+def test_select_action_from_mjai_str_matches_dict():
+    env = RiichiEnv(seed=11)
+    obs = env.reset()
+    agent = RandomAgent(seed=0)
+    while not env.done():
+        for o in obs.values():
+            legal = o.legal_actions()
+            resps = [a.to_mjai() for a in legal]
+            batch = Observation.select_actions_from_mjai([o] * len(resps), resps)
+            for act, resp, from_batch in zip(legal, resps, batch):
+                from_dict = o.select_action_from_mjai(json.loads(resp))
+                from_str = o.select_action_from_mjai_str(resp)
+                assert from_dict is not None
+                assert from_dict.action_type == act.action_type
+                assert from_dict.to_dict() == from_str.to_dict() == from_batch.to_dict()
+        obs = env.step({pid: agent.act(o) for pid, o in obs.items()})
+
+
+def test_select_action_from_mjai_str_errors():
+    obs = Observation(0, [], [], 0, [Action(ActionType.PASS)])
+    with pytest.raises(ValueError):
+        obs.select_action_from_mjai_str("not json")
+    with pytest.raises(ValueError):
+        obs.select_action_from_mjai_str('{"pai": "1m"}')
+    with pytest.raises(ValueError):
+        Observation.select_actions_from_mjai([obs], [])
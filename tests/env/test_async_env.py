@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from riichienv import RiichiEnv
+from riichienv.agents import RandomAgent
+from riichienv.async_env import AsyncRiichiEnv
+
+
+class _SlowAgent:
+    def __init__(self, seed, delay):
+        self._agent = RandomAgent(seed=seed)
+        self._delay = delay
+
+    async def act(self, obs):
+        await asyncio.sleep(self._delay)
+        return self._agent.act(obs)
+
+
+def _sync_scores(seed):
+    agents = [RandomAgent(seed=p) for p in range(4)]
+    env = RiichiEnv(seed=seed)
+    obs = env.reset()
+    while not env.done():
+        obs = env.step({pid: agents[pid].act(o) for pid, o in obs.items()})
+    return env.scores()
+
+
+def test_async_env_matches_sync_play_across_tables():
+    async def main():
+        tables = [AsyncRiichiEnv([_SlowAgent(p, 0) for p in range(4)], seed=s) for s in range(6)]
+        return await asyncio.gather(*(t.play() for t in tables))
+
+    envs = asyncio.run(main())
+    assert [env.scores() for env in envs] == [_sync_scores(s) for s in range(6)]
+
+
+def test_async_env_times_out_to_default_actions():
+    agents = [_SlowAgent(0, 10.0), RandomAgent(seed=1), RandomAgent(seed=2), RandomAgent(seed=3)]
+    table = AsyncRiichiEnv(agents, timeout=0.001, seed=1)
+    env = asyncio.run(table.play())
+    assert env.done()
+    assert table.timeouts[0] > 0
+    assert table.timeouts[1:] == [0, 0, 0]
+
+
+def test_async_env_requires_reset():
+    table = AsyncRiichiEnv([RandomAgent()] * 4)
+    with pytest.raises(RuntimeError):
+        asyncio.run(table.step())
@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from riichienv import ActionType, GameRecord, RiichiEnv
+
+
+def _play(env, seed):
+    rng = random.Random(seed)
+    obs = env.reset()
+    decisions = []
+    while not env.done():
+        decisions.append(obs)
+        obs = env.step({pid: rng.choice(o.legal_actions()) for pid, o in obs.items()})
+    return decisions
+
+
+def test_auto_play_only_returns_meaningful_decisions():
+    env = RiichiEnv(seed=3, auto_play=["forced", "always_ron", "always_tsumo"])
+    assert env.auto_play == ["always_ron", "always_tsumo", "forced"]
+    for obs in _play(env, 3):
+        for o in obs.values():
+            legal = o.legal_actions()
+            assert len(legal) > 1
+            assert not any(a.action_type in (ActionType.Ron, ActionType.Tsumo) for a in legal)
+
+
+def test_auto_played_games_replay_from_record():
+    env = RiichiEnv(seed=5, game_mode="4p-red-east", record=True, auto_play={"pass_only", "riichi_tsumogiri"})
+    _play(env, 5)
+
+    record = GameRecord.from_bytes(env.game_record().to_bytes())
+    assert record.to_mjai() == env.mjai_log
+
+
+def test_auto_play_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        RiichiEnv(auto_play={"always_pon"})
@@ -0,0 +1,56 @@
+import pickle
+import random
+
+import pytest
+
+from riichienv import GameRecord, RiichiEnv
+
+
+def _play(seed, game_mode=None):
+    rng = random.Random(seed)
+    env = RiichiEnv(game_mode=game_mode, seed=seed, record=True)
+    obs = env.reset()
+    while not env.done():
+        actions = {pid: rng.choice(o.legal_actions()) for pid, o in obs.items()}
+        obs = env.step(actions)
+    return env
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_replay_reproduces_mjai_log(seed):
+    env = _play(seed)
+    record = GameRecord.from_bytes(env.game_record().to_bytes())
+    assert record.seed == seed
+    assert record.to_mjai() == env.mjai_log
+
+    replayed = record.replay()
+    assert replayed.done()
+    assert replayed.scores() == env.scores()
+
+
+def test_replay_multi_round_game():
+    env = _play(7, game_mode="4p-red-east")
+    record = pickle.loads(pickle.dumps(env.game_record()))
+    assert record.to_mjai() == env.mjai_log
+
+    starts = sum(1 for ev in env.mjai_log if ev["type"] == "start_kyoku")
+    kyokus = record.to_kyokus()
+    assert len(kyokus) == starts
+
+
+def test_to_y47_has_one_row_per_decision():
+    env = _play(3)
+    record = env.game_record()
+    samples = record.to_y47()
+    n = len(samples["action_index"])
+    assert 0 < n <= len(record)
+    assert samples["token_main"].shape == (n, 256, 7)
+    assert samples["legal_action_mask"][range(n), samples["action_index"]].all()
+
+
+def test_game_record_requires_recording():
+    env = RiichiEnv(seed=1)
+    with pytest.raises(ValueError):
+        env.game_record()
+    with pytest.raises(ValueError):
+        GameRecord.from_bytes(b"not a record")
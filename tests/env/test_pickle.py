@@ -0,0 +1,72 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from riichienv import Observation, RiichiEnv
+from riichienv.agents import RandomAgent
+
+
+def _advance(env, obs, agent, steps):
+    for _ in range(steps):
+        if env.done():
+            break
+        obs = env.step({pid: agent.act(o) for pid, o in obs.items()})
+    return obs
+
+
+def test_env_pickle_round_trip_mid_game():
+    env = RiichiEnv(seed=3, record=True)
+    obs = _advance(env, env.reset(), RandomAgent(seed=0), 40)
+
+    restored = pickle.loads(pickle.dumps(env, protocol=5))
+    assert restored.to_bytes() == env.to_bytes()
+    assert restored.mjai_log == env.mjai_log
+    assert restored.hands == env.hands
+
+    restored_obs = restored.get_observations(list(obs))
+    a = _advance(env, obs, RandomAgent(seed=1), 1000)
+    b = _advance(restored, restored_obs, RandomAgent(seed=1), 1000)
+    assert env.done() and restored.done()
+    assert set(a) == set(b)
+    assert env.scores() == restored.scores()
+    assert env.mjai_log == restored.mjai_log
+    assert env.game_record().to_bytes() == restored.game_record().to_bytes()
+
+
+def test_env_snapshot_without_logs():
+    env = RiichiEnv(seed=5)
+    env.reset()
+    data = env.to_bytes(include_logs=False)
+    assert len(data) < len(env.to_bytes())
+    restored = RiichiEnv.from_bytes(data)
+    assert restored.mjai_log == []
+    assert restored.hands == env.hands
+    with pytest.raises(ValueError):
+        RiichiEnv.from_bytes(data[:-1])
+    with pytest.raises(ValueError):
+        RiichiEnv.from_bytes(b"nope")
+
+
+def test_observation_pickle_round_trip():
+    env = RiichiEnv(seed=7)
+    obs = env.reset()
+    for pid, o in obs.items():
+        restored = pickle.loads(pickle.dumps(o))
+        assert isinstance(restored, Observation)
+        assert restored.player_id == pid
+        assert restored.hand == o.hand
+        assert restored.events == o.events
+        assert [a.to_mjai() for a in restored.legal_actions()] == [a.to_mjai() for a in o.legal_actions()]
+
+
+def test_y47_turn_pickles_out_of_band():
+    env = RiichiEnv(seed=9)
+    turns = env.reset_y47(seed=9)
+    turn = next(iter(turns.values()))
+    buffers = []
+    data = pickle.dumps(turn, protocol=5, buffer_callback=buffers.append)
+    assert len(buffers) == 7
+    restored = pickle.loads(data, buffers=buffers)
+    for name in ("token_main", "token_scalar", "token_mask", "legal_action_mask"):
+        np.testing.assert_array_equal(getattr(restored, name), getattr(turn, name))
@@ -1,4 +1,5 @@
 import json
+import random
 
 import pytest
 
@@ -639,3 +640,40 @@ class TestRiichiEnv:
         assert env.riichi_declared[3]
         # Also points should be deducted (25000 - 1000 = 24000)
         assert env.scores()[3] == 24000
+
+    def test_legal_discards_track_hand(self) -> None:
+        rng = random.Random(0)
+        env = RiichiEnv(seed=11)
+        obs = env.reset()
+        while not env.done():
+            for pid, o in obs.items():
+                if env.phase != Phase.WaitAct or env.riichi_declared[pid]:
+                    continue
+                forbidden = set(env.forbidden_discards[pid])
+                expected = sorted(t for t in env.hands[pid] if t // 4 not in forbidden)
+                discards = [a.tile for a in o.legal_actions() if a.action_type == ActionType.Discard]
+                assert discards == expected
+            obs = env.step({pid: rng.choice(o.legal_actions()) for pid, o in obs.items()})
+
+    def test_riichi_follows_replaced_hand(self) -> None:
+        env = RiichiEnv(seed=5)
+        env.reset()
+        env.current_player = 0
+        env.phase = Phase.WaitAct
+        env.needs_tsumo = False
+        env.drawn_tile = 132
+
+        def can_riichi() -> bool:
+            legals = env.get_observations(players=[0])[0].legal_actions()
+            return any(a.action_type == ActionType.Riichi for a in legals)
+
+        # 123m 456m 789m 123p 5p + 9z drawn: discarding 9z leaves a 5p tanki.
+        h = env.hands
+        h[0] = [0, 4, 8, 12, 17, 20, 24, 28, 32, 36, 40, 44, 53, 132]
+        env.hands = h
+        assert can_riichi()
+
+        # Replacing the hand must not reuse the previous tenpai table.
+        h[0] = [0, 9, 18, 27, 37, 46, 55, 64, 73, 82, 91, 100, 109, 132]
+        env.hands = h
+        assert not can_riichi()
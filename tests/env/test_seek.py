@@ -0,0 +1,101 @@
+import json
+import random
+
+import pytest
+
+from riichienv import KyokuSeeker, ReplayGame, RiichiEnv
+
+from ..helper import helper_write_log
+
+RED_FIVES = (16, 52, 88)
+
+
+def _tiles(tids):
+    return sorted((t // 4, t in RED_FIVES) for t in tids)
+
+
+def _snapshot(env):
+    return (
+        [_tiles(h) for h in env.hands],
+        [_tiles(d) for d in env.discards],
+        env.current_player,
+        sorted(env.active_players),
+    )
+
+
+def _play_logged_kyoku(seed):
+    rng = random.Random(seed)
+    env = RiichiEnv(seed=seed)
+    obs = env.reset()
+    snapshots = [(len(env.mjai_log), _snapshot(env))]
+    while not env.done():
+        actions = {pid: rng.choice(o.legal_actions()) for pid, o in obs.items()}
+        obs = env.step(actions)
+        snapshots.append((len(env.mjai_log), _snapshot(env)))
+    return env.mjai_log, snapshots
+
+
+def _kyoku_over(log, upto):
+    return any(ev["type"] in ("hora", "ryukyoku") for ev in log[:upto])
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_from_mjai_matches_live_play(seed):
+    log, snapshots = _play_logged_kyoku(seed)
+    for upto, expected in snapshots:
+        if _kyoku_over(log, upto):
+            continue
+        env = RiichiEnv.from_mjai(log, upto=upto)
+        assert _snapshot(env) == expected, f"mismatch after {upto} events"
+
+
+def test_from_mjai_accepts_json_strings():
+    log, snapshots = _play_logged_kyoku(4)
+    upto, expected = snapshots[3]
+    env = RiichiEnv.from_mjai([json.dumps(ev) for ev in log], upto=upto)
+    assert _snapshot(env) == expected
+
+
+def test_from_mjai_rejects_missing_start():
+    with pytest.raises(ValueError):
+        RiichiEnv.from_mjai([{"type": "start_game"}])
+
+
+def test_from_kyoku_and_seeker(tmp_path):
+    path = tmp_path / "game.json.gz"
+    helper_write_log(path)
+    kyoku = next(iter(ReplayGame.from_json(str(path)).take_kyokus()))
+
+    env = RiichiEnv.from_kyoku(kyoku, step=1)
+    # The dealer has discarded 5m and seat 1 may ron it.
+    assert [t // 4 for t in env.discards[0]] == [4]
+    assert 1 in env.active_players
+
+    seeker = KyokuSeeker(kyoku, checkpoint_every=1)
+    assert seeker.num_steps == 2
+    assert _snapshot(seeker.seek(1)) == _snapshot(env)
+    assert seeker.seek(2).done()
+    with pytest.raises(ValueError):
+        seeker.seek(3)
+    with pytest.raises(ValueError):
+        RiichiEnv.from_kyoku(kyoku, step=3)
+
+
+def test_from_mjai_mjai_logging():
+    log, snapshots = _play_logged_kyoku(5)
+    upto, expected = snapshots[3]
+
+    quiet = RiichiEnv.from_mjai(log, upto=upto, mjai_logging=False)
+    assert quiet.skip_mjai_logging
+    assert quiet.mjai_log == []
+
+    env = RiichiEnv.from_mjai(log, upto=upto)
+    assert not env.skip_mjai_logging
+    assert _snapshot(env) == expected
+    assert env.mjai_log == []
+
+    obs = env.get_observations(env.active_players)
+    env.step({pid: o.legal_actions()[0] for pid, o in obs.items()})
+    # Only events from the seek point on are logged.
+    assert env.mjai_log
+    assert all(ev["type"] not in ("start_game", "start_kyoku") for ev in env.mjai_log)
@@ -0,0 +1,82 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from riichienv import GameRecord, RiichiEnv, generate_walls
+
+
+def _tehais(env):
+    return next(ev["tehais"] for ev in env.mjai_log if ev["type"] == "start_kyoku")
+
+
+@pytest.mark.parametrize("rng", ["chacha", "xoshiro"])
+def test_generated_walls_match_seeded_deals(rng):
+    walls = generate_walls(3, 42, rng=rng)
+    assert walls.shape == (3, 136) and walls.dtype == np.uint8
+    assert all(sorted(row) == list(range(136)) for row in walls.tolist())
+
+    seeded = RiichiEnv(seed=42, rng=rng)
+    seeded.reset()
+    env = RiichiEnv()
+    env.reset(wall=walls[0].tolist())
+    assert _tehais(env) == _tehais(seeded)
+
+    env.load_walls(walls)
+    assert env.num_walls == 3
+    env.reset(wall_index=0)
+    assert _tehais(env) == _tehais(seeded)
+    assert env.wall_cursor == 1
+
+
+def test_wall_bank_wraps_around():
+    walls = generate_walls(2, 5)
+    env = RiichiEnv(game_mode="4p-red-half")
+    env.load_walls(walls)
+    obs = env.reset(wall_index=1)
+    assert env.wall_cursor == 2
+    while not env.done() and env.wall_cursor < 3:
+        obs = env.step({pid: o.legal_actions()[0] for pid, o in obs.items()})
+    assert env.wall_cursor == 3
+
+    # The third hand is dealt from row 0 again; the dora marker does not depend on the dealer.
+    ref = RiichiEnv()
+    ref.reset(wall=walls[0].tolist())
+    first = next(ev for ev in ref.mjai_log if ev["type"] == "start_kyoku")
+    last = [ev for ev in env.mjai_log if ev["type"] == "start_kyoku"][-1]
+    assert last["dora_marker"] == first["dora_marker"]
+
+
+def test_wall_bank_validation():
+    env = RiichiEnv()
+    with pytest.raises(IndexError):
+        env.reset(wall_index=0)
+    with pytest.raises(ValueError):
+        env.load_walls(np.zeros((1, 136), dtype=np.uint8))
+    env.load_walls(generate_walls(2, 1))
+    with pytest.raises(ValueError):
+        env.reset(wall=list(range(136)), wall_index=0)
+
+
+def test_record_keeps_rng():
+    env = RiichiEnv(seed=9, rng="xoshiro", record=True)
+    obs = env.reset()
+    env.step({pid: o.legal_actions()[0] for pid, o in obs.items()})
+    record = GameRecord.from_bytes(env.game_record().to_bytes())
+    assert record.rng == "xoshiro"
+    assert record.to_mjai() == env.mjai_log
+
+
+@pytest.mark.parametrize("version", [0, 1, 2])
+def test_wall_digest_versions(version):
+    wall = generate_walls(1, 3)[0].tolist()
+    env = RiichiEnv(seed=3, digest_version=version)
+    env.reset(wall=wall)
+    dealt = wall[::-1]
+    if version == 0:
+        expected = ""
+    elif version == 1:
+        expected = hashlib.sha256((env.salt + ",".join(map(str, dealt))).encode()).hexdigest()
+    else:
+        expected = hashlib.sha256(env.salt.encode() + bytes(dealt)).hexdigest()
+    assert env.wall_digest == expected
@@ -0,0 +1,44 @@
+import gzip
+import json
+
+
+def helper_write_log(path, **hule_fields) -> None:
+    """Writes a one-kyoku MJSoul-style replay log (gzipped JSON) to `path`; `hule_fields` override the win."""
+    # East 1: the dealer discards 5m and seat 1 wins on it with tanyao.
+    new_round = {
+        "scores": [25000, 25000, 25000, 25000],
+        "doras": ["3m"],
+        "tiles0": ["1m", "9m", "1p", "9p", "1s", "9s", "1z", "2z", "3z", "4z", "5z", "6z", "7z", "5m"],
+        "tiles1": ["2m", "3m", "4m", "3p", "4p", "5p", "4s", "5s", "6s", "6s", "7s", "8s", "5m"],
+        "tiles2": ["1m", "1m", "2p", "2p", "7p", "7p", "8p", "2s", "3s", "8s", "9s", "1z", "2z"],
+        "tiles3": ["6m", "7m", "8m", "6p", "8p", "9p", "1s", "2s", "3s", "7s", "9s", "3z", "4z"],
+        "chang": 0,
+        "ju": 0,
+        "ben": 0,
+        "liqibang": 0,
+    }
+    hule = {
+        "seat": 1,
+        "hu_tile": "5m",
+        "zimo": False,
+        "count": 1,
+        "fu": 40,
+        "fans": [{"id": 12}],
+        "hand": new_round["tiles1"][:-1],
+        "yiman": False,
+        "point_rong": 1300,
+        "point_zimo_qin": 0,
+        "point_zimo_xian": 0,
+        **hule_fields,
+    }
+    log = {
+        "rounds": [
+            [
+                {"name": "NewRound", "data": new_round},
+                {"name": "DiscardTile", "data": {"seat": 0, "tile": "5m"}},
+                {"name": "Hule", "data": {"hules": [hule]}},
+            ]
+        ]
+    }
+    with gzip.open(path, "wt") as f:
+        json.dump(log, f)
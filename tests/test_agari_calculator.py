@@ -139,3 +139,32 @@ def test_yaku_shibari():
     # Ideally should be Yaku Shibari if shape is valid.
     # But for now we just verify it doesn't allow a win.
     assert not res.agari, "Yaku Shibari failed: Allowed agari with only Aka Dora"
+
+
+def test_calc_many_matches_calc():
+    # 23456m 456p 678s 99s (red 5m and 5p), waiting on 1m, 4m and 7m
+    hand = rv.AgariCalculator([4, 8, 12, 16, 20, 48, 52, 56, 92, 96, 100, 104, 105])
+    cond = rv.Conditions(riichi=True, player_wind=1)
+    dora = [0]
+
+    results = hand.calc_many(dora_indicators=dora, conditions=cond)
+    assert len(results) == len(hand.get_waits())
+    for wait, res in zip(hand.get_waits(), results):
+        win_tile = wait * 4 + (wait * 4 in (16, 52, 88))
+        assert res == hand.calc(win_tile, dora, cond)
+        assert res == hand.calc(win_tile, dora, cond.to_rust())
+        assert res.agari
+
+    results = hand.calc_many([108, 0])
+    assert results == [hand.calc(108), hand.calc(0)]
+    assert results[0] == rv.Agari(agari=False)
+
+
+def test_calc_with_complete_hand():
+    tiles = [4, 8, 12, 16, 20, 48, 52, 56, 92, 96, 100, 104, 105]
+    win_tile = 24
+    cond = rv.Conditions(tsumo=True)
+    short = rv.AgariCalculator(tiles).calc(win_tile, conditions=cond)
+    full = rv.AgariCalculator(sorted([*tiles, win_tile])).calc(win_tile, conditions=cond)
+    assert short == full
+    assert short.agari
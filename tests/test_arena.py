@@ -0,0 +1,43 @@
+import functools
+import math
+
+import pytest
+
+from riichienv import GameRecord
+from riichienv.agents import RandomAgent
+from riichienv.arena import run_arena, stable_dan, summarize
+
+
+def test_run_arena_in_process_rotates_seats():
+    factories = [functools.partial(RandomAgent, seed=i) for i in range(4)]
+    results = sorted(run_arena(factories, n_games=4, seed=3, processes=0), key=lambda r: r.game)
+    assert [r.seed for r in results] == [3, 3, 3, 3]
+    assert [r.seats for r in results] == [[0, 1, 2, 3], [3, 0, 1, 2], [2, 3, 0, 1], [1, 2, 3, 0]]
+    for r in results:
+        assert sorted(r.ranks) == [1, 2, 3, 4]
+        assert r.record is None
+
+    summary = summarize(results)
+    assert sorted(summary) == [0, 1, 2, 3]
+    assert all(s.games == 4 for s in summary.values())
+    assert math.isclose(sum(s.mean_rank for s in summary.values()), 10.0)
+
+
+def test_run_arena_pool_matches_in_process():
+    factories = [RandomAgent, RandomAgent]
+    kwargs = dict(n_games=4, seed=11, preset_rule="basic", keep_records=True)
+    local = sorted(run_arena(factories, processes=0, **kwargs), key=lambda r: r.game)
+    pooled = sorted(run_arena(factories, processes=2, **kwargs), key=lambda r: r.game)
+    assert [r.seats for r in pooled] == [r.seats for r in local]
+    for r in pooled:
+        env = GameRecord.from_bytes(r.record).replay()
+        assert env.scores() == r.scores
+
+
+def test_stable_dan():
+    assert stable_dan([25, 25, 25, 25]) == pytest.approx(7.0)
+    assert stable_dan([3, 3, 2, 2]) == pytest.approx((6 * 0.3 + 3 * 0.3) / 0.2 - 2)
+    assert math.isinf(stable_dan([1, 0, 0, 0]))
+    assert math.isnan(stable_dan([0, 0, 0, 0]))
+    with pytest.raises(ValueError):
+        list(run_arena([RandomAgent] * 5, n_games=1, processes=0))
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from riichienv import RiichiEnv
+from riichienv.broker import Y47_FIELDS, InferenceBroker
+
+
+def _first_legal(batch):
+    return batch["legal_action_mask"].argmax(axis=1)
+
+
+def _play_single(seed):
+    env = RiichiEnv(skip_mjai_logging=True)
+    turns = env.reset_y47(seed=seed)
+    while True:
+        action_index = {pid: int(np.asarray(t.legal_action_mask).argmax()) for pid, t in turns.items()}
+        turns, rewards, done = env.step_y47(action_index)
+        if done:
+            return np.asarray(rewards)
+
+
+def test_broker_batches_all_pending_seats():
+    broker = InferenceBroker(3, seed=5, skip_mjai_logging=True)
+    batch = broker.collect()
+    assert list(batch["env_id"]) == [0, 1, 2]
+    for name in Y47_FIELDS:
+        assert batch[name].shape[0] == 3
+    with pytest.raises(ValueError):
+        broker.step([0])
+
+
+def test_broker_matches_sequential_play():
+    broker = InferenceBroker(2, seed=7, skip_mjai_logging=True)
+    episodes = broker.run(_first_legal, num_episodes=2)
+    assert len(episodes) >= 2
+    for episode in episodes:
+        np.testing.assert_array_equal(episode.rewards, _play_single(episode.seed))
@@ -1,3 +1,5 @@
+import pytest
+
 from riichienv import RiichiEnv
 from riichienv.action import Action, ActionType
 
@@ -119,3 +121,56 @@ class TestClaimPriority:
         # Check Log
         last_ev = env.mjai_log[-1]
         assert last_ev["type"] == "pon"
+
+    def test_current_claims_view(self):
+        env = RiichiEnv(seed=1)
+        env.reset()
+        h = env.hands
+        h[2] = [56, 58] + [1] * 11
+        h[0] = [57] + [2] * 12
+        env.hands = h
+        env.current_player = 0
+        env.phase = 0
+        env.active_players = [0]
+        env.step({0: Action(ActionType.DISCARD, tile=57)})
+
+        claims = env.current_claims
+        assert sorted(claims) == env.active_players
+        pons = [(a.tile, sorted(a.consume_tiles)) for a in claims[2] if a.action_type == ActionType.PON]
+        assert pons == [(57, [56, 58])]
+
+        env.current_claims = {3: [Action(ActionType.RON, tile=57)]}
+        assert list(env.current_claims) == [3]
+        assert env.current_claims[3][0].action_type == ActionType.RON
+        with pytest.raises(ValueError):
+            env.current_claims = {4: [Action(ActionType.RON, tile=57)]}
+        with pytest.raises(ValueError, match="at most 4"):
+            env.current_claims = {2: [Action(ActionType.DAIMINKAN, tile=57, consume_tiles=[56, 58, 59, 56, 58])]}
+
+    @staticmethod
+    def _claims_on_5m(hand):
+        env = RiichiEnv(seed=1)
+        env.reset()
+        h = env.hands
+        h[0] = [17] + [2] * 12
+        h[1] = hand
+        h[2] = [36, 37, 40, 41, 44, 45, 56, 57, 60, 61, 64, 65, 68]
+        h[3] = [72, 73, 76, 77, 80, 81, 92, 93, 96, 97, 100, 101, 104]
+        env.hands = h
+        env.current_player = 0
+        env.phase = 0
+        env.active_players = [0]
+        env.drawn_tile = 100
+        obs = env.step({0: Action(ActionType.DISCARD, tile=17)})
+        return [(a.action_type, list(a.consume_tiles)) for a in obs[1].legal_actions()]
+
+    def test_red_five_claims_do_not_depend_on_hand_order(self):
+        honors = [108, 112, 116, 120, 124, 128, 132, 109, 113, 117]
+        expected = [
+            (ActionType.PASS, []),
+            (ActionType.PON, [18, 19]),
+            (ActionType.PON, [16, 18]),
+            (ActionType.DAIMINKAN, [16, 18, 19]),
+        ]
+        assert self._claims_on_5m([16, 18, 19] + honors) == expected
+        assert self._claims_on_5m([19, 18, 16] + honors[::-1]) == expected
@@ -1,3 +1,6 @@
+import numpy as np
+import pytest
+
 from riichienv import convert
 
 
@@ -64,3 +67,35 @@ class TestConvert:
         tids = [0, 16, 124]
         assert convert.tid_to_mpsz_list(tids) == ["1m", "0m", "5z"]
         assert convert.tid_to_mjai_list(tids) == ["1m", "5mr", "P"]
+
+    def test_scalar_fallbacks(self):
+        # Non-canonical spellings still go through the original parser.
+        assert convert.mpsz_to_tid("05m") == 17
+        assert convert.mjai_to_tid("1z") == 108
+        with pytest.raises(ValueError, match="Invalid TID"):
+            convert.tid_to_mjai(136)
+        with pytest.raises(ValueError, match="Invalid honor number"):
+            convert.mpsz_to_tid("8z")
+        with pytest.raises(ValueError, match="Invalid red spec"):
+            convert.mjai_to_tid("5zr")
+
+    def test_arrays(self):
+        tids = np.arange(136).reshape(4, 34)
+        mjai = convert.tid_to_mjai_array(tids)
+        mpsz = convert.tid_to_mpsz_array(tids)
+        assert mjai.shape == mpsz.shape == (4, 34)
+        assert mjai.ravel().tolist() == [convert.tid_to_mjai(t) for t in range(136)]
+        assert mpsz.ravel().tolist() == [convert.tid_to_mpsz(t) for t in range(136)]
+
+        expected = [convert.mjai_to_tid(s) for s in mjai.ravel()]
+        assert convert.mjai_to_tid_array(mjai).ravel().tolist() == expected
+        assert convert.mjai_to_tid_array(mjai.astype(object)).ravel().tolist() == expected
+        assert convert.mpsz_to_tid_array(mpsz).ravel().tolist() == [convert.mpsz_to_tid(s) for s in mpsz.ravel()]
+        assert convert.mjai_to_tid_array(["5pr", "1z", "05m"]).tolist() == [52, 108, 17]
+
+        with pytest.raises(ValueError, match="Invalid TID: 136"):
+            convert.tid_to_mjai_array([0, 136])
+        with pytest.raises(TypeError):
+            convert.tid_to_mjai_array([0.0])
+        with pytest.raises(ValueError):
+            convert.mpsz_to_tid_array(["1m", "5mr"])
@@ -0,0 +1,43 @@
+import math
+
+import pytest
+
+from riichienv import generate_walls
+from riichienv.agents import RandomAgent
+from riichienv.duplicate import play_duplicate
+
+
+def test_play_duplicate_rotates_agents():
+    agents = [RandomAgent(seed=i) for i in range(4)]
+    result = play_duplicate(agents, n_sets=2, seed=10)
+    assert result.n_sets == 2
+    for games in result.scores:
+        assert len(games) == 4
+        for scores in games:
+            assert len(scores) == 4
+    for games in result.ranks:
+        for ranks in games:
+            assert sorted(ranks) == [1, 2, 3, 4]
+
+    mean, stderr = result.paired_diff(0, 0)
+    assert mean == 0.0 and stderr == 0.0
+    summary = result.summary()
+    assert len(summary) == 4
+    assert math.isclose(sum(row["mean_ranks"] for row in summary), 10.0)
+
+
+def test_play_duplicate_from_wall_bank():
+    agent = RandomAgent(seed=0)
+    walls = generate_walls(8, 1)
+    result = play_duplicate([agent] * 4, n_sets=2, walls=walls, preset_rule="ouza-normal", skip_mjai_logging=True)
+    assert result.n_sets == 2
+
+    with pytest.raises(ValueError, match="too small"):
+        play_duplicate([agent] * 4, n_sets=3, walls=generate_walls(2, 1))
+    with pytest.raises(ValueError, match="mutually exclusive"):
+        play_duplicate([agent] * 4, n_sets=2, seed=1, walls=walls)
+
+
+def test_play_duplicate_needs_four_agents():
+    with pytest.raises(ValueError):
+        play_duplicate([RandomAgent()], n_sets=1)
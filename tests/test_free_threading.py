@@ -0,0 +1,55 @@
+import random
+import sys
+import sysconfig
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import riichienv as rv
+
+from .helper import helper_write_log
+
+
+def _self_play(seed):
+    rng = random.Random(seed)
+    env = rv.RiichiEnv(seed=seed, game_mode="4p-red-half", skip_mjai_logging=True)
+    obs = env.reset()
+    while not env.done():
+        obs = env.step({pid: rng.choice(o.legal_actions()) for pid, o in obs.items()})
+    return env.scores(), env.ranks()
+
+
+def _calc(_):
+    hand = rv.AgariCalculator.hand_from_text("123m456p789s111z2z")
+    res = hand.calc(rv.parse_tile("2z"), conditions=rv.Conditions())
+    return res.han, res.fu, res.ron_agari
+
+
+@pytest.mark.skipif(not sysconfig.get_config_var("Py_GIL_DISABLED"), reason="needs a free-threaded build")
+def test_import_keeps_gil_disabled():
+    assert not sys._is_gil_enabled()
+
+
+def test_threaded_self_play_matches_serial():
+    seeds = list(range(8))
+    serial = [_self_play(s) for s in seeds]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        threaded = list(pool.map(_self_play, seeds))
+    assert threaded == serial
+
+
+def test_threaded_agari_calculator():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = set(pool.map(_calc, range(64)))
+    assert results == {(2, 40, 3900)}
+
+
+def test_threaded_replay_parsing(tmp_path):
+    path = tmp_path / "game.json.gz"
+    helper_write_log(path)
+
+    def parse(_):
+        return len(rv.ReplayGame.from_json(str(path)).take_kyokus())
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert set(pool.map(parse, range(16))) == {1}
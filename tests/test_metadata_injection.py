@@ -1,14 +1,15 @@
+import gzip
 import json
 import os
 
 import pytest
 
-from riichienv.visualizer.viewer import MetadataInjector
+from riichienv.visualizer.viewer import MetadataInjector, inject_metadata_batch
 
 
 # Load the log once for all tests
 @pytest.fixture(scope="module")
-def enriched_log():
+def raw_log():
     # Use the .bak file as requested (now renamed)
     path = os.path.join(os.path.dirname(__file__), "../tools/replay-visualizer/example_before_injection.jsonl")
     if not os.path.exists(path):
@@ -16,9 +17,12 @@ def enriched_log():
         path = "tools/replay-visualizer/example_before_injection.jsonl"
 
     with open(path, encoding="utf-8") as f:
-        events = [json.loads(line) for line in f]
+        return [json.loads(line) for line in f]
 
-    injector = MetadataInjector(events)
+
+@pytest.fixture(scope="module")
+def enriched_log(raw_log):
+    injector = MetadataInjector(raw_log)
     return injector.process()
 
 
@@ -121,3 +125,29 @@ def test_waits_calculation(enriched_log):
                 break
 
     assert found_waits, "No waits calculated in any Dahai event"
+
+
+def test_batch_matches_single(raw_log, enriched_log):
+    before = json.dumps(raw_log)
+    batch = inject_metadata_batch([raw_log, raw_log[:40]], num_workers=2)
+
+    assert json.dumps(raw_log) == before
+    assert json.dumps(batch[0]) == json.dumps(enriched_log)
+    assert json.dumps(batch[1]) == json.dumps(MetadataInjector(raw_log[:40]).process())
+
+
+def test_batch_accepts_text_and_paths(raw_log, enriched_log, tmp_path):
+    text = "\n".join(json.dumps(ev) for ev in raw_log)
+    path = tmp_path / "log.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(text)
+
+    batch = inject_metadata_batch([text, json.dumps(raw_log), str(path), path], num_workers=2)
+
+    for events in batch:
+        assert events == enriched_log
+
+
+def test_batch_reports_bad_log(raw_log):
+    with pytest.raises(ValueError, match="log 1: "):
+        inject_metadata_batch([raw_log, '{"type": '])
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import sys
+
+from riichienv.mjai_server import MjaiBot, MjaiServer, _seat_events, play_table, spawn_bot
+
+# A stdio bot that tsumogiris; with --linger it keeps running after stdin closes.
+_STDIO_BOT = """
+import json, sys, time
+seat = None
+while line := sys.stdin.readline():
+    events = json.loads(line)
+    for ev in events:
+        if ev["type"] == "start_game":
+            seat = ev["id"]
+    last = events[-1] if events else {}
+    if last.get("type") == "tsumo" and last.get("actor") == seat:
+        resp = {"type": "dahai", "actor": seat, "pai": last["pai"], "tsumogiri": True}
+    else:
+        resp = {"type": "none"}
+    print(json.dumps(resp), flush=True)
+if "--linger" in sys.argv:
+    time.sleep(60)
+"""
+
+
+def _tsumogiri_response(events, state):
+    for ev in events:
+        if ev["type"] == "start_game":
+            state["id"] = ev["id"]
+    last = events[-1] if events else {}
+    if last.get("type") == "tsumo" and last.get("actor") == state.get("id"):
+        return {"type": "dahai", "actor": state["id"], "pai": last["pai"], "tsumogiri": True}
+    return {"type": "none"}
+
+
+async def _tsumogiri_client(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    state = {}
+    while line := await reader.readline():
+        writer.write((json.dumps(_tsumogiri_response(json.loads(line), state)) + "\n").encode())
+        await writer.drain()
+    writer.close()
+
+
+async def _pipe_bot(respond):
+    """A bot served in-process through a local socket pair."""
+
+    async def handle(reader, writer):
+        state = {}
+        while line := await reader.readline():
+            resp = respond(json.loads(line), state)
+            if resp is not None:
+                writer.write((json.dumps(resp) + "\n").encode())
+                await writer.drain()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    reader, writer = await asyncio.open_connection(host, port)
+    return MjaiBot(reader, writer), server
+
+
+def test_server_plays_tables_over_tcp():
+    async def main():
+        server = MjaiServer(seed=1, timeout=5.0)
+        host, port = await server.start()
+        clients = [asyncio.create_task(_tsumogiri_client(host, port)) for _ in range(8)]
+        results = [await asyncio.wait_for(server.results.get(), 60) for _ in range(2)]
+        await server.close()
+        await asyncio.gather(*clients)
+        return results
+
+    results = asyncio.run(main())
+    assert sorted(i for i, _ in results) == [0, 1]
+    for _, r in results:
+        assert sorted(r.ranks) == [1, 2, 3, 4]
+        assert r.violations == [0, 0, 0, 0]
+
+
+def test_silent_bot_falls_back_to_default_actions():
+    async def main():
+        bots, servers = [], []
+        for p in range(4):
+            respond = (lambda events, state: None) if p == 0 else _tsumogiri_response
+            bot, server = await _pipe_bot(respond)
+            bots.append(bot)
+            servers.append(server)
+        result = await play_table(bots, seed=2, timeout=0.05, game_mode="4p-red-single")
+        for bot in bots:
+            await bot.close()
+        for server in servers:
+            server.close()
+        return result
+
+    result = asyncio.run(main())
+    assert result.violations[0] > 0
+    assert result.violations[1:] == [0, 0, 0]
+
+
+def test_spawned_stdio_bots_play_a_table():
+    async def main():
+        bots = [
+            await spawn_bot(sys.executable, "-c", _STDIO_BOT, *(["--linger"] if p == 0 else []), kill_timeout=0.5)
+            for p in range(4)
+        ]
+        result = await play_table(bots, seed=3, timeout=10.0, game_mode="4p-red-single")
+        for bot in bots:
+            await bot.close()
+        return result, [bot._writer._proc.returncode for bot in bots]
+
+    result, returncodes = asyncio.run(main())
+    assert sorted(result.ranks) == [1, 2, 3, 4]
+    assert result.violations == [0, 0, 0, 0]
+    # Seats 1-3 exit on EOF; the lingering bot is killed after kill_timeout.
+    assert returncodes[1:] == [0, 0, 0]
+    assert returncodes[0] != 0
+
+
+def test_seat_events_rewrites_only_start_game():
+    events = [
+        json.dumps({"type": "start_game", "id": 0, "names": ["a", "b", "c", "d"]}),
+        json.dumps({"type": "dahai", "actor": 0, "pai": "5m", "tsumogiri": False, "note": '"start_game"'}),
+    ]
+    seated = _seat_events(events, 2)
+    assert json.loads(seated[0]) == {"type": "start_game", "id": 2, "names": ["a", "b", "c", "d"]}
+    assert seated[1] == events[1]
@@ -0,0 +1,42 @@
+import numpy as np
+
+from riichienv import Kyoku, ReplayGame
+
+from .helper import helper_write_log
+
+
+def test_kyoku_to_arrays(tmp_path):
+    path = tmp_path / "game.json.gz"
+    helper_write_log(path)
+    kyoku = next(iter(ReplayGame.from_json(str(path)).take_kyokus()))
+
+    cols = kyoku.to_arrays()
+    names = [Kyoku.ACTION_TYPE_NAMES[c] for c in cols["action_type"]]
+    assert names == ["other", "discard", "hule"]
+    assert cols["actor"].tolist() == [-1, 0, 1]
+    assert cols["tile"][1] // 4 == 4
+    assert cols["consumed"].shape == (3, 4)
+    assert cols["is_tsumo"].tolist() == [False, False, False]
+    assert cols["han"][2] == 1
+
+    assert cols["kyoku_offsets"].tolist() == [0, 3]
+    assert cols["scores"].tolist() == [[25000] * 4]
+    assert cols["hands"].shape == (1, 4, 14)
+    # Only the dealer has a 14th tile.
+    assert (cols["hands"][0, :, 13] >= 0).tolist() == [True, False, False, False]
+    assert cols["doras"][0].tolist() == [8, -1, -1, -1, -1]
+
+
+def test_corpus_to_arrays(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"game{i}.json.gz"
+        helper_write_log(path)
+        paths.append(str(path))
+
+    cols = ReplayGame.corpus_to_arrays(paths)
+    assert cols["game_offsets"].tolist() == [0, 1, 2, 3]
+    assert cols["kyoku_offsets"].tolist() == [0, 3, 6, 9]
+    assert cols["action_type"].shape == (9,)
+    assert cols["hands"].shape == (3, 4, 14)
+    np.testing.assert_array_equal(cols["tile"][:3], cols["tile"][6:])
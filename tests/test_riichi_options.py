@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import riichienv as rv
+
+
+def _counts(tiles):
+    counts = np.zeros(34, dtype=np.uint8)
+    for t in tiles:
+        counts[t // 4] += 1
+    return counts
+
+
+def test_riichi_options_waits_and_remaining():
+    # 123m 456m 789m 123p 5p 7z: either single tile is a tanki wait.
+    tiles = [0, 4, 8, 12, 17, 20, 24, 28, 32, 36, 40, 44, 53, 132]
+    options = rv.riichi_options(tiles)
+    assert [o[0] for o in options] == [53, 132]
+    by_tile = {t: (waits, remaining) for t, waits, remaining in options}
+    assert by_tile[132] == ([13], [3])
+    assert by_tile[53] == ([33], [3])
+
+    visible = [0] * 34
+    visible[13] = 1
+    assert dict((t, r) for t, _, r in rv.riichi_options(tiles, visible=visible))[132] == [2]
+
+
+def test_riichi_options_matches_check_riichi_candidates():
+    tiles = [0, 4, 8, 12, 17, 20, 24, 28, 32, 36, 40, 44, 53, 132]
+    assert [o[0] for o in rv.riichi_options(tiles)] == sorted(rv.check_riichi_candidates(tiles))
+    with pytest.raises(ValueError):
+        rv.riichi_options(tiles[:-1])
+
+
+def test_riichi_options_batch():
+    hands = [
+        [0, 4, 8, 12, 17, 20, 24, 28, 32, 36, 40, 44, 53, 132],
+        [0, 9, 18, 27, 37, 46, 55, 64, 73, 82, 91, 100, 109, 132],
+    ]
+    out = rv.riichi_options_batch(np.stack([_counts(h) for h in hands]))
+    assert out["discards"].shape == (2, 34)
+    assert out["waits"].shape == (2, 34, 34)
+    assert np.flatnonzero(out["discards"][0]).tolist() == [13, 33]
+    assert np.flatnonzero(out["waits"][0, 33]).tolist() == [13]
+    assert out["remaining"][0, 33, 13] == 3
+    assert not out["discards"][1].any()
+
+    bad = np.stack([_counts(h) for h in hands])
+    bad[0, 0] = 5
+    with pytest.raises(ValueError, match="at most 4"):
+        rv.riichi_options_batch(bad)
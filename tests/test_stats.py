@@ -0,0 +1,102 @@
+import pickle
+import random
+
+import pytest
+
+from riichienv import ReplayGame, RiichiEnv, StatsAggregator
+
+from .helper import helper_write_log
+
+
+def _random_episode(seed):
+    rng = random.Random(seed)
+    env = RiichiEnv(seed=seed)
+    obs = env.reset()
+    while not env.done():
+        obs = env.step({pid: rng.choice(o.legal_actions()) for pid, o in obs.items()})
+    return env
+
+
+def test_replay_counts(tmp_path):
+    path = tmp_path / "game.json.gz"
+    helper_write_log(path)
+
+    stats = StatsAggregator()
+    stats.add_replay(ReplayGame.from_json(str(path)))
+    s = stats.summary()
+    assert s["games"] == 1
+    assert s["kyokus"] == 1
+    assert s["agari_rate"] == [0.0, 1.0, 0.0, 0.0]
+    assert s["deal_in_rate"] == [1.0, 0.0, 0.0, 0.0]
+    assert s["tsumo_rate"] == [0.0, 0.0, 0.0, 0.0]
+    assert s["avg_agari_points"][1] == 1300
+    assert s["yaku_counts"] == {12: 1}
+    # The fixture records no score changes, so the game has no placement.
+    assert s["placed_games"] == 0
+
+
+def test_yakuman_not_counted_as_han(tmp_path):
+    normal = tmp_path / "normal.json.gz"
+    yakuman = tmp_path / "yakuman.json.gz"
+    helper_write_log(normal, count=3)
+    helper_write_log(yakuman, count=2, yiman=True, fans=[{"id": 35}], point_rong=64000)
+
+    stats = StatsAggregator()
+    stats.add_replay(ReplayGame.from_json(str(yakuman)))
+    assert stats.summary()["avg_agari_han"][1] == 0.0
+
+    stats.add_replay(ReplayGame.from_json(str(normal)))
+    s = stats.summary()
+    assert s["avg_agari_han"][1] == 3.0
+    assert s["avg_agari_points"][1] == (64000 + 1300) / 2
+    assert s["yaku_counts"] == {12: 1, 35: 1}
+
+
+def test_add_files_matches_add_replay(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"game{i}.json.gz"
+        helper_write_log(path)
+        paths.append(str(path))
+
+    parallel = StatsAggregator()
+    failed = parallel.add_files(paths + [str(tmp_path / "missing.json.gz")], num_workers=2)
+    assert [p for p, _ in failed] == [str(tmp_path / "missing.json.gz")]
+
+    serial = StatsAggregator()
+    for p in paths:
+        serial.add_replay(ReplayGame.from_json(p))
+    assert parallel.summary() == serial.summary()
+
+
+def test_env_episodes_merge_and_pickle():
+    a, b = StatsAggregator(), StatsAggregator()
+    for seed in range(4):
+        env = _random_episode(seed)
+        (a if seed % 2 else b).add_env(env)
+
+    a.merge(b)
+    s = a.summary()
+    assert s["games"] == 4
+    assert s["placed_games"] == 4
+    assert [sum(row) for row in s["placements"]] == [4, 4, 4, 4]
+    assert sum(s["agari_rate"]) + s["draw_rate"] >= 1.0 - 1e-9
+
+    restored = pickle.loads(pickle.dumps(a))
+    assert restored.summary() == s
+
+
+def test_add_mjai_uses_end_game_scores():
+    env = _random_episode(7)
+    events = list(env.mjai_log)
+    events.append({"type": "end_game", "scores": [40000, 30000, 20000, 10000]})
+    stats = StatsAggregator()
+    stats.add_mjai(events)
+    assert stats.summary()["placements"] == [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]]
+
+
+def test_add_env_requires_log():
+    env = RiichiEnv(skip_mjai_logging=True)
+    env.reset()
+    with pytest.raises(ValueError):
+        StatsAggregator().add_env(env)
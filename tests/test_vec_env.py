@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from riichienv import RiichiEnv
+from riichienv.vec_env import Y47_SPECS, SubprocRiichiVecEnv
+
+
+def _first_legal(obs):
+    return obs["legal_action_mask"].argmax(axis=-1)
+
+
+def _assert_matches(obs, turns):
+    for e, env_turns in enumerate(turns):
+        assert sorted(np.flatnonzero(obs["active"][e])) == sorted(env_turns)
+        for seat, turn in env_turns.items():
+            for name in Y47_SPECS:
+                np.testing.assert_array_equal(obs[name][e, seat], getattr(turn, name))
+
+
+@pytest.mark.parametrize("num_envs,envs_per_worker", [(2, 1), (3, 2)])
+def test_subproc_vec_env_matches_single_env(num_envs, envs_per_worker):
+    seed = 4
+    with SubprocRiichiVecEnv(num_envs, seed=seed, envs_per_worker=envs_per_worker, skip_mjai_logging=True) as venv:
+        obs = venv.reset()
+        assert obs["token_main"].shape[:2] == (num_envs, 4)
+        assert list(venv.seeds) == [seed + e for e in range(num_envs)]
+
+        singles = [RiichiEnv(skip_mjai_logging=True) for _ in range(num_envs)]
+        turns = [env.reset_y47(seed=seed + e) for e, env in enumerate(singles)]
+        episodes = [0] * num_envs
+        for _ in range(2000):
+            _assert_matches(obs, turns)
+
+            actions = _first_legal(obs)
+            expected = []
+            for e, env in enumerate(singles):
+                turns[e], rewards, done = env.step_y47({s: int(actions[e, s]) for s in turns[e]})
+                expected.append((np.asarray(rewards), done))
+                if done:
+                    episodes[e] += 1
+                    turns[e] = env.reset_y47(seed=seed + e + episodes[e] * num_envs)
+            obs, rewards, dones = venv.step(actions)
+            for e in range(num_envs):
+                assert bool(dones[e]) == expected[e][1]
+                np.testing.assert_array_equal(rewards[e], expected[e][0])
+                # A finished env has moved on to its next seed.
+                assert venv.seeds[e] == seed + e + episodes[e] * num_envs
+            if all(episodes):
+                break
+
+        # Every env has finished a game and its next episode matches a fresh single env.
+        assert all(episodes)
+        _assert_matches(obs, turns)
+
+
+def test_reset_into_matches_reset_y47():
+    env = RiichiEnv(skip_mjai_logging=True)
+    turns = env.reset_y47(seed=7)
+    out = {name: np.zeros((4, *shape), dtype=dtype) for name, (shape, dtype) in Y47_SPECS.items()}
+    out["active"] = np.zeros(4, dtype=bool)
+    RiichiEnv(skip_mjai_logging=True).reset_y47_into(out, seed=7)
+
+    assert sorted(np.flatnonzero(out["active"])) == sorted(turns)
+    for seat, turn in turns.items():
+        for name in Y47_SPECS:
+            np.testing.assert_array_equal(out[name][seat], getattr(turn, name))
+
+
+def test_env_error_is_reported_and_group_keeps_stepping():
+    seed = 4
+    with SubprocRiichiVecEnv(2, seed=seed, envs_per_worker=2, skip_mjai_logging=True) as venv:
+        obs = venv.reset()
+        actions = _first_legal(obs)
+        actions[0, :] = 10**6
+
+        single = RiichiEnv(skip_mjai_logging=True)
+        turns = single.reset_y47(seed=seed + 1)
+        turns, rewards, _ = single.step_y47({s: int(actions[1, s]) for s in turns})
+
+        with pytest.raises(RuntimeError, match="env 0: ") as excinfo:
+            venv.step(actions)
+        assert "env 1" not in str(excinfo.value)
+        # Env 1 shares the worker with env 0 and was still stepped.
+        _assert_matches({name: obs[name][1:] for name in obs}, [turns])
+        np.testing.assert_array_equal(venv._views["rewards"][1], rewards)
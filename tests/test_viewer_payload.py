@@ -0,0 +1,88 @@
+import base64
+import gzip
+import json
+import os
+
+import pytest
+
+from riichienv.visualizer.viewer import (
+    MetadataInjector,
+    Replay,
+    _get_viewer_js_compressed_base64,
+    _gzip_base64,
+    _iter_jsonl,
+    _split_kyoku,
+)
+
+LOG_PATH = os.path.join(os.path.dirname(__file__), "../tools/replay-visualizer/example_before_injection.jsonl")
+
+
+@pytest.fixture(scope="module")
+def log():
+    with open(LOG_PATH, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_gzip_base64_round_trip(log):
+    payload = _gzip_base64(log)
+    assert json.loads(gzip.decompress(base64.b64decode(payload))) == log
+    assert payload == _gzip_base64(log)
+
+
+def test_split_kyoku(log):
+    chunks = _split_kyoku(log)
+    assert [ev for chunk in chunks for ev in chunk] == log
+    assert len(chunks) == sum(ev["type"] == "start_kyoku" for ev in log)
+    for chunk in chunks:
+        assert sum(ev["type"] == "start_kyoku" for ev in chunk) == 1
+
+
+def test_iter_jsonl_gz(log, tmp_path):
+    path = tmp_path / "log.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for ev in log:
+            f.write(json.dumps(ev) + "\n\n")
+    assert list(_iter_jsonl(str(path))) == log
+
+
+def test_show_does_not_inline_raw_log(log):
+    html = Replay(log).show().data
+    assert "start_kyoku" not in html
+
+
+def test_chunked_step_maps_to_kyoku(log):
+    replay = Replay(log, step=0, chunked=True)
+    chunks, labels, first_chunk, step = replay._payload(log)
+    assert len(chunks) == len(labels) == len(_split_kyoku(log))
+    assert (first_chunk, step) == (0, 0)
+
+    second = _split_kyoku(log)[1]
+    offset = sum(ev["type"] not in ("start_game", "end_game") for ev in _split_kyoku(log)[0])
+    replay.step = offset + 3
+    _, _, first_chunk, step = replay._payload(log)
+    assert (first_chunk, step) == (1, 3)
+    assert labels[1].startswith(second[0]["bakaze"])
+
+
+def _decode(payload):
+    return json.loads(gzip.decompress(base64.b64decode(payload)))
+
+
+def test_chunked_stream_matches_whole_log(log):
+    streamed, labels, _, _ = Replay(log, chunked=True)._payload(iter(log))
+    assert len(streamed) == len(labels) == len(_split_kyoku(log))
+    assert [ev for chunk in streamed for ev in _decode(chunk)] == MetadataInjector(log).process()
+
+
+def test_show_replaces_previous_viewer(log):
+    html = Replay(log, chunked=True).show().data
+    assert "viewer.destroy()" in html
+
+
+def test_viewer_bundle_defines_destroy():
+    bundle_b64, _ = _get_viewer_js_compressed_base64()
+    js = gzip.decompress(base64.b64decode(bundle_b64)).decode("utf-8")
+    # Viewer and ReplayController both detach their window listeners
+    assert js.count("destroy(){") == 2
+    assert 'removeEventListener("resize"' in js
+    assert 'removeEventListener("keydown"' in js
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from riichienv import extract_y47_samples
+
+from .helper import helper_write_log
+
+ACT_DISCARD = 0
+ACT_RON = 7
+
+
+def test_extract_npz(tmp_path):
+    log_path = tmp_path / "game.json.gz"
+    helper_write_log(log_path)
+
+    res = extract_y47_samples([str(log_path)], str(tmp_path / "out"), shard_size=16)
+    assert res["num_samples"] == 2
+    assert res["num_kyokus"] == 1
+    assert res["skipped_kyokus"] == 0
+    assert res["failed_files"] == []
+    assert len(res["shards"]) == 1
+
+    shard_path, n = res["shards"][0]
+    assert n == 2
+    with np.load(shard_path) as shard:
+        assert shard["token_main"].shape == (2, 256, 7)
+        assert shard["token_scalar"].dtype == np.float32
+        assert shard["legal_action_mask"].shape == (2, 128)
+        assert shard["player_id"].tolist() == [0, 1]
+
+        idx = shard["action_index"]
+        assert shard["legal_action_mask"][np.arange(2), idx].all()
+        kinds = shard["action_main"][np.arange(2), idx, 0]
+        assert kinds.tolist() == [ACT_DISCARD, ACT_RON]
+
+
+def test_extract_npy_sharding(tmp_path):
+    log_path = tmp_path / "game.json.gz"
+    helper_write_log(log_path)
+
+    res = extract_y47_samples([str(log_path)], str(tmp_path / "out"), shard_size=1, format="npy", num_workers=2)
+    assert [n for _, n in res["shards"]] == [1, 1]
+    first = np.load(f"{res['shards'][0][0]}/action_main.npy")
+    assert first.shape == (1, 128, 6)
+
+
+def test_extract_reports_bad_files(tmp_path):
+    missing = tmp_path / "missing.json.gz"
+    res = extract_y47_samples([str(missing)], str(tmp_path / "out"))
+    assert res["num_samples"] == 0
+    assert res["failed_files"][0][0] == str(missing)
+
+    with pytest.raises(ValueError):
+        extract_y47_samples([], str(tmp_path / "out"), format="csv")
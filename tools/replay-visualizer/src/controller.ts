@@ -5,18 +5,32 @@ export class ReplayController {
     autoPlayTimer: number | null = null;
     private logBtn: HTMLElement | null = null;
     private autoBtn: HTMLElement | null = null;
+    private keyTarget: HTMLElement | Window | null = null;
 
     constructor(viewer: Viewer) {
         this.viewer = viewer;
     }
 
+    private onKeyDown = (e: any) => {
+        if (e.key === 'ArrowRight') this.stepForward();
+        if (e.key === 'ArrowLeft') this.stepBackward();
+        if (e.key === 'ArrowUp') this.prevTurn();
+        if (e.key === 'ArrowDown') this.nextTurn();
+    };
+
     setupKeyboardControls(target: HTMLElement | Window) {
-        target.addEventListener('keydown', (e: any) => {
-            if (e.key === 'ArrowRight') this.stepForward();
-            if (e.key === 'ArrowLeft') this.stepBackward();
-            if (e.key === 'ArrowUp') this.prevTurn();
-            if (e.key === 'ArrowDown') this.nextTurn();
-        });
+        this.keyTarget = target;
+        target.addEventListener('keydown', this.onKeyDown);
+    }
+
+    // Removes the keyboard listener and stops auto play; the wheel listener
+    // goes away with the viewer's DOM.
+    destroy() {
+        this.stopAutoPlay();
+        if (this.keyTarget) {
+            this.keyTarget.removeEventListener('keydown', this.onKeyDown);
+            this.keyTarget = null;
+        }
     }
 
     setupWheelControls(target: HTMLElement) {
@@ -19,6 +19,9 @@ export class Viewer {
 
     debugPanel!: HTMLElement;
 
+    private resizeObserver: ResizeObserver | null = null;
+    private onWindowResize: (() => void) | null = null;
+
     constructor(containerId: string, log: MjaiEvent[], initialStep?: number, perspective?: number, freeze: boolean = false) {
         this.isFrozen = freeze;
         const el = document.getElementById(containerId);
@@ -224,7 +227,7 @@ export class Viewer {
         // Resize Logic to scale the entire content (Board + Sidebar)
         // Resize Logic to scale the entire content (Board + Sidebar)
         // We use ResizeObserver on the container to detect size changes of the parent environment (e.g. Jupyter cell)
-        const resizeObserver = new ResizeObserver((entries) => {
+        this.resizeObserver = new ResizeObserver((entries) => {
             for (const entry of entries) {
                 // The entry.contentRect gives the size of the container.
                 // However, since we adjust the container size ourselves (in older logic),
@@ -261,7 +264,7 @@ export class Viewer {
             }
         });
 
-        resizeObserver.observe(this.container);
+        this.resizeObserver.observe(this.container);
 
         // Also keep window resize listener as fallback or for height updates?
         // ResizeObserver on container usually covers window resizes that affect container width.
@@ -270,7 +273,7 @@ export class Viewer {
         // Or just observe document.body?
         // Let's stick to observing container + window resize.
 
-        window.addEventListener('resize', () => {
+        this.onWindowResize = () => {
             // Force check
             // But ResizeObserver loop is separate.
             // We can just rely on ResizeObserver if width changes.
@@ -285,7 +288,8 @@ export class Viewer {
             contentWrapper.style.transform = `scale(${scale})`;
             scaleWrapper.style.width = `${Math.floor(baseW * scale)}px`;
             scaleWrapper.style.height = `${Math.floor(baseH * scale)}px`;
-        });
+        };
+        window.addEventListener('resize', this.onWindowResize);
 
         // Wire up buttons - Moved to creation block to handle freeze safely and avoid ID collisions.
 
@@ -391,6 +395,20 @@ export class Viewer {
         this.container.appendChild(overlay);
     }
 
+    // Detaches the listeners registered outside the container, so another
+    // viewer can take over the same element.
+    destroy() {
+        if (this.controller) this.controller.destroy();
+        if (this.resizeObserver) {
+            this.resizeObserver.disconnect();
+            this.resizeObserver = null;
+        }
+        if (this.onWindowResize) {
+            window.removeEventListener('resize', this.onWindowResize);
+            this.onWindowResize = null;
+        }
+    }
+
     update() {
         if (!this.gameState || !this.renderer) return;
         const state = this.gameState.getState();